@@ -13,6 +13,11 @@ import asyncio
 from dotenv import load_dotenv
 
 from ii_agent.llm.message_history import MessageHistory
+from ii_agent.tools.output_store import TOOL_OUTPUTS_DIR, ToolOutputStore
+from ii_agent.core.storage.local import LocalFileStore
+from ii_agent.llm.rate_limiter import RateLimits, get_rate_limiter_registry
+from ii_agent.tools.result_cache import get_tool_result_cache
+from ii_agent.llm.context_manager import create_context_manager
 
 load_dotenv()
 
@@ -29,7 +34,6 @@ from ii_agent.agents.function_call import FunctionCallAgent
 from ii_agent.agents.reviewer import ReviewerAgent
 from ii_agent.utils import WorkspaceManager
 from ii_agent.llm import get_client
-from ii_agent.llm.context_manager.llm_summarizing import LLMSummarizingContextManager
 from ii_agent.llm.token_counter import TokenCounter
 from ii_agent.db.manager import Sessions
 
@@ -91,7 +95,18 @@ async def async_main():
             f"Agent CLI started with session {session_id}. Waiting for user input. Press Ctrl+C to exit. Type 'exit' or 'quit' to end the session."
         )
 
+    # Reuse the results of idempotent tools across sessions
+    if args.tool_cache_path:
+        get_tool_result_cache().attach_disk(args.tool_cache_path)
+
     # Initialize LLM client
+    get_rate_limiter_registry().configure(
+        RateLimits(
+            requests_per_minute=args.llm_rpm,
+            input_tokens_per_minute=args.llm_input_tpm,
+            output_tokens_per_minute=args.llm_output_tpm,
+        )
+    )
     client_kwargs = {
         "model_name": args.model_name,
     }
@@ -103,7 +118,16 @@ async def async_main():
         client_kwargs["azure_model"] = args.azure_model
         client_kwargs["cot_model"] = args.cot_model
 
-    client = get_client(args.llm_client, **client_kwargs)
+    if args.replay_cassette:
+        client = get_client(
+            "replay", cassette_path=args.replay_cassette, latency=args.replay_latency
+        )
+    else:
+        client = get_client(args.llm_client, **client_kwargs)
+        if args.record_cassette:
+            client = get_client(
+                "replay", cassette_path=args.record_cassette, mode="record", client=client
+            )
 
     # Initialize workspace manager with the session-specific workspace
     workspace_manager = WorkspaceManager(
@@ -111,14 +135,20 @@ async def async_main():
     )
 
     # Initialize token counter
-    token_counter = TokenCounter()
+    token_counter = TokenCounter.for_model(
+        args.model_name, dict(args.token_calibration)
+    )
 
     # Create context manager based on argument
-    context_manager = LLMSummarizingContextManager(
+    context_manager = create_context_manager(
+        args.context_strategy,
         client=client,
         token_counter=token_counter,
         logger=logger_for_agent_logs,
         token_budget=TOKEN_BUDGET,
+        presummarize_threshold=args.presummarize_threshold,
+        summary_chunk_tokens=args.summary_chunk_tokens,
+        summary_fan_out=args.summary_fan_out,
     )
     init_history = MessageHistory(context_manager)
 
@@ -149,6 +179,12 @@ async def async_main():
         max_output_tokens_per_turn=MAX_OUTPUT_TOKENS_PER_TURN,
         max_turns=MAX_TURNS,
         session_id=session_id,  # Pass the session_id from database manager
+        parallel_tool_calls=args.parallel_tool_calls,
+        output_store=(
+            ToolOutputStore(LocalFileStore(str(workspace_manager.root / TOOL_OUTPUTS_DIR)))
+            if args.offload_tool_outputs
+            else None
+        ),
     )
 
 
@@ -266,6 +302,9 @@ Please review this feedback and implement the suggested improvements to better c
         message_task.cancel()
         if reviewer_message_task:
             reviewer_message_task.cancel()
+        # Kills the shells and background jobs of the tools, which the
+        # reviewer shares
+        agent.tool_manager.close()
 
     console.print("[bold]Goodbye![/bold]")
 
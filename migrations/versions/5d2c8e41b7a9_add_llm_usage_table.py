@@ -0,0 +1,44 @@
+"""Add llm_usage table
+
+Revision ID: 5d2c8e41b7a9
+Revises: a89eabebd4fa
+Create Date: 2026-10-17 10:12:08.351742
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2c8e41b7a9'
+down_revision: Union[str, None] = 'a89eabebd4fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('llm_usage',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('session_id', sa.String(length=36), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('caller', sa.String(), nullable=False),
+    sa.Column('model_name', sa.String(), nullable=False),
+    sa.Column('turn', sa.Integer(), nullable=False),
+    sa.Column('input_tokens', sa.Integer(), nullable=True),
+    sa.Column('output_tokens', sa.Integer(), nullable=True),
+    sa.Column('cache_creation_input_tokens', sa.Integer(), nullable=True),
+    sa.Column('cache_read_input_tokens', sa.Integer(), nullable=True),
+    sa.Column('latency', sa.Float(), nullable=True),
+    sa.Column('endpoint', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_llm_usage_session_id'), 'llm_usage', ['session_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_llm_usage_session_id'), table_name='llm_usage')
+    op.drop_table('llm_usage')
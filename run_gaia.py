@@ -53,7 +53,9 @@ from ii_agent.tools.visualizer import DisplayImageTool
 from ii_agent.tools.web_search_tool import WebSearchTool
 from ii_agent.utils import WorkspaceManager
 from ii_agent.llm import get_client
-from ii_agent.llm.context_manager.llm_summarizing import LLMSummarizingContextManager
+from ii_agent.llm.rate_limiter import RateLimits, get_rate_limiter_registry
+from ii_agent.tools.result_cache import get_tool_result_cache
+from ii_agent.llm.context_manager import create_context_manager
 from ii_agent.llm.token_counter import TokenCounter
 from ii_agent.utils.constants import DEFAULT_MODEL, TOKEN_BUDGET, UPLOAD_FOLDER_NAME
 from utils import parse_common_args
@@ -186,6 +188,7 @@ async def answer_single_question(
     client,
     context_manager,
     container_workspace: bool,
+    parallel_tool_calls: bool = False,
 ) -> None:
     """Process a single GAIA question using the agent."""
     # Create workspace using task_id
@@ -312,6 +315,7 @@ async def answer_single_question(
         max_turns=200,
         session_id=session_id,  # Pass the session_id from database manager
         interactive_mode=False,  # Run until the task is completed
+        parallel_tool_calls=parallel_tool_calls,
     )
 
     # Create background task for message processing
@@ -356,6 +360,7 @@ Run verification steps if that's needed, you must make sure you find the correct
         raised_exception = True
     finally:
         # Cleanup tasks
+        agent.tool_manager.close()
         message_task.cancel()
         try:
             # Wait for the task to be cancelled and process remaining messages
@@ -404,23 +409,50 @@ def main():
     if not args.minimize_stdout_logs:
         logger.addHandler(logging.StreamHandler())
 
+    # Reuse the results of idempotent tools across tasks and runs
+    if args.tool_cache_path:
+        get_tool_result_cache().attach_disk(args.tool_cache_path)
+
     # Initialize LLM client
-    client = get_client(
-        "anthropic-direct",
-        model_name=DEFAULT_MODEL,
-        use_caching=False,
-        project_id=args.project_id,
-        region=args.region,
-        thinking_tokens=0,
+    get_rate_limiter_registry().configure(
+        RateLimits(
+            requests_per_minute=args.llm_rpm,
+            input_tokens_per_minute=args.llm_input_tpm,
+            output_tokens_per_minute=args.llm_output_tpm,
+        )
     )
+    if args.replay_cassette:
+        client = get_client(
+            "replay", cassette_path=args.replay_cassette, latency=args.replay_latency
+        )
+    else:
+        client = get_client(
+            "anthropic-direct",
+            model_name=DEFAULT_MODEL,
+            use_caching=False,
+            project_id=args.project_id,
+            region=args.region,
+            thinking_tokens=0,
+        )
+        if args.record_cassette:
+            client = get_client(
+                "replay",
+                cassette_path=args.record_cassette,
+                mode="record",
+                client=client,
+            )
 
     # Initialize token counter and context manager
-    token_counter = TokenCounter()
-    context_manager = LLMSummarizingContextManager(
+    token_counter = TokenCounter.for_model(DEFAULT_MODEL, dict(args.token_calibration))
+    context_manager = create_context_manager(
+        args.context_strategy,
         client=client,
         token_counter=token_counter,
         logger=logger,
         token_budget=TOKEN_BUDGET,
+        presummarize_threshold=args.presummarize_threshold,
+        summary_chunk_tokens=args.summary_chunk_tokens,
+        summary_fan_out=args.summary_fan_out,
     )
 
     # Load dataset and get tasks to run
@@ -469,6 +501,7 @@ def main():
                     client,
                     context_manager,
                     args.use_container_workspace,
+                    args.parallel_tool_calls,
                 )
 
         # Create tasks with semaphore
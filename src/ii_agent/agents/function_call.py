@@ -2,18 +2,24 @@ import asyncio
 import logging
 from typing import Any, Optional
 import uuid
-from functools import partial
 
 from typing import List
 from fastapi import WebSocket
 from ii_agent.agents.base import BaseAgent
-from ii_agent.core.event import EventType, RealtimeEvent
-from ii_agent.llm.base import LLMClient, TextResult, ToolCallParameters
+from ii_agent.core.event import EventType, RealtimeEvent, STREAMING_EVENT_TYPES
+from ii_agent.llm.base import (
+    LLMClient,
+    LLMStreamEvent,
+    TextResult,
+    ToolCallParameters,
+)
 from ii_agent.llm.message_history import MessageHistory
+from ii_agent.llm.prompt_cache import PromptCacheUsage
 from ii_agent.tools.base import ToolImplOutput, LLMTool
 from ii_agent.tools.utils import encode_image
 from ii_agent.db.manager import Events
 from ii_agent.tools import AgentToolManager
+from ii_agent.tools.output_store import ToolOutputStore
 from ii_agent.utils.constants import COMPLETE_MESSAGE
 from ii_agent.utils.workspace_manager import WorkspaceManager
 
@@ -61,6 +67,9 @@ try breaking down the task into smaller steps. After call this tool to update or
         websocket: Optional[WebSocket] = None,
         session_id: Optional[uuid.UUID] = None,
         interactive_mode: bool = True,
+        parallel_tool_calls: bool = False,
+        stream_response: bool = False,
+        output_store: Optional[ToolOutputStore] = None,
     ):
         """Initialize the agent.
 
@@ -76,6 +85,12 @@ try breaking down the task into smaller steps. After call this tool to update or
             session_id: UUID of the session this agent belongs to
             interactive_mode: Whether to use interactive mode
             init_history: Optional initial history to use
+            parallel_tool_calls: Whether to execute all tool calls of a turn,
+                running independent calls concurrently
+            stream_response: Whether to stream model output, sending partial
+                text, thinking and tool input events while a turn is generated
+            output_store: Optional store for large tool outputs, which are then
+                kept out of the history except for a preview and a handle
         """
         super().__init__()
         self.workspace_manager = workspace_manager
@@ -85,11 +100,15 @@ try breaking down the task into smaller steps. After call this tool to update or
             tools=tools,
             logger_for_agent_logs=logger_for_agent_logs,
             interactive_mode=interactive_mode,
+            output_store=output_store,
         )
 
         self.logger_for_agent_logs = logger_for_agent_logs
         self.max_output_tokens = max_output_tokens_per_turn
         self.max_turns = max_turns
+        self.parallel_tool_calls = parallel_tool_calls
+        self.stream_response = stream_response
+        self.cache_usage = PromptCacheUsage()
 
         self.interrupted = False
         self.history = init_history
@@ -105,9 +124,11 @@ try breaking down the task into smaller steps. After call this tool to update or
                 try:
                     message: RealtimeEvent = await self.message_queue.get()
 
-                    # Save all events to database if we have a session
+                    # Save all events to database if we have a session;
+                    # partial streaming events are only sent to the websocket
                     if self.session_id is not None:
-                        Events.save_event(self.session_id, message)
+                        if message.type not in STREAMING_EVENT_TYPES:
+                            Events.save_event(self.session_id, message)
                     else:
                         self.logger_for_agent_logs.info(
                             f"No session ID, skipping event: {message}"
@@ -141,14 +162,43 @@ try breaking down the task into smaller steps. After call this tool to update or
             self.logger_for_agent_logs.error(f"Error in message processor: {str(e)}")
 
     def _validate_tool_parameters(self):
-        """Validate tool parameters and check for duplicates."""
-        tool_params = [tool.get_tool_param() for tool in self.tool_manager.get_tools()]
-        tool_names = [param.name for param in tool_params]
-        sorted_names = sorted(tool_names)
-        for i in range(len(sorted_names) - 1):
-            if sorted_names[i] == sorted_names[i + 1]:
-                raise ValueError(f"Tool {sorted_names[i]} is duplicated")
-        return tool_params
+        """Return the tool parameters, checked for duplicates by the registry."""
+        return self.tool_manager.get_tool_params()
+
+    async def _generate_streaming(self, **kwargs):
+        """Consume a streamed generation.
+
+        Partial output is forwarded to the message queue as it arrives. Returns
+        the same (response, metadata) pair as ``LLMClient.agenerate``.
+        """
+        async for event in self.client.agenerate_stream(**kwargs):
+            if event.type == "complete":
+                return event.response, event.metadata
+            self.message_queue.put_nowait(self._stream_event_to_realtime(event))
+        raise RuntimeError("LLM stream ended without a complete response")
+
+    @staticmethod
+    def _stream_event_to_realtime(event: LLMStreamEvent) -> RealtimeEvent:
+        """Convert a streamed delta into a partial realtime event."""
+        if event.type == "thinking":
+            return RealtimeEvent(
+                type=EventType.AGENT_THINKING_DELTA,
+                content={"index": event.index, "text": event.delta},
+            )
+        if event.type == "tool_use":
+            return RealtimeEvent(
+                type=EventType.TOOL_CALL_DELTA,
+                content={
+                    "index": event.index,
+                    "tool_call_id": event.tool_call_id,
+                    "tool_name": event.tool_name,
+                    "partial_input": event.delta,
+                },
+            )
+        return RealtimeEvent(
+            type=EventType.AGENT_RESPONSE_DELTA,
+            content={"index": event.index, "text": event.delta},
+        )
 
     def start_message_processing(self):
         """Start processing the message queue."""
@@ -199,7 +249,7 @@ try breaking down the task into smaller steps. After call this tool to update or
 
         remaining_turns = self.max_turns
         while remaining_turns > 0:
-            self.history.truncate()
+            await self.history.truncate_async()
             remaining_turns -= 1
 
             delimiter = "-" * 45 + " NEW TURN " + "-" * 45
@@ -219,23 +269,34 @@ try breaking down the task into smaller steps. After call this tool to update or
             self.logger_for_agent_logs.info(
                 f"(Current token count: {self.history.count_tokens()})\n"
             )
-            loop = asyncio.get_event_loop()
-            model_response, _ = await loop.run_in_executor(
-                None,
-                partial(
-                    self.client.generate,
-                    messages=self.history.get_messages_for_llm(),
-                    max_tokens=self.max_output_tokens,
-                    tools=all_tool_params,
-                    system_prompt=self.system_prompt,
-                ),
+            generate = (
+                self._generate_streaming
+                if self.stream_response
+                else self.client.agenerate
             )
+            model_response, metadata = await generate(
+                messages=self.history.get_messages_for_llm(),
+                max_tokens=self.max_output_tokens,
+                tools=all_tool_params,
+                system_prompt=self.system_prompt,
+            )
+            turn_cache_usage = self.cache_usage.record(metadata)
+            if turn_cache_usage is not None:
+                self.logger_for_agent_logs.info(
+                    f"Prompt cache: {turn_cache_usage['cache_read_input_tokens']} tokens read, "
+                    f"{turn_cache_usage['cache_creation_input_tokens']} written, "
+                    f"{turn_cache_usage['input_tokens']} uncached "
+                    f"(turn hit rate {PromptCacheUsage.hit_rate_of(turn_cache_usage):.0%}, "
+                    f"session {self.cache_usage.hit_rate:.0%})"
+                )
 
             if len(model_response) == 0:
                 model_response = [TextResult(text=COMPLETE_MESSAGE)]
 
             # Add the raw response to the canonical history
-            self.history.add_assistant_turn(model_response)
+            self.history.add_assistant_turn(
+                model_response, parallel_tool_calls=self.parallel_tool_calls
+            )
 
             # Handle tool calls
             pending_tool_calls = self.history.get_pending_tool_calls()
@@ -254,23 +315,17 @@ try breaking down the task into smaller steps. After call this tool to update or
                     tool_result_message="Task completed",
                 )
 
-            if len(pending_tool_calls) > 1:
-                raise ValueError("Only one tool call per turn is supported")
-
-            assert len(pending_tool_calls) == 1
-
-            tool_call = pending_tool_calls[0]
-
-            self.message_queue.put_nowait(
-                RealtimeEvent(
-                    type=EventType.TOOL_CALL,
-                    content={
-                        "tool_call_id": tool_call.tool_call_id,
-                        "tool_name": tool_call.tool_name,
-                        "tool_input": tool_call.tool_input,
-                    },
+            for tool_call in pending_tool_calls:
+                self.message_queue.put_nowait(
+                    RealtimeEvent(
+                        type=EventType.TOOL_CALL,
+                        content={
+                            "tool_call_id": tool_call.tool_call_id,
+                            "tool_name": tool_call.tool_name,
+                            "tool_input": tool_call.tool_input,
+                        },
+                    )
                 )
-            )
 
             text_results = [
                 item for item in model_response if isinstance(item, TextResult)
@@ -284,15 +339,28 @@ try breaking down the task into smaller steps. After call this tool to update or
             # Handle tool call by the agent
             if self.interrupted:
                 # Handle interruption during tool execution
-                self.add_tool_call_result(tool_call, TOOL_RESULT_INTERRUPT_MESSAGE)
+                self.add_tool_call_results(
+                    pending_tool_calls,
+                    [TOOL_RESULT_INTERRUPT_MESSAGE] * len(pending_tool_calls),
+                )
                 self.add_fake_assistant_turn(TOOL_CALL_INTERRUPT_FAKE_MODEL_RSP)
                 return ToolImplOutput(
                     tool_output=TOOL_RESULT_INTERRUPT_MESSAGE,
                     tool_result_message=TOOL_RESULT_INTERRUPT_MESSAGE,
                 )
-            tool_result = await self.tool_manager.run_tool(tool_call, self.history)
 
-            self.add_tool_call_result(tool_call, tool_result)
+            if len(pending_tool_calls) == 1:
+                tool_results = [
+                    await self.tool_manager.run_tool(
+                        pending_tool_calls[0], self.history
+                    )
+                ]
+            else:
+                tool_results = await self.tool_manager.run_tools_parallel(
+                    pending_tool_calls, self.history
+                )
+
+            self.add_tool_call_results(pending_tool_calls, tool_results)
             if self.tool_manager.should_stop():
                 # Add a fake model response, so the next turn is the user's
                 # turn in case they want to resume
@@ -382,18 +450,26 @@ try breaking down the task into smaller steps. After call this tool to update or
 
     def add_tool_call_result(self, tool_call: ToolCallParameters, tool_result: str):
         """Add a tool call result to the history and send it to the message queue."""
-        self.history.add_tool_call_result(tool_call, tool_result)
+        self.add_tool_call_results([tool_call], [tool_result])
 
-        self.message_queue.put_nowait(
-            RealtimeEvent(
-                type=EventType.TOOL_RESULT,
-                content={
-                    "tool_call_id": tool_call.tool_call_id,
-                    "tool_name": tool_call.tool_name,
-                    "result": tool_result,
-                },
+    def add_tool_call_results(
+        self, tool_calls: list[ToolCallParameters], tool_results: list[str]
+    ):
+        """Add the results of a turn's tool calls to the history as a single turn
+        and send each of them to the message queue."""
+        self.history.add_tool_call_results(tool_calls, tool_results)
+
+        for tool_call, tool_result in zip(tool_calls, tool_results):
+            self.message_queue.put_nowait(
+                RealtimeEvent(
+                    type=EventType.TOOL_RESULT,
+                    content={
+                        "tool_call_id": tool_call.tool_call_id,
+                        "tool_name": tool_call.tool_name,
+                        "result": tool_result,
+                    },
+                )
             )
-        )
 
     def add_fake_assistant_turn(self, text: str):
         """Add a fake assistant turn to the history and send it to the message queue."""
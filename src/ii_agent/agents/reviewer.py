@@ -85,9 +85,6 @@ This agent conducts thorough reviews with emphasis on:
 
         self.message_queue = message_queue
         self.websocket = websocket
-        
-        # Cache for tool parameters to avoid repeated validation
-        self._cached_tool_params = None
 
     async def _process_messages(self):
         pass
@@ -100,9 +97,7 @@ This agent conducts thorough reviews with emphasis on:
         """Centralized LLM response generation with timing metrics."""
         start_time = time.time()
         
-        # Use asyncio.to_thread for cleaner async execution
-        model_response, metadata = await asyncio.to_thread(
-            self.client.generate,
+        model_response, metadata = await self.client.agenerate(
             messages=messages,
             max_tokens=self.max_output_tokens,
             tools=tools,
@@ -115,19 +110,8 @@ This agent conducts thorough reviews with emphasis on:
         return model_response, metadata
 
     def _validate_tool_parameters(self):
-        """Validate tool parameters and check for duplicates with caching."""
-        if self._cached_tool_params is not None:
-            return self._cached_tool_params
-            
-        tool_params = [tool.get_tool_param() for tool in self.tool_manager.get_tools()]
-        tool_names = [param.name for param in tool_params]
-        sorted_names = sorted(tool_names)
-        for i in range(len(sorted_names) - 1):
-            if sorted_names[i] == sorted_names[i + 1]:
-                raise ValueError(f"Tool {sorted_names[i]} is duplicated")
-        
-        self._cached_tool_params = tool_params
-        return tool_params
+        """Return the tool parameters, checked for duplicates by the registry."""
+        return self.tool_manager.get_tool_params()
 
     def start_message_processing(self):
         """Start processing the message queue."""
@@ -179,7 +163,7 @@ Now your turn to review the general agent's work.
                 )
 
             current_messages = self.history.get_messages_for_llm()
-            current_tok_count = self.context_manager.count_tokens(current_messages)
+            current_tok_count = self.history.count_tokens()
             self.logger_for_agent_logs.info(
                 f"(Current token count: {current_tok_count})\n"
             )
@@ -192,7 +176,9 @@ Now your turn to review the general agent's work.
                 )
 
             truncated_messages_for_llm = (
-                self.context_manager.apply_truncation_if_needed(current_messages)
+                await self.context_manager.apply_truncation_if_needed_async(
+                    current_messages, token_count=current_tok_count
+                )
             )
 
             self.history.set_message_list(truncated_messages_for_llm)
@@ -241,7 +227,7 @@ Now your turn to review the general agent's work.
                     self.history.add_user_prompt(summarize_review)
                     current_messages = self.history.get_messages_for_llm()
                     truncated_messages_for_llm = (
-                        self.context_manager.apply_truncation_if_needed(current_messages)
+                        await self.context_manager.apply_truncation_if_needed_async(current_messages)
                     )
                     self.history.set_message_list(truncated_messages_for_llm)
                     
@@ -360,5 +346,4 @@ Now your turn to review the general agent's work.
     def clear(self):
         """Clear the dialog and reset interruption state."""
         self.history.clear()
-        self.interrupted = False
-        self._cached_tool_params = None  # Clear cached tool parameters
\ No newline at end of file
+        self.interrupted = False
\ No newline at end of file
@@ -9,7 +9,11 @@ class EventType(str, enum.Enum):
     WORKSPACE_INFO = "workspace_info"
     PROCESSING = "processing"
     AGENT_THINKING = "agent_thinking"
+    AGENT_THINKING_DELTA = "agent_thinking_delta"
+    AGENT_RESPONSE_DELTA = "agent_response_delta"
+    TOOL_CALL_DELTA = "tool_call_delta"
     TOOL_CALL = "tool_call"
+    TOOL_OUTPUT_DELTA = "tool_output_delta"
     TOOL_RESULT = "tool_result"
     AGENT_RESPONSE = "agent_response"
     AGENT_RESPONSE_INTERRUPTED = "agent_response_interrupted"
@@ -27,3 +31,16 @@ class EventType(str, enum.Enum):
 class RealtimeEvent(BaseModel):
     type: EventType
     content: dict[str, Any]
+
+
+# Partial events streamed while the model generates or a tool runs. They are
+# only forwarded to the client; the complete events that follow them are what
+# gets persisted.
+STREAMING_EVENT_TYPES = frozenset(
+    {
+        EventType.AGENT_THINKING_DELTA,
+        EventType.AGENT_RESPONSE_DELTA,
+        EventType.TOOL_CALL_DELTA,
+        EventType.TOOL_OUTPUT_DELTA,
+    }
+)
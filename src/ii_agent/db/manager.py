@@ -2,10 +2,11 @@ from contextlib import contextmanager
 from typing import Optional, Generator, List
 import uuid
 from pathlib import Path
-from sqlalchemy import create_engine, asc, text
+from sqlalchemy import create_engine, asc, desc, func, text
 from sqlalchemy.orm import sessionmaker, Session as DBSession
-from ii_agent.db.models import Base, Session, Event
+from ii_agent.db.models import Base, Session, Event, LLMUsage
 from ii_agent.core.event import EventType, RealtimeEvent
+from ii_agent.llm.usage import UsageRecord
 
 
 # Database setup
@@ -268,6 +269,102 @@ class EventsTable:
             return event_list
 
 
+class UsageTable:
+    """Table class for LLM usage operations following Open WebUI pattern."""
+
+    # Calls listed individually in the usage summary, most tokens first
+    TOP_CALLS = 10
+
+    def save_usage(self, records: List[UsageRecord]) -> None:
+        """Save a batch of usage records in one transaction.
+
+        Args:
+            records: The usage records to save
+        """
+        with get_db() as db:
+            db.bulk_insert_mappings(LLMUsage, [record.to_dict() for record in records])
+
+    @staticmethod
+    def _aggregates(query, group: Optional[str] = None) -> List[dict]:
+        return [
+            {
+                **({group: getattr(row, group)} if group else {}),
+                "calls": row.calls,
+                "input_tokens": row.input_tokens or 0,
+                "output_tokens": row.output_tokens or 0,
+                "cache_creation_input_tokens": row.cache_creation_input_tokens or 0,
+                "cache_read_input_tokens": row.cache_read_input_tokens or 0,
+                "total_latency": row.total_latency or 0.0,
+                "average_latency": row.average_latency or 0.0,
+                "max_latency": row.max_latency or 0.0,
+            }
+            for row in query
+        ]
+
+    def get_session_usage(self, session_id: str) -> dict:
+        """Get the aggregated LLM usage of a session.
+
+        Args:
+            session_id: The session identifier to aggregate usage for
+
+        Returns:
+            A dictionary with the usage totals of the session, the totals per
+            caller and per model, and the calls that used the most tokens
+        """
+        columns = [
+            func.count(LLMUsage.id).label("calls"),
+            func.sum(LLMUsage.input_tokens).label("input_tokens"),
+            func.sum(LLMUsage.output_tokens).label("output_tokens"),
+            func.sum(LLMUsage.cache_creation_input_tokens).label(
+                "cache_creation_input_tokens"
+            ),
+            func.sum(LLMUsage.cache_read_input_tokens).label("cache_read_input_tokens"),
+            func.sum(LLMUsage.latency).label("total_latency"),
+            func.avg(LLMUsage.latency).label("average_latency"),
+            func.max(LLMUsage.latency).label("max_latency"),
+        ]
+        with get_db() as db:
+            usage = db.query(*columns).filter(LLMUsage.session_id == session_id)
+            totals = self._aggregates(usage)[0]
+            by_caller = self._aggregates(
+                usage.add_columns(LLMUsage.caller).group_by(LLMUsage.caller), "caller"
+            )
+            by_model = self._aggregates(
+                usage.add_columns(LLMUsage.model_name).group_by(LLMUsage.model_name),
+                "model_name",
+            )
+            top_calls = (
+                db.query(LLMUsage)
+                .filter(LLMUsage.session_id == session_id)
+                .order_by(desc(LLMUsage.input_tokens + LLMUsage.output_tokens))
+                .limit(self.TOP_CALLS)
+                .all()
+            )
+
+            return {
+                "session_id": session_id,
+                "totals": totals,
+                "by_caller": by_caller,
+                "by_model": by_model,
+                "top_calls": [
+                    {
+                        "timestamp": call.timestamp.isoformat(),
+                        "caller": call.caller,
+                        "model_name": call.model_name,
+                        "turn": call.turn,
+                        "input_tokens": call.input_tokens,
+                        "output_tokens": call.output_tokens,
+                        "cache_creation_input_tokens": call.cache_creation_input_tokens,
+                        "cache_read_input_tokens": call.cache_read_input_tokens,
+                        "latency": call.latency,
+                        "endpoint": call.endpoint,
+                    }
+                    for call in top_calls
+                ],
+            }
+
+
 # Create singleton instances following Open WebUI pattern
 Sessions = SessionsTable()
 Events = EventsTable()
+Usage = UsageTable()
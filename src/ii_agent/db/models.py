@@ -1,6 +1,6 @@
 from datetime import datetime
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, Float, ForeignKey, Integer
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.dialects.sqlite import JSON as SQLiteJSON
 from typing import Optional
@@ -72,6 +72,25 @@ class Event(Base):
         self.event_payload = event_payload
 
 
+class LLMUsage(Base):
+    """Database model for the token usage of one LLM call."""
+
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String(36), index=True, nullable=False)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+    caller = Column(String, nullable=False)
+    model_name = Column(String, nullable=False)
+    turn = Column(Integer, nullable=False)
+    input_tokens = Column(Integer, default=0)
+    output_tokens = Column(Integer, default=0)
+    cache_creation_input_tokens = Column(Integer, default=0)
+    cache_read_input_tokens = Column(Integer, default=0)
+    latency = Column(Float, default=0.0)
+    endpoint = Column(String, nullable=True)
+
+
 def init_db(engine):
     """Initialize the database by creating all tables."""
     Base.metadata.create_all(engine)
@@ -2,6 +2,8 @@ from ii_agent.llm.base import LLMClient
 from ii_agent.llm.openai import OpenAIDirectClient
 from ii_agent.llm.anthropic import AnthropicDirectClient
 from ii_agent.llm.gemini import GeminiDirectClient
+from ii_agent.llm.replay import ReplayLLMClient
+from ii_agent.llm.router import RouterLLMClient
 
 def get_client(client_name: str, **kwargs) -> LLMClient:
     """Get a client for a given client name."""
@@ -11,6 +13,10 @@ def get_client(client_name: str, **kwargs) -> LLMClient:
         return OpenAIDirectClient(**kwargs)
     elif client_name == "gemini-direct":
         return GeminiDirectClient(**kwargs)
+    elif client_name == "replay":
+        return ReplayLLMClient(**kwargs)
+    elif client_name == "router":
+        return RouterLLMClient(**kwargs)
     else:
         raise ValueError(f"Unknown client name: {client_name}")
 
@@ -20,5 +26,7 @@ __all__ = [
     "OpenAIDirectClient",
     "AnthropicDirectClient",
     "GeminiDirectClient",
+    "ReplayLLMClient",
+    "RouterLLMClient",
     "get_client",
 ]
@@ -1,9 +1,8 @@
 import os
 
-import random
-import time
-from typing import Any, Tuple, cast
+from typing import Any, AsyncIterator, Iterator, Tuple
 import anthropic
+import httpx
 from anthropic import (
     NOT_GIVEN as Anthropic_NOT_GIVEN,
 )
@@ -41,7 +40,9 @@ from anthropic.types.message_create_params import (
 
 from ii_agent.llm.base import (
     LLMClient,
+    LLMStreamEvent,
     AssistantContentBlock,
+    GeneralContentBlock,
     ToolParam,
     TextPrompt,
     ToolCall,
@@ -52,8 +53,80 @@ from ii_agent.llm.base import (
     recursively_remove_invoke_tag,
     ImageBlock,
 )
+from ii_agent.llm.conversion import BlockConverters, TurnConversionCache
+from ii_agent.llm.rate_limiter import get_rate_limiter_registry
+from ii_agent.llm.prompt_cache import CACHE_CONTROL, PromptCachePlanner
 from ii_agent.utils.constants import DEFAULT_MODEL
 
+RETRYABLE_ERRORS = (
+    AnthropicAPIConnectionError,
+    AnthropicInternalServerError,
+    AnthropicRateLimitError,
+    AnthropicOverloadedError,
+)
+
+
+def _convert_text(block: TextPrompt | TextResult) -> AnthropicTextBlock:
+    return AnthropicTextBlock(type="text", text=block.text)
+
+
+def _convert_image(block: ImageBlock) -> AnthropicImageBlockParam:
+    return AnthropicImageBlockParam(type="image", source=block.source)
+
+
+def _convert_tool_call(block: ToolCall) -> AnthropicToolUseBlock:
+    return AnthropicToolUseBlock(
+        type="tool_use",
+        id=block.tool_call_id,
+        name=block.tool_name,
+        input=block.tool_input,
+    )
+
+
+def _convert_tool_result(block: ToolFormattedResult) -> AnthropicToolResultBlockParam:
+    return AnthropicToolResultBlockParam(
+        type="tool_result",
+        tool_use_id=block.tool_call_id,
+        content=block.tool_output,
+    )
+
+
+def _keep_block(block: Any) -> Any:
+    return block
+
+
+BLOCK_CONVERTERS = BlockConverters(
+    {
+        TextPrompt: _convert_text,
+        ImageBlock: _convert_image,
+        TextResult: _convert_text,
+        ToolCall: _convert_tool_call,
+        ToolFormattedResult: _convert_tool_result,
+        AnthropicRedactedThinkingBlock: _keep_block,
+        AnthropicThinkingBlock: _keep_block,
+    }
+)
+
+
+def _convert_turn(message_list: list[GeneralContentBlock]) -> dict[str, Any]:
+    """Convert one turn of the history into an Anthropic message."""
+    role = "user" if isinstance(message_list[0], UserContentBlock) else "assistant"
+    return {
+        "role": role,
+        "content": [BLOCK_CONVERTERS.convert(message) for message in message_list],
+    }
+
+
+def _convert_tools(tools: list[ToolParam]) -> list[AnthropicToolParam]:
+    return [
+        AnthropicToolParam(
+            input_schema=tool.input_schema,
+            name=tool.name,
+            description=tool.description,
+        )
+        for tool in tools
+    ]
+
 
 class AnthropicDirectClient(LLMClient):
     """Use Anthropic models via first party API."""
@@ -61,13 +134,19 @@ class AnthropicDirectClient(LLMClient):
     def __init__(
         self,
         model_name=DEFAULT_MODEL,
-        max_retries=2,
+        max_retries=4,
         use_caching=True,
         thinking_tokens: int = 0,
         project_id: None | str = None,
         region: None | str = None,
+        http_client: httpx.Client | None = None,
+        async_http_client: httpx.AsyncClient | None = None,
     ):
-        """Initialize the Anthropic first party client."""
+        """Initialize the Anthropic first party client.
+
+        ``http_client`` and ``async_http_client`` let several clients share one
+        connection pool; by default each client opens its own.
+        """
         # Disable retries since we are handling retries ourselves.
         if (project_id is not None) and (region is not None):
             self.client = anthropic.AnthropicVertex(
@@ -75,11 +154,28 @@ class AnthropicDirectClient(LLMClient):
                 region=region,
                 timeout=60 * 5,
                 max_retries=1,
+                http_client=http_client,
+            )
+            self.async_client = anthropic.AsyncAnthropicVertex(
+                project_id=project_id,
+                region=region,
+                timeout=60 * 5,
+                max_retries=1,
+                http_client=async_http_client,
             )
         else:
             api_key = os.getenv("ANTHROPIC_API_KEY")
             self.client = anthropic.Anthropic(
-                api_key=api_key, max_retries=1, timeout=60 * 5
+                api_key=api_key,
+                max_retries=1,
+                timeout=60 * 5,
+                http_client=http_client,
+            )
+            self.async_client = anthropic.AsyncAnthropic(
+                api_key=api_key,
+                max_retries=1,
+                timeout=60 * 5,
+                http_client=async_http_client,
             )
             model_name = model_name.replace(
                 "@", "-"
@@ -92,8 +188,18 @@ class AnthropicDirectClient(LLMClient):
         else:
             self.headers = {"anthropic-beta": "prompt-caching-2024-07-31"}
         self.thinking_tokens = thinking_tokens
+        self.cache_planner = PromptCachePlanner()
+        # Each Vertex AI region has its own quota
+        self.rate_limiter = get_rate_limiter_registry().get(
+            "anthropic",
+            model_name,
+            region if project_id is not None and region is not None else "",
+        )
+        self.conversion_cache = TurnConversionCache()
+        # Agents send the same tool list every turn, so it is converted once
+        self.tool_definitions = TurnConversionCache(max_turns=64)
 
-    def generate(
+    def _build_request_params(
         self,
         messages: LLMMessages,
         max_tokens: int,
@@ -102,96 +208,21 @@ class AnthropicDirectClient(LLMClient):
         tools: list[ToolParam] = [],
         tool_choice: dict[str, str] | None = None,
         thinking_tokens: int | None = None,
-    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
-        """Generate responses.
-
-        Args:
-            messages: A list of messages.
-            max_tokens: The maximum number of tokens to generate.
-            system_prompt: A system prompt.
-            temperature: The temperature.
-            tools: A list of tools.
-            tool_choice: A tool choice.
-
-        Returns:
-            A generated response.
-        """
-
-        # Turn GeneralContentBlock into Anthropic message format
-        anthropic_messages = []
-        for idx, message_list in enumerate(messages):
-            role = (
-                "user" if isinstance(message_list[0], UserContentBlock) else "assistant"
-            )
-            message_content_list = []
-            for message in message_list:
-                # Check string type to avoid import issues particularly with reloads.
-                if str(type(message)) == str(TextPrompt):
-                    message = cast(TextPrompt, message)
-                    message_content = AnthropicTextBlock(
-                        type="text",
-                        text=message.text,
-                    )
-                elif str(type(message)) == str(ImageBlock):
-                    message = cast(ImageBlock, message)
-                    message_content = AnthropicImageBlockParam(
-                        type="image",
-                        source=message.source,
-                    )
-                elif str(type(message)) == str(TextResult):
-                    message = cast(TextResult, message)
-                    message_content = AnthropicTextBlock(
-                        type="text",
-                        text=message.text,
-                    )
-                elif str(type(message)) == str(ToolCall):
-                    message = cast(ToolCall, message)
-                    message_content = AnthropicToolUseBlock(
-                        type="tool_use",
-                        id=message.tool_call_id,
-                        name=message.tool_name,
-                        input=message.tool_input,
-                    )
-                elif str(type(message)) == str(ToolFormattedResult):
-                    message = cast(ToolFormattedResult, message)
-                    message_content = AnthropicToolResultBlockParam(
-                        type="tool_result",
-                        tool_use_id=message.tool_call_id,
-                        content=message.tool_output,
-                    )
-                elif str(type(message)) == str(AnthropicRedactedThinkingBlock):
-                    message = cast(AnthropicRedactedThinkingBlock, message)
-                    message_content = message
-                elif str(type(message)) == str(AnthropicThinkingBlock):
-                    message = cast(AnthropicThinkingBlock, message)
-                    message_content = message
-                else:
-                    print(
-                        f"Unknown message type: {type(message)}, expected one of {str(TextPrompt)}, {str(TextResult)}, {str(ToolCall)}, {str(ToolFormattedResult)}"
-                    )
-                    raise ValueError(
-                        f"Unknown message type: {type(message)}, expected one of {str(TextPrompt)}, {str(TextResult)}, {str(ToolCall)}, {str(ToolFormattedResult)}"
-                    )
-                message_content_list.append(message_content)
+    ) -> dict[str, Any]:
+        """Build the keyword arguments of an Anthropic messages request."""
 
-            # Anthropic supports up to 4 cache breakpoints, so we put them on the last 4 messages.
-            if self.use_caching and idx >= len(messages) - 4:
-                if isinstance(message_content_list[-1], dict):
-                    message_content_list[-1]["cache_control"] = {"type": "ephemeral"}
-                else:
-                    message_content_list[-1].cache_control = {"type": "ephemeral"}
-
-            anthropic_messages.append(
-                {
-                    "role": role,
-                    "content": message_content_list,
-                }
-            )
+        # Turn GeneralContentBlock into Anthropic message format, reusing
+        # the conversions of turns sent in earlier requests
+        anthropic_messages = [
+            self.conversion_cache.convert(message_list, _convert_turn)
+            for message_list in messages
+        ]
 
         if self.use_caching:
             extra_headers = self.headers
         else:
             extra_headers = None
+        system_param = system_prompt or Anthropic_NOT_GIVEN
 
         # Turn tool_choice into Anthropic tool_choice format
         if tool_choice is None:
@@ -210,16 +241,30 @@ class AnthropicDirectClient(LLMClient):
         if len(tools) == 0:
             tool_params = Anthropic_NOT_GIVEN
         else:
-            tool_params = [
-                AnthropicToolParam(
-                    input_schema=tool.input_schema,
-                    name=tool.name,
-                    description=tool.description,
-                )
-                for tool in tools
-            ]
+            tool_params = self.tool_definitions.convert(tools, _convert_tools)
 
-        response = None
+        if self.use_caching:
+            plan = self.cache_planner.plan(
+                messages, has_system_prompt=bool(system_prompt), has_tools=bool(tools)
+            )
+            if plan.cache_system:
+                system_param = [
+                    {"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}
+                ]
+            if plan.cache_tools:
+                # The converted tools are shared, so the breakpoint goes on a copy
+                tool_params = tool_params[:-1] + [
+                    {**tool_params[-1], "cache_control": CACHE_CONTROL}
+                ]
+            for idx in plan.message_indices:
+                # Converted turns are shared with later requests, so the
+                # breakpoint goes on a copy
+                message = anthropic_messages[idx]
+                content = message["content"]
+                anthropic_messages[idx] = {
+                    **message,
+                    "content": [*content[:-1], self._with_cache_control(content[-1])],
+                }
 
         if thinking_tokens is None:
             thinking_tokens = self.thinking_tokens
@@ -231,39 +276,35 @@ class AnthropicDirectClient(LLMClient):
         else:
             extra_body = None
 
-        for retry in range(self.max_retries):
-            try:
-                response = self.client.messages.create(  # type: ignore
-                    max_tokens=max_tokens,
-                    messages=anthropic_messages,
-                    model=self.model_name,
-                    temperature=temperature,
-                    system=system_prompt or Anthropic_NOT_GIVEN,
-                    tool_choice=tool_choice_param,  # type: ignore
-                    tools=tool_params,
-                    extra_headers=extra_headers,
-                    extra_body=extra_body,
-                )
-                break
-            except (
-                AnthropicAPIConnectionError,
-                AnthropicInternalServerError,
-                AnthropicRateLimitError,
-                AnthropicOverloadedError,
-            ) as e:
-                if retry == self.max_retries - 1:
-                    print(f"Failed Anthropic request after {retry + 1} retries")
-                    raise e
-                else:
-                    print(f"Retrying LLM request: {retry + 1}/{self.max_retries}")
-                    # Sleep 12-18 seconds with jitter to avoid thundering herd.
-                    time.sleep(15 * random.uniform(0.8, 1.2))
-            except Exception as e:
-                raise e
+        return dict(
+            max_tokens=max_tokens,
+            messages=anthropic_messages,
+            model=self.model_name,
+            temperature=temperature,
+            system=system_param,
+            tool_choice=tool_choice_param,  # type: ignore
+            tools=tool_params,
+            extra_headers=extra_headers,
+            extra_body=extra_body,
+        )
 
-        # Convert messages back to internal format
+    @staticmethod
+    def _with_cache_control(block: Any) -> Any:
+        """Return a copy of a content block with a cache breakpoint.
+
+        Converted blocks are cached and thinking blocks are the history's own
+        objects, so they are copied rather than modified; a breakpoint must
+        not leak into later requests.
+        """
+        if isinstance(block, dict):
+            return {**block, "cache_control": CACHE_CONTROL}
+        return block.model_copy(update={"cache_control": CACHE_CONTROL})
+
+    def _convert_response(
+        self, response: Any
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        """Convert an Anthropic message into internal blocks and metadata."""
         internal_messages = []
-        assert response is not None
         for message in response.content:
             if "</invoke>" in str(message):
                 warning_msg = "\n".join(
@@ -271,16 +312,13 @@ class AnthropicDirectClient(LLMClient):
                 )
                 print(warning_msg)
 
-            if str(type(message)) == str(AnthropicTextBlock):
-                message = cast(AnthropicTextBlock, message)
+            # Dispatch on the block type tag: streamed responses are assembled
+            # into subclasses of the SDK block types.
+            if message.type == "text":
                 internal_messages.append(TextResult(text=message.text))
-            elif str(type(message)) == str(AnthropicRedactedThinkingBlock):
+            elif message.type in ("redacted_thinking", "thinking"):
                 internal_messages.append(message)
-            elif str(type(message)) == str(AnthropicThinkingBlock):
-                message = cast(AnthropicThinkingBlock, message)
-                internal_messages.append(message)
-            elif str(type(message)) == str(AnthropicToolUseBlock):
-                message = cast(AnthropicToolUseBlock, message)
+            elif message.type == "tool_use":
                 internal_messages.append(
                     ToolCall(
                         tool_call_id=message.id,
@@ -304,3 +342,255 @@ class AnthropicDirectClient(LLMClient):
         }
 
         return internal_messages, message_metadata
+
+    def _convert_stream_event(
+        self, event: Any, tool_uses: dict[int, Any]
+    ) -> LLMStreamEvent | None:
+        """Convert a raw stream event into a delta event, if it carries one.
+
+        ``tool_uses`` collects the tool-use blocks started so far, so that
+        input deltas can be attributed to their tool call.
+        """
+        if event.type == "content_block_start":
+            if event.content_block.type == "tool_use":
+                tool_uses[event.index] = event.content_block
+            return None
+        if event.type != "content_block_delta":
+            return None
+        delta = event.delta
+        if delta.type == "text_delta":
+            return LLMStreamEvent(type="text", index=event.index, delta=delta.text)
+        if delta.type == "thinking_delta":
+            return LLMStreamEvent(
+                type="thinking", index=event.index, delta=delta.thinking
+            )
+        if delta.type == "input_json_delta":
+            tool_use = tool_uses[event.index]
+            return LLMStreamEvent(
+                type="tool_use",
+                index=event.index,
+                delta=delta.partial_json,
+                tool_call_id=tool_use.id,
+                tool_name=tool_use.name,
+            )
+        return None
+
+    def generate(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        """Generate responses.
+
+        Args:
+            messages: A list of messages.
+            max_tokens: The maximum number of tokens to generate.
+            system_prompt: A system prompt.
+            temperature: The temperature.
+            tools: A list of tools.
+            tool_choice: A tool choice.
+
+        Returns:
+            A generated response.
+        """
+        request_params = self._build_request_params(
+            messages,
+            max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+
+        input_tokens = self.rate_limiter.estimate_input_tokens(messages, system_prompt)
+        response = None
+        for retry in range(self.max_retries):
+            # Waits for this model's shared quota and any pause after errors
+            reservation = self.rate_limiter.acquire_sync(input_tokens, max_tokens)
+            try:
+                response = self.client.messages.create(**request_params)  # type: ignore
+                break
+            except RETRYABLE_ERRORS as e:
+                delay = self.rate_limiter.throttle(reservation, e)
+                if retry == self.max_retries - 1:
+                    print(f"Failed Anthropic request after {retry + 1} retries")
+                    raise e
+                else:
+                    print(
+                        f"Retrying LLM request in {delay:.1f}s: {retry + 1}/{self.max_retries}"
+                    )
+            except Exception as e:
+                raise e
+
+        # Convert messages back to internal format
+        assert response is not None
+        internal_messages, message_metadata = self._convert_response(response)
+        self.rate_limiter.settle(reservation, message_metadata)
+        return internal_messages, message_metadata
+
+    def generate_stream(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Iterator[LLMStreamEvent]:
+        """Generate responses, yielding text, thinking and tool-use deltas.
+
+        Requests are only retried while nothing has been yielded yet.
+        """
+        request_params = self._build_request_params(
+            messages,
+            max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+
+        input_tokens = self.rate_limiter.estimate_input_tokens(messages, system_prompt)
+        response = None
+        for retry in range(self.max_retries):
+            # Waits for this model's shared quota and any pause after errors
+            reservation = self.rate_limiter.acquire_sync(input_tokens, max_tokens)
+            started = False
+            try:
+                with self.client.messages.stream(**request_params) as stream:  # type: ignore
+                    tool_uses: dict[int, Any] = {}
+                    for event in stream:
+                        stream_event = self._convert_stream_event(event, tool_uses)
+                        if stream_event is None:
+                            continue
+                        started = True
+                        yield stream_event
+                    response = stream.get_final_message()
+                break
+            except RETRYABLE_ERRORS as e:
+                delay = self.rate_limiter.throttle(reservation, e)
+                if started or retry == self.max_retries - 1:
+                    print(f"Failed Anthropic request after {retry + 1} retries")
+                    raise e
+                else:
+                    print(
+                        f"Retrying LLM request in {delay:.1f}s: {retry + 1}/{self.max_retries}"
+                    )
+
+        assert response is not None
+        internal_messages, message_metadata = self._convert_response(response)
+        self.rate_limiter.settle(reservation, message_metadata)
+        yield LLMStreamEvent(
+            type="complete", response=internal_messages, metadata=message_metadata
+        )
+
+    async def agenerate(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        """Generate responses with the async Anthropic client.
+
+        Same as ``generate``, but waits between retries without blocking the
+        event loop.
+        """
+        request_params = self._build_request_params(
+            messages,
+            max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+
+        input_tokens = self.rate_limiter.estimate_input_tokens(messages, system_prompt)
+        response = None
+        for retry in range(self.max_retries):
+            # Waits for this model's shared quota and any pause after errors
+            reservation = await self.rate_limiter.acquire(input_tokens, max_tokens)
+            try:
+                response = await self.async_client.messages.create(**request_params)  # type: ignore
+                break
+            except RETRYABLE_ERRORS as e:
+                delay = self.rate_limiter.throttle(reservation, e)
+                if retry == self.max_retries - 1:
+                    print(f"Failed Anthropic request after {retry + 1} retries")
+                    raise e
+                else:
+                    print(
+                        f"Retrying LLM request in {delay:.1f}s: {retry + 1}/{self.max_retries}"
+                    )
+
+        assert response is not None
+        internal_messages, message_metadata = self._convert_response(response)
+        self.rate_limiter.settle(reservation, message_metadata)
+        return internal_messages, message_metadata
+
+    async def agenerate_stream(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        """Async counterpart of ``generate_stream``."""
+        request_params = self._build_request_params(
+            messages,
+            max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+
+        input_tokens = self.rate_limiter.estimate_input_tokens(messages, system_prompt)
+        response = None
+        for retry in range(self.max_retries):
+            # Waits for this model's shared quota and any pause after errors
+            reservation = await self.rate_limiter.acquire(input_tokens, max_tokens)
+            started = False
+            try:
+                async with self.async_client.messages.stream(**request_params) as stream:  # type: ignore
+                    tool_uses: dict[int, Any] = {}
+                    async for event in stream:
+                        stream_event = self._convert_stream_event(event, tool_uses)
+                        if stream_event is None:
+                            continue
+                        started = True
+                        yield stream_event
+                    response = await stream.get_final_message()
+                break
+            except RETRYABLE_ERRORS as e:
+                delay = self.rate_limiter.throttle(reservation, e)
+                if started or retry == self.max_retries - 1:
+                    print(f"Failed Anthropic request after {retry + 1} retries")
+                    raise e
+                else:
+                    print(
+                        f"Retrying LLM request in {delay:.1f}s: {retry + 1}/{self.max_retries}"
+                    )
+
+        assert response is not None
+        internal_messages, message_metadata = self._convert_response(response)
+        self.rate_limiter.settle(reservation, message_metadata)
+        yield LLMStreamEvent(
+            type="complete", response=internal_messages, metadata=message_metadata
+        )
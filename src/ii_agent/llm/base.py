@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
+import asyncio
 import json
 from dataclasses import dataclass
-from typing import Any, Tuple
+from typing import Any, AsyncIterator, Iterator, Tuple
 from dataclasses_json import DataClassJsonMixin
 from anthropic.types import (
     ThinkingBlock as AnthropicThinkingBlock,
@@ -122,6 +123,26 @@ GeneralContentBlock = UserContentBlock | AssistantContentBlock
 LLMMessages = list[list[GeneralContentBlock]]
 
 
+@dataclass
+class LLMStreamEvent:
+    """Incremental piece of a streamed LLM response.
+
+    Delta events have type ``text``, ``thinking`` or ``tool_use`` and carry the
+    newly generated characters of the content block at ``index``; tool-use
+    deltas are fragments of the JSON tool input. The last event of a stream has
+    type ``complete`` and carries the assembled response and metadata, exactly
+    as ``LLMClient.generate`` returns them.
+    """
+
+    type: Literal["text", "thinking", "tool_use", "complete"]
+    index: int = 0
+    delta: str = ""
+    tool_call_id: str | None = None
+    tool_name: str | None = None
+    response: list[AssistantContentBlock] | None = None
+    metadata: dict[str, Any] | None = None
+
+
 class LLMClient(ABC):
     """A client for LLM APIs for the use in agents."""
 
@@ -151,6 +172,84 @@ class LLMClient(ABC):
         """
         raise NotImplementedError
 
+    def generate_stream(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Iterator[LLMStreamEvent]:
+        """Generate responses, yielding deltas as they are produced.
+
+        Takes the same arguments as ``generate``. The last event has type
+        ``complete`` and carries the result ``generate`` would have returned.
+        Clients without native streaming yield only that final event.
+        """
+        response, metadata = self.generate(
+            messages=messages,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+        yield LLMStreamEvent(type="complete", response=response, metadata=metadata)
+
+    async def agenerate(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        """Generate responses without blocking the event loop.
+
+        Takes the same arguments and returns the same result as ``generate``.
+        Clients without a native async API run ``generate`` in a worker thread.
+        """
+        return await asyncio.to_thread(
+            self.generate,
+            messages=messages,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+
+    async def agenerate_stream(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        """Async counterpart of ``generate_stream``.
+
+        Clients without native async streaming yield only the final event.
+        """
+        response, metadata = await self.agenerate(
+            messages=messages,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+        yield LLMStreamEvent(type="complete", response=response, metadata=metadata)
+
 
 def recursively_remove_invoke_tag(obj):
     """Recursively remove the </invoke> tag from a dictionary or list."""
@@ -0,0 +1,151 @@
+"""Process-wide registry of LLM clients that share pooled HTTP connections."""
+
+import logging
+import threading
+from types import ModuleType
+from typing import Any
+
+import anthropic
+import openai
+
+from ii_agent.llm import get_client
+from ii_agent.llm.base import LLMClient
+
+logger = logging.getLogger(__name__)
+
+# SDK of each client that accepts an externally managed httpx client.
+TRANSPORT_SDKS: dict[str, ModuleType] = {
+    "anthropic-direct": anthropic,
+    "openai-direct": openai,
+}
+
+
+class ClientRegistry:
+    """Hands out one LLM client per configuration, shared by all sessions.
+
+    Clients are keyed by the client name and the keyword arguments they are
+    built with (model, project, region, caching and thinking options). Clients
+    of the same SDK additionally share one sync and one async httpx client with
+    bounded keep-alive pools, so sessions reuse warm connections instead of
+    opening their own. The async transports belong to the event loop that
+    first uses them; the registry is meant for the single-loop server process.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self._lock = threading.Lock()
+        self._clients: dict[tuple, LLMClient] = {}
+        self._transports: dict[str, tuple[Any, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(client_name: str, kwargs: dict[str, Any]) -> tuple:
+        return (client_name, tuple(sorted(kwargs.items())))
+
+    def get_client(self, client_name: str, **kwargs) -> LLMClient:
+        """Return the shared client for this configuration, creating it once.
+
+        Args:
+            client_name: Name of the client, as accepted by ``get_client``.
+            **kwargs: Client configuration; values must be hashable.
+
+        Returns:
+            LLMClient: The shared client instance.
+        """
+        key = self._key(client_name, kwargs)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.hits += 1
+                return client
+
+            self.misses += 1
+            if client_name in TRANSPORT_SDKS:
+                http_client, async_http_client = self._get_transport(client_name)
+                kwargs = dict(
+                    kwargs,
+                    http_client=http_client,
+                    async_http_client=async_http_client,
+                )
+            client = get_client(client_name, **kwargs)
+            self._clients[key] = client
+            logger.info(
+                f"Created shared {client_name} client ({len(self._clients)} total)"
+            )
+            return client
+
+    def _get_transport(self, client_name: str) -> tuple[Any, Any]:
+        """Return the (sync, async) httpx clients shared by an SDK's clients."""
+        if client_name not in self._transports:
+            sdk = TRANSPORT_SDKS[client_name]
+            # Build limits with the httpx flavour the SDK itself uses
+            limits = type(sdk.DEFAULT_CONNECTION_LIMITS)(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            )
+            self._transports[client_name] = (
+                sdk.DefaultHttpxClient(limits=limits),
+                sdk.DefaultAsyncHttpxClient(limits=limits),
+            )
+        return self._transports[client_name]
+
+    @staticmethod
+    def _pool_stats(http_client: Any) -> dict[str, int]:
+        """Count open and idle connections of an httpx client's pool."""
+        pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        return {
+            "open": len(connections),
+            "idle": sum(1 for connection in connections if connection.is_idle()),
+        }
+
+    def stats(self) -> dict[str, Any]:
+        """Return client reuse counters and connection pool statistics."""
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "hits": self.hits,
+                "misses": self.misses,
+                "max_connections": self.max_connections,
+                "max_keepalive_connections": self.max_keepalive_connections,
+                "pools": {
+                    client_name: {
+                        "sync": self._pool_stats(http_client),
+                        "async": self._pool_stats(async_http_client),
+                    }
+                    for client_name, (
+                        http_client,
+                        async_http_client,
+                    ) in self._transports.items()
+                },
+            }
+
+    async def aclose(self) -> None:
+        """Close the shared transports and forget all clients."""
+        with self._lock:
+            transports = list(self._transports.values())
+            self._transports.clear()
+            self._clients.clear()
+        for http_client, async_http_client in transports:
+            http_client.close()
+            await async_http_client.aclose()
+
+
+_default_registry: ClientRegistry | None = None
+
+
+def get_client_registry() -> ClientRegistry:
+    """Return the process-wide client registry."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ClientRegistry()
+    return _default_registry
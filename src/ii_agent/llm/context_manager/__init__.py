@@ -1,6 +1,16 @@
 from ii_agent.llm.context_manager.llm_summarizing import LLMSummarizingContextManager
+from ii_agent.llm.context_manager.observation_masking import (
+    ObservationMaskingContextManager,
+)
+from ii_agent.llm.context_manager.strategy import (
+    CONTEXT_STRATEGIES,
+    create_context_manager,
+)
 
 
 __all__ = [
+    "CONTEXT_STRATEGIES",
+    "create_context_manager",
     "LLMSummarizingContextManager",
+    "ObservationMaskingContextManager",
 ]
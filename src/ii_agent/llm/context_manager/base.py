@@ -1,7 +1,7 @@
 import json
 import logging
 from abc import ABC, abstractmethod
-from typing import final
+from typing import Hashable, final
 from ii_agent.llm.base import (
     GeneralContentBlock,
     TextPrompt,
@@ -19,7 +19,13 @@ from ii_agent.utils.constants import TOKEN_BUDGET
 
 
 class ContextManager(ABC):
-    """Abstract base class for context management strategies."""
+    """Abstract base class for context management strategies.
+
+    One context manager may serve several histories at once, e.g. the
+    concurrent tasks of a GAIA run. Strategies that keep state for an upcoming
+    truncation keep it per ``key``, which identifies the history the message
+    lists belong to.
+    """
 
     def __init__(
         self,
@@ -36,6 +42,40 @@ class ContextManager(ABC):
         """Return the token budget."""
         return self._token_budget
 
+    def count_block_tokens(self, message: GeneralContentBlock) -> int:
+        """Counts the tokens of a single block.
+
+        Thinking blocks are counted in full; count_tokens only charges them in
+        the last message list.
+        """
+        if isinstance(message, (TextPrompt, TextResult)):
+            return self.token_counter.count_tokens(message.text)
+        elif isinstance(message, ToolFormattedResult):
+            # Count truncated output if already truncated
+            return self.token_counter.count_tokens(message.tool_output)
+        elif isinstance(message, ToolCall):
+            # Basic counting of input JSON
+            try:
+                input_str = json.dumps(message.tool_input)
+                return self.token_counter.count_tokens(input_str)
+            except TypeError:
+                self.logger.warning(
+                    f"Could not serialize tool input for token counting: {message.tool_input}"
+                )
+                return 100  # Add arbitrary penalty
+        elif isinstance(message, ImageBlock):
+            # Estimated from the image dimensions in its header
+            return self.token_counter.count_image_tokens(message.source)
+        elif isinstance(message, AnthropicRedactedThinkingBlock):
+            return 0  # Always 0 tokens
+        elif isinstance(message, AnthropicThinkingBlock):
+            return self.token_counter.count_tokens(message.thinking)
+        else:
+            self.logger.warning(
+                f"Unhandled message type for token counting: {type(message)}"
+            )
+            return 0
+
     def count_tokens(self, message_lists: list[list[GeneralContentBlock]]) -> int:
         """Counts tokens, ignoring thinking blocks except in the very last message."""
         total_tokens = 0
@@ -43,66 +83,109 @@ class ContextManager(ABC):
         for i, message_list in enumerate(message_lists):
             is_last_turn = i == num_turns - 1
             for message in message_list:
-                if isinstance(message, (TextPrompt, TextResult)):
-                    total_tokens += self.token_counter.count_tokens(message.text)
-                elif isinstance(message, ToolFormattedResult):
-                    # Count truncated output if already truncated
-                    total_tokens += self.token_counter.count_tokens(message.tool_output)
-                elif isinstance(message, ToolCall):
-                    # Basic counting of input JSON
-                    try:
-                        input_str = json.dumps(message.tool_input)
-                        total_tokens += self.token_counter.count_tokens(input_str)
-                    except TypeError:
-                        self.logger.warning(
-                            f"Could not serialize tool input for token counting: {message.tool_input}"
-                        )
-                        total_tokens += 100  # Add arbitrary penalty
-                elif isinstance(message, ImageBlock):
-                    # Images are expensive - assign a reasonable token count
-                    # Typical image tokens range from 85-1700+ depending on size and detail
-                    # Using a conservative estimate of 1000 tokens per image
-                    total_tokens += 1000
-                elif isinstance(message, AnthropicRedactedThinkingBlock):
-                    pass  # Always 0 tokens
-                elif isinstance(message, AnthropicThinkingBlock):
-                    # Only count thinking if it's in the very last message list
-                    if is_last_turn:
-                        total_tokens += self.token_counter.count_tokens(
-                            message.thinking
-                        )
-                else:
-                    self.logger.warning(
-                        f"Unhandled message type for token counting: {type(message)}"
-                    )
+                # Only count thinking if it's in the very last message list
+                if isinstance(message, AnthropicThinkingBlock) and not is_last_turn:
+                    continue
+                total_tokens += self.count_block_tokens(message)
         return total_tokens
 
-    def should_truncate(self, message_lists: list[list[GeneralContentBlock]]) -> bool:
-        """Check if truncation is needed based on the number of message lists."""
-        return self.count_tokens(message_lists) > self._token_budget
+    def should_truncate(
+        self,
+        message_lists: list[list[GeneralContentBlock]],
+        token_count: int | None = None,
+    ) -> bool:
+        """Check if truncation is needed based on the number of message lists.
+
+        Callers that track the token count of the message lists, like
+        MessageHistory, pass it as ``token_count`` to skip recounting.
+        """
+        if token_count is None:
+            token_count = self.count_tokens(message_lists)
+        return token_count > self._token_budget
 
     @final
     def apply_truncation_if_needed(
-        self, message_lists: list[list[GeneralContentBlock]]
+        self,
+        message_lists: list[list[GeneralContentBlock]],
+        token_count: int | None = None,
+        key: Hashable = None,
     ) -> list[list[GeneralContentBlock]]:
-        if not self.should_truncate(message_lists):
+        if token_count is None:
+            token_count = self.count_tokens(message_lists)
+        if not self.should_truncate(message_lists, token_count):
             return message_lists
 
-        current_tokens = self.count_tokens(message_lists)
         self.logger.warning(
-            f"Token count {current_tokens}."
+            f"Token count {token_count}."
         )
-        truncated_message_lists = self.apply_truncation(message_lists)
+        truncated_message_lists = self.apply_truncation(message_lists, key=key)
+        self._log_truncation(token_count, truncated_message_lists)
+        return truncated_message_lists
+
+    @final
+    async def apply_truncation_if_needed_async(
+        self,
+        message_lists: list[list[GeneralContentBlock]],
+        token_count: int | None = None,
+        key: Hashable = None,
+    ) -> list[list[GeneralContentBlock]]:
+        """Async variant of apply_truncation_if_needed, for use on the event loop."""
+        if token_count is None:
+            token_count = self.count_tokens(message_lists)
+        if not self.should_truncate(message_lists, token_count):
+            self.prepare_truncation(message_lists, token_count, key=key)
+            return message_lists
+
+        self.logger.warning(
+            f"Token count {token_count}."
+        )
+        truncated_message_lists = await self.apply_truncation_async(message_lists, key=key)
+        self._log_truncation(token_count, truncated_message_lists)
+        return truncated_message_lists
+
+    def _log_truncation(
+        self,
+        token_count: int,
+        truncated_message_lists: list[list[GeneralContentBlock]],
+    ) -> None:
         new_token_count = self.count_tokens(truncated_message_lists)
-        tokens_saved = current_tokens - new_token_count
+        tokens_saved = token_count - new_token_count
         self.logger.info(
             f"Truncation saved ~{tokens_saved} tokens. New count: {new_token_count}"
         )
-        return truncated_message_lists
 
     @abstractmethod
     def apply_truncation(
-        self, message_lists: list[list[GeneralContentBlock]]
+        self, message_lists: list[list[GeneralContentBlock]], key: Hashable = None
     ) -> list[list[GeneralContentBlock]]:
         """Apply truncation to message lists if needed."""
         pass
+
+    def prepare_truncation(
+        self,
+        message_lists: list[list[GeneralContentBlock]],
+        token_count: int,
+        key: Hashable = None,
+    ) -> None:
+        """Called on the event loop while no truncation is needed yet.
+
+        Strategies may start work for an upcoming truncation in the
+        background; the default does nothing.
+        """
+
+    def cancel_pending_truncation(self, key: Hashable = None) -> None:
+        """Cancel the work started by prepare_truncation for ``key``, if any.
+
+        Called when the history it was started for is cleared or its session
+        ends.
+        """
+
+    async def apply_truncation_async(
+        self, message_lists: list[list[GeneralContentBlock]], key: Hashable = None
+    ) -> list[list[GeneralContentBlock]]:
+        """Apply truncation without blocking the event loop.
+
+        Strategies that call an LLM override this; the default runs the
+        synchronous strategy directly.
+        """
+        return self.apply_truncation(message_lists, key=key)
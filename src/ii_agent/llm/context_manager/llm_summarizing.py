@@ -1,4 +1,8 @@
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Hashable, Optional
 from ii_agent.llm.base import GeneralContentBlock, TextPrompt, TextResult, AnthropicThinkingBlock, AnthropicRedactedThinkingBlock
 from ii_agent.llm.context_manager.base import ContextManager
 from ii_agent.llm.token_counter import TokenCounter
@@ -6,12 +10,90 @@ from ii_agent.llm.base import LLMClient
 from ii_agent.utils.constants import TOKEN_BUDGET, SUMMARY_MAX_TOKENS
 
 
+SUMMARY_INSTRUCTIONS = """You are maintaining a context-aware state summary for an interactive agent. You will be given a list of events corresponding to actions taken by the agent, and the most recent previous summary if one exists. Track:
+
+USER_CONTEXT: (Preserve essential user requirements, goals, and clarifications in concise form)
+
+COMPLETED: (Tasks completed so far, with brief results)
+PENDING: (Tasks that still need to be done)
+CURRENT_STATE: (Current variables, data structures, or relevant state)
+
+For code-specific tasks, also include:
+CODE_STATE: {File paths, function signatures, data structures}
+TESTS: {Failing cases, error messages, outputs}
+CHANGES: {Code edits, variable updates}
+DEPS: {Dependencies, imports, external calls}
+VERSION_CONTROL_STATUS: {Repository state, current branch, PR status, commit history}
+
+PRIORITIZE:
+1. Adapt tracking format to match the actual task type
+2. Capture key user requirements and goals
+3. Distinguish between completed and pending tasks
+4. Keep all sections concise and relevant
+
+SKIP: Tracking irrelevant details for the current task type
+
+Example formats:
+
+For code tasks:
+USER_CONTEXT: Fix FITS card float representation issue
+COMPLETED: Modified mod_float() in card.py, all tests passing
+PENDING: Create PR, update documentation
+CODE_STATE: mod_float() in card.py updated
+TESTS: test_format() passed
+CHANGES: str(val) replaces f"{val:.16G}"
+DEPS: None modified
+VERSION_CONTROL_STATUS: Branch: fix-float-precision, Latest commit: a1b2c3d
+
+For other tasks:
+USER_CONTEXT: Write 20 haikus based on coin flip results
+COMPLETED: 15 haikus written for results [T,H,T,H,T,H,T,T,H,T,H,T,H,T,H]
+PENDING: 5 more haikus needed
+CURRENT_STATE: Last flip: Heads, Haiku count: 15/20
+
+"""
+
+
+@dataclass
+class SummaryPlan:
+    """Which events a truncation replaces with a summary, and what it keeps."""
+
+    head: list[list[GeneralContentBlock]]
+    forgotten_events: list[list[GeneralContentBlock]]
+    previous_summary: str
+    tail: list[list[GeneralContentBlock]]
+    description: str
+
+
+@dataclass
+class PendingSummary:
+    """A summary generated in the background ahead of the hard limit."""
+
+    plan: SummaryPlan
+    # The leading message lists the summary replaces: head, previous summary
+    # and forgotten events, as they were when summarization started.
+    prefix: list[list[GeneralContentBlock]]
+    task: asyncio.Task
+
+
 class LLMSummarizingContextManager(ContextManager):
     """A context manager that summarizes forgotten events using LLM.
 
     Maintains a condensed history and forgets old events when it grows too large,
     keeping a special summarization event after the prefix that summarizes all previous
     summarizations and newly forgotten events.
+
+    With ``presummarize_threshold`` set, summarization starts in the background
+    once the history reaches that fraction of the token budget (or of
+    ``max_size``), and the finished summary is swapped in when the limit is
+    hit, so truncation adds almost no latency to the turn that triggers it.
+    Each history, identified by the ``key`` of the calls, has its own summary
+    in the background.
+
+    With ``summary_chunk_tokens`` set, the forgotten events are split into
+    chunks of at most that many tokens, up to ``summary_fan_out`` chunks are
+    summarized concurrently, and the partial summaries are merged with the
+    previous summary in a final request.
     """
 
     def __init__(
@@ -22,15 +104,33 @@ class LLMSummarizingContextManager(ContextManager):
         token_budget: int = TOKEN_BUDGET,
         max_size: int = 100,
         max_event_length: int = 10_000,
+        presummarize_threshold: Optional[float] = None,
+        summary_chunk_tokens: Optional[int] = None,
+        summary_fan_out: int = 4,
     ):
         if max_size < 1:
             raise ValueError(f"max_size ({max_size}) cannot be non-positive")
+        if presummarize_threshold is not None and not 0 < presummarize_threshold < 1:
+            raise ValueError(
+                f"presummarize_threshold ({presummarize_threshold}) must be between 0 and 1"
+            )
+        if summary_chunk_tokens is not None and summary_chunk_tokens < 1:
+            raise ValueError(
+                f"summary_chunk_tokens ({summary_chunk_tokens}) cannot be non-positive"
+            )
+        if summary_fan_out < 1:
+            raise ValueError(f"summary_fan_out ({summary_fan_out}) cannot be non-positive")
 
         super().__init__(token_counter, logger, token_budget)
         self.client = client
         self.max_size = max_size
         self.keep_first = 1
         self.max_event_length = max_event_length
+        self.presummarize_threshold = presummarize_threshold
+        self.summary_chunk_tokens = summary_chunk_tokens
+        self.summary_fan_out = summary_fan_out
+        # Background summaries by the key of the history they were started for
+        self._pending: dict[Hashable, PendingSummary] = {}
 
     def _truncate_content(self, content: str) -> str:
         """Truncate the content to fit within the specified maximum event length."""
@@ -54,10 +154,14 @@ class LLMSummarizingContextManager(ContextManager):
                 parts.append(f"{type(message).__name__}: {str(message)}")
         return "\n".join(parts)
 
-    def should_truncate(self, message_lists: list[list[GeneralContentBlock]]) -> bool:
+    def should_truncate(
+        self,
+        message_lists: list[list[GeneralContentBlock]],
+        token_count: int | None = None,
+    ) -> bool:
         """Check if condensation is needed based on the number of message lists."""
         return len(message_lists) > self.max_size or super().should_truncate(
-            message_lists
+            message_lists, token_count
         )
 
     def _has_thinking_blocks(self, message_lists: list[list[GeneralContentBlock]]) -> bool:
@@ -77,27 +181,160 @@ class LLMSummarizingContextManager(ContextManager):
         return len(message_lists) - 1  # Fallback to last index
 
     def apply_truncation(
-        self, message_lists: list[list[GeneralContentBlock]]
+        self, message_lists: list[list[GeneralContentBlock]], key: Hashable = None
     ) -> list[list[GeneralContentBlock]]:
         """Apply truncation with LLM summarization when needed."""
+        pending = self._pending.get(key)
+        if (
+            pending is not None
+            and pending.task.done()
+            and not pending.task.cancelled()
+            and self._matches_prefix(message_lists, pending.prefix)
+        ):
+            del self._pending[key]
+            return self._condense_pending(message_lists, pending, pending.task.result())
+
+        plan = self._plan_truncation(message_lists)
+        if plan is None:
+            return message_lists
+        summary = self._generate_summary(plan.forgotten_events, plan.previous_summary)
+        return self._condense(message_lists, plan, summary)
+
+    async def apply_truncation_async(
+        self, message_lists: list[list[GeneralContentBlock]], key: Hashable = None
+    ) -> list[list[GeneralContentBlock]]:
+        """Apply truncation, generating the summary with the async client.
+
+        A summary started in the background is used if the events it covers
+        are still at the start of the history, waiting for it if it is not
+        done yet; otherwise it is discarded and a new summary is generated.
+        """
+        pending = self._take_pending(message_lists, key)
+        if pending is not None:
+            summary = await pending.task
+            return self._condense_pending(message_lists, pending, summary)
+
+        plan = self._plan_truncation(message_lists)
+        if plan is None:
+            return message_lists
+        summary = await self._agenerate_summary(
+            plan.forgotten_events, plan.previous_summary
+        )
+        return self._condense(message_lists, plan, summary)
+
+    def prepare_truncation(
+        self,
+        message_lists: list[list[GeneralContentBlock]],
+        token_count: int,
+        key: Hashable = None,
+    ) -> None:
+        """Start summarizing in the background once the soft threshold is reached."""
+        if self.presummarize_threshold is None:
+            return
+        pending = self._pending.get(key)
+        if pending is not None:
+            if self._matches_prefix(message_lists, pending.prefix):
+                return
+            self._discard_pending(key)
+
+        if (
+            token_count < self.presummarize_threshold * self._token_budget
+            and len(message_lists) < self.presummarize_threshold * self.max_size
+        ):
+            return
+        plan = self._plan_truncation(message_lists)
+        if plan is None:
+            return
+
+        self.logger.info(
+            f"Token count {token_count} reached the pre-summarization threshold, "
+            f"summarizing {len(plan.forgotten_events)} events in the background"
+        )
+        task = asyncio.create_task(
+            self._agenerate_summary(plan.forgotten_events, plan.previous_summary)
+        )
+        self._pending[key] = PendingSummary(
+            plan=plan,
+            prefix=message_lists[: len(message_lists) - len(plan.tail)],
+            task=task,
+        )
+
+    def cancel_pending_truncation(self, key: Hashable = None) -> None:
+        """Cancel the summary running in the background for ``key``, if any."""
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            pending.task.cancel()
+
+    def _take_pending(
+        self, message_lists: list[list[GeneralContentBlock]], key: Hashable
+    ) -> Optional[PendingSummary]:
+        """Return the pending summary of ``key`` if it still applies to the message lists."""
+        pending = self._pending.get(key)
+        if pending is None:
+            return None
+        if not self._matches_prefix(message_lists, pending.prefix):
+            self._discard_pending(key)
+            return None
+        del self._pending[key]
+        return pending
+
+    def _discard_pending(self, key: Hashable) -> None:
+        """Cancel a background summary whose events are no longer in the history."""
+        self.logger.info("History changed since pre-summarization started, discarding it")
+        self._pending.pop(key).task.cancel()
+
+    @staticmethod
+    def _matches_prefix(
+        message_lists: list[list[GeneralContentBlock]],
+        prefix: list[list[GeneralContentBlock]],
+    ) -> bool:
+        """Check that the message lists start with the same blocks as the prefix."""
+        if len(message_lists) < len(prefix):
+            return False
+        for message_list, expected in zip(message_lists, prefix):
+            if len(message_list) != len(expected) or any(
+                block is not other for block, other in zip(message_list, expected)
+            ):
+                return False
+        return True
+
+    def _condense_pending(
+        self,
+        message_lists: list[list[GeneralContentBlock]],
+        pending: PendingSummary,
+        summary: str,
+    ) -> list[list[GeneralContentBlock]]:
+        """Replace the events of a background summary, keeping everything after them."""
+        tail = message_lists[len(pending.prefix) :]
+        plan = replace(
+            pending.plan,
+            tail=tail,
+            description=f"kept {len(pending.plan.head)} head + 1 summary + {len(tail)} tail, summarized in the background",
+        )
+        return self._condense(message_lists, plan, summary)
+
+    def _plan_truncation(
+        self, message_lists: list[list[GeneralContentBlock]]
+    ) -> Optional[SummaryPlan]:
+        """Decide which events to summarize, or None if nothing should change."""
         # Check if we have thinking blocks and route to appropriate method
         has_thinking_blocks = self._has_thinking_blocks(message_lists)
         
         if has_thinking_blocks:
-            return self._apply_truncation_with_thinking_blocks(message_lists)
+            return self._plan_truncation_with_thinking_blocks(message_lists)
         else:
-            return self._apply_truncation_without_thinking_blocks(message_lists)
+            return self._plan_truncation_without_thinking_blocks(message_lists)
 
-    def _apply_truncation_with_thinking_blocks(
+    def _plan_truncation_with_thinking_blocks(
         self, message_lists: list[list[GeneralContentBlock]]
-    ) -> list[list[GeneralContentBlock]]:
-        """Apply truncation when thinking blocks are present - only truncate before last TextPrompt."""
+    ) -> Optional[SummaryPlan]:
+        """Plan truncation when thinking blocks are present - only truncate before last TextPrompt."""
         # New logic: only truncate before the last user message (TextPrompt)
         last_prompt_index = self._find_last_text_prompt_index(message_lists)
         
         # If we only have one or no TextPrompt, don't truncate
         if last_prompt_index <= 0:
-            return message_lists
+            return None
             
         # target size is half of the max size but we must keep from last text prompt onwards
         target_size = min(self.max_size, len(message_lists)) // 2
@@ -110,29 +347,20 @@ class LLMSummarizingContextManager(ContextManager):
             self.logger.info(
                 "No events to summarize, returning original message lists"
             )
-            return message_lists
-            
-        # Generate summary for events before the last TextPrompt
-        summary = self._generate_summary(events_to_summarize)
-        
-        # Create condensed message list with summary + events from last TextPrompt
-        condensed_messages = []
-        condensed_messages.extend(message_lists[:self.keep_first])
-        summary_message = [TextResult(text=f"Conversation Summary: {summary}")]
-        condensed_messages.append(summary_message)
-        condensed_messages.extend(events_to_keep)
-        
-        self.logger.info(
-            f"Condensed {len(message_lists)} message lists to {len(condensed_messages)} "
-            f"(kept {self.keep_first} head + 1 summary + {len(events_to_keep)} from last TextPrompt onwards)"
+            return None
+
+        return SummaryPlan(
+            head=message_lists[:self.keep_first],
+            forgotten_events=events_to_summarize,
+            previous_summary="No events summarized",
+            tail=events_to_keep,
+            description=f"kept {self.keep_first} head + 1 summary + {len(events_to_keep)} from last TextPrompt onwards",
         )
-        
-        return condensed_messages
 
-    def _apply_truncation_without_thinking_blocks(
+    def _plan_truncation_without_thinking_blocks(
         self, message_lists: list[list[GeneralContentBlock]]
-    ) -> list[list[GeneralContentBlock]]:
-        """Apply truncation when no thinking blocks are present - use original logic."""
+    ) -> Optional[SummaryPlan]:
+        """Plan truncation when no thinking blocks are present - use original logic."""
         head = message_lists[: self.keep_first]
         target_size = min(self.max_size, len(message_lists)) // 2
         events_from_tail = target_size - len(head) - 1
@@ -160,114 +388,180 @@ class LLMSummarizingContextManager(ContextManager):
         )
 
         if not forgotten_events:
-            return message_lists
-
-        # Generate summary using existing logic
-        summary = self._generate_summary(forgotten_events, summary_content)
+            return None
+
+        return SummaryPlan(
+            head=head,
+            forgotten_events=forgotten_events,
+            previous_summary=summary_content,
+            tail=message_lists[-events_from_tail:] if events_from_tail > 0 else [],
+            description=f"kept {len(head)} head + 1 summary + {events_from_tail} tail",
+        )
 
-        # Create new condensed message list
+    def _condense(
+        self,
+        message_lists: list[list[GeneralContentBlock]],
+        plan: SummaryPlan,
+        summary: str,
+    ) -> list[list[GeneralContentBlock]]:
+        """Replace the forgotten events of the plan with the summary."""
         condensed_messages = []
-
-        # Add head messages
-        condensed_messages.extend(head)
-
-        # Add summary as a new message
+        condensed_messages.extend(plan.head)
         summary_message = [TextResult(text=f"Conversation Summary: {summary}")]
         condensed_messages.append(summary_message)
-
-        # Add tail messages
-        if events_from_tail > 0:
-            condensed_messages.extend(message_lists[-events_from_tail:])
+        condensed_messages.extend(plan.tail)
 
         self.logger.info(
             f"Condensed {len(message_lists)} message lists to {len(condensed_messages)} "
-            f"(kept {len(head)} head + 1 summary + {events_from_tail} tail)"
+            f"({plan.description})"
         )
 
         return condensed_messages
 
-    def _generate_summary(self, forgotten_events: list[list[GeneralContentBlock]], previous_summary_content: str = "No events summarized") -> str:
-        """Generate a summary for the given forgotten events."""
+    def _build_summary_prompt(self, forgotten_events: list[list[GeneralContentBlock]], previous_summary_content: str = "No events summarized") -> str:
+        """Build the summarization prompt for the given forgotten events."""
         # Construct prompt for summarization
-        prompt = """You are maintaining a context-aware state summary for an interactive agent. You will be given a list of events corresponding to actions taken by the agent, and the most recent previous summary if one exists. Track:
-
-USER_CONTEXT: (Preserve essential user requirements, goals, and clarifications in concise form)
-
-COMPLETED: (Tasks completed so far, with brief results)
-PENDING: (Tasks that still need to be done)
-CURRENT_STATE: (Current variables, data structures, or relevant state)
-
-For code-specific tasks, also include:
-CODE_STATE: {File paths, function signatures, data structures}
-TESTS: {Failing cases, error messages, outputs}
-CHANGES: {Code edits, variable updates}
-DEPS: {Dependencies, imports, external calls}
-VERSION_CONTROL_STATUS: {Repository state, current branch, PR status, commit history}
+        prompt = SUMMARY_INSTRUCTIONS
 
-PRIORITIZE:
-1. Adapt tracking format to match the actual task type
-2. Capture key user requirements and goals
-3. Distinguish between completed and pending tasks
-4. Keep all sections concise and relevant
-
-SKIP: Tracking irrelevant details for the current task type
-
-Example formats:
-
-For code tasks:
-USER_CONTEXT: Fix FITS card float representation issue
-COMPLETED: Modified mod_float() in card.py, all tests passing
-PENDING: Create PR, update documentation
-CODE_STATE: mod_float() in card.py updated
-TESTS: test_format() passed
-CHANGES: str(val) replaces f"{val:.16G}"
-DEPS: None modified
-VERSION_CONTROL_STATUS: Branch: fix-float-precision, Latest commit: a1b2c3d
+        prompt += self._previous_summary_section(previous_summary_content)
 
-For other tasks:
-USER_CONTEXT: Write 20 haikus based on coin flip results
-COMPLETED: 15 haikus written for results [T,H,T,H,T,H,T,T,H,T,H,T,H,T,H]
-PENDING: 5 more haikus needed
-CURRENT_STATE: Last flip: Heads, Haiku count: 15/20
+        # Add all events that are being forgotten
+        for i, forgotten_event in enumerate(forgotten_events):
+            event_content = self._truncate_content(
+                self._message_list_to_string(forgotten_event)
+            )
+            prompt += f"<EVENT id={i}>\n{event_content}\n</EVENT>\n"
 
-"""
+        prompt += "\nNow summarize the events using the rules above."
+        return prompt
 
-        # Add the previous summary if it exists
+    def _previous_summary_section(self, previous_summary_content: str) -> str:
+        """Format the previous summary, if one exists, for a summarization prompt."""
         previous_summary = (
             previous_summary_content.replace("Conversation Summary: ", "")
             if previous_summary_content != "No events summarized"
             else ""
         )
-        prompt += f"<PREVIOUS SUMMARY>\n{self._truncate_content(previous_summary)}\n</PREVIOUS SUMMARY>\n\n"
+        return f"<PREVIOUS SUMMARY>\n{self._truncate_content(previous_summary)}\n</PREVIOUS SUMMARY>\n\n"
+
+    def _build_reduce_prompt(self, partial_summaries: list[str], previous_summary_content: str = "No events summarized") -> str:
+        """Build the prompt that merges the summaries of consecutive chunks of events."""
+        prompt = SUMMARY_INSTRUCTIONS
+        prompt += self._previous_summary_section(previous_summary_content)
+        for i, partial_summary in enumerate(partial_summaries):
+            prompt += f"<PARTIAL SUMMARY id={i}>\n{partial_summary}\n</PARTIAL SUMMARY>\n"
+
+        prompt += (
+            "\nThe partial summaries cover consecutive chunks of the events, in order. "
+            "Now merge the previous summary and the partial summaries into one summary using the rules above."
+        )
+        return prompt
+
+    def _chunk_events(self, forgotten_events: list[list[GeneralContentBlock]]) -> list[list[list[GeneralContentBlock]]]:
+        """Split the forgotten events into consecutive chunks of at most summary_chunk_tokens.
+
+        An event larger than the bound forms a chunk of its own. Without a
+        bound, all events form a single chunk.
+        """
+        if self.summary_chunk_tokens is None:
+            return [forgotten_events]
+        chunks = []
+        chunk = []
+        chunk_tokens = 0
+        for event in forgotten_events:
+            event_tokens = self.token_counter.count_tokens(
+                self._truncate_content(self._message_list_to_string(event))
+            )
+            if chunk and chunk_tokens + event_tokens > self.summary_chunk_tokens:
+                chunks.append(chunk)
+                chunk = []
+                chunk_tokens = 0
+            chunk.append(event)
+            chunk_tokens += event_tokens
+        if chunk:
+            chunks.append(chunk)
+        return chunks
 
-        # Add all events that are being forgotten
-        for i, forgotten_event in enumerate(forgotten_events):
-            event_content = self._truncate_content(
-                self._message_list_to_string(forgotten_event)
+    def _generate_summary(self, forgotten_events: list[list[GeneralContentBlock]], previous_summary_content: str = "No events summarized") -> str:
+        """Generate a summary for the given forgotten events.
+
+        Large windows are summarized chunk by chunk in parallel threads, then
+        the partial summaries are merged with the previous summary.
+        """
+        chunks = self._chunk_events(forgotten_events)
+        if len(chunks) == 1:
+            prompt = self._build_summary_prompt(forgotten_events, previous_summary_content)
+            return self._request_summary(prompt, forgotten_events)
+
+        with ThreadPoolExecutor(max_workers=self.summary_fan_out) as executor:
+            partial_summaries = list(
+                executor.map(
+                    lambda chunk: self._request_summary(self._build_summary_prompt(chunk), chunk),
+                    chunks,
+                )
             )
-            prompt += f"<EVENT id={i}>\n{event_content}\n</EVENT>\n"
+        prompt = self._build_reduce_prompt(partial_summaries, previous_summary_content)
+        return self._request_summary(prompt, forgotten_events)
 
-        prompt += "\nNow summarize the events using the rules above."
-        
-        # Generate summary using LLM
+    async def _agenerate_summary(self, forgotten_events: list[list[GeneralContentBlock]], previous_summary_content: str = "No events summarized") -> str:
+        """Generate a summary for the given forgotten events with the async client.
+
+        Large windows are summarized chunk by chunk concurrently, at most
+        summary_fan_out at a time, then the partial summaries are merged with
+        the previous summary.
+        """
+        chunks = self._chunk_events(forgotten_events)
+        if len(chunks) == 1:
+            prompt = self._build_summary_prompt(forgotten_events, previous_summary_content)
+            return await self._arequest_summary(prompt, forgotten_events)
+
+        semaphore = asyncio.Semaphore(self.summary_fan_out)
+
+        async def summarize_chunk(chunk: list[list[GeneralContentBlock]]) -> str:
+            async with semaphore:
+                return await self._arequest_summary(self._build_summary_prompt(chunk), chunk)
+
+        partial_summaries = await asyncio.gather(*(summarize_chunk(chunk) for chunk in chunks))
+        prompt = self._build_reduce_prompt(partial_summaries, previous_summary_content)
+        return await self._arequest_summary(prompt, forgotten_events)
+
+    def _request_summary(self, prompt: str, forgotten_events: list[list[GeneralContentBlock]]) -> str:
+        """Send a summarization prompt to the client."""
         try:
-            summary_messages = [[TextPrompt(text=prompt)]]
             model_response, _ = self.client.generate(
-                messages=summary_messages,
+                messages=[[TextPrompt(text=prompt)]],
                 max_tokens=SUMMARY_MAX_TOKENS,
                 thinking_tokens=0,
             )
-            summary = ""
-            for message in model_response:
-                if isinstance(message, TextResult):
-                    summary += message.text
+        except Exception as e:
+            return self._summary_failure(forgotten_events, e)
+        return self._summary_from_response(forgotten_events, model_response)
 
-            self.logger.info(
-                f"Generated summary for {len(forgotten_events)} forgotten events"
+    async def _arequest_summary(self, prompt: str, forgotten_events: list[list[GeneralContentBlock]]) -> str:
+        """Send a summarization prompt to the async client."""
+        try:
+            model_response, _ = await self.client.agenerate(
+                messages=[[TextPrompt(text=prompt)]],
+                max_tokens=SUMMARY_MAX_TOKENS,
+                thinking_tokens=0,
             )
-
         except Exception as e:
-            self.logger.error(f"Failed to generate summary: {e}")
-            summary = f"Failed to summarize {len(forgotten_events)} events due to error: {str(e)}"
+            return self._summary_failure(forgotten_events, e)
+        return self._summary_from_response(forgotten_events, model_response)
+
+    def _summary_from_response(self, forgotten_events: list[list[GeneralContentBlock]], model_response: list) -> str:
+        """Join the text of a summarization response."""
+        summary = ""
+        for message in model_response:
+            if isinstance(message, TextResult):
+                summary += message.text
 
+        self.logger.info(
+            f"Generated summary for {len(forgotten_events)} forgotten events"
+        )
         return summary
+
+    def _summary_failure(self, forgotten_events: list[list[GeneralContentBlock]], error: Exception) -> str:
+        """Summary text used when the summarization request fails."""
+        self.logger.error(f"Failed to generate summary: {error}")
+        return f"Failed to summarize {len(forgotten_events)} events due to error: {str(error)}"
@@ -0,0 +1,203 @@
+import logging
+from typing import Any, Hashable, Optional
+
+from ii_agent.llm.base import (
+    AnthropicRedactedThinkingBlock,
+    AnthropicThinkingBlock,
+    GeneralContentBlock,
+    ImageBlock,
+    TextPrompt,
+    TextResult,
+    ToolFormattedResult,
+)
+from ii_agent.llm.context_manager.base import ContextManager
+from ii_agent.llm.token_counter import TokenCounter
+from ii_agent.utils.constants import TOKEN_BUDGET
+
+
+def _format_size(chars: int) -> str:
+    return f"{chars / 1000:.0f}k" if chars >= 1000 else str(chars)
+
+
+class ObservationMaskingContextManager(ContextManager):
+    """A context manager that elides old observations without calling an LLM.
+
+    Outputs of all but the last ``keep_last_observations`` tool results are
+    replaced with placeholders such as "[output of bash elided, 12k chars]".
+    Images and thinking blocks before those results are elided as well. Tool
+    calls and results keep their ids, so every call still has its result.
+
+    With a ``fallback`` context manager, for example an
+    LLMSummarizingContextManager, masking runs first and the fallback only
+    truncates when the masked history still needs it. Without one, a
+    history whose recent turns alone exceed the budget stays over it.
+    """
+
+    def __init__(
+        self,
+        token_counter: TokenCounter,
+        logger: logging.Logger,
+        token_budget: int = TOKEN_BUDGET,
+        keep_last_observations: int = 5,
+        min_masked_chars: int = 200,
+        fallback: Optional[ContextManager] = None,
+    ):
+        if keep_last_observations < 0:
+            raise ValueError(
+                f"keep_last_observations ({keep_last_observations}) cannot be negative"
+            )
+
+        super().__init__(token_counter, logger, token_budget)
+        self.keep_last_observations = keep_last_observations
+        self.min_masked_chars = min_masked_chars
+        self.fallback = fallback
+
+    def should_truncate(
+        self,
+        message_lists: list[list[GeneralContentBlock]],
+        token_count: int | None = None,
+    ) -> bool:
+        """Check if the token budget, or the fallback's own limits, are exceeded."""
+        if super().should_truncate(message_lists, token_count):
+            return True
+        return self.fallback is not None and self.fallback.should_truncate(
+            message_lists, token_count
+        )
+
+    def apply_truncation(
+        self, message_lists: list[list[GeneralContentBlock]], key: Hashable = None
+    ) -> list[list[GeneralContentBlock]]:
+        """Mask old observations, then let the fallback truncate if still needed."""
+        masked_message_lists = self.mask_observations(message_lists)
+        if self.fallback is not None and self.fallback.should_truncate(
+            masked_message_lists
+        ):
+            return self.fallback.apply_truncation(masked_message_lists, key=key)
+        return masked_message_lists
+
+    async def apply_truncation_async(
+        self, message_lists: list[list[GeneralContentBlock]], key: Hashable = None
+    ) -> list[list[GeneralContentBlock]]:
+        """Mask old observations, then let the fallback truncate if still needed."""
+        masked_message_lists = self.mask_observations(message_lists)
+        if self.fallback is not None and self.fallback.should_truncate(
+            masked_message_lists
+        ):
+            return await self.fallback.apply_truncation_async(
+                masked_message_lists, key=key
+            )
+        return masked_message_lists
+
+    def prepare_truncation(
+        self,
+        message_lists: list[list[GeneralContentBlock]],
+        token_count: int,
+        key: Hashable = None,
+    ) -> None:
+        if self.fallback is not None:
+            self.fallback.prepare_truncation(message_lists, token_count, key=key)
+
+    def cancel_pending_truncation(self, key: Hashable = None) -> None:
+        if self.fallback is not None:
+            self.fallback.cancel_pending_truncation(key=key)
+
+    def mask_observations(
+        self, message_lists: list[list[GeneralContentBlock]]
+    ) -> list[list[GeneralContentBlock]]:
+        """Elide the observations before the last ``keep_last_observations`` tool results.
+
+        Message lists without anything to elide are returned as they are.
+        """
+        keep_from = self._find_keep_from_index(message_lists)
+        masked_message_lists = []
+        masked_count = 0
+        for i, message_list in enumerate(message_lists):
+            if i >= keep_from:
+                masked_message_lists.append(message_list)
+                continue
+            masked_list = self._mask_message_list(message_list)
+            if masked_list is not message_list:
+                masked_count += 1
+            masked_message_lists.append(masked_list)
+
+        if masked_count == 0:
+            return message_lists
+        self.logger.info(
+            f"Masked observations in {masked_count} message lists, "
+            f"kept the last {self.keep_last_observations} tool results"
+        )
+        return masked_message_lists
+
+    def _find_keep_from_index(
+        self, message_lists: list[list[GeneralContentBlock]]
+    ) -> int:
+        """Find the index of the first message list whose observations are kept."""
+        remaining = self.keep_last_observations
+        for i in range(len(message_lists) - 1, -1, -1):
+            if any(
+                isinstance(block, ToolFormattedResult) for block in message_lists[i]
+            ):
+                if remaining == 0:
+                    return i + 1
+                remaining -= 1
+        return 0
+
+    def _mask_message_list(
+        self, message_list: list[GeneralContentBlock]
+    ) -> list[GeneralContentBlock]:
+        """Return the message list with its observations elided."""
+        masked_list = []
+        changed = False
+        for block in message_list:
+            if isinstance(
+                block, (AnthropicThinkingBlock, AnthropicRedactedThinkingBlock)
+            ):
+                changed = True
+                continue
+            masked_block = self._mask_block(block)
+            changed = changed or masked_block is not block
+            masked_list.append(masked_block)
+
+        if not changed:
+            return message_list
+        if not masked_list:
+            # The turn only held thinking; keep a placeholder so it is not empty
+            masked_list.append(TextResult(text="[thinking elided]"))
+        return masked_list
+
+    def _mask_block(self, block: GeneralContentBlock) -> GeneralContentBlock:
+        if isinstance(block, ImageBlock):
+            return TextPrompt(text="[image elided]")
+        if not isinstance(block, ToolFormattedResult):
+            return block
+
+        chars, images = self._measure_output(block.tool_output)
+        if chars < self.min_masked_chars and images == 0:
+            return block
+        placeholder = (
+            f"[output of {block.tool_name} elided, {_format_size(chars)} chars"
+        )
+        if images:
+            placeholder += f", {images} image{'s' if images > 1 else ''}"
+        placeholder += "]"
+        return ToolFormattedResult(
+            tool_call_id=block.tool_call_id,
+            tool_name=block.tool_name,
+            tool_output=placeholder,
+        )
+
+    @staticmethod
+    def _measure_output(tool_output: list[dict[str, Any]] | str) -> tuple[int, int]:
+        """Count the characters and images of a tool output."""
+        if isinstance(tool_output, str):
+            return len(tool_output), 0
+        chars = 0
+        images = 0
+        for item in tool_output:
+            if isinstance(item, dict) and item.get("type") == "image":
+                images += 1
+            elif isinstance(item, dict) and item.get("type") == "text":
+                chars += len(item.get("text", ""))
+            else:
+                chars += len(str(item))
+        return chars, images
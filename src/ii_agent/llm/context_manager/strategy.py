@@ -0,0 +1,81 @@
+import logging
+from typing import Optional
+
+from ii_agent.llm.base import LLMClient
+from ii_agent.llm.context_manager.base import ContextManager
+from ii_agent.llm.context_manager.llm_summarizing import LLMSummarizingContextManager
+from ii_agent.llm.context_manager.observation_masking import (
+    ObservationMaskingContextManager,
+)
+from ii_agent.llm.token_counter import TokenCounter
+from ii_agent.utils.constants import TOKEN_BUDGET
+
+# "mask" never calls the LLM, but a history whose recent turns alone exceed
+# the budget stays over it; "mask-then-summarize" summarizes in that case.
+CONTEXT_STRATEGIES = ("summarize", "mask", "mask-then-summarize")
+
+
+def create_context_manager(
+    strategy: str,
+    client: LLMClient,
+    token_counter: TokenCounter,
+    logger: logging.Logger,
+    token_budget: int = TOKEN_BUDGET,
+    presummarize_threshold: Optional[float] = None,
+    summary_chunk_tokens: Optional[int] = None,
+    summary_fan_out: int = 4,
+    keep_observations: int = 5,
+) -> ContextManager:
+    """Create the context manager of a context strategy.
+
+    Args:
+        strategy: "summarize" to summarize old events with the LLM, "mask"
+            to only mask old tool outputs, or "mask-then-summarize" to mask
+            them first and summarize only if the masked history is still too
+            large.
+        client: The client summaries are requested from.
+        token_counter: Counts the tokens of the history.
+        logger: Logger of the agent.
+        token_budget: Tokens the history may take.
+        presummarize_threshold: Fraction of the budget at which summarization
+            starts in the background, if any.
+        summary_chunk_tokens: Token bound of the chunks of a map-reduce
+            summary, if any.
+        summary_fan_out: Most chunks summarized at once.
+        keep_observations: Recent tool results kept intact when masking.
+
+    Raises:
+        ValueError: If the strategy is unknown.
+    """
+    if strategy not in CONTEXT_STRATEGIES:
+        raise ValueError(
+            f"Unknown context strategy: {strategy}, expected one of {', '.join(CONTEXT_STRATEGIES)}"
+        )
+
+    if strategy == "mask":
+        return ObservationMaskingContextManager(
+            token_counter=token_counter,
+            logger=logger,
+            token_budget=token_budget,
+            keep_last_observations=keep_observations,
+        )
+
+    summarizer = LLMSummarizingContextManager(
+        client=client,
+        token_counter=token_counter,
+        logger=logger,
+        token_budget=token_budget,
+        presummarize_threshold=presummarize_threshold,
+        summary_chunk_tokens=summary_chunk_tokens,
+        summary_fan_out=summary_fan_out,
+    )
+    if strategy == "summarize":
+        return summarizer
+
+    return ObservationMaskingContextManager(
+        token_counter=token_counter,
+        logger=logger,
+        token_budget=token_budget,
+        keep_last_observations=keep_observations,
+        fallback=summarizer,
+    )
@@ -0,0 +1,132 @@
+"""Helpers for converting history turns into provider request formats."""
+
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+from ii_agent.llm.base import GeneralContentBlock
+
+
+class BlockConverters:
+    """Dispatch table from content block types to converter functions.
+
+    Blocks are looked up by their exact type, then by the types they inherit
+    from, then by module and class name, so that blocks created before a
+    module reload still find their converter.
+    """
+
+    def __init__(self, converters: dict[type, Callable[[Any], Any]]):
+        self._by_type = dict(converters)
+        self._by_name = {
+            (cls.__module__, cls.__qualname__): converter
+            for cls, converter in converters.items()
+        }
+
+    def get(self, block_type: type) -> Optional[Callable[[Any], Any]]:
+        converter = self._by_type.get(block_type)
+        if converter is not None:
+            return converter
+        for cls in block_type.__mro__:
+            converter = self._by_type.get(cls) or self._by_name.get(
+                (cls.__module__, cls.__qualname__)
+            )
+            if converter is not None:
+                self._by_type[block_type] = converter
+                return converter
+        return None
+
+    def convert(self, block: Any) -> Any:
+        """Convert a block.
+
+        Raises:
+            ValueError: If no converter handles the block's type.
+        """
+        converter = self.get(type(block))
+        if converter is None:
+            raise ValueError(f"Unknown message type: {type(block)}")
+        return converter(block)
+
+
+def estimate_size(value: Any) -> int:
+    """Roughly estimate the bytes held by the strings of a nested value.
+
+    Strings and bytes count their length; dicts, sequences and objects count
+    what they contain. Shared strings are counted each time they appear.
+    """
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value)
+    attributes = getattr(value, "__dict__", None)
+    if attributes is not None:
+        return estimate_size(attributes)
+    return 0
+
+
+class TurnConversionCache:
+    """Memoizes the provider format of history turns.
+
+    Histories only append turns, and the lists returned by
+    ``MessageHistory.get_messages_for_llm`` reuse the turn lists of earlier
+    calls, so each turn is converted once and only new turns cost work on
+    later requests. An entry is keyed by the identity of the turn list and is
+    reused only while the turn still holds the same blocks. Clients
+    are shared across sessions, so the cache is thread safe and bounded both
+    in turns and in the estimated bytes of the turns and their conversions,
+    which keeps images of ended sessions from piling up.
+
+    Converted values are shared between requests and must not be modified.
+    """
+
+    def __init__(self, max_turns: int = 4096, max_bytes: int = 64 * 1024 * 1024):
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        # Insertion ordered; the oldest conversions are evicted first
+        self._entries: dict[
+            tuple[int, Hashable],
+            tuple[list[GeneralContentBlock], list[GeneralContentBlock], Any, int],
+        ] = {}
+        self.size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def convert(
+        self,
+        turn: list[GeneralContentBlock],
+        convert_turn: Callable[[list[GeneralContentBlock]], Any],
+        variant: Hashable = None,
+    ) -> Any:
+        """Return the converted turn, converting it on first use.
+
+        Args:
+            turn: The turn to convert.
+            convert_turn: Converts a turn into the provider format.
+            variant: Distinguishes conversions of one turn that depend on
+                context, such as its position in the history.
+        """
+        key = (id(turn), variant)
+        # Dict reads are atomic, so hits skip the lock
+        entry = self._entries.get(key)
+        # List comparison checks identity before equality, so an unchanged
+        # turn is matched without comparing block contents
+        if entry is not None and entry[0] is turn and entry[1] == turn:
+            self.hits += 1
+            return entry[2]
+
+        converted = convert_turn(turn)
+        size = estimate_size(turn) + estimate_size(converted)
+        with self._lock:
+            self.misses += 1
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[3]
+            if size > self.max_bytes:
+                return converted
+            # The entry holds the turn, so its id is not reused while cached
+            self._entries[key] = (turn, list(turn), converted, size)
+            self.size += size
+            while len(self._entries) > self.max_turns or self.size > self.max_bytes:
+                self.size -= self._entries.pop(next(iter(self._entries)))[3]
+        return converted
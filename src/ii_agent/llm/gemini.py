@@ -1,13 +1,16 @@
+import json
 import os
 import time
 import random
 
-from typing import Any, Tuple
+from typing import Any, AsyncIterator, Iterator, Tuple
 from google import genai
 from google.genai import types, errors
 from ii_agent.llm.base import (
     LLMClient,
+    LLMStreamEvent,
     AssistantContentBlock,
+    GeneralContentBlock,
     ToolParam,
     TextPrompt,
     ToolCall,
@@ -16,6 +19,8 @@ from ii_agent.llm.base import (
     ToolFormattedResult,
     ImageBlock,
 )
+from ii_agent.llm.conversion import BlockConverters, TurnConversionCache
+from ii_agent.llm.rate_limiter import get_rate_limiter_registry
 
 def generate_tool_call_id() -> str:
     """Generate a unique ID for a tool call.
@@ -28,10 +33,88 @@ def generate_tool_call_id() -> str:
     return f"call_{timestamp}_{random_num}"
 
 
+def _convert_text(block: TextPrompt | TextResult) -> list[types.Part]:
+    return [types.Part(text=block.text)]
+
+
+def _convert_image(block: ImageBlock) -> list[types.Part]:
+    return [
+        types.Part.from_bytes(
+            data=block.source["data"],
+            mime_type=block.source["media_type"],
+        )
+    ]
+
+
+def _convert_tool_call(block: ToolCall) -> list[types.Part]:
+    return [
+        types.Part.from_function_call(
+            name=block.tool_name,
+            args=block.tool_input,
+        )
+    ]
+
+
+def _convert_tool_result(block: ToolFormattedResult) -> list[types.Part]:
+    if isinstance(block.tool_output, str):
+        return [
+            types.Part.from_function_response(
+                name=block.tool_name,
+                response={"result": block.tool_output}
+            )
+        ]
+    # Handle tool return images. See: https://discuss.ai.google.dev/t/returning-images-from-function-calls/3166/6
+    parts = []
+    for item in block.tool_output:
+        if item['type'] == 'text':
+            parts.append(types.Part(text=item['text']))
+        elif item['type'] == 'image':
+            parts.append(types.Part.from_bytes(
+                data=item['source']['data'],
+                mime_type=item['source']['media_type']
+            ))
+    return parts
+
+
+BLOCK_CONVERTERS = BlockConverters(
+    {
+        TextPrompt: _convert_text,
+        ImageBlock: _convert_image,
+        TextResult: _convert_text,
+        ToolCall: _convert_tool_call,
+        ToolFormattedResult: _convert_tool_result,
+    }
+)
+
+
+def _convert_parts(message_list: list[GeneralContentBlock]) -> list[types.Part]:
+    """Convert one turn of the history into Gemini parts."""
+    return [
+        part for message in message_list for part in BLOCK_CONVERTERS.convert(message)
+    ]
+
+
+def _convert_tools(tools: list[ToolParam]) -> list[types.Tool] | None:
+    if not tools:
+        return None
+    return [
+        types.Tool(
+            function_declarations=[
+                {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "parameters": tool.input_schema,
+                }
+                for tool in tools
+            ]
+        )
+    ]
+
+
 class GeminiDirectClient(LLMClient):
     """Use Gemini models via first party API."""
 
-    def __init__(self, model_name: str, max_retries: int = 2, project_id: None | str = None, region: None | str = None):
+    def __init__(self, model_name: str, max_retries: int = 4, project_id: None | str = None, region: None | str = None):
         self.model_name = model_name
 
         if project_id and region:
@@ -45,8 +128,15 @@ class GeminiDirectClient(LLMClient):
             print("====== Using Gemini directly ======")
             
         self.max_retries = max_retries
+        # Each Vertex AI region has its own quota
+        self.rate_limiter = get_rate_limiter_registry().get(
+            "gemini", model_name, region if project_id and region else ""
+        )
+        self.conversion_cache = TurnConversionCache()
+        # Agents send the same tool list every turn, so it is converted once
+        self.tool_definitions = TurnConversionCache(max_turns=64)
 
-    def generate(
+    def _build_request_params(
         self,
         messages: LLMMessages,
         max_tokens: int,
@@ -54,63 +144,22 @@ class GeminiDirectClient(LLMClient):
         temperature: float = 0.0,
         tools: list[ToolParam] = [],
         tool_choice: dict[str, str] | None = None,
-    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
-        
+    ) -> dict[str, Any]:
+        """Build the keyword arguments of a Gemini generate_content request."""
+        # Reuse the conversions of turns sent in earlier requests; the role
+        # follows from the turn's position, so it is part of the cache key
         gemini_messages = []
         for idx, message_list in enumerate(messages):
             role = "user" if idx % 2 == 0 else "model"
-            message_content_list = []
-            for message in message_list:
-                if isinstance(message, TextPrompt):
-                    message_content = types.Part(text=message.text)
-                elif isinstance(message, ImageBlock):
-                    message_content = types.Part.from_bytes(
-                            data=message.source["data"],
-                            mime_type=message.source["media_type"],
-                        )
-                elif isinstance(message, TextResult):
-                    message_content = types.Part(text=message.text)
-                elif isinstance(message, ToolCall):
-                    message_content = types.Part.from_function_call(
-                        name=message.tool_name,
-                        args=message.tool_input,
-                    )
-                elif isinstance(message, ToolFormattedResult):
-                    if isinstance(message.tool_output, str):
-                        message_content = types.Part.from_function_response(
-                            name=message.tool_name,
-                            response={"result": message.tool_output}
-                        )
-                    # Handle tool return images. See: https://discuss.ai.google.dev/t/returning-images-from-function-calls/3166/6
-                    elif isinstance(message.tool_output, list):
-                        message_content = []
-                        for item in message.tool_output:
-                            if item['type'] == 'text':
-                                message_content.append(types.Part(text=item['text']))
-                            elif item['type'] == 'image':
-                                message_content.append(types.Part.from_bytes(
-                                    data=item['source']['data'],
-                                    mime_type=item['source']['media_type']
-                                ))
-                else:
-                    raise ValueError(f"Unknown message type: {type(message)}")
-                
-                if isinstance(message_content, list):
-                    message_content_list.extend(message_content)
-                else:
-                    message_content_list.append(message_content)
-            
-            gemini_messages.append(types.Content(role=role, parts=message_content_list))
-        
-        tool_declarations = [
-            {
-                "name": tool.name,
-                "description": tool.description,
-                "parameters": tool.input_schema,
-            }
-            for tool in tools
-        ]
-        tool_params = [types.Tool(function_declarations=tool_declarations)] if tool_declarations else None
+            gemini_messages.append(
+                self.conversion_cache.convert(
+                    message_list,
+                    lambda turn: types.Content(role=role, parts=_convert_parts(turn)),
+                    variant=role,
+                )
+            )
+
+        tool_params = self.tool_definitions.convert(tools, _convert_tools)
 
         mode = None
         if not tool_choice:
@@ -122,52 +171,297 @@ class GeminiDirectClient(LLMClient):
         else:
             raise ValueError(f"Unknown tool_choice type for Gemini: {tool_choice['type']}")
 
+        return dict(
+            model=self.model_name,
+            config=types.GenerateContentConfig(
+                tools=tool_params,
+                system_instruction=system_prompt,
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+                tool_config={'function_calling_config': {'mode': mode}}
+                ),
+            contents=gemini_messages,
+        )
+
+    def _convert_response(
+        self, text: str | None, function_calls: list[types.FunctionCall]
+    ) -> list[AssistantContentBlock]:
+        """Convert response text and function calls into internal blocks."""
+        internal_messages = []
+        if text:
+            internal_messages.append(TextResult(text=text))
+
+        for fn_call in function_calls:
+            response_message_content = ToolCall(
+                tool_call_id=fn_call.id if fn_call.id else generate_tool_call_id(),
+                tool_name=fn_call.name,
+                tool_input=fn_call.args,
+            )
+            internal_messages.append(response_message_content)
+
+        return internal_messages
+
+    def _response_metadata(self, response: Any) -> dict[str, Any]:
+        """Build the metadata of a response (or of the last streamed chunk)."""
+        return {
+            "raw_response": response,
+            "input_tokens": response.usage_metadata.prompt_token_count,
+            "output_tokens": response.usage_metadata.candidates_token_count,
+        }
+
+    def _consume_stream_chunk(
+        self,
+        chunk: Any,
+        text_parts: list[str],
+        function_calls: list[types.FunctionCall],
+    ) -> list[LLMStreamEvent]:
+        """Accumulate one streamed chunk and return the deltas it carries."""
+        stream_events = []
+        if chunk.text:
+            text_parts.append(chunk.text)
+            stream_events.append(LLMStreamEvent(type="text", delta=chunk.text))
+        for fn_call in chunk.function_calls or []:
+            function_calls.append(fn_call)
+            stream_events.append(
+                LLMStreamEvent(
+                    type="tool_use",
+                    index=len(function_calls) - 1,
+                    delta=json.dumps(fn_call.args),
+                    tool_call_id=fn_call.id,
+                    tool_name=fn_call.name,
+                )
+            )
+        return stream_events
+
+    def generate(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        request_params = self._build_request_params(
+            messages,
+            max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+        )
+
+        input_tokens = self.rate_limiter.estimate_input_tokens(messages, system_prompt)
         for retry in range(self.max_retries):
+            # Waits for this model's shared quota and any pause after errors
+            reservation = self.rate_limiter.acquire_sync(input_tokens, max_tokens)
             try:
-                response = self.client.models.generate_content(
-                    model=self.model_name,
-                    config=types.GenerateContentConfig(
-                        tools=tool_params,
-                        system_instruction=system_prompt,
-                        temperature=temperature,
-                        max_output_tokens=max_tokens,
-                        tool_config={'function_calling_config': {'mode': mode}}
-                        ),
-                    contents=gemini_messages,
-                )
+                response = self.client.models.generate_content(**request_params)
                 break
             except errors.APIError as e:
                 # 503: The service may be temporarily overloaded or down.
                 # 429: The request was throttled.
                 if e.code in [503, 429]:
+                    delay = self.rate_limiter.throttle(reservation, e)
                     if retry == self.max_retries - 1:
                         print(f"Failed Gemini request after {retry + 1} retries")
                         raise e
                     else:
                         print(f"Error: {e}")
-                        print(f"Retrying Gemini request: {retry + 1}/{self.max_retries}")
-                        # Sleep 12-18 seconds with jitter to avoid thundering herd.
-                        time.sleep(15 * random.uniform(0.8, 1.2))
+                        print(
+                            f"Retrying Gemini request in {delay:.1f}s: {retry + 1}/{self.max_retries}"
+                        )
                 else:
                     raise e
 
-        internal_messages = []
-        if response.text:
-            internal_messages.append(TextResult(text=response.text))
+        message_metadata = self._response_metadata(response)
+        self.rate_limiter.settle(reservation, message_metadata)
+        return self._convert_response(
+            response.text, response.function_calls or []
+        ), message_metadata
 
-        if response.function_calls:
-            for fn_call in response.function_calls:
-                response_message_content = ToolCall(
-                    tool_call_id=fn_call.id if fn_call.id else generate_tool_call_id(),
-                    tool_name=fn_call.name,
-                    tool_input=fn_call.args,
+    def generate_stream(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Iterator[LLMStreamEvent]:
+        """Generate responses, yielding text and tool-use deltas.
+
+        Gemini streams function calls whole, so each tool-use delta carries
+        the complete JSON input of one call. Requests are only retried while
+        nothing has been yielded yet.
+        """
+        request_params = self._build_request_params(
+            messages,
+            max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+        )
+
+        text_parts: list[str] = []
+        function_calls: list[types.FunctionCall] = []
+        chunk = None
+        input_tokens = self.rate_limiter.estimate_input_tokens(messages, system_prompt)
+        for retry in range(self.max_retries):
+            # Waits for this model's shared quota and any pause after errors
+            reservation = self.rate_limiter.acquire_sync(input_tokens, max_tokens)
+            started = False
+            try:
+                for chunk in self.client.models.generate_content_stream(
+                    **request_params
+                ):
+                    for stream_event in self._consume_stream_chunk(
+                        chunk, text_parts, function_calls
+                    ):
+                        started = True
+                        yield stream_event
+                break
+            except errors.APIError as e:
+                # 503: The service may be temporarily overloaded or down.
+                # 429: The request was throttled.
+                if e.code in [503, 429] and not started:
+                    delay = self.rate_limiter.throttle(reservation, e)
+                    if retry == self.max_retries - 1:
+                        print(f"Failed Gemini request after {retry + 1} retries")
+                        raise e
+                    else:
+                        print(f"Error: {e}")
+                        print(
+                            f"Retrying Gemini request in {delay:.1f}s: {retry + 1}/{self.max_retries}"
+                        )
+                else:
+                    raise e
+
+        assert chunk is not None
+        message_metadata = self._response_metadata(chunk)
+        self.rate_limiter.settle(reservation, message_metadata)
+        yield LLMStreamEvent(
+            type="complete",
+            response=self._convert_response("".join(text_parts), function_calls),
+            metadata=message_metadata,
+        )
+
+    async def agenerate(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        """Generate responses with the async Gemini client.
+
+        Same as ``generate``, but waits between retries without blocking the
+        event loop.
+        """
+        request_params = self._build_request_params(
+            messages,
+            max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+        )
+
+        input_tokens = self.rate_limiter.estimate_input_tokens(messages, system_prompt)
+        for retry in range(self.max_retries):
+            # Waits for this model's shared quota and any pause after errors
+            reservation = await self.rate_limiter.acquire(input_tokens, max_tokens)
+            try:
+                response = await self.client.aio.models.generate_content(**request_params)
+                break
+            except errors.APIError as e:
+                # 503: The service may be temporarily overloaded or down.
+                # 429: The request was throttled.
+                if e.code in [503, 429]:
+                    delay = self.rate_limiter.throttle(reservation, e)
+                    if retry == self.max_retries - 1:
+                        print(f"Failed Gemini request after {retry + 1} retries")
+                        raise e
+                    else:
+                        print(f"Error: {e}")
+                        print(
+                            f"Retrying Gemini request in {delay:.1f}s: {retry + 1}/{self.max_retries}"
+                        )
+                else:
+                    raise e
+
+        message_metadata = self._response_metadata(response)
+        self.rate_limiter.settle(reservation, message_metadata)
+        return self._convert_response(
+            response.text, response.function_calls or []
+        ), message_metadata
+
+    async def agenerate_stream(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        """Async counterpart of ``generate_stream``."""
+        request_params = self._build_request_params(
+            messages,
+            max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+        )
+
+        text_parts: list[str] = []
+        function_calls: list[types.FunctionCall] = []
+        chunk = None
+        input_tokens = self.rate_limiter.estimate_input_tokens(messages, system_prompt)
+        for retry in range(self.max_retries):
+            # Waits for this model's shared quota and any pause after errors
+            reservation = await self.rate_limiter.acquire(input_tokens, max_tokens)
+            started = False
+            try:
+                stream = await self.client.aio.models.generate_content_stream(
+                    **request_params
                 )
-                internal_messages.append(response_message_content)
+                async for chunk in stream:
+                    for stream_event in self._consume_stream_chunk(
+                        chunk, text_parts, function_calls
+                    ):
+                        started = True
+                        yield stream_event
+                break
+            except errors.APIError as e:
+                # 503: The service may be temporarily overloaded or down.
+                # 429: The request was throttled.
+                if e.code in [503, 429] and not started:
+                    delay = self.rate_limiter.throttle(reservation, e)
+                    if retry == self.max_retries - 1:
+                        print(f"Failed Gemini request after {retry + 1} retries")
+                        raise e
+                    else:
+                        print(f"Error: {e}")
+                        print(
+                            f"Retrying Gemini request in {delay:.1f}s: {retry + 1}/{self.max_retries}"
+                        )
+                else:
+                    raise e
 
-        message_metadata = {
-            "raw_response": response,
-            "input_tokens": response.usage_metadata.prompt_token_count,
-            "output_tokens": response.usage_metadata.candidates_token_count,
-        }
-        
-        return internal_messages, message_metadata
\ No newline at end of file
+        assert chunk is not None
+        message_metadata = self._response_metadata(chunk)
+        self.rate_limiter.settle(reservation, message_metadata)
+        yield LLMStreamEvent(
+            type="complete",
+            response=self._convert_response("".join(text_parts), function_calls),
+            metadata=message_metadata,
+        )
@@ -0,0 +1,126 @@
+"""Estimate image token costs from the image header, without decoding pixels."""
+
+import base64
+import binascii
+import struct
+from collections import OrderedDict
+from typing import Any, Optional
+
+# Tokens charged when the image size cannot be read from its header.
+DEFAULT_IMAGE_TOKENS = 1500
+# Pixels per token in the provider's image token formula.
+PIXELS_PER_TOKEN = 750
+
+# Base64 characters decoded at first; JPEG headers may need more.
+_INITIAL_PREFIX = 64
+_MAX_PREFIX = 1 << 20
+
+
+def _decode_prefix(data: str, length: int) -> bytes:
+    """Decode the first ``length`` base64 characters (rounded down to a quad)."""
+    prefix = data[: length - length % 4]
+    try:
+        return base64.b64decode(prefix)
+    except (binascii.Error, ValueError):
+        return b""
+
+
+def _png_size(header: bytes) -> Optional[tuple[int, int]]:
+    if len(header) >= 24 and header[12:16] == b"IHDR":
+        return struct.unpack(">II", header[16:24])
+    return None
+
+
+def _webp_size(header: bytes) -> Optional[tuple[int, int]]:
+    chunk = header[12:16]
+    if chunk == b"VP8 " and len(header) >= 30:
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(header) >= 25:
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(header) >= 30:
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def _jpeg_size(header: bytes) -> tuple[Optional[tuple[int, int]], bool]:
+    """Return the JPEG frame size and whether more bytes are needed to find it."""
+    offset = 2
+    while offset + 4 <= len(header):
+        if header[offset] != 0xFF:
+            return None, False
+        marker = header[offset + 1]
+        if marker == 0xFF:  # Fill byte
+            offset += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:  # No length
+            offset += 2
+            continue
+        (segment_length,) = struct.unpack(">H", header[offset + 2 : offset + 4])
+        # Start-of-frame markers, excluding DHT, JPG and DAC
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if offset + 9 > len(header):
+                return None, True
+            height, width = struct.unpack(">HH", header[offset + 5 : offset + 9])
+            return (width, height), False
+        offset += 2 + segment_length
+    return None, True
+
+
+def image_size_from_base64(data: str) -> Optional[tuple[int, int]]:
+    """Read (width, height) of a base64 PNG, JPEG or WebP image from its header.
+
+    Only a prefix of the data is decoded: a few dozen bytes for PNG and WebP,
+    and up to the start-of-frame segment for JPEG.
+    """
+    header = _decode_prefix(data, _INITIAL_PREFIX)
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return _png_size(header)
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return _webp_size(header)
+    if header[:2] == b"\xff\xd8":
+        length = _INITIAL_PREFIX
+        while True:
+            size, needs_more = _jpeg_size(header)
+            if not needs_more or length >= min(len(data), _MAX_PREFIX):
+                return size
+            length *= 4
+            header = _decode_prefix(data, length)
+    return None
+
+
+class ImageTokenEstimator:
+    """Estimates image tokens as (width * height) / 750 from the image header.
+
+    Estimates are cached per image in a small LRU keyed by the base64 string,
+    whose hash Python computes once per string object, so histories that keep
+    the same screenshots are measured in constant time per image.
+    """
+
+    def __init__(self, cache_size: int = 256):
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, int] = OrderedDict()
+
+    def estimate(self, source: dict[str, Any]) -> int:
+        """Estimate the tokens of an image from its Anthropic-style source."""
+        data = source.get("data")
+        if not isinstance(data, str):
+            return DEFAULT_IMAGE_TOKENS
+        tokens = self._cache.get(data)
+        if tokens is not None:
+            self._cache.move_to_end(data)
+            return tokens
+
+        size = image_size_from_base64(data)
+        if size is None:
+            tokens = DEFAULT_IMAGE_TOKENS
+        else:
+            width, height = size
+            tokens = int((width * height) / PIXELS_PER_TOKEN)
+        self._cache[data] = tokens
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return tokens
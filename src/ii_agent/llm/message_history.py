@@ -16,6 +16,7 @@ from ii_agent.llm.base import (
     ToolCallParameters,
     ToolFormattedResult,
     ImageBlock,
+    AnthropicThinkingBlock,
 )
 from ii_agent.llm.context_manager.base import ContextManager
 
@@ -24,11 +25,80 @@ class MessageHistory:
     """Stores the sequence of messages in a dialog."""
 
     def __init__(self, context_manager: ContextManager):
+        # The context manager may be shared with other histories, so it keeps
+        # its state for this one under id(self)
         self._context_manager = context_manager
         self._message_lists: list[list[GeneralContentBlock]] = []
         self._last_user_prompt_index: int | None = (
             None  # Track the last user prompt index
         )
+        # Token accounting: each block is counted once, when it enters the
+        # history. Blocks are dataclasses and not hashable, so the cache is
+        # keyed by id() and keeps the block to guard against id reuse.
+        self._block_tokens: dict[int, tuple[GeneralContentBlock, int]] = {}
+        # (tokens without thinking, thinking tokens) of each turn
+        self._turn_tokens: list[tuple[int, int]] = []
+        self._total_tokens = 0  # sum of the non-thinking tokens of all turns
+        # Set when an appended turn may have left tool calls without results
+        # (or results without calls), so that truncate() restores integrity.
+        self._needs_integrity_check = False
+
+    def _count_turn(
+        self,
+        turn: list[GeneralContentBlock],
+        known_blocks: dict[int, tuple[GeneralContentBlock, int]],
+    ) -> tuple[int, int]:
+        """Count a turn, reusing the counts of blocks in ``known_blocks``."""
+        tokens = 0
+        thinking_tokens = 0
+        for block in turn:
+            cached = known_blocks.get(id(block))
+            if cached is None or cached[0] is not block:
+                cached = (block, self._context_manager.count_block_tokens(block))
+            self._block_tokens[id(block)] = cached
+            if isinstance(block, AnthropicThinkingBlock):
+                thinking_tokens += cached[1]
+            else:
+                tokens += cached[1]
+        return tokens, thinking_tokens
+
+    def _append_turn(self, turn: list[GeneralContentBlock]):
+        """Append a turn and add its tokens to the running total."""
+        if self._message_lists:
+            pending_ids = {
+                block.tool_call_id
+                for block in self._message_lists[-1]
+                if isinstance(block, ToolCall)
+            }
+            result_ids = {
+                block.tool_call_id
+                for block in turn
+                if isinstance(block, ToolFormattedResult)
+            }
+            if pending_ids != result_ids:
+                self._needs_integrity_check = True
+        elif any(isinstance(block, ToolFormattedResult) for block in turn):
+            self._needs_integrity_check = True
+        self._message_lists.append(turn)
+        if self._context_manager is None:
+            return
+        turn_tokens = self._count_turn(turn, self._block_tokens)
+        self._turn_tokens.append(turn_tokens)
+        self._total_tokens += turn_tokens[0]
+
+    def _set_turns(self, message_lists: list[list[GeneralContentBlock]]):
+        """Replace all turns, recounting only blocks not seen before."""
+        self._message_lists = message_lists
+        known_blocks = self._block_tokens
+        self._block_tokens = {}
+        self._turn_tokens = []
+        self._total_tokens = 0
+        if self._context_manager is None:
+            return
+        for turn in message_lists:
+            turn_tokens = self._count_turn(turn, known_blocks)
+            self._turn_tokens.append(turn_tokens)
+            self._total_tokens += turn_tokens[0]
 
     @classmethod
     def _ensure_tool_call_integrity(
@@ -118,7 +188,8 @@ class MessageHistory:
             message_lists_type_adapter = TypeAdapter(list[list[GeneralContentBlock]])
             message_lists = message_lists_type_adapter.validate_python(message_lists)
 
-            self._message_lists = message_lists
+            self._set_turns(message_lists)
+            self._needs_integrity_check = True
         except FileNotFoundError:
             raise FileNotFoundError(
                 f"Could not restore history from file for session id: {session_id}"
@@ -149,10 +220,21 @@ class MessageHistory:
         for msg in messages:
             if not isinstance(msg, (TextPrompt, ToolFormattedResult, ImageBlock)):
                 raise TypeError(f"Invalid message type for user turn: {type(msg)}")
-        self._message_lists.append(messages)
+        self._append_turn(messages)
+
+    def add_assistant_turn(
+        self,
+        messages: list[AssistantContentBlock],
+        parallel_tool_calls: bool = False,
+    ):
+        """Adds an assistant turn (text response and/or tool calls).
+
+        Only the first tool call is kept unless ``parallel_tool_calls`` is set.
+        """
+        if parallel_tool_calls:
+            self._append_turn(cast(list[GeneralContentBlock], list(messages)))
+            return
 
-    def add_assistant_turn(self, messages: list[AssistantContentBlock]):
-        """Adds an assistant turn (text response and/or tool calls)."""
         messages_with_one_tool_call = []
         has_tool_call = False
         for message in messages:
@@ -165,9 +247,7 @@ class MessageHistory:
                 )
             else:
                 messages_with_one_tool_call.append(message)
-        self._message_lists.append(
-            cast(list[GeneralContentBlock], messages_with_one_tool_call)
-        )
+        self._append_turn(cast(list[GeneralContentBlock], messages_with_one_tool_call))
 
     def get_messages_for_llm(self) -> LLMMessages:  # TODO: change name to get_messages
         """Returns messages formatted for the LLM client."""
@@ -197,7 +277,7 @@ class MessageHistory:
         self, parameters: list[ToolCallParameters], results: list[str]
     ):
         """Add the result of a tool call to the dialog."""
-        self._message_lists.append(
+        self._append_turn(
             [
                 ToolFormattedResult(
                     tool_call_id=params.tool_call_id,
@@ -221,9 +301,16 @@ class MessageHistory:
 
     def clear(self):
         """Removes all messages."""
-        self._message_lists = []
+        self.cancel_pending_truncation()
+        self._set_turns([])
+        self._needs_integrity_check = False
         self._last_user_prompt_index = None
 
+    def cancel_pending_truncation(self):
+        """Stops the context manager's background work for this history, e.g. a summary."""
+        if self._context_manager is not None:
+            self._context_manager.cancel_pending_truncation(key=id(self))
+
     def clear_from_last_to_user_message(self):
         """Clears messages from the last turn backwards to the last user prompt (inclusive).
         This preserves the conversation history before the last user prompt.
@@ -232,7 +319,7 @@ class MessageHistory:
             return
 
         # Keep messages up to and excluding the last user prompt
-        self._message_lists = self._message_lists[: self._last_user_prompt_index]
+        self._set_turns(self._message_lists[: self._last_user_prompt_index])
         # Reset the last user prompt index since we've cleared after it
         self._last_user_prompt_index = None
 
@@ -276,16 +363,38 @@ class MessageHistory:
 
     def set_message_list(self, message_list: list[list[GeneralContentBlock]]):
         """Sets the message list and ensures tool call integrity."""
-        self._message_lists = MessageHistory._ensure_tool_call_integrity(message_list)
+        self._set_turns(MessageHistory._ensure_tool_call_integrity(message_list))
+        self._needs_integrity_check = False
+
+    def count_tokens(self) -> int:
+        """Counts the tokens in the message list.
 
-    def count_tokens(self):
-        """Counts the tokens in the message list."""
-        return self._context_manager.count_tokens(self.get_messages_for_llm())
+        Same result as ``ContextManager.count_tokens`` on the messages, but in
+        O(1) from the counts cached as turns are added. Thinking blocks are
+        only counted in the last turn.
+        """
+        if not self._turn_tokens:
+            return 0
+        return self._total_tokens + self._turn_tokens[-1][1]
 
     def truncate(self) -> None:
         """Remove oldest messages when context window limit is exceeded."""
+        messages = self.get_messages_for_llm()
         truncated_messages_for_llm = self._context_manager.apply_truncation_if_needed(
-            self.get_messages_for_llm()
+            messages, token_count=self.count_tokens(), key=id(self)
+        )
+
+        if truncated_messages_for_llm is not messages or self._needs_integrity_check:
+            self.set_message_list(truncated_messages_for_llm)
+
+    async def truncate_async(self) -> None:
+        """Async variant of truncate, for use on the event loop."""
+        messages = self.get_messages_for_llm()
+        truncated_messages_for_llm = (
+            await self._context_manager.apply_truncation_if_needed_async(
+                messages, token_count=self.count_tokens(), key=id(self)
+            )
         )
 
-        self.set_message_list(truncated_messages_for_llm)
+        if truncated_messages_for_llm is not messages or self._needs_integrity_check:
+            self.set_message_list(truncated_messages_for_llm)
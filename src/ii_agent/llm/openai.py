@@ -2,14 +2,11 @@
 
 import json
 import os
-import random
-import time
-from typing import Any, Tuple, cast
+from typing import Any, AsyncIterator, Iterator, Tuple
+import httpx
 import openai
 import logging
 
-logger = logging.getLogger(__name__)
-
 from openai import (
     APIConnectionError as OpenAI_APIConnectionError,
 )
@@ -25,7 +22,9 @@ from openai._types import (
 
 from ii_agent.llm.base import (
     LLMClient,
+    LLMStreamEvent,
     AssistantContentBlock,
+    GeneralContentBlock,
     LLMMessages,
     ToolParam,
     TextPrompt,
@@ -33,13 +32,122 @@ from ii_agent.llm.base import (
     TextResult,
     ToolFormattedResult,
 )
+from ii_agent.llm.conversion import BlockConverters, TurnConversionCache
+from ii_agent.llm.rate_limiter import get_rate_limiter_registry
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (
+    OpenAI_APIConnectionError,
+    OpenAI_InternalServerError,
+    OpenAI_RateLimitError,
+)
+
+
+def _tool_call_payload(tool_call: ToolCall) -> dict[str, Any]:
+    """Convert an internal tool call into an OpenAI tool call payload."""
+    # Ensure arguments are stringified JSON for the OpenAI API call
+    try:
+        arguments_str = json.dumps(tool_call.tool_input)
+    except TypeError as e:
+        logger.error(f"Failed to serialize tool_input to JSON string for tool '{tool_call.tool_name}': {tool_call.tool_input}. Error: {str(e)}")
+        # Decide how to handle: skip this message, or raise, or send with potentially malformed args? For now, let's raise.
+        raise ValueError(f"Cannot serialize tool arguments for {tool_call.tool_name}: {str(e)}") from e
+
+    return {
+        "type": "function",
+        "id": tool_call.tool_call_id,
+        "function": {
+            "name": tool_call.tool_name,
+            "arguments": arguments_str, # Use the JSON string
+        },
+    }
+
+
+def _convert_text_prompt(block: TextPrompt) -> dict[str, Any]:
+    return {"role": "user", "content": [{"type": "text", "text": block.text}]}
+
+
+def _convert_text_result(block: TextResult) -> dict[str, Any]:
+    # For TextResult (assistant), content is handled differently by OpenAI API
+    return {"role": "assistant", "content": [{"type": "text", "text": block.text}]}
+
+
+def _convert_tool_call(block: ToolCall) -> dict[str, Any]:
+    # Content is implicitly None or omitted by not setting it
+    return {"role": "assistant", "tool_calls": [_tool_call_payload(block)]}
+
+
+def _convert_tool_result(block: ToolFormattedResult) -> dict[str, Any]:
+    return {
+        "role": "tool",
+        "tool_call_id": block.tool_call_id,
+        "content": block.tool_output,
+    }
+
+
+BLOCK_CONVERTERS = BlockConverters(
+    {
+        TextPrompt: _convert_text_prompt,
+        TextResult: _convert_text_result,
+        ToolCall: _convert_tool_call,
+        ToolFormattedResult: _convert_tool_result,
+    }
+)
+
+
+def _convert_turn(message_list: list[GeneralContentBlock]) -> list[dict[str, Any]]:
+    """Convert one turn of the history into OpenAI messages."""
+    converted = [BLOCK_CONVERTERS.convert(message) for message in message_list]
+    if len(converted) == 1:
+        return converted
+    # Parallel tool calls and their results span a single turn
+    if all("tool_calls" in message for message in converted):
+        return [
+            {
+                "role": "assistant",
+                "tool_calls": [
+                    message["tool_calls"][0] for message in converted
+                ],
+            }
+        ]
+    if all(message["role"] == "tool" for message in converted):
+        return converted
+    raise ValueError("Only one entry per message supported for openai")
+
+
+def _convert_tools(tools: list[ToolParam]) -> list[dict[str, Any]]:
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": tool.name,
+                "description": tool.description,
+                # Copied so the strict flag does not leak into the tool's schema
+                "parameters": {**tool.input_schema, "strict": True},
+            },
+        }
+        for tool in tools
+    ]
 
 
 class OpenAIDirectClient(LLMClient):
     """Use OpenAI models via first party API."""
 
-    def __init__(self, model_name: str, max_retries=2, cot_model: bool = True, azure_model: bool = False):
-        """Initialize the OpenAI first party client."""
+    def __init__(
+        self,
+        model_name: str,
+        max_retries=2,
+        cot_model: bool = True,
+        azure_model: bool = False,
+        http_client: httpx.Client | None = None,
+        async_http_client: httpx.AsyncClient | None = None,
+    ):
+        """Initialize the OpenAI first party client.
+
+        ``http_client`` and ``async_http_client`` let several clients share one
+        connection pool; by default each client opens its own.
+        """
         api_key = os.getenv("OPENAI_API_KEY", "EMPTY")
         base_url = os.getenv("OPENAI_BASE_URL", "http://0.0.0.0:2323")
         if azure_model:
@@ -51,14 +159,37 @@ class OpenAIDirectClient(LLMClient):
                 azure_endpoint=azure_endpoint,
                 api_version=api_version,
                 max_retries=max_retries,
+                http_client=http_client,
+            )
+            self.async_client = openai.AsyncAzureOpenAI(
+                api_key=api_key,
+                azure_endpoint=azure_endpoint,
+                api_version=api_version,
+                max_retries=max_retries,
+                http_client=async_http_client,
             )
         else:
-            self.client = openai.OpenAI(api_key=api_key, base_url=base_url, max_retries=max_retries)
+            self.client = openai.OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=max_retries,
+                http_client=http_client,
+            )
+            self.async_client = openai.AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=max_retries,
+                http_client=async_http_client,
+            )
         self.model_name = model_name
         self.max_retries = max_retries
         self.cot_model = cot_model
+        self.rate_limiter = get_rate_limiter_registry().get("openai", model_name)
+        self.conversion_cache = TurnConversionCache()
+        # Agents send the same tool list every turn, so it is converted once
+        self.tool_definitions = TurnConversionCache(max_turns=64)
 
-    def generate(
+    def _build_request_params(
         self,
         messages: LLMMessages,
         max_tokens: int,
@@ -67,20 +198,8 @@ class OpenAIDirectClient(LLMClient):
         tools: list[ToolParam] = [],
         tool_choice: dict[str, str] | None = None,
         thinking_tokens: int | None = None,
-    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
-        """Generate responses.
-
-        Args:
-            messages: A list of messages.
-            system_prompt: A system prompt.
-            max_tokens: The maximum number of tokens to generate.
-            temperature: The temperature.
-            tools: A list of tools.
-            tool_choice: A tool choice.
-
-        Returns:
-            A generated response.
-        """
+    ) -> dict[str, Any]:
+        """Build the keyword arguments of an OpenAI chat completion request."""
 
         openai_messages = []
         system_prompt_applied = False
@@ -91,77 +210,27 @@ class OpenAIDirectClient(LLMClient):
                 openai_messages.append(system_message)
                 system_prompt_applied = True
 
-        for idx, message_list in enumerate(messages):
-            if len(message_list) > 1:
-                raise ValueError("Only one entry per message supported for openai")
-            internal_message = message_list[0]
-            
-            current_message_text = ""
-            is_user_prompt = False
-
-            if str(type(internal_message)) == str(TextPrompt):
-                internal_message = cast(TextPrompt, internal_message)
-                current_message_text = internal_message.text
-                is_user_prompt = True
-                role = "user"
-            elif str(type(internal_message)) == str(TextResult):
-                internal_message = cast(TextResult, internal_message)
-                # For TextResult (assistant), content is handled differently by OpenAI API
-                message_content_obj = {"type": "text", "text": internal_message.text}
-                openai_message = {"role": "assistant", "content": [message_content_obj]}
-                openai_messages.append(openai_message)
-                continue # Move to next message in outer loop
-            elif str(type(internal_message)) == str(ToolCall):
-                internal_message = cast(ToolCall, internal_message)
-                # Ensure arguments are stringified JSON for the OpenAI API call
-                try:
-                    arguments_str = json.dumps(internal_message.tool_input)
-                except TypeError as e:
-                    logger.error(f"Failed to serialize tool_input to JSON string for tool '{internal_message.tool_name}': {internal_message.tool_input}. Error: {str(e)}")
-                    # Decide how to handle: skip this message, or raise, or send with potentially malformed args? For now, let's raise.
-                    raise ValueError(f"Cannot serialize tool arguments for {internal_message.tool_name}: {str(e)}") from e
-                
-                tool_call_payload = {
-                    "type": "function",
-                    "id": internal_message.tool_call_id,
-                    "function": {
-                        "name": internal_message.tool_name,
-                        "arguments": arguments_str, # Use the JSON string
-                    },
-                }
-                openai_message = {
-                    "role": "assistant",
-                    "tool_calls": [tool_call_payload],
-                    # Content is implicitly None or omitted by not setting it
-                }
-                openai_messages.append(openai_message)
-                continue # Move to next message in outer loop
-            elif str(type(internal_message)) == str(ToolFormattedResult):
-                internal_message = cast(ToolFormattedResult, internal_message)
-                openai_message = {
-                    "role": "tool",
-                    "tool_call_id": internal_message.tool_call_id,
-                    "content": internal_message.tool_output,
-                }
-                openai_messages.append(openai_message)
-                continue # Move to next message in outer loop
-            else:
-                print(
-                    f"Unknown message type: {type(internal_message)}, expected one of {str(TextPrompt)}, {str(TextResult)}, {str(ToolCall)}, {str(ToolFormattedResult)}"
-                )
-                raise ValueError(f"Unknown message type: {type(internal_message)}")
-
-            # This part now only applies to TextPrompt (user messages)
-            if is_user_prompt:
-                final_text_for_user_message = current_message_text
-                # If cot_model is True, system_prompt is not None, and it hasn't been applied yet (i.e., this is the first user message opportunity)
-                if self.cot_model and system_prompt and not system_prompt_applied:
-                    final_text_for_user_message = f"{system_prompt}\n\n{current_message_text}"
-                    system_prompt_applied = True # Mark as applied
-                
-                message_content_obj = {"type": "text", "text": final_text_for_user_message}
-                openai_message = {"role": role, "content": [message_content_obj]}
-                openai_messages.append(openai_message)
+        # Reuse the conversions of turns sent in earlier requests
+        for message_list in messages:
+            openai_messages.extend(
+                self.conversion_cache.convert(message_list, _convert_turn)
+            )
+
+        # If cot_model is True, prepend the system prompt to the first user message
+        if self.cot_model and system_prompt and not system_prompt_applied:
+            for idx, openai_message in enumerate(openai_messages):
+                if openai_message["role"] == "user":
+                    # Converted turns are shared with later requests, so the
+                    # prompt goes on a copy
+                    text = openai_message["content"][0]["text"]
+                    openai_messages[idx] = {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": f"{system_prompt}\n\n{text}"}
+                        ],
+                    }
+                    system_prompt_applied = True
+                    break
 
         # If cot_model is True and system_prompt was provided but not applied (e.g., no user messages found, though unlikely for an agent)
         if self.cot_model and system_prompt and not system_prompt_applied:
@@ -187,61 +256,32 @@ class OpenAIDirectClient(LLMClient):
             raise ValueError(f"Unknown tool_choice type: {tool_choice['type']}")
 
         # Turn tools into OpenAI tool format
-        openai_tools = []
-        for tool in tools:
-            tool_def = {
-                "name": tool.name,
-                "description": tool.description,
-                "parameters": tool.input_schema,
-            }
-            tool_def["parameters"]["strict"] = True
-            openai_tool_object = {
-                "type": "function",
-                "function": tool_def,
-            }
-            openai_tools.append(openai_tool_object)
+        openai_tools = self.tool_definitions.convert(tools, _convert_tools)
 
-        response = None
-        for retry in range(self.max_retries):
-            try:
-                extra_body = {}
-                openai_max_tokens = max_tokens
-                openai_temperature = temperature
-                if self.cot_model:
-                    extra_body["max_completion_tokens"] = max_tokens
-                    openai_max_tokens = OpenAI_NOT_GIVEN
-                    openai_temperature = OpenAI_NOT_GIVEN
-                response = self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=openai_messages,
-                    tools=openai_tools if len(openai_tools) > 0 else OpenAI_NOT_GIVEN,
-                    tool_choice=tool_choice_param,
-                    max_tokens=openai_max_tokens,
-                    extra_body=extra_body,
-                )
-                break
-            except (
-                OpenAI_APIConnectionError,
-                OpenAI_InternalServerError,
-                OpenAI_RateLimitError,
-            ) as e:
-                if retry == self.max_retries - 1:
-                    print(f"Failed OpenAI request after {retry + 1} retries")
-                    raise e
-                else:
-                    print(f"Retrying OpenAI request: {retry + 1}/{self.max_retries}")
-                    # Sleep 8-12 seconds with jitter to avoid thundering herd.
-                    time.sleep(10 * random.uniform(0.8, 1.2))
+        extra_body = {}
+        openai_max_tokens = max_tokens
+        openai_temperature = temperature
+        if self.cot_model:
+            extra_body["max_completion_tokens"] = max_tokens
+            openai_max_tokens = OpenAI_NOT_GIVEN
+            openai_temperature = OpenAI_NOT_GIVEN
+        return dict(
+            model=self.model_name,
+            messages=openai_messages,
+            tools=openai_tools if len(openai_tools) > 0 else OpenAI_NOT_GIVEN,
+            tool_choice=tool_choice_param,
+            max_tokens=openai_max_tokens,
+            extra_body=extra_body,
+        )
 
-        # Convert messages back to internal format
+    def _convert_response(
+        self,
+        content: str | None,
+        tool_calls: list[Tuple[str, str, Any]],
+        tools: list[ToolParam],
+    ) -> list[AssistantContentBlock]:
+        """Convert response content and (id, name, arguments) tool calls into internal blocks."""
         internal_messages = []
-        assert response is not None
-        openai_response_messages = response.choices
-        if len(openai_response_messages) > 1:
-            raise ValueError("Only one message supported for OpenAI")
-        openai_response_message = openai_response_messages[0].message
-        tool_calls = openai_response_message.tool_calls
-        content = openai_response_message.content
 
         # Exactly one of tool_calls or content should be present
         if tool_calls and content:
@@ -254,14 +294,12 @@ class OpenAIDirectClient(LLMClient):
             logger.info(f"Model returned {len(tool_calls)} tool_calls. Available tools: {available_tool_names}")
             
             processed_tool_call = False
-            for tool_call_data in tool_calls:
-                tool_name_from_model = tool_call_data.function.name
+            for tool_call_id, tool_name_from_model, args_data in tool_calls:
                 if tool_name_from_model and tool_name_from_model in available_tool_names:
                     logger.info(f"Attempting to process tool call: {tool_name_from_model}")
                     try:
                         # Ensure arguments are a string before trying to load as JSON, 
                         # as some models might already return a dict if the library handles it.
-                        args_data = tool_call_data.function.arguments
                         if isinstance(args_data, dict):
                             tool_input = args_data
                         elif isinstance(args_data, str):
@@ -271,7 +309,7 @@ class OpenAIDirectClient(LLMClient):
                             continue # Skip this tool call
 
                     except json.JSONDecodeError as e:
-                        logger.error(f"Failed to parse JSON arguments for tool '{tool_name_from_model}': {tool_call_data.function.arguments}. Error: {str(e)}")
+                        logger.error(f"Failed to parse JSON arguments for tool '{tool_name_from_model}': {args_data}. Error: {str(e)}")
                         continue # Skip this malformed tool call
                     except Exception as e:
                         logger.error(f"Unexpected error parsing arguments for tool '{tool_name_from_model}': {str(e)}")
@@ -281,22 +319,38 @@ class OpenAIDirectClient(LLMClient):
                         ToolCall(
                             tool_name=tool_name_from_model,
                             tool_input=tool_input,
-                            tool_call_id=tool_call_data.id,
+                            tool_call_id=tool_call_id,
                         )
                     )
                     processed_tool_call = True
-                    logger.info(f"Successfully processed and selected tool call: {tool_name_from_model}")
-                    break # Processed the first valid and available tool call
+                    logger.info(f"Successfully processed tool call: {tool_name_from_model}")
                 else:
                     logger.warning(f"Skipping tool call with unknown or placeholder name: '{tool_name_from_model}'. Not in available tools: {available_tool_names}")
             
             if not processed_tool_call:
                 logger.warning("No valid and available tool calls found after filtering.")
 
-        elif content:
-            internal_messages.append(TextResult(text=content))
         else:
-            raise ValueError(f"Unknown message type: {openai_response_message}")
+            internal_messages.append(TextResult(text=content))
+
+        return internal_messages
+
+    def _convert_completion(
+        self, response: Any, tools: list[ToolParam]
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        """Convert a chat completion into internal blocks and metadata."""
+        openai_response_messages = response.choices
+        if len(openai_response_messages) > 1:
+            raise ValueError("Only one message supported for OpenAI")
+        openai_response_message = openai_response_messages[0].message
+        internal_messages = self._convert_response(
+            openai_response_message.content,
+            [
+                (tool_call.id, tool_call.function.name, tool_call.function.arguments)
+                for tool_call in openai_response_message.tool_calls or []
+            ],
+            tools,
+        )
 
         assert response.usage is not None
         message_metadata = {
@@ -306,3 +360,295 @@ class OpenAIDirectClient(LLMClient):
         }
 
         return internal_messages, message_metadata
+
+    def _consume_stream_chunk(
+        self,
+        chunk: Any,
+        content_parts: list[str],
+        tool_calls: dict[int, list],
+    ) -> list[LLMStreamEvent]:
+        """Accumulate one streamed chunk and return the deltas it carries.
+
+        ``tool_calls`` maps the tool call index to ``[id, name, arguments]``.
+        """
+        if not chunk.choices:
+            return []
+        if len(chunk.choices) > 1:
+            raise ValueError("Only one message supported for OpenAI")
+        delta = chunk.choices[0].delta
+        stream_events = []
+        if delta.content:
+            content_parts.append(delta.content)
+            stream_events.append(LLMStreamEvent(type="text", delta=delta.content))
+        for tool_call_delta in delta.tool_calls or []:
+            tool_call = tool_calls.setdefault(tool_call_delta.index, [None, None, ""])
+            if tool_call_delta.id:
+                tool_call[0] = tool_call_delta.id
+            function = tool_call_delta.function
+            if function is not None and function.name:
+                tool_call[1] = function.name
+            if function is not None and function.arguments:
+                tool_call[2] += function.arguments
+                stream_events.append(
+                    LLMStreamEvent(
+                        type="tool_use",
+                        index=tool_call_delta.index,
+                        delta=function.arguments,
+                        tool_call_id=tool_call[0],
+                        tool_name=tool_call[1],
+                    )
+                )
+        return stream_events
+
+    def _complete_stream_event(
+        self,
+        content_parts: list[str],
+        tool_calls: dict[int, list],
+        usage: Any,
+        last_chunk: Any,
+        tools: list[ToolParam],
+    ) -> LLMStreamEvent:
+        """Assemble the final event of a stream from the accumulated chunks."""
+        internal_messages = self._convert_response(
+            "".join(content_parts) or None,
+            [tuple(tool_calls[index]) for index in sorted(tool_calls)],
+            tools,
+        )
+
+        assert usage is not None
+        message_metadata = {
+            "raw_response": last_chunk,
+            "input_tokens": usage.prompt_tokens,
+            "output_tokens": usage.completion_tokens,
+        }
+        return LLMStreamEvent(
+            type="complete", response=internal_messages, metadata=message_metadata
+        )
+
+    def generate(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        """Generate responses.
+
+        Args:
+            messages: A list of messages.
+            system_prompt: A system prompt.
+            max_tokens: The maximum number of tokens to generate.
+            temperature: The temperature.
+            tools: A list of tools.
+            tool_choice: A tool choice.
+
+        Returns:
+            A generated response.
+        """
+        request_params = self._build_request_params(
+            messages,
+            max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+        )
+
+        response = None
+        input_tokens = self.rate_limiter.estimate_input_tokens(messages, system_prompt)
+        for retry in range(self.max_retries):
+            # Waits for this model's shared quota and any pause after errors
+            reservation = self.rate_limiter.acquire_sync(input_tokens, max_tokens)
+            try:
+                response = self.client.chat.completions.create(**request_params)
+                break
+            except RETRYABLE_ERRORS as e:
+                delay = self.rate_limiter.throttle(reservation, e)
+                if retry == self.max_retries - 1:
+                    print(f"Failed OpenAI request after {retry + 1} retries")
+                    raise e
+                else:
+                    print(
+                        f"Retrying OpenAI request in {delay:.1f}s: {retry + 1}/{self.max_retries}"
+                    )
+
+        # Convert messages back to internal format
+        assert response is not None
+        internal_messages, message_metadata = self._convert_completion(response, tools)
+        self.rate_limiter.settle(reservation, message_metadata)
+        return internal_messages, message_metadata
+
+    def generate_stream(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Iterator[LLMStreamEvent]:
+        """Generate responses, yielding text and tool-use deltas.
+
+        Requests are only retried while nothing has been yielded yet.
+        """
+        request_params = self._build_request_params(
+            messages,
+            max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+        )
+
+        content_parts: list[str] = []
+        tool_calls: dict[int, list] = {}
+        usage = None
+        last_chunk = None
+        input_tokens = self.rate_limiter.estimate_input_tokens(messages, system_prompt)
+        for retry in range(self.max_retries):
+            # Waits for this model's shared quota and any pause after errors
+            reservation = self.rate_limiter.acquire_sync(input_tokens, max_tokens)
+            started = False
+            try:
+                stream = self.client.chat.completions.create(
+                    **request_params,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                for chunk in stream:
+                    last_chunk = chunk
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    for stream_event in self._consume_stream_chunk(
+                        chunk, content_parts, tool_calls
+                    ):
+                        started = True
+                        yield stream_event
+                break
+            except RETRYABLE_ERRORS as e:
+                delay = self.rate_limiter.throttle(reservation, e)
+                if started or retry == self.max_retries - 1:
+                    print(f"Failed OpenAI request after {retry + 1} retries")
+                    raise e
+                else:
+                    print(
+                        f"Retrying OpenAI request in {delay:.1f}s: {retry + 1}/{self.max_retries}"
+                    )
+
+        complete_event = self._complete_stream_event(
+            content_parts, tool_calls, usage, last_chunk, tools
+        )
+        self.rate_limiter.settle(reservation, complete_event.metadata)
+        yield complete_event
+
+    async def agenerate(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        """Generate responses with the async OpenAI client.
+
+        Same as ``generate``, but waits between retries without blocking the
+        event loop.
+        """
+        request_params = self._build_request_params(
+            messages,
+            max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+        )
+
+        response = None
+        input_tokens = self.rate_limiter.estimate_input_tokens(messages, system_prompt)
+        for retry in range(self.max_retries):
+            # Waits for this model's shared quota and any pause after errors
+            reservation = await self.rate_limiter.acquire(input_tokens, max_tokens)
+            try:
+                response = await self.async_client.chat.completions.create(**request_params)
+                break
+            except RETRYABLE_ERRORS as e:
+                delay = self.rate_limiter.throttle(reservation, e)
+                if retry == self.max_retries - 1:
+                    print(f"Failed OpenAI request after {retry + 1} retries")
+                    raise e
+                else:
+                    print(
+                        f"Retrying OpenAI request in {delay:.1f}s: {retry + 1}/{self.max_retries}"
+                    )
+
+        assert response is not None
+        internal_messages, message_metadata = self._convert_completion(response, tools)
+        self.rate_limiter.settle(reservation, message_metadata)
+        return internal_messages, message_metadata
+
+    async def agenerate_stream(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        """Async counterpart of ``generate_stream``."""
+        request_params = self._build_request_params(
+            messages,
+            max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+        )
+
+        content_parts: list[str] = []
+        tool_calls: dict[int, list] = {}
+        usage = None
+        last_chunk = None
+        input_tokens = self.rate_limiter.estimate_input_tokens(messages, system_prompt)
+        for retry in range(self.max_retries):
+            # Waits for this model's shared quota and any pause after errors
+            reservation = await self.rate_limiter.acquire(input_tokens, max_tokens)
+            started = False
+            try:
+                stream = await self.async_client.chat.completions.create(
+                    **request_params,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                async for chunk in stream:
+                    last_chunk = chunk
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    for stream_event in self._consume_stream_chunk(
+                        chunk, content_parts, tool_calls
+                    ):
+                        started = True
+                        yield stream_event
+                break
+            except RETRYABLE_ERRORS as e:
+                delay = self.rate_limiter.throttle(reservation, e)
+                if started or retry == self.max_retries - 1:
+                    print(f"Failed OpenAI request after {retry + 1} retries")
+                    raise e
+                else:
+                    print(
+                        f"Retrying OpenAI request in {delay:.1f}s: {retry + 1}/{self.max_retries}"
+                    )
+
+        complete_event = self._complete_stream_event(
+            content_parts, tool_calls, usage, last_chunk, tools
+        )
+        self.rate_limiter.settle(reservation, complete_event.metadata)
+        yield complete_event
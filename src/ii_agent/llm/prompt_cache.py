@@ -0,0 +1,140 @@
+"""Prompt-cache breakpoint planning and cache usage tracking."""
+
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from ii_agent.llm.base import LLMMessages, TextPrompt, TextResult
+
+CACHE_CONTROL = {"type": "ephemeral"}
+# Anthropic accepts at most four cache breakpoints per request.
+MAX_CACHE_BREAKPOINTS = 4
+SUMMARY_PREFIX = "Conversation Summary:"
+_TEXT_BLOCKS = (TextPrompt, TextResult)
+
+
+@dataclass
+class CachePlan:
+    """Where the cache breakpoints of a request go."""
+
+    # Breakpoint on the system prompt, which also caches the tool definitions
+    cache_system: bool = False
+    # Breakpoint on the last tool definition, used when there is no system prompt
+    cache_tools: bool = False
+    # Message lists whose last block gets a breakpoint
+    message_indices: list[int] = field(default_factory=list)
+
+
+class PromptCachePlanner:
+    """Places cache breakpoints on the stable prefix and the growing tail.
+
+    The cached prefix is read in the order tools, system prompt, messages.
+    Breakpoints go, by priority, on:
+
+    1. The system prompt (or the last tool definition), identical every turn.
+    2. The last message, so the next turn reads the whole history from cache.
+    3. The latest conversation summary, since the history up to it only
+       changes at the next truncation.
+    4. The last message of the previous turn's request, so its cache entry
+       still hits when a turn adds more blocks than the cache looks back over.
+    """
+
+    def __init__(self, max_breakpoints: int = MAX_CACHE_BREAKPOINTS):
+        self.max_breakpoints = max_breakpoints
+
+    def plan(
+        self,
+        messages: LLMMessages,
+        has_system_prompt: bool,
+        has_tools: bool,
+    ) -> CachePlan:
+        plan = CachePlan()
+        remaining = self.max_breakpoints
+        if has_system_prompt:
+            plan.cache_system = True
+            remaining -= 1
+        elif has_tools:
+            plan.cache_tools = True
+            remaining -= 1
+
+        candidates = []
+        if messages:
+            last_index = len(messages) - 1
+            candidates.append(last_index)
+            summary_index = self._find_summary_index(messages)
+            if summary_index is not None:
+                candidates.append(summary_index)
+            # The previous request ended two message lists earlier, before
+            # the assistant turn and the new user turn
+            if last_index >= 2:
+                candidates.append(last_index - 2)
+
+        for index in candidates:
+            if remaining == 0:
+                break
+            if index not in plan.message_indices:
+                plan.message_indices.append(index)
+                remaining -= 1
+        plan.message_indices.sort()
+        return plan
+
+    @staticmethod
+    def _find_summary_index(messages: LLMMessages) -> Optional[int]:
+        """Find the message list holding the latest conversation summary."""
+        for index in range(len(messages) - 1, -1, -1):
+            for block in messages[index]:
+                # Cheaper than an isinstance check on every block of the history
+                if type(block) in _TEXT_BLOCKS and block.text.startswith(
+                    SUMMARY_PREFIX
+                ):
+                    return index
+        return None
+
+
+@dataclass
+class PromptCacheUsage:
+    """Per-turn prompt cache usage, from the metadata of LLM responses."""
+
+    turns: list[dict[str, int]] = field(default_factory=list)
+
+    def record(self, metadata: Optional[dict[str, Any]]) -> Optional[dict[str, int]]:
+        """Record the cache usage of one response, if it reports any."""
+        if not metadata or "input_tokens" not in metadata:
+            return None
+        usage = {
+            "input_tokens": metadata["input_tokens"],
+            "cache_creation_input_tokens": max(
+                metadata.get("cache_creation_input_tokens") or 0, 0
+            ),
+            "cache_read_input_tokens": max(
+                metadata.get("cache_read_input_tokens") or 0, 0
+            ),
+        }
+        self.turns.append(usage)
+        return usage
+
+    @staticmethod
+    def hit_rate_of(usage: dict[str, int]) -> float:
+        """Fraction of the prompt tokens read from the cache."""
+        total = (
+            usage["input_tokens"]
+            + usage["cache_creation_input_tokens"]
+            + usage["cache_read_input_tokens"]
+        )
+        return usage["cache_read_input_tokens"] / total if total else 0.0
+
+    def totals(self) -> dict[str, int]:
+        """Token counts summed over all recorded turns."""
+        totals = {
+            "input_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+        }
+        for usage in self.turns:
+            for key in totals:
+                totals[key] += usage[key]
+        return totals
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of all prompt tokens so far that were read from the cache."""
+        return self.hit_rate_of(self.totals())
@@ -0,0 +1,454 @@
+"""Process-wide rate limiting and backoff for LLM provider requests."""
+
+import asyncio
+import email.utils
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# How often queued callers that are not at the head check their turn
+QUEUE_POLL_INTERVAL = 0.05
+# The learned request rate never drops below this many requests per minute,
+# nor below this fraction of the quota or of the highest rate observed
+MIN_ADAPTIVE_RPM = 10.0
+MIN_ADAPTIVE_FRACTION = 0.1
+# After a 429 the learned rate doubles every this many seconds until it is
+# back at the quota
+RATE_RECOVERY_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    """Quotas of one provider and model; ``None`` means unlimited."""
+
+    requests_per_minute: Optional[float] = None
+    input_tokens_per_minute: Optional[float] = None
+    output_tokens_per_minute: Optional[float] = None
+
+
+@dataclass
+class Reservation:
+    """Capacity taken from a limiter for one request."""
+
+    input_tokens: int
+    output_tokens: int
+
+
+class TokenBucket:
+    """A bucket holding up to one minute of quota, refilled continuously.
+
+    The level may go negative when a request turns out to use more than it
+    reserved; later requests then wait until the debt is refilled.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.clock = clock
+        self.capacity = per_minute
+        self.level = per_minute
+        self._updated = clock()
+
+    @property
+    def per_minute(self) -> float:
+        return self.capacity
+
+    def set_rate(self, per_minute: float):
+        self._refill()
+        self.capacity = per_minute
+        self.level = min(self.level, per_minute)
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(
+            self.capacity, self.level + (now - self._updated) * self.capacity / 60
+        )
+        self._updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken from the bucket."""
+        self._refill()
+        # Requests larger than the whole bucket wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.capacity
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Read the delay a provider asked for from an error's response headers."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms is not None:
+            return float(retry_after_ms) / 1000
+        retry_after = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+            return max(retry_at.timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return status == 429
+
+
+class RateLimiter:
+    """Paces the requests of one provider and model across all sessions.
+
+    Requests wait in a FIFO queue until the request, input-token and
+    output-token buckets all have room, so under load they are admitted at
+    the quota instead of failing. A request reserves its estimated input
+    tokens and ``max_tokens`` output tokens; ``settle`` corrects the buckets
+    with the usage the provider reports.
+
+    When a request fails with a retryable error, every caller of the limiter
+    pauses: for the ``retry-after`` the provider asked for, or else for a
+    decorrelated-jitter exponential backoff. A 429 also halves the request
+    rate, starting from the quota or, without one, from the highest rate seen
+    in a minute, and never below a floor. The rate then doubles every
+    ``RATE_RECOVERY_SECONDS`` until it is back at the quota, so the queued
+    callers resume at a rate the provider accepts rather than retrying
+    together, and a single transient 429 costs little throughput.
+
+    Async callers queue fairly. Sync callers wait for the buckets and the
+    pause but do not take a place in the queue, since they may run on the
+    event loop thread that the queued async callers need.
+    """
+
+    def __init__(
+        self,
+        limits: RateLimits = RateLimits(),
+        base_backoff: float = 2.0,
+        max_backoff: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limits = limits
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._requests = (
+            TokenBucket(limits.requests_per_minute, clock)
+            if limits.requests_per_minute
+            else None
+        )
+        self._input_tokens = (
+            TokenBucket(limits.input_tokens_per_minute, clock)
+            if limits.input_tokens_per_minute
+            else None
+        )
+        self._output_tokens = (
+            TokenBucket(limits.output_tokens_per_minute, clock)
+            if limits.output_tokens_per_minute
+            else None
+        )
+        self._queue: deque[int] = deque()
+        self._tickets = itertools.count()
+        self._paused_until = 0.0
+        self._backoff = 0.0
+        self._admitted: deque[float] = deque()
+        # Most requests admitted within a minute so far
+        self._peak_rpm = 0
+        # When the last 429 set the learned rate, and the rate it set
+        self._throttled_at: Optional[float] = None
+        self._throttled_rate = 0.0
+        self.throttled_count = 0
+
+    def estimate_input_tokens(
+        self, messages: list[list[Any]], system_prompt: str | None = None
+    ) -> int:
+        """Roughly estimate the prompt tokens of a request, at four chars a token.
+
+        Returns 0 without looking at the history when input tokens are not
+        limited.
+        """
+        if self._input_tokens is None:
+            return 0
+        chars = len(system_prompt or "")
+        for message_list in messages:
+            for message in message_list:
+                chars += len(str(message))
+        return chars // 4
+
+    def _buckets(self, reservation: Reservation):
+        for bucket, amount in (
+            (self._requests, 1),
+            (self._input_tokens, reservation.input_tokens),
+            (self._output_tokens, reservation.output_tokens),
+        ):
+            if bucket is not None:
+                yield bucket, amount
+
+    def _wait_time(self, reservation: Reservation) -> float:
+        self._recover_rate()
+        wait = max(self._paused_until - self.clock(), 0.0)
+        for bucket, amount in self._buckets(reservation):
+            wait = max(wait, bucket.time_until(amount))
+        return wait
+
+    def _admit(self, reservation: Reservation):
+        for bucket, amount in self._buckets(reservation):
+            bucket.take(amount)
+        now = self.clock()
+        self._admitted.append(now)
+        while self._admitted and self._admitted[0] < now - 60:
+            self._admitted.popleft()
+        self._peak_rpm = max(self._peak_rpm, len(self._admitted))
+
+    def _try_acquire(self, ticket: Optional[int], reservation: Reservation) -> float:
+        """Admit the request if it is its turn and there is room.
+
+        Returns:
+            0 if the request was admitted, else the seconds to wait.
+        """
+        with self._lock:
+            if ticket is not None and self._queue[0] != ticket:
+                return QUEUE_POLL_INTERVAL
+            wait = self._wait_time(reservation)
+            if wait > 0:
+                return wait if ticket is None else min(wait, QUEUE_POLL_INTERVAL * 10)
+            self._admit(reservation)
+            if ticket is not None:
+                self._queue.popleft()
+            return 0.0
+
+    def _remove(self, ticket: int):
+        with self._lock:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+
+    async def acquire(
+        self, input_tokens: int = 0, output_tokens: int = 0
+    ) -> Reservation:
+        """Wait for the turn and capacity of a request.
+
+        Args:
+            input_tokens: Estimated prompt tokens of the request.
+            output_tokens: Output tokens to reserve, usually ``max_tokens``.
+        """
+        reservation = Reservation(input_tokens, output_tokens)
+        with self._lock:
+            if not self._queue and self._wait_time(reservation) == 0:
+                self._admit(reservation)
+                return reservation
+            ticket = next(self._tickets)
+            self._queue.append(ticket)
+        try:
+            while True:
+                wait = self._try_acquire(ticket, reservation)
+                if wait == 0:
+                    return reservation
+                await asyncio.sleep(wait)
+        finally:
+            self._remove(ticket)
+
+    def acquire_sync(
+        self, input_tokens: int = 0, output_tokens: int = 0
+    ) -> Reservation:
+        """Blocking counterpart of ``acquire``."""
+        reservation = Reservation(input_tokens, output_tokens)
+        while True:
+            wait = self._try_acquire(None, reservation)
+            if wait == 0:
+                return reservation
+            time.sleep(wait)
+
+    def settle(
+        self, reservation: Reservation, metadata: Optional[dict[str, Any]] = None
+    ):
+        """Correct the token buckets with the usage a response reports.
+
+        A request that ends without reported usage keeps its reservation.
+        """
+        with self._lock:
+            self._backoff = 0.0
+            if not metadata:
+                return
+            for bucket, reserved, key in (
+                (self._input_tokens, reservation.input_tokens, "input_tokens"),
+                (self._output_tokens, reservation.output_tokens, "output_tokens"),
+            ):
+                used = metadata.get(key)
+                if bucket is None or used is None or used < 0:
+                    continue
+                if used > reserved:
+                    bucket.take(used - reserved)
+                else:
+                    bucket.give(reserved - used)
+
+    def _ceiling(self) -> float:
+        """The request rate the learned rate shrinks from and recovers to."""
+        if self.limits.requests_per_minute:
+            return self.limits.requests_per_minute
+        return max(self._peak_rpm, MIN_ADAPTIVE_RPM)
+
+    def _recover_rate(self):
+        """Grow the learned rate back towards the ceiling after a 429."""
+        if self._throttled_at is None:
+            return
+        elapsed = self.clock() - self._throttled_at
+        ceiling = self._ceiling()
+        rate = min(
+            ceiling, self._throttled_rate * 2 ** (elapsed / RATE_RECOVERY_SECONDS)
+        )
+        if rate < ceiling:
+            self._requests.set_rate(rate)
+            return
+        self._throttled_at = None
+        if self.limits.requests_per_minute:
+            self._requests.set_rate(ceiling)
+        else:
+            # Back to unlimited requests
+            self._requests = None
+
+    def throttle(self, reservation: Reservation, error: BaseException) -> float:
+        """Pause all callers after a failed request.
+
+        The reserved tokens are returned, since the provider did not process
+        the request.
+
+        Returns:
+            The pause in seconds.
+        """
+        with self._lock:
+            for bucket, amount in self._buckets(reservation):
+                if bucket is not self._requests:
+                    bucket.give(amount)
+            retry_after = retry_after_seconds(error)
+            # Decorrelated jitter: each backoff is drawn between the base and
+            # three times the previous one
+            self._backoff = min(
+                self.max_backoff,
+                random.uniform(
+                    self.base_backoff, max(self._backoff, self.base_backoff) * 3
+                ),
+            )
+            delay = retry_after if retry_after is not None else self._backoff
+            self._paused_until = max(self._paused_until, self.clock() + delay)
+            if is_rate_limit_error(error):
+                self.throttled_count += 1
+                self._shrink_rate()
+            return delay
+
+    def _shrink_rate(self):
+        self._recover_rate()
+        ceiling = self._ceiling()
+        current = self._requests.per_minute if self._requests is not None else ceiling
+        floor = max(ceiling * MIN_ADAPTIVE_FRACTION, MIN_ADAPTIVE_RPM)
+        rate = min(max(current / 2, floor), current)
+        if self._requests is None:
+            self._requests = TokenBucket(rate, self.clock)
+            # Let one request through as soon as the pause ends, and pace the
+            # ones after it at the new rate
+            self._requests.level = 1
+        else:
+            self._requests.set_rate(rate)
+        self._throttled_at = self.clock()
+        self._throttled_rate = rate
+        logger.warning(f"Rate limited; pacing requests at {rate:.0f} per minute")
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            self._recover_rate()
+            return {
+                "queued": len(self._queue),
+                "paused_for": max(self._paused_until - self.clock(), 0.0),
+                "requests_per_minute": self._requests.per_minute
+                if self._requests is not None
+                else None,
+                "throttled": self.throttled_count,
+            }
+
+
+class RateLimiterRegistry:
+    """Hands out one rate limiter per provider, model and endpoint.
+
+    Regional endpoints of a provider, such as Vertex AI regions, have quotas
+    and outages of their own, so a 429 from one region does not pause the
+    requests sent to the others.
+    """
+
+    def __init__(self, default_limits: RateLimits = RateLimits()):
+        self.default_limits = default_limits
+        self._limits: dict[tuple[str, str], RateLimits] = {}
+        self._limiters: dict[tuple[str, str, str], RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def configure(
+        self, limits: RateLimits, provider: str | None = None, model: str | None = None
+    ):
+        """Set the quotas of one provider and model, or the default quotas.
+
+        Limiters that already exist keep their quotas.
+        """
+        with self._lock:
+            if provider is None:
+                self.default_limits = limits
+            else:
+                self._limits[(provider, model or "")] = limits
+
+    def get(self, provider: str, model: str, endpoint: str = "") -> RateLimiter:
+        """Return the limiter of a model at an endpoint.
+
+        Args:
+            provider: The provider, e.g. "anthropic".
+            model: The model name.
+            endpoint: The region serving the model, or "" for the provider's
+                first-party API. Every endpoint gets the model's quotas.
+        """
+        key = (provider, model, endpoint)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limits = self._limits.get((provider, model)) or self._limits.get(
+                    (provider, ""), self.default_limits
+                )
+                limiter = RateLimiter(limits)
+                self._limiters[key] = limiter
+            return limiter
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {
+            f"{provider}/{model}"
+            + (f"@{endpoint}" if endpoint else ""): limiter.stats()
+            for (provider, model, endpoint), limiter in limiters.items()
+        }
+
+
+_default_registry: RateLimiterRegistry | None = None
+
+
+def get_rate_limiter_registry() -> RateLimiterRegistry:
+    """Return the process-wide rate limiter registry."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = RateLimiterRegistry()
+    return _default_registry
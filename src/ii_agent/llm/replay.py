@@ -0,0 +1,352 @@
+"""Record and replay LLM responses for offline, deterministic runs."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Literal, Optional, Tuple
+
+from anthropic.types import (
+    RedactedThinkingBlock as AnthropicRedactedThinkingBlock,
+    ThinkingBlock as AnthropicThinkingBlock,
+)
+
+from ii_agent.llm.base import (
+    AssistantContentBlock,
+    LLMClient,
+    LLMMessages,
+    TextResult,
+    ToolCall,
+    ToolParam,
+)
+from ii_agent.llm.utils import convert_message_to_json
+
+logger = logging.getLogger(__name__)
+
+# Content that changes from run to run without changing the request, such as
+# the date in the system prompts and the ids of sessions
+VOLATILE_PATTERNS = [
+    (
+        re.compile(r"\b\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?\b"),
+        "<timestamp>",
+    ),
+    (
+        re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"),
+        "<uuid>",
+    ),
+]
+
+
+def _stable_hash(value: Any) -> str:
+    """Hash a JSON value, ignoring its volatile content."""
+    serialized = json.dumps(value, sort_keys=True, default=str)
+    for pattern, placeholder in VOLATILE_PATTERNS:
+        serialized = pattern.sub(placeholder, serialized)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def conversation_hash(messages: LLMMessages) -> str:
+    """Hash the first message list, which tells the conversations of a run apart."""
+    if not messages:
+        return _stable_hash(None)
+    return _stable_hash([convert_message_to_json(message) for message in messages[0]])
+
+
+def request_hash(
+    messages: LLMMessages,
+    max_tokens: int,
+    system_prompt: str | None = None,
+    temperature: float = 0.0,
+    tools: list[ToolParam] = [],
+    tool_choice: dict[str, str] | None = None,
+    thinking_tokens: int | None = None,
+) -> str:
+    """Hash the arguments of a ``generate`` call, ignoring their volatile content."""
+    request = {
+        "messages": [
+            [convert_message_to_json(message) for message in message_list]
+            for message_list in messages
+        ],
+        "max_tokens": max_tokens,
+        "system_prompt": system_prompt,
+        "temperature": temperature,
+        "tools": [tool.to_dict() for tool in tools],
+        "tool_choice": tool_choice,
+        "thinking_tokens": thinking_tokens,
+    }
+    return _stable_hash(request)
+
+
+def response_to_json(response: list[AssistantContentBlock]) -> list[dict[str, Any]]:
+    return [convert_message_to_json(block) for block in response]
+
+
+def response_from_json(blocks: list[dict[str, Any]]) -> list[AssistantContentBlock]:
+    response = []
+    for block in blocks:
+        if block["type"] == "text":
+            response.append(TextResult(text=block["text"]))
+        elif block["type"] == "tool_call":
+            response.append(
+                ToolCall(
+                    tool_call_id=block["tool_call_id"],
+                    tool_name=block["tool_name"],
+                    tool_input=block["tool_input"],
+                )
+            )
+        elif block["type"] == "thinking":
+            response.append(
+                AnthropicThinkingBlock(
+                    type="thinking",
+                    thinking=block["thinking"],
+                    signature=block["signature"],
+                )
+            )
+        elif block["type"] == "redacted_thinking":
+            response.append(
+                AnthropicRedactedThinkingBlock(
+                    type="redacted_thinking", data=block["content"]
+                )
+            )
+        else:
+            raise ValueError(f"Unknown block type in cassette: {block['type']}")
+    return response
+
+
+def metadata_to_json(metadata: dict[str, Any]) -> dict[str, Any]:
+    """Keep the JSON-serializable metadata, such as token usage.
+
+    The raw provider response is dropped; replayed metadata has none.
+    """
+    kept = {}
+    for key, value in metadata.items():
+        if key == "raw_response":
+            continue
+        try:
+            json.dumps(value)
+        except TypeError:
+            continue
+        kept[key] = value
+    return kept
+
+
+class ReplayLLMClient(LLMClient):
+    """Records the responses of an LLM client to a cassette, or replays them.
+
+    A cassette is a JSON lines file with one interaction per line: the hash
+    of the request, the hash of its conversation, the response blocks, the
+    JSON-serializable metadata (token usage) and the latency of the call.
+
+    In ``record`` mode every call goes to ``client`` and is appended to the
+    cassette. In ``replay`` mode calls are answered from the cassette without
+    network access. A request is matched by its hash, which leaves out dates
+    and uuids; identical requests are answered in the order they were
+    recorded. Requests that differ from every recording, for instance because
+    a tool output changed, get the earliest recording of their conversation
+    not served yet, unless ``strict`` is set. Conversations are told apart by
+    their first message, so concurrent tasks never get each other's responses.
+    """
+
+    def __init__(
+        self,
+        cassette_path: str,
+        mode: Literal["record", "replay"] = "replay",
+        client: Optional[LLMClient] = None,
+        latency: Optional[float] = None,
+        strict: bool = False,
+    ):
+        """Initialize the replay client.
+
+        Args:
+            cassette_path: Path of the cassette file.
+            mode: Whether to record the responses of ``client`` or replay them.
+            client: The client to record; required in ``record`` mode.
+            latency: Seconds to wait before each replayed response. ``None``
+                replays without delay, a negative value waits as long as the
+                recorded call took.
+            strict: Raise on requests without a matching recording instead of
+                serving the next unserved one of their conversation.
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown replay mode: {mode}")
+        if mode == "record" and client is None:
+            raise ValueError("Recording needs a client to record")
+        self.cassette_path = cassette_path
+        self.mode = mode
+        self.client = client
+        self.latency = latency
+        self.strict = strict
+        self._lock = threading.Lock()
+        self._interactions: list[dict[str, Any]] = []
+        self._by_hash: dict[str, deque[int]] = defaultdict(deque)
+        self._by_conversation: dict[str, deque[int]] = defaultdict(deque)
+        self._served: set[int] = set()
+
+        if mode == "record":
+            directory = os.path.dirname(cassette_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Start a fresh cassette
+            open(cassette_path, "w").close()
+        else:
+            self._load()
+
+    def _load(self):
+        with open(self.cassette_path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                interaction = json.loads(line)
+                index = len(self._interactions)
+                self._by_hash[interaction["request_hash"]].append(index)
+                self._by_conversation[interaction["conversation_hash"]].append(index)
+                self._interactions.append(interaction)
+        logger.info(
+            f"Loaded {len(self._interactions)} interactions from {self.cassette_path}"
+        )
+
+    def _record(
+        self,
+        key: str,
+        conversation: str,
+        response: list[AssistantContentBlock],
+        metadata: dict[str, Any],
+        latency: float,
+    ):
+        interaction = {
+            "request_hash": key,
+            "conversation_hash": conversation,
+            "response": response_to_json(response),
+            "metadata": metadata_to_json(metadata),
+            "latency": latency,
+        }
+        with self._lock:
+            self._interactions.append(interaction)
+            # Append line by line, so an interrupted run keeps its recordings
+            with open(self.cassette_path, "a") as f:
+                f.write(json.dumps(interaction) + "\n")
+
+    @staticmethod
+    def _next_unserved(
+        indices: Optional[deque[int]], served: set[int]
+    ) -> Optional[int]:
+        """Pop the served recordings off the front of a queue and take the next one."""
+        while indices and indices[0] in served:
+            indices.popleft()
+        return indices.popleft() if indices else None
+
+    def _take(self, key: str, conversation: str) -> dict[str, Any]:
+        """Pick the recording that answers a request."""
+        with self._lock:
+            index = self._next_unserved(self._by_hash.get(key), self._served)
+            if index is None:
+                if self.strict:
+                    raise KeyError(f"No recorded response for request {key[:12]}")
+                index = self._next_unserved(
+                    self._by_conversation.get(conversation), self._served
+                )
+                if index is None:
+                    raise KeyError(
+                        f"Cassette {self.cassette_path} has no responses left "
+                        f"for conversation {conversation[:12]}"
+                    )
+                logger.warning(
+                    f"No recorded response for request {key[:12]}, "
+                    f"replaying interaction {index} instead"
+                )
+            self._served.add(index)
+            return self._interactions[index]
+
+    def _replay_delay(self, interaction: dict[str, Any]) -> float:
+        if self.latency is None:
+            return 0.0
+        if self.latency < 0:
+            return interaction.get("latency", 0.0)
+        return self.latency
+
+    @staticmethod
+    def _replayed(
+        interaction: dict[str, Any],
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        return response_from_json(interaction["response"]), dict(
+            interaction["metadata"]
+        )
+
+    def generate(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        """Generate responses, recording or replaying them."""
+        request = dict(
+            messages=messages,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+        key = request_hash(**request)
+        conversation = conversation_hash(messages)
+        if self.mode == "record":
+            assert self.client is not None
+            start = time.perf_counter()
+            response, metadata = self.client.generate(**request)
+            self._record(
+                key, conversation, response, metadata, time.perf_counter() - start
+            )
+            return response, metadata
+
+        interaction = self._take(key, conversation)
+        delay = self._replay_delay(interaction)
+        if delay:
+            time.sleep(delay)
+        return self._replayed(interaction)
+
+    async def agenerate(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        """Async counterpart of ``generate``."""
+        request = dict(
+            messages=messages,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+        key = request_hash(**request)
+        conversation = conversation_hash(messages)
+        if self.mode == "record":
+            assert self.client is not None
+            start = time.perf_counter()
+            response, metadata = await self.client.agenerate(**request)
+            self._record(
+                key, conversation, response, metadata, time.perf_counter() - start
+            )
+            return response, metadata
+
+        interaction = self._take(key, conversation)
+        delay = self._replay_delay(interaction)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._replayed(interaction)
@@ -0,0 +1,378 @@
+"""Route LLM requests across equivalent endpoints by health and latency."""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Tuple
+
+from ii_agent.llm.base import (
+    AssistantContentBlock,
+    LLMClient,
+    LLMMessages,
+    LLMStreamEvent,
+    ToolParam,
+)
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying on another endpoint: timeouts, throttling and
+# server errors (including Anthropic's 529 overloaded)
+FAILOVER_STATUS_CODES = {408, 429}
+# Latency samples kept per endpoint for the hedging percentile
+LATENCY_WINDOW = 100
+# Samples needed before an endpoint's percentile is trusted for hedging
+MIN_HEDGE_SAMPLES = 5
+
+
+def is_failover_error(error: BaseException) -> bool:
+    """Whether another endpoint may succeed where this one failed.
+
+    Client errors such as invalid requests fail the same way everywhere and
+    are raised at once.
+    """
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int):
+        return status in FAILOVER_STATUS_CODES or status >= 500
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    name = type(error).__name__
+    return "Connection" in name or "Timeout" in name or "Overloaded" in name
+
+
+@dataclass
+class EndpointHealth:
+    """Running latency and error statistics of one endpoint."""
+
+    name: str
+    latency_ewma: Optional[float] = None
+    error_ewma: float = 0.0
+    cooldown_until: float = 0.0
+    requests: int = 0
+    failures: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.latencies) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class RouterLLMClient(LLMClient):
+    """Sends each request to the healthiest of several equivalent endpoints.
+
+    Endpoints are ranked by an exponentially weighted moving average of their
+    latency, inflated by their recent error rate; endpoints without samples
+    are tried first so every endpoint gets measured. A request that fails
+    with an overload, throttling, server or connection error is retried on
+    the next endpoint, and the failing endpoint is skipped for ``cooldown``
+    seconds.
+
+    With ``hedge`` set, an async request that has not completed after the
+    endpoint's ``hedge_quantile`` latency (or ``hedge_after`` seconds) is sent
+    to the next endpoint as well; the first response wins and the other
+    request is cancelled. Streaming requests fail over but are not hedged,
+    since their deltas have already been yielded.
+    """
+
+    def __init__(
+        self,
+        endpoints: list[tuple[str, LLMClient]],
+        alpha: float = 0.2,
+        error_penalty: float = 4.0,
+        cooldown: float = 30.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_after: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the router.
+
+        Args:
+            endpoints: (name, client) pairs serving the same model.
+            alpha: Weight of the newest sample in the moving averages.
+            error_penalty: How much a 100% error rate multiplies the latency
+                score of an endpoint.
+            cooldown: Seconds an endpoint is skipped after a failover error.
+            hedge: Whether to hedge slow async requests to a second endpoint.
+            hedge_quantile: Latency percentile after which a request is hedged.
+            hedge_after: Fixed hedging delay in seconds, instead of the
+                percentile.
+            clock: Time source, replaceable in tests.
+        """
+        if not endpoints:
+            raise ValueError("The router needs at least one endpoint")
+        self.endpoints = dict(endpoints)
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self.cooldown = cooldown
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_after = hedge_after
+        self.clock = clock
+        self.health = {name: EndpointHealth(name) for name in self.endpoints}
+        self.hedged_requests = 0
+        self._lock = threading.Lock()
+
+    def _score(self, health: EndpointHealth) -> float:
+        if health.latency_ewma is None:
+            return -1.0
+        return health.latency_ewma * (1 + self.error_penalty * health.error_ewma)
+
+    def ranked_endpoints(self) -> list[str]:
+        """Endpoint names from healthiest to least healthy.
+
+        Endpoints cooling down after a failure come last, so they are only
+        used when every endpoint has failed recently.
+        """
+        now = self.clock()
+        with self._lock:
+            return sorted(
+                self.health,
+                key=lambda name: (
+                    self.health[name].cooldown_until > now,
+                    self._score(self.health[name]),
+                ),
+            )
+
+    def _record_success(self, name: str, latency: float):
+        with self._lock:
+            health = self.health[name]
+            health.requests += 1
+            health.latencies.append(latency)
+            if health.latency_ewma is None:
+                health.latency_ewma = latency
+            else:
+                health.latency_ewma += self.alpha * (latency - health.latency_ewma)
+            health.error_ewma *= 1 - self.alpha
+
+    def _record_failure(self, name: str, error: BaseException):
+        # Invalid requests say nothing about the endpoint's health
+        if not is_failover_error(error):
+            return
+        with self._lock:
+            health = self.health[name]
+            health.requests += 1
+            health.failures += 1
+            health.error_ewma += self.alpha * (1 - health.error_ewma)
+            health.cooldown_until = self.clock() + self.cooldown
+        logger.warning(f"LLM endpoint {name} failed: {error}")
+
+    def _hedge_delay(self, name: str) -> Optional[float]:
+        if self.hedge_after is not None:
+            return self.hedge_after
+        with self._lock:
+            return self.health[name].percentile(self.hedge_quantile)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the health statistics of every endpoint."""
+        with self._lock:
+            return {
+                "hedged_requests": self.hedged_requests,
+                "endpoints": {
+                    name: {
+                        "latency_ewma": health.latency_ewma,
+                        "error_rate": health.error_ewma,
+                        "p95_latency": health.percentile(0.95),
+                        "requests": health.requests,
+                        "failures": health.failures,
+                        "cooling_down": health.cooldown_until > self.clock(),
+                    }
+                    for name, health in self.health.items()
+                },
+            }
+
+    def generate(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        """Generate responses on the healthiest endpoint, failing over on errors."""
+        request = dict(
+            messages=messages,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+        last_error: Optional[BaseException] = None
+        for name in self.ranked_endpoints():
+            start = self.clock()
+            try:
+                response, metadata = self.endpoints[name].generate(**request)
+            except Exception as e:
+                self._record_failure(name, e)
+                if not is_failover_error(e):
+                    raise
+                last_error = e
+                continue
+            self._record_success(name, self.clock() - start)
+            return response, {**metadata, "endpoint": name}
+        assert last_error is not None
+        raise last_error
+
+    async def _agenerate_on(
+        self, name: str, request: dict[str, Any]
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        start = self.clock()
+        try:
+            response, metadata = await self.endpoints[name].agenerate(**request)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._record_failure(name, e)
+            raise
+        self._record_success(name, self.clock() - start)
+        return response, {**metadata, "endpoint": name}
+
+    async def agenerate(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        """Async counterpart of ``generate``, hedging slow requests if enabled."""
+        request = dict(
+            messages=messages,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+        remaining = deque(self.ranked_endpoints())
+        running: dict[asyncio.Task, str] = {}
+        last_error: Optional[BaseException] = None
+        try:
+            while remaining or running:
+                if not running:
+                    name = remaining.popleft()
+                    running[asyncio.create_task(self._agenerate_on(name, request))] = (
+                        name
+                    )
+
+                timeout = None
+                if self.hedge and remaining and len(running) == 1:
+                    timeout = self._hedge_delay(next(iter(running.values())))
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # The request is slower than usual: race it on the next endpoint
+                    name = remaining.popleft()
+                    logger.info(f"Hedging LLM request to endpoint {name}")
+                    with self._lock:
+                        self.hedged_requests += 1
+                    running[asyncio.create_task(self._agenerate_on(name, request))] = (
+                        name
+                    )
+                    continue
+
+                for task in done:
+                    running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    if not is_failover_error(error):
+                        raise error
+                    last_error = error
+        finally:
+            for task in running:
+                task.cancel()
+        assert last_error is not None
+        raise last_error
+
+    def generate_stream(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Iterator[LLMStreamEvent]:
+        """Stream from the healthiest endpoint, failing over until the first delta."""
+        request = dict(
+            messages=messages,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+        last_error: Optional[BaseException] = None
+        for name in self.ranked_endpoints():
+            start = self.clock()
+            started = False
+            try:
+                for event in self.endpoints[name].generate_stream(**request):
+                    if event.type == "complete":
+                        self._record_success(name, self.clock() - start)
+                        event.metadata = {**(event.metadata or {}), "endpoint": name}
+                    started = True
+                    yield event
+                return
+            except Exception as e:
+                self._record_failure(name, e)
+                if started or not is_failover_error(e):
+                    raise
+                last_error = e
+        assert last_error is not None
+        raise last_error
+
+    async def agenerate_stream(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        """Async counterpart of ``generate_stream``."""
+        request = dict(
+            messages=messages,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+        last_error: Optional[BaseException] = None
+        for name in self.ranked_endpoints():
+            start = self.clock()
+            started = False
+            try:
+                async for event in self.endpoints[name].agenerate_stream(**request):
+                    if event.type == "complete":
+                        self._record_success(name, self.clock() - start)
+                        event.metadata = {**(event.metadata or {}), "endpoint": name}
+                    started = True
+                    yield event
+                return
+            except Exception as e:
+                self._record_failure(name, e)
+                if started or not is_failover_error(e):
+                    raise
+                last_error = e
+        assert last_error is not None
+        raise last_error
@@ -1,42 +1,103 @@
 import json
-import base64
-from typing import Any, Union
-from PIL import Image
-import io
+import hashlib
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Union
+
+from ii_agent.llm.image_tokens import ImageTokenEstimator
+from ii_agent.llm.tokenizer import Tokenizer, get_default_tokenizer
 
 
 class TokenCounter:
+    """Counts prompt tokens with a local tokenizer.
+
+    Text counts are memoized by content hash in an LRU cache and scaled by a
+    calibration factor, which corrects the local tokenizer towards the token
+    counts a given model's provider reports. Images are estimated from their
+    header dimensions without decoding the pixels.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Optional[Tokenizer] = None,
+        calibration: float = 1.0,
+        cache_size: int = 4096,
+    ):
+        self.tokenizer = tokenizer or get_default_tokenizer()
+        self.calibration = calibration
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, int] = OrderedDict()
+        self.image_estimator = ImageTokenEstimator()
+
+    @classmethod
+    def for_model(
+        cls,
+        model_name: Optional[str],
+        calibrations: Optional[dict[str, float]] = None,
+        tokenizer: Optional[Tokenizer] = None,
+    ) -> "TokenCounter":
+        """Create a counter calibrated for a model.
+
+        Args:
+            model_name: The model whose prompts are counted.
+            calibrations: Calibration factors keyed by model name prefix; the
+                longest matching prefix wins.
+            tokenizer: The tokenizer to use, defaults to the configured one.
+        """
+        calibration = 1.0
+        if model_name and calibrations:
+            prefixes = [p for p in calibrations if model_name.startswith(p)]
+            if prefixes:
+                calibration = calibrations[max(prefixes, key=len)]
+        return cls(tokenizer=tokenizer, calibration=calibration)
+
+    @staticmethod
+    def calibrate(samples: Iterable[tuple[int, int]]) -> float:
+        """Compute a calibration factor from (estimated, reported) token counts.
+
+        For example, pair the local count of each prompt with the input tokens
+        in the provider's usage metadata.
+        """
+        samples = list(samples)
+        estimated = sum(sample[0] for sample in samples)
+        reported = sum(sample[1] for sample in samples)
+        if estimated <= 0:
+            return 1.0
+        return reported / estimated
+
+    def _count_text(self, text: str) -> int:
+        if not self.tokenizer.cacheable:
+            return int(self.tokenizer.count(text) * self.calibration)
+        key = hashlib.blake2b(
+            text.encode("utf-8", "surrogatepass"), digest_size=16
+        ).digest()
+        count = self._cache.get(key)
+        if count is not None:
+            self._cache.move_to_end(key)
+            return count
+        count = int(self.tokenizer.count(text) * self.calibration)
+        self._cache[key] = count
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return count
+
+    def count_image_tokens(self, source: dict[str, Any]) -> int:
+        """Count the tokens of an image using the official formula (width * height)/750."""
+        return self.image_estimator.estimate(source)
+
     def count_tokens(self, prompt_chars: Union[str, list[dict[str, Any]]]) -> int:
         if isinstance(prompt_chars, str):
-            return len(prompt_chars) // 3
+            return self._count_text(prompt_chars)
         elif isinstance(prompt_chars, list):
             total_tokens = 0
             for item in prompt_chars:
                 if item.get("type") == "image" and "source" in item:
-                    # For images, calculate tokens based on image dimensions
-                    try:
-                        # Decode base64 image data
-                        image_data = base64.b64decode(item["source"]["data"])
-                        # Open image to get dimensions
-                        with Image.open(io.BytesIO(image_data)) as img:
-                            width, height = img.size
-                            # Calculate tokens using official formula: (width * height)/750
-                            image_tokens = int((width * height) / 750)
-                            total_tokens += image_tokens
-                    except Exception as e:
-                        # If we can't decode the image, use a conservative estimate
-                        print(
-                            f"Warning: Could not decode image for token counting: {e}"
-                        )
-                        total_tokens += (
-                            1500  # Conservative estimate for unknown image size
-                        )
+                    total_tokens += self.count_image_tokens(item["source"])
                 elif item.get("type") == "text":
-                    total_tokens += len(item["text"]) // 3
+                    total_tokens += self._count_text(item["text"])
                 else:
                     # For regular text/dict items, convert to JSON and count
                     json_str = json.dumps(item)
-                    total_tokens += len(json_str) // 3
+                    total_tokens += self._count_text(json_str)
             return total_tokens
         else:
             raise ValueError(
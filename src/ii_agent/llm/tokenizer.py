@@ -0,0 +1,135 @@
+"""Tokenizers used to estimate prompt sizes locally, without a network call."""
+
+import base64
+import logging
+import os
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+try:
+    import regex as re
+except ImportError:  # pragma: no cover - regex ships with tiktoken
+    import re
+
+logger = logging.getLogger(__name__)
+
+# Pre-tokenization pattern of cl100k-style vocabularies.
+CL100K_PATTERN = r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+# Approximation of CL100K_PATTERN for the standard library re module.
+FALLBACK_PATTERN = r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\w]?[^\W\d_]+|\d{1,3}| ?[^\s\w]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+
+TOKENIZER_VOCAB_ENV = "TOKENIZER_VOCAB_PATH"
+
+
+class Tokenizer(ABC):
+    """Counts the tokens of a string."""
+
+    name: str
+    # Whether counts are worth memoizing; cheap estimates are recomputed.
+    cacheable: bool = True
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Return the number of tokens in ``text``."""
+        raise NotImplementedError
+
+
+class HeuristicTokenizer(Tokenizer):
+    """Estimates one token per three characters."""
+
+    name = "heuristic"
+    cacheable = False
+
+    def count(self, text: str) -> int:
+        return len(text) // 3
+
+
+def load_bpe_ranks(vocab_path: str) -> dict[bytes, int]:
+    """Load a tiktoken-format vocabulary: one base64 token and its rank per line."""
+    ranks = {}
+    with open(vocab_path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            token, rank = line.split()
+            ranks[base64.b64decode(token)] = int(rank)
+    return ranks
+
+
+class BPETokenizer(Tokenizer):
+    """Byte-level BPE over a local vocabulary file.
+
+    Uses tiktoken's native encoder when it is installed and a pure Python
+    merge loop otherwise; both give the same counts for the same vocabulary.
+    """
+
+    def __init__(self, vocab_path: str, pattern: str = CL100K_PATTERN):
+        self.name = f"bpe:{os.path.basename(vocab_path)}"
+        self._ranks = load_bpe_ranks(vocab_path)
+        if re.__name__ != "regex":
+            pattern = FALLBACK_PATTERN
+        self._pattern = re.compile(pattern)
+        try:
+            import tiktoken
+
+            self._encoding = tiktoken.Encoding(
+                name=self.name,
+                pat_str=pattern,
+                mergeable_ranks=self._ranks,
+                special_tokens={},
+            )
+        except ImportError:
+            self._encoding = None
+        self._count_piece = lru_cache(maxsize=65536)(self._count_piece_uncached)
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode_ordinary(text))
+        return sum(
+            self._count_piece(piece.encode("utf-8"))
+            for piece in self._pattern.findall(text)
+        )
+
+    def _count_piece_uncached(self, piece: bytes) -> int:
+        """Count the tokens of one pre-tokenized piece by merging byte pairs."""
+        if piece in self._ranks:
+            return 1
+        parts = [piece[i : i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best_rank = None
+            best_index = 0
+            for i in range(len(parts) - 1):
+                rank = self._ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank = rank
+                    best_index = i
+            if best_rank is None:
+                break
+            parts[best_index : best_index + 2] = [
+                parts[best_index] + parts[best_index + 1]
+            ]
+        return len(parts)
+
+
+def get_default_tokenizer() -> Tokenizer:
+    """Return the BPE tokenizer if a local vocabulary is configured.
+
+    The vocabulary is read from the file named by ``TOKENIZER_VOCAB_PATH``;
+    without one, or if it cannot be loaded, the heuristic is used.
+    """
+    vocab_path = os.getenv(TOKENIZER_VOCAB_ENV)
+    if not vocab_path:
+        return HeuristicTokenizer()
+    try:
+        return _load_bpe_tokenizer(vocab_path)
+    except (OSError, ValueError) as e:
+        logger.warning(
+            f"Could not load tokenizer vocabulary {vocab_path}, using heuristic: {e}"
+        )
+        return HeuristicTokenizer()
+
+
+@lru_cache(maxsize=None)
+def _load_bpe_tokenizer(vocab_path: str) -> BPETokenizer:
+    # Vocabularies are large; load each one once per process.
+    return BPETokenizer(vocab_path)
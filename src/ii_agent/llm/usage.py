@@ -0,0 +1,320 @@
+"""Per-call token usage and latency accounting for LLM clients."""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Tuple
+
+from ii_agent.llm.base import (
+    AssistantContentBlock,
+    LLMClient,
+    LLMMessages,
+    LLMStreamEvent,
+    ToolParam,
+)
+
+logger = logging.getLogger(__name__)
+
+# Callers an LLM call can be attributed to
+AGENT_CALLER = "agent"
+SUMMARIZER_CALLER = "summarizer"
+REVIEWER_CALLER = "reviewer"
+PROMPT_ENHANCER_CALLER = "prompt_enhancer"
+TOOL_CALLER = "tool"
+
+
+def _token_count(metadata: dict[str, Any], key: str) -> int:
+    # Clients report -1 or nothing for counts the provider does not return
+    value = metadata.get(key)
+    return value if isinstance(value, int) and value > 0 else 0
+
+
+@dataclass
+class UsageRecord:
+    """Token usage and latency of one LLM call."""
+
+    session_id: str
+    caller: str
+    model_name: str
+    turn: int
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    latency: float = 0.0
+    endpoint: Optional[str] = None
+    timestamp: datetime = field(default_factory=datetime.utcnow)
+
+    @classmethod
+    def from_metadata(
+        cls,
+        session_id: str,
+        caller: str,
+        model_name: str,
+        turn: int,
+        latency: float,
+        metadata: Optional[dict[str, Any]],
+    ) -> "UsageRecord":
+        metadata = metadata or {}
+        return cls(
+            session_id=session_id,
+            caller=caller,
+            model_name=model_name,
+            turn=turn,
+            input_tokens=_token_count(metadata, "input_tokens"),
+            output_tokens=_token_count(metadata, "output_tokens"),
+            cache_creation_input_tokens=_token_count(
+                metadata, "cache_creation_input_tokens"
+            ),
+            cache_read_input_tokens=_token_count(metadata, "cache_read_input_tokens"),
+            latency=latency,
+            endpoint=metadata.get("endpoint"),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class UsageLedger:
+    """Buffers usage records and writes them to a sink in batches.
+
+    Records are flushed once ``batch_size`` of them are pending or the oldest
+    pending record is ``flush_interval`` seconds old, so a busy server does one
+    database write per batch instead of one per LLM call. Without a sink the
+    records are dropped on flush. A flush due on the event loop runs in a
+    worker thread.
+    """
+
+    def __init__(
+        self,
+        sink: Optional[Callable[[list[UsageRecord]], None]] = None,
+        batch_size: int = 50,
+        flush_interval: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the ledger.
+
+        Args:
+            sink: Called with each batch of records to persist.
+            batch_size: Pending records that trigger a flush.
+            flush_interval: Age in seconds of the oldest pending record that
+                triggers a flush.
+            clock: Time source, replaceable in tests.
+        """
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._pending: list[UsageRecord] = []
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        # Held while a batch is written, so that flush() returns only once
+        # the records recorded before it are stored
+        self._write_lock = threading.Lock()
+        self._flushes: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def record(self, record: UsageRecord):
+        """Add a record, flushing the batch if it is due."""
+        with self._lock:
+            self._pending.append(record)
+            if self._oldest is None:
+                self._oldest = self.clock()
+            due = (
+                len(self._pending) >= self.batch_size
+                or self.clock() - self._oldest >= self.flush_interval
+            )
+        if due:
+            self.flush_soon()
+
+    def flush_soon(self):
+        """Flush, in a worker thread when called on the event loop."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        # The sink writes to the database, which must not block the event loop
+        task = loop.create_task(asyncio.to_thread(self.flush))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    def flush(self):
+        """Write all pending records to the sink."""
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._oldest = None
+                sink = self.sink
+            if not batch or sink is None:
+                return
+            try:
+                sink(batch)
+            except Exception as e:
+                # Losing usage records must never fail an agent turn
+                logger.error(f"Failed to write {len(batch)} usage records: {e}")
+
+
+_default_ledger: UsageLedger | None = None
+
+
+def get_usage_ledger() -> UsageLedger:
+    """Return the process-wide usage ledger."""
+    global _default_ledger
+    if _default_ledger is None:
+        _default_ledger = UsageLedger()
+    return _default_ledger
+
+
+class MeteredLLMClient(LLMClient):
+    """Records the usage of every call made through a client.
+
+    Each caller of a session (the agent, its summarizer, the reviewer, the
+    prompt enhancer) gets its own wrapper, so the ledger can attribute tokens
+    and latency to it. ``turn`` counts the calls made through the wrapper.
+    Attributes other than the generate methods are read from the wrapped
+    client.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        session_id: Any,
+        caller: str,
+        ledger: Optional[UsageLedger] = None,
+    ):
+        """Initialize the wrapper.
+
+        Args:
+            client: The client making the calls.
+            session_id: Session the calls are attributed to.
+            caller: Component making the calls, e.g. ``AGENT_CALLER``.
+            ledger: Ledger to record to, by default the process-wide one.
+        """
+        self.client = client
+        self.session_id = str(session_id)
+        self.caller = caller
+        self.ledger = ledger if ledger is not None else get_usage_ledger()
+        self.turns = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes the wrapper does not define
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def _record(self, latency: float, metadata: Optional[dict[str, Any]]):
+        with self._lock:
+            self.turns += 1
+            turn = self.turns
+        self.ledger.record(
+            UsageRecord.from_metadata(
+                session_id=self.session_id,
+                caller=self.caller,
+                model_name=getattr(self.client, "model_name", "unknown"),
+                turn=turn,
+                latency=latency,
+                metadata=metadata,
+            )
+        )
+
+    def generate(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        start = time.perf_counter()
+        response, metadata = self.client.generate(
+            messages=messages,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+        self._record(time.perf_counter() - start, metadata)
+        return response, metadata
+
+    async def agenerate(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Tuple[list[AssistantContentBlock], dict[str, Any]]:
+        start = time.perf_counter()
+        response, metadata = await self.client.agenerate(
+            messages=messages,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        )
+        self._record(time.perf_counter() - start, metadata)
+        return response, metadata
+
+    def generate_stream(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> Iterator[LLMStreamEvent]:
+        start = time.perf_counter()
+        for event in self.client.generate_stream(
+            messages=messages,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        ):
+            if event.type == "complete":
+                self._record(time.perf_counter() - start, event.metadata)
+            yield event
+
+    async def agenerate_stream(
+        self,
+        messages: LLMMessages,
+        max_tokens: int,
+        system_prompt: str | None = None,
+        temperature: float = 0.0,
+        tools: list[ToolParam] = [],
+        tool_choice: dict[str, str] | None = None,
+        thinking_tokens: int | None = None,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        start = time.perf_counter()
+        async for event in self.client.agenerate_stream(
+            messages=messages,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking_tokens=thinking_tokens,
+        ):
+            if event.type == "complete":
+                self._record(time.perf_counter() - start, event.metadata)
+            yield event
@@ -5,8 +5,15 @@ Session management API endpoints.
 import logging
 from fastapi import APIRouter, HTTPException
 
-from ii_agent.db.manager import Events, Sessions
-from ..models.messages import SessionResponse, EventResponse, SessionInfo, EventInfo
+from ii_agent.db.manager import Events, Sessions, Usage
+from ii_agent.llm.usage import get_usage_ledger
+from ..models.messages import (
+    SessionResponse,
+    EventResponse,
+    SessionInfo,
+    EventInfo,
+    UsageResponse,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -56,3 +63,26 @@ def get_session_events(session_id: str):
         raise HTTPException(
             status_code=500, detail=f"Error retrieving events: {str(e)}"
         )
+
+
+@sessions_router.get("/sessions/{session_id}/usage", response_model=UsageResponse)
+def get_session_usage(session_id: str):
+    """Get the aggregated LLM token usage and latency of a session.
+
+    Args:
+        session_id: The session identifier to aggregate usage for
+
+    Returns:
+        The usage totals of the session, per caller and per model, and the
+        calls that used the most tokens
+    """
+    try:
+        # Include the records still waiting for a batch write
+        get_usage_ledger().flush()
+        return UsageResponse(**Usage.get_session_usage(session_id))
+
+    except Exception as e:
+        logger.error(f"Error retrieving usage: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error retrieving usage: {str(e)}"
+        )
@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 import os
@@ -9,10 +10,25 @@ from .api import upload_router, sessions_router
 from ii_agent.server.websocket import ConnectionManager
 from ii_agent.server.factories import AgentFactory, AgentConfig, ClientFactory
 from ii_agent.core.config.utils import load_ii_agent_config
+from ii_agent.db.manager import Usage
+from ii_agent.llm.client_registry import get_client_registry
+from ii_agent.llm.rate_limiter import RateLimits, get_rate_limiter_registry
+from ii_agent.llm.usage import get_usage_ledger
+from ii_agent.tools.bash_tool import get_shell_pool
+from ii_agent.tools.lazy_tool import get_lazy_tool_stats
+from ii_agent.tools.result_cache import get_tool_result_cache
 
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release the resources shared by all sessions when the server stops."""
+    yield
+    # Close the connection pools of the shared LLM clients
+    await get_client_registry().aclose()
+
+
 def create_app(args) -> FastAPI:
     """Create and configure the FastAPI application.
 
@@ -22,7 +38,7 @@ def create_app(args) -> FastAPI:
     Returns:
         FastAPI: Configured FastAPI application instance
     """
-    app = FastAPI(title="Agent WebSocket API")
+    app = FastAPI(title="Agent WebSocket API", lifespan=lifespan)
     ii_agent_config = load_ii_agent_config()
 
     # Add CORS middleware
@@ -38,13 +54,37 @@ def create_app(args) -> FastAPI:
     app.state.workspace = args.workspace
 
     # Create factory instances
-    client_factory = ClientFactory(project_id=args.project_id, region=args.region)
+    get_rate_limiter_registry().configure(
+        RateLimits(
+            requests_per_minute=args.llm_rpm,
+            input_tokens_per_minute=args.llm_input_tpm,
+            output_tokens_per_minute=args.llm_output_tpm,
+        )
+    )
+    # Persist the usage of every LLM call in batches
+    get_usage_ledger().sink = Usage.save_usage
+    # Start shells ahead of the sessions that will use them
+    get_shell_pool().configure(args.shell_pool_size)
+    if args.tool_cache_path:
+        get_tool_result_cache().attach_disk(args.tool_cache_path)
+    client_factory = ClientFactory(
+        project_id=args.project_id,
+        region=args.region,
+        router_endpoints=args.router_endpoints,
+        hedge_requests=args.hedge_requests,
+    )
 
     agent_config = AgentConfig(
         logs_path=args.logs_path,
         minimize_stdout_logs=args.minimize_stdout_logs,
         docker_container_id=args.docker_container_id,
         needs_permission=args.needs_permission,
+        presummarize_threshold=args.presummarize_threshold,
+        summary_chunk_tokens=args.summary_chunk_tokens,
+        summary_fan_out=args.summary_fan_out,
+        context_strategy=args.context_strategy,
+        token_calibrations=dict(args.token_calibration),
+        parallel_tool_calls=args.parallel_tool_calls,
     )
     agent_factory = AgentFactory(agent_config)
 
@@ -66,6 +106,26 @@ def create_app(args) -> FastAPI:
     # Setup workspace static files
     setup_workspace(app, args.workspace)
 
+    @app.get("/api/llm/pool")
+    def get_llm_pool_stats():
+        """Return reuse and connection pool statistics of the shared LLM clients."""
+        return client_factory.pool_stats()
+
+    @app.get("/api/tools/usage")
+    def get_tool_usage_stats():
+        """Return how often the lazily built tools are created, built and called."""
+        return get_lazy_tool_stats().stats()
+
+    @app.get("/api/tools/shells")
+    def get_shell_pool_stats():
+        """Return how many shells were served from the pool or started on demand."""
+        return get_shell_pool().stats()
+
+    @app.get("/api/tools/cache")
+    def get_tool_cache_stats():
+        """Return the hits and misses of the tool result cache per tool."""
+        return get_tool_result_cache().stats()
+
     # WebSocket endpoint
     @app.websocket("/ws")
     async def websocket_handler(websocket: WebSocket):
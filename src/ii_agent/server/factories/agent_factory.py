@@ -1,19 +1,28 @@
 import asyncio
 import logging
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from fastapi import WebSocket
 
 from ii_agent.core.storage.files import FileStore
+from ii_agent.core.storage.local import LocalFileStore
 from ii_agent.llm.base import LLMClient
 from ii_agent.llm.message_history import MessageHistory
 from ii_agent.utils import WorkspaceManager
 from ii_agent.agents.function_call import FunctionCallAgent
 from ii_agent.agents.reviewer import ReviewerAgent
-from ii_agent.llm.context_manager.llm_summarizing import LLMSummarizingContextManager
+from ii_agent.llm.context_manager import create_context_manager
 from ii_agent.llm.token_counter import TokenCounter
+from ii_agent.llm.usage import (
+    AGENT_CALLER,
+    REVIEWER_CALLER,
+    SUMMARIZER_CALLER,
+    TOOL_CALLER,
+    MeteredLLMClient,
+)
 from ii_agent.db.manager import Sessions
 from ii_agent.tools import get_system_tools
+from ii_agent.tools.output_store import TOOL_OUTPUTS_DIR, ToolOutputStore
 from ii_agent.prompts.system_prompt import (
     SYSTEM_PROMPT,
     SYSTEM_PROMPT_WITH_SEQ_THINKING,
@@ -38,6 +47,13 @@ class AgentConfig:
         max_output_tokens_per_turn: int = MAX_OUTPUT_TOKENS_PER_TURN,
         max_turns: int = MAX_TURNS,
         token_budget: int = TOKEN_BUDGET,
+        token_calibrations: Dict[str, float] = None,
+        presummarize_threshold: Optional[float] = None,
+        summary_chunk_tokens: Optional[int] = None,
+        summary_fan_out: int = 4,
+        context_strategy: str = "summarize",
+        keep_observations: int = 5,
+        parallel_tool_calls: bool = False,
     ):
         self.logs_path = logs_path
         self.minimize_stdout_logs = minimize_stdout_logs
@@ -46,6 +62,19 @@ class AgentConfig:
         self.max_output_tokens_per_turn = max_output_tokens_per_turn
         self.max_turns = max_turns
         self.token_budget = token_budget
+        # Token count calibration factors keyed by model name prefix
+        self.token_calibrations = token_calibrations or {}
+        # Fraction of the token budget at which summarization starts in the background
+        self.presummarize_threshold = presummarize_threshold
+        # Token bound of the chunks of a map-reduce summary, and how many run at once
+        self.summary_chunk_tokens = summary_chunk_tokens
+        self.summary_fan_out = summary_fan_out
+        # "summarize", "mask" or "mask-then-summarize"
+        self.context_strategy = context_strategy
+        # Number of recent tool results kept intact when masking observations
+        self.keep_observations = keep_observations
+        # Whether agents execute every tool call of a turn, unless a session asks otherwise
+        self.parallel_tool_calls = parallel_tool_calls
 
 
 class AgentFactory:
@@ -91,7 +120,10 @@ class AgentFactory:
         )
 
         # Create context manager
-        context_manager = self._create_context_manager(client, logger_for_agent_logs)
+        context_manager = self._create_context_manager(
+            MeteredLLMClient(client, session_id, SUMMARIZER_CALLER),
+            logger_for_agent_logs,
+        )
 
         # Create agent
         return self._create_agent_instance(
@@ -148,13 +180,20 @@ class AgentFactory:
 
     def _create_context_manager(self, client: LLMClient, logger: logging.Logger):
         """Create context manager based on configuration."""
-        token_counter = TokenCounter()
+        token_counter = TokenCounter.for_model(
+            client.model_name, self.config.token_calibrations
+        )
 
-        return LLMSummarizingContextManager(
+        return create_context_manager(
+            self.config.context_strategy,
             client=client,
             token_counter=token_counter,
             logger=logger,
             token_budget=self.config.token_budget,
+            presummarize_threshold=self.config.presummarize_threshold,
+            summary_chunk_tokens=self.config.summary_chunk_tokens,
+            summary_fan_out=self.config.summary_fan_out,
+            keep_observations=self.config.keep_observations,
         )
 
     def _create_agent_instance(
@@ -172,7 +211,7 @@ class AgentFactory:
         # Initialize agent queue and tools
         queue = asyncio.Queue()
         tools = get_system_tools(
-            client=client,
+            client=MeteredLLMClient(client, session_id, TOOL_CALLER),
             workspace_manager=workspace_manager,
             message_queue=queue,
             container_id=self.config.docker_container_id,
@@ -187,6 +226,13 @@ class AgentFactory:
             else SYSTEM_PROMPT
         )
 
+        # Keep large tool outputs in the workspace instead of the history
+        output_store = None
+        if tool_args.get("offload_tool_outputs", False):
+            output_store = ToolOutputStore(
+                LocalFileStore(str(workspace_manager.root / TOOL_OUTPUTS_DIR))
+            )
+
         # try to get history from file store
         init_history = MessageHistory(context_manager)
         try:
@@ -197,7 +243,7 @@ class AgentFactory:
 
         agent = FunctionCallAgent(
             system_prompt=system_prompt,
-            client=client,
+            client=MeteredLLMClient(client, session_id, AGENT_CALLER),
             tools=tools,
             workspace_manager=workspace_manager,
             message_queue=queue,
@@ -207,6 +253,11 @@ class AgentFactory:
             max_turns=self.config.max_turns,
             websocket=websocket,
             session_id=session_id,
+            parallel_tool_calls=tool_args.get(
+                "parallel_tool_calls", self.config.parallel_tool_calls
+            ),
+            stream_response=tool_args.get("stream_response", False),
+            output_store=output_store,
         )
 
         # Store the session ID in the agent for event tracking
@@ -239,12 +290,15 @@ class AgentFactory:
         logger_for_agent_logs = self._setup_logger(websocket)
 
         # Create context manager
-        context_manager = self._create_context_manager(client, logger_for_agent_logs)
+        context_manager = self._create_context_manager(
+            MeteredLLMClient(client, session_id, SUMMARIZER_CALLER),
+            logger_for_agent_logs,
+        )
 
         # Initialize agent queue and tools
         queue = asyncio.Queue()
         tools = get_system_tools(
-            client=client,
+            client=MeteredLLMClient(client, session_id, TOOL_CALLER),
             workspace_manager=workspace_manager,
             message_queue=queue,
             container_id=self.config.docker_container_id,
@@ -254,7 +308,7 @@ class AgentFactory:
 
         reviewer_agent = ReviewerAgent(
             system_prompt=REVIEWER_SYSTEM_PROMPT,
-            client=client,
+            client=MeteredLLMClient(client, session_id, REVIEWER_CALLER),
             tools=tools,
             workspace_manager=workspace_manager,
             message_queue=queue,
@@ -1,23 +1,51 @@
+from typing import Any
+
 from ii_agent.llm.base import LLMClient
-from ii_agent.llm import get_client
+from ii_agent.llm.client_registry import ClientRegistry, get_client_registry
+from ii_agent.llm.router import RouterLLMClient
+
+# Router endpoint name of the provider's first-party API, as opposed to a region
+DIRECT_ENDPOINT = "direct"
 
 
 class ClientFactory:
     """Factory for creating LLM clients based on model configuration."""
 
-    def __init__(self, project_id: str = None, region: str = None):
+    def __init__(
+        self,
+        project_id: str = None,
+        region: str = None,
+        registry: ClientRegistry = None,
+        use_caching: bool = True,
+        router_endpoints: list[str] | None = None,
+        hedge_requests: bool = False,
+    ):
         """Initialize the client factory with configuration.
 
         Args:
             project_id: Project ID for cloud services
             region: Region for cloud services
+            registry: Registry of shared clients, defaults to the process-wide one
+            use_caching: Whether Anthropic clients use prompt caching
+            router_endpoints: Regions (or "direct" for the first-party API) to
+                route each model's requests across, instead of ``region`` alone
+            hedge_requests: Whether routed requests are hedged to a second
+                endpoint when they are slower than usual
         """
         self.project_id = project_id
         self.region = region
+        self.registry = registry or get_client_registry()
+        self.use_caching = use_caching
+        self.router_endpoints = router_endpoints
+        self.hedge_requests = hedge_requests
+        self._routers: dict[tuple, RouterLLMClient] = {}
 
     def create_client(self, model_name: str, **kwargs) -> LLMClient:
         """Create an LLM client based on the model name and configuration.
 
+        Clients are shared across sessions: the same configuration always
+        returns the same instance.
+
         Args:
             model_name: The name of the model to use
             **kwargs: Additional configuration options like thinking_tokens
@@ -29,20 +57,43 @@ class ClientFactory:
             ValueError: If the model name is not supported
         """
         if "claude" in model_name:
-            return get_client(
+            return self._get_client(
                 "anthropic-direct",
                 model_name=model_name,
-                use_caching=False,
-                project_id=self.project_id,
-                region=self.region,
+                use_caching=self.use_caching,
                 thinking_tokens=kwargs.get("thinking_tokens", 0),
             )
         elif "gemini" in model_name:
-            return get_client(
-                "gemini-direct",
-                model_name=model_name,
-                project_id=self.project_id,
-                region=self.region,
-            )
+            return self._get_client("gemini-direct", model_name=model_name)
         else:
             raise ValueError(f"Unknown model name: {model_name}")
+
+    def _get_client(self, client_name: str, **kwargs) -> LLMClient:
+        """Return the shared client, or the shared router over all endpoints."""
+        if not self.router_endpoints:
+            return self.registry.get_client(
+                client_name, project_id=self.project_id, region=self.region, **kwargs
+            )
+
+        key = (client_name, tuple(sorted(kwargs.items())))
+        router = self._routers.get(key)
+        if router is None:
+            endpoints = []
+            for endpoint in self.router_endpoints:
+                direct = endpoint == DIRECT_ENDPOINT
+                client = self.registry.get_client(
+                    client_name,
+                    project_id=None if direct else self.project_id,
+                    region=None if direct else endpoint,
+                    # Fail over to another endpoint instead of retrying this one
+                    max_retries=1,
+                    **kwargs,
+                )
+                endpoints.append((endpoint, client))
+            router = RouterLLMClient(endpoints, hedge=self.hedge_requests)
+            self._routers[key] = router
+        return router
+
+    def pool_stats(self) -> dict[str, Any]:
+        """Return reuse and connection pool statistics of the shared clients."""
+        return self.registry.stats()
@@ -1,4 +1,4 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from pydantic import BaseModel
 
 
@@ -56,6 +56,46 @@ class EventResponse(BaseModel):
     events: List[EventInfo]
 
 
+class UsageAggregate(BaseModel):
+    """Model for the summed LLM usage of a session, caller or model."""
+
+    calls: int
+    input_tokens: int
+    output_tokens: int
+    cache_creation_input_tokens: int
+    cache_read_input_tokens: int
+    total_latency: float
+    average_latency: float
+    max_latency: float
+    caller: Optional[str] = None
+    model_name: Optional[str] = None
+
+
+class UsageCall(BaseModel):
+    """Model for the usage of a single LLM call."""
+
+    timestamp: str
+    caller: str
+    model_name: str
+    turn: int
+    input_tokens: int
+    output_tokens: int
+    cache_creation_input_tokens: int
+    cache_read_input_tokens: int
+    latency: float
+    endpoint: Optional[str] = None
+
+
+class UsageResponse(BaseModel):
+    """Response model for session usage queries."""
+
+    session_id: str
+    totals: UsageAggregate
+    by_caller: List[UsageAggregate]
+    by_model: List[UsageAggregate]
+    top_calls: List[UsageCall]
+
+
 class QueryContent(BaseModel):
     """Model for query message content."""
 
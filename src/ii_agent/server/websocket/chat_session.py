@@ -12,6 +12,11 @@ from ii_agent.agents.reviewer import ReviewerAgent
 from ii_agent.core.event import RealtimeEvent, EventType
 from ii_agent.core.storage.files import FileStore
 from ii_agent.db.manager import Sessions, Events
+from ii_agent.llm.usage import (
+    PROMPT_ENHANCER_CALLER,
+    MeteredLLMClient,
+    get_usage_ledger,
+)
 from ii_agent.utils.prompt_generator import enhance_user_prompt
 from ii_agent.utils.workspace_manager import WorkspaceManager
 from ii_agent.server.models.messages import (
@@ -370,7 +375,11 @@ class ChatSession:
             enhance_content = EnhancePromptContent(**content)
 
             # Create LLM client using factory
-            client = self.client_factory.create_client(enhance_content.model_name)
+            client = MeteredLLMClient(
+                self.client_factory.create_client(enhance_content.model_name),
+                self.session_uuid,
+                PROMPT_ENHANCER_CALLER,
+            )
 
             # Call the enhance_prompt function
             success, message, enhanced_prompt = await enhance_user_prompt(
@@ -563,6 +572,16 @@ Please review this feedback and implement the suggested improvements to better c
             self.active_task.cancel()
             self.active_task = None
 
+        # Kill the shells of the agents, the pool replaces them, and stop
+        # summaries started in the background for their histories
+        for agent in (self.agent, self.reviewer_agent):
+            if agent is not None:
+                agent.tool_manager.close()
+                agent.history.cancel_pending_truncation()
+
+        # Write the usage records still waiting for a batch
+        get_usage_ledger().flush_soon()
+
         # Clean up references
         self.websocket = None
         self.agent = None
@@ -3,6 +3,7 @@ from ii_agent.tools.str_replace_tool_relative import StrReplaceEditorTool
 from ii_agent.tools.sequential_thinking_tool import SequentialThinkingTool
 from ii_agent.tools.bash_tool import BashTool
 from ii_agent.tools.tool_manager import get_system_tools, AgentToolManager
+from ii_agent.tools.output_store import ToolOutputStore
 
 # Tools that need input truncation (ToolCall)
 TOOLS_NEED_INPUT_TRUNCATION = {
@@ -18,5 +19,6 @@ __all__ = [
     "AgentToolManager",
     "TOOLS_NEED_INPUT_TRUNCATION",
     "TOOLS_NEED_OUTPUT_FILE_SAVE",
+    "ToolOutputStore",
     "get_system_tools",
 ]
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 import asyncio
 from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any, Optional
 
 import jsonschema
@@ -8,9 +9,15 @@ from anthropic import BadRequestError
 from typing_extensions import final
 
 from ii_agent.llm.base import (
+    ToolCallParameters,
     ToolParam,
 )
 from ii_agent.llm.message_history import MessageHistory
+from ii_agent.tools.result_cache import (
+    ToolCachePolicy,
+    get_tool_result_cache,
+    make_cache_key,
+)
 
 ToolInputSchema = dict[str, Any]
 
@@ -40,12 +47,50 @@ class LLMTool(ABC):
     name: str
     description: str
     input_schema: ToolInputSchema
+    # Read-only tools never mutate the workspace or any shared state, so the
+    # agent may run several of their calls concurrently within one turn.
+    read_only: bool = False
+    # Tools with a cache policy return the cached result of an earlier call
+    # with the same input, made by any session, instead of running again.
+    cache_policy: Optional[ToolCachePolicy] = None
 
     @property
     def should_stop(self) -> bool:
         """Whether the tool wants to stop the current agentic run."""
         return False
 
+    def is_read_only(self, tool_input: dict[str, Any]) -> bool:
+        """Whether a call with this input leaves all shared state untouched."""
+        return self.read_only
+
+    def get_resource_key(self, tool_input: dict[str, Any]) -> Optional[str]:
+        """Return the key of the single resource a call operates on, if any.
+
+        Mutating calls that declare a resource key may run concurrently with
+        calls on other resources; calls sharing a key always run in order.
+        Mutating calls without a key are never run concurrently.
+        """
+        return None
+
+    def get_cache_files(self, tool_input: dict[str, Any]) -> list[Path]:
+        """Return the files the result of a call is computed from.
+
+        Cached results are only reused while these files are unchanged.
+        """
+        return []
+
+    def close(self):
+        """Release resources held by the tool, e.g. when its session ends."""
+
+    def adjust_parallel_calls(
+        self, tool_calls: list[ToolCallParameters]
+    ) -> list[ToolCallParameters]:
+        """Adjust calls issued in the same turn that share a resource key.
+
+        The calls are executed sequentially in the returned order.
+        """
+        return tool_calls
+
     # Final is here to indicate that subclasses should override run_impl(), not
     # run(). There may be a reason in the future to override run() itself, and
     # if such a reason comes up, this @final decorator can be removed.
@@ -66,8 +111,21 @@ class LLMTool(ABC):
         """
         try:
             self._validate_tool_input(tool_input)
-            result = await self.run_impl(tool_input, message_history)
-            tool_output = result.tool_output
+            if self.cache_policy is None:
+                result = await self.run_impl(tool_input, message_history)
+                return result.tool_output
+
+            cache = get_tool_result_cache()
+            key = make_cache_key(
+                self.name, tool_input, self.get_cache_files(tool_input)
+            )
+            tool_output = await cache.aget(self.name, key)
+            if tool_output is None:
+                result = await self.run_impl(tool_input, message_history)
+                tool_output = result.tool_output
+                # Failures may be transient, so they are never reused
+                if result.auxiliary_data.get("success", True):
+                    await cache.aput(self.name, key, tool_output, self.cache_policy.ttl)
         except jsonschema.ValidationError as exc:
             tool_output = "Invalid tool input: " + exc.message
         except BadRequestError as exc:
@@ -115,10 +173,30 @@ class LLMTool(ABC):
             input_schema=self.input_schema,
         )
 
+    def get_input_validator(self) -> Any:
+        """Return the validator of the input schema, compiled on first use.
+
+        Raises:
+            jsonschema.SchemaError: If the input schema itself is invalid.
+        """
+        validator = self.__dict__.get("_input_validator")
+        if validator is None or validator.schema is not self.input_schema:
+            validator_class = jsonschema.validators.validator_for(self.input_schema)
+            validator_class.check_schema(self.input_schema)
+            validator = validator_class(self.input_schema)
+            self._input_validator = validator
+        return validator
+
     def _validate_tool_input(self, tool_input: dict[str, Any]):
         """Validates the tool input.
 
         Raises:
             jsonschema.ValidationError: If the tool input is invalid.
         """
-        jsonschema.validate(instance=tool_input, schema=self.input_schema)
+        # Same result as jsonschema.validate, without checking the schema and
+        # building a validator on every call
+        error = jsonschema.exceptions.best_match(
+            self.get_input_validator().iter_errors(tool_input)
+        )
+        if error is not None:
+            raise error
@@ -0,0 +1,175 @@
+import re
+from pathlib import Path
+from typing import Any, List, Optional
+
+from ii_agent.llm.message_history import MessageHistory
+from ii_agent.tools.base import LLMTool, ToolImplOutput
+from ii_agent.tools.bash_tool import (
+    BANNED_COMMAND_STRS,
+    confirm_command,
+    find_banned_str,
+)
+from ii_agent.tools.job_manager import JobManager, JobNotFoundError
+
+TAIL_BYTES = 16 * 1024
+MAX_WAIT_SECONDS = 600
+
+
+class BashJobTool(LLMTool):
+    name = "bash_job"
+    description = """\
+Run long-lived shell commands, such as servers, builds and test suites, in the background and follow them.
+Use this instead of `&` in bash, and instead of repeated `sleep` and `cat` calls to check on a command.
+* `start` runs `command` in the workspace and returns a job id; stdout and stderr go to a log file
+* `status` tells whether the job is still running and its exit code
+* `tail` returns the output from `offset`, or the end of the output without one, and the offset to continue from
+* `wait` waits until the output matches the regular expression `pattern` (e.g. a server's "Listening on" line), or without one until the job ends, for at most `timeout` seconds
+* `kill` stops the job and every process it started"""
+
+    input_schema = {
+        "type": "object",
+        "properties": {
+            "action": {
+                "type": "string",
+                "enum": ["start", "status", "tail", "wait", "kill"],
+                "description": "The action to perform. Allowed options are: `start`, `status`, `tail`, `wait`, `kill`.",
+            },
+            "command": {
+                "type": "string",
+                "description": "Required parameter of `start`: the bash command to run.",
+            },
+            "job_id": {
+                "type": "string",
+                "description": "Required parameter of every action but `start`: the id returned by `start`.",
+            },
+            "offset": {
+                "type": "integer",
+                "description": "Optional parameter of `tail` and `wait`: byte offset of the output to read or search from.",
+            },
+            "pattern": {
+                "type": "string",
+                "description": "Optional parameter of `wait`: regular expression to wait for in the output.",
+            },
+            "timeout": {
+                "type": "integer",
+                "description": f"Optional parameter of `wait`: most seconds to wait, at most {MAX_WAIT_SECONDS}. Defaults to 60.",
+            },
+        },
+        "required": ["action"],
+    }
+
+    def __init__(
+        self,
+        workspace_root: Path,
+        max_log_bytes: int = 8 * 1024 * 1024,
+        require_confirmation: bool = True,
+        additional_banned_command_strs: Optional[List[str]] = None,
+    ):
+        super().__init__()
+        self.job_manager = JobManager(workspace_root, max_log_bytes=max_log_bytes)
+        # Jobs are held to the same rules as the commands of the bash tool
+        self.require_confirmation = require_confirmation
+        self.banned_command_strs = list(BANNED_COMMAND_STRS)
+        if additional_banned_command_strs is not None:
+            self.banned_command_strs.extend(additional_banned_command_strs)
+
+    def is_read_only(self, tool_input: dict[str, Any]) -> bool:
+        return tool_input.get("action") in ("status", "tail", "wait")
+
+    def get_tool_start_message(self, tool_input: dict[str, Any]) -> str:
+        if tool_input.get("action") == "start":
+            return f"Starting background job: {tool_input.get('command')}"
+        return f"Background job {tool_input.get('job_id')}: {tool_input.get('action')}"
+
+    def close(self):
+        self.job_manager.close()
+
+    def _tail(self, job_id: str, offset: Optional[int]) -> str:
+        output, start, end = self.job_manager.tail(job_id, offset, TAIL_BYTES)
+        if offset is not None and start > offset:
+            output = (
+                f"[Output before offset {start} was dropped from the log]\n{output}"
+            )
+        return f"{output}\n[Output bytes {start}-{end}; continue with offset={end}]"
+
+    async def run_impl(
+        self,
+        tool_input: dict[str, Any],
+        message_history: Optional[MessageHistory] = None,
+    ) -> ToolImplOutput:
+        action = tool_input["action"]
+        if action == "start":
+            if not tool_input.get("command"):
+                return ToolImplOutput(
+                    "Error: `command` is required to start a job.",
+                    "No command given",
+                    {"success": False},
+                )
+            command = tool_input["command"]
+            banned_str = find_banned_str(command, self.banned_command_strs)
+            if banned_str is not None:
+                return ToolImplOutput(
+                    f"Command not executed due to banned string in command: {banned_str} found in {command}.",
+                    f"Command not executed due to banned string in command: {banned_str} found in {command}.",
+                    {"success": False, "reason": "Banned command"},
+                )
+            if self.require_confirmation and not confirm_command(command):
+                return ToolImplOutput(
+                    "Command not executed due to lack of user confirmation.",
+                    "Command execution cancelled",
+                    {"success": False, "reason": "User did not confirm"},
+                )
+            job = await self.job_manager.start(command)
+            log_path = job.log.path.relative_to(self.job_manager.workspace_root)
+            return ToolImplOutput(
+                f"Started job {job.job_id} (pid {job.process.pid}). Its output is logged to {log_path}.",
+                f"Started background job {job.job_id}",
+                {"success": True, "job_id": job.job_id},
+            )
+
+        job_id = tool_input.get("job_id")
+        if not job_id:
+            return ToolImplOutput(
+                f"Error: `job_id` is required to {action} a job.",
+                "No job id given",
+                {"success": False},
+            )
+        try:
+            if action == "status":
+                output = self.job_manager.get(job_id).describe()
+            elif action == "tail":
+                output = self._tail(job_id, tool_input.get("offset"))
+            elif action == "wait":
+                timeout = min(tool_input.get("timeout", 60), MAX_WAIT_SECONDS)
+                match = await self.job_manager.wait(
+                    job_id,
+                    pattern=tool_input.get("pattern"),
+                    timeout=timeout,
+                    offset=tool_input.get("offset", 0),
+                )
+                job = self.job_manager.get(job_id)
+                if match is not None:
+                    output = f"Found {match.group(0)!r}. {job.describe()}"
+                elif tool_input.get("pattern") is None:
+                    output = job.describe()
+                else:
+                    reason = (
+                        "the job ended"
+                        if job.finished_at is not None
+                        else f"{timeout}s passed"
+                    )
+                    output = f"The output did not match before {reason}. {job.describe()}\n{self._tail(job_id, None)}"
+            else:
+                output = (await self.job_manager.kill(job_id)).describe()
+        except JobNotFoundError as e:
+            return ToolImplOutput(
+                f"Error: {e.args[0]}", f"No job {job_id}", {"success": False}
+            )
+        except re.error as e:
+            return ToolImplOutput(
+                f"Error: invalid pattern: {e}", "Invalid pattern", {"success": False}
+            )
+
+        return ToolImplOutput(
+            output, f"Background job {job_id}: {action}", {"success": True}
+        )
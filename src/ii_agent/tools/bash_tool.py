@@ -8,20 +8,42 @@ It provides a simple interface for running shell commands and getting their outp
 It also supports command filters for transforming commands before execution.
 """
 
+import asyncio
+import atexit
+import codecs
+import logging
+import os
+import threading
+import time
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import pexpect
 import re
 from abc import ABC, abstractmethod
 
+from ii_agent.core.event import EventType, RealtimeEvent
 from ii_agent.llm.message_history import MessageHistory
 from ii_agent.tools.base import LLMTool, ToolImplOutput
 
+logger = logging.getLogger(__name__)
 
-def start_persistent_shell(timeout: int):
-    # Start a new Bash shell
-    child = pexpect.spawn("/bin/bash", encoding="utf-8", echo=False, timeout=timeout)
+
+def start_persistent_shell(timeout: int, shell_command: Optional[List[str]] = None):
+    # Start a new Bash shell, by default a local one
+    if shell_command is None:
+        child = pexpect.spawn(
+            "/bin/bash", encoding="utf-8", echo=False, timeout=timeout
+        )
+    else:
+        child = pexpect.spawn(
+            shell_command[0],
+            shell_command[1:],
+            encoding="utf-8",
+            echo=False,
+            timeout=timeout,
+        )
     # Set a known, unique prompt
     # We use a random string that is unlikely to appear otherwise
     # so we can detect the prompt reliably.
@@ -34,6 +56,58 @@ def start_persistent_shell(timeout: int):
     return child, custom_prompt
 
 
+ANSI_ESCAPE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+# An escape code cut off at the end of the output read so far
+PARTIAL_ANSI_ESCAPE = re.compile(r"\x1B(\[[0-?]*[ -/]*)?$")
+
+# Most bytes read from the shell at once
+READ_CHUNK_SIZE = 64 * 1024
+# Bytes of command output kept from its start and from its end
+OUTPUT_HEAD_BYTES = 32 * 1024
+OUTPUT_TAIL_BYTES = 64 * 1024
+
+
+def clean_command_output(raw_output: str) -> str:
+    """Strip ANSI escape codes and surrounding whitespace from shell output."""
+    # Bash wraps output in escape codes, e.g. to toggle bracketed paste
+    return ANSI_ESCAPE.sub("", raw_output).strip()
+
+
+class HeadTailBuffer:
+    """Keeps the first and the last bytes of an output of any length.
+
+    Memory use is bounded by ``head_bytes + tail_bytes`` however much is
+    appended; the bytes in between are counted and dropped.
+    """
+
+    def __init__(
+        self, head_bytes: int = OUTPUT_HEAD_BYTES, tail_bytes: int = OUTPUT_TAIL_BYTES
+    ):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self._head = bytearray()
+        self._tail = bytearray()
+        self.omitted_bytes = 0
+
+    def append(self, data: bytes):
+        room = self.head_bytes - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        self._tail += data
+        excess = len(self._tail) - self.tail_bytes
+        if excess > 0:
+            del self._tail[:excess]
+            self.omitted_bytes += excess
+
+    def getvalue(self, encoding: str = "utf-8") -> str:
+        head = self._head.decode(encoding, errors="replace")
+        tail = self._tail.decode(encoding, errors="replace")
+        if not self.omitted_bytes:
+            return head + tail
+        return f"{head}\n... [{self.omitted_bytes} bytes of output omitted] ...\n{tail}"
+
+
 def run_command(child, custom_prompt, cmd):
     # Send the command
     child.sendline(cmd)
@@ -41,15 +115,362 @@ def run_command(child, custom_prompt, cmd):
     child.expect(custom_prompt)
     # Output is everything printed before the prompt minus the command itself
     # pexpect puts the matched prompt in child.after and everything before it in child.before.
+    return clean_command_output(child.before)
+
+
+async def read_until_prompt(
+    child,
+    custom_prompt,
+    timeout=None,
+    on_output: Optional[Callable[[str], None]] = None,
+    output: Optional[HeadTailBuffer] = None,
+) -> str:
+    """Wait for the shell prompt without blocking the event loop.
+
+    The shell is read whenever the event loop reports it readable, so waiting
+    costs no thread and other sessions keep running meanwhile.
 
-    raw_output = child.before.strip()
-    ansi_escape = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
-    clean_output = ansi_escape.sub("", raw_output)
+    Args:
+        child: The pexpect shell.
+        custom_prompt: The prompt the shell prints when it is ready.
+        timeout: Seconds to wait, by default the timeout of the shell.
+        on_output: Called with the output as it arrives.
+        output: Buffer collecting the output, by default one keeping the
+            first ``OUTPUT_HEAD_BYTES`` and last ``OUTPUT_TAIL_BYTES``.
+
+    Returns:
+        What the buffer kept of everything the shell printed before the prompt.
 
-    if clean_output.startswith("\r"):
-        clean_output = clean_output[1:]
+    Raises:
+        pexpect.TIMEOUT: If the prompt did not show up in time.
+        pexpect.EOF: If the shell exited.
+    """
+    if timeout is None:
+        timeout = child.timeout
+    if output is None:
+        output = HeadTailBuffer()
+    encoding = child.encoding or "utf-8"
+    prompt = custom_prompt.encode(encoding)
+    loop = asyncio.get_running_loop()
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    done = loop.create_future()
+    # End of the output read so far that may be the start of a prompt split
+    # across reads
+    pending = b""
+
+    def emit(data: bytes):
+        output.append(data)
+        if on_output is not None:
+            text = decoder.decode(data)
+            if text:
+                on_output(text)
+
+    def feed(data: bytes):
+        nonlocal pending
+        window = pending + data
+        index = window.find(prompt)
+        if index == -1:
+            # Hold back only an end that may be the start of the prompt, so
+            # other output is passed on as soon as it is read
+            keep = next(
+                (
+                    size
+                    for size in range(min(len(prompt) - 1, len(window)), 0, -1)
+                    if window.endswith(prompt[:size])
+                ),
+                0,
+            )
+            emit(window[: len(window) - keep])
+            pending = window[len(window) - keep :]
+            return
+        emit(window[:index])
+        child.buffer = window[index + len(prompt) :].decode(encoding, errors="replace")
+        done.set_result(output.getvalue(encoding))
+
+    def on_readable():
+        if done.done():
+            return
+        try:
+            data = os.read(child.child_fd, READ_CHUNK_SIZE)
+        except OSError:
+            # Linux reports a closed pty as EIO
+            data = b""
+        if not data:
+            done.set_exception(pexpect.EOF("End Of File (EOF). The shell exited."))
+            return
+        feed(data)
+
+    # Output left over from an earlier read
+    leftover = child.buffer
+    child.buffer = ""
+    feed(leftover.encode(encoding))
+    if done.done():
+        return done.result()
+    loop.add_reader(child.child_fd, on_readable)
+    try:
+        return await asyncio.wait_for(done, timeout)
+    except asyncio.TimeoutError:
+        raise pexpect.TIMEOUT("Timeout exceeded.") from None
+    finally:
+        loop.remove_reader(child.child_fd)
+
+
+async def run_command_async(
+    child,
+    custom_prompt,
+    cmd,
+    timeout=None,
+    on_output: Optional[Callable[[str], None]] = None,
+    output: Optional[HeadTailBuffer] = None,
+) -> str:
+    """Run a command in the shell without blocking the event loop.
+
+    Args:
+        child: The pexpect shell.
+        custom_prompt: The prompt the shell prints when it is ready.
+        cmd: The command to run.
+        timeout: Seconds to wait for the command, by default the timeout of the shell.
+        on_output: Called with the output as it arrives.
+        output: Buffer collecting the output, see ``read_until_prompt``.
+
+    Returns:
+        The cleaned output of the command.
+
+    Raises:
+        pexpect.TIMEOUT: If the command did not finish in time.
+        pexpect.EOF: If the shell exited.
+    """
+    child.sendline(cmd)
+    raw_output = await read_until_prompt(
+        child, custom_prompt, timeout, on_output=on_output, output=output
+    )
+    return clean_command_output(raw_output)
+
+
+class OutputStream:
+    """Forwards command output to the client as progress events.
+
+    Output is batched into at most one event per ``interval`` seconds, and an
+    event carries at most the last ``max_chars`` characters of its batch, so
+    a chatty command cannot flood the websocket.
+    """
+
+    def __init__(
+        self,
+        message_queue: asyncio.Queue,
+        tool_name: str,
+        command: str,
+        interval: float = 0.1,
+        max_chars: int = 16 * 1024,
+    ):
+        self.message_queue = message_queue
+        self.tool_name = tool_name
+        self.command = command
+        self.interval = interval
+        self.max_chars = max_chars
+        self._chunks: list[str] = []
+        self._size = 0
+        self._skipped_chars = 0
+        self._last_sent = 0.0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def __call__(self, text: str):
+        self._chunks.append(text)
+        self._size += len(text)
+        if self._size > 2 * self.max_chars:
+            joined = "".join(self._chunks)
+            self._skipped_chars += len(joined) - self.max_chars
+            self._chunks = [joined[-self.max_chars :]]
+            self._size = self.max_chars
+        loop = asyncio.get_running_loop()
+        wait = self._last_sent + self.interval - loop.time()
+        if wait <= 0:
+            self.flush(final=False)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(wait, self.flush, False)
+
+    def flush(self, final: bool = True):
+        """Send the output received since the last event, if any.
+
+        Args:
+            final: Whether the command ended. Otherwise an escape code cut off
+                at the end of the output is held back until it is complete.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        text = "".join(self._chunks)
+        held_back = ""
+        partial_escape = None if final else PARTIAL_ANSI_ESCAPE.search(text)
+        if partial_escape is not None:
+            text, held_back = (
+                text[: partial_escape.start()],
+                text[partial_escape.start() :],
+            )
+        skipped_chars = self._skipped_chars + max(0, len(text) - self.max_chars)
+        text = ANSI_ESCAPE.sub("", text[-self.max_chars :])
+        self._chunks = [held_back] if held_back else []
+        self._size = len(held_back)
+        if not text:
+            return
+        self._skipped_chars = 0
+        self._last_sent = asyncio.get_running_loop().time()
+        self.message_queue.put_nowait(
+            RealtimeEvent(
+                type=EventType.TOOL_OUTPUT_DELTA,
+                content={
+                    "tool_name": self.tool_name,
+                    "command": self.command,
+                    "text": text,
+                    "skipped_chars": skipped_chars,
+                },
+            )
+        )
 
-    return clean_output
+
+class ShellPool:
+    """Keeps prompt-initialized shells ready for new bash tools.
+
+    Spawning bash and waiting for its prompt takes a while, so a background
+    thread does it ahead of time and keeps ``size`` shells waiting. A shell is
+    only ever handed out once: it carries the state of the session that used
+    it, so it is killed when released and a fresh one takes its place.
+    """
+
+    def __init__(self, size: int = 2, timeout: int = 60):
+        """Initialize the pool.
+
+        Args:
+            size: Number of shells kept ready.
+            timeout: Default command timeout of the shells.
+        """
+        self.size = size
+        self.timeout = timeout
+        self._idle: deque[tuple[Any, str]] = deque()
+        self._retired: list[Any] = []
+        self._starting = 0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._cond = threading.Condition()
+        self._stats = {"hits": 0, "misses": 0, "spawned": 0, "killed": 0}
+
+    def configure(self, size: int):
+        """Change the number of shells kept ready and start filling the pool."""
+        with self._cond:
+            self.size = size
+            self._start_refilling()
+
+    def _start_refilling(self):
+        # Called with the lock held
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(
+                target=self._refill, name="shell-pool", daemon=True
+            )
+            self._thread.start()
+        self._cond.notify()
+
+    def _spawn(self) -> tuple[Any, str]:
+        shell = start_persistent_shell(timeout=self.timeout)
+        with self._cond:
+            self._stats["spawned"] += 1
+        return shell
+
+    def _refill(self):
+        while True:
+            with self._cond:
+                while (
+                    not self._closed
+                    and not self._retired
+                    and (len(self._idle) + self._starting >= self.size)
+                ):
+                    self._cond.wait()
+                retired, self._retired = self._retired, []
+                closed = self._closed
+                refill = not closed and len(self._idle) + self._starting < self.size
+                if refill:
+                    self._starting += 1
+
+            for child in retired:
+                child.close(force=True)
+            if closed:
+                return
+            if not refill:
+                continue
+
+            shell = None
+            try:
+                shell = self._spawn()
+            except Exception as e:
+                logger.warning(f"Failed to start a shell for the pool: {e}")
+                time.sleep(1)
+            with self._cond:
+                self._starting -= 1
+                if shell is not None:
+                    if self._closed:
+                        self._retired.append(shell[0])
+                    else:
+                        self._idle.append(shell)
+
+    def acquire(self, cwd: Optional[Path] = None) -> tuple[Any, str]:
+        """Hand out a ready shell, spawning one if none is ready.
+
+        Args:
+            cwd: Directory to change the shell into.
+
+        Returns:
+            The shell and its prompt.
+        """
+        shell = None
+        with self._cond:
+            while self._idle and shell is None:
+                shell = self._idle.popleft()
+                if not shell[0].isalive():
+                    self._retired.append(shell[0])
+                    shell = None
+            self._stats["hits" if shell is not None else "misses"] += 1
+            self._start_refilling()
+        if shell is None:
+            shell = self._spawn()
+        child, custom_prompt = shell
+        if cwd:
+            run_command(child, custom_prompt, f"cd {cwd}")
+        return shell
+
+    def release(self, child):
+        """Give back a shell handed out by the pool; it is killed in the background."""
+        with self._cond:
+            self._stats["killed"] += 1
+            self._retired.append(child)
+            if self._thread is None:
+                self._start_refilling()
+            else:
+                self._cond.notify()
+
+    def close(self):
+        """Kill the shells waiting in the pool and stop refilling it."""
+        with self._cond:
+            self._closed = True
+            idle = [child for child, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify()
+        for child in idle:
+            child.close(force=True)
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return dict(self._stats, idle=len(self._idle), size=self.size)
+
+
+_default_pool: ShellPool | None = None
+
+
+def get_shell_pool() -> ShellPool:
+    """Return the process-wide shell pool."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = ShellPool()
+        atexit.register(_default_pool.close)
+    return _default_pool
 
 
 class CommandFilter(ABC):
@@ -71,6 +492,14 @@ class CommandFilter(ABC):
         """
         pass
 
+    def get_shell_command(self) -> Optional[List[str]]:
+        """Return the command starting the shell to run commands in, if not a local one.
+
+        Filters that run commands in a long-lived remote shell return the
+        command starting it and pass commands through unchanged.
+        """
+        return None
+
 
 class SSHCommandFilter(CommandFilter):
     """Filter that wraps commands for execution over SSH."""
@@ -130,15 +559,32 @@ class DockerCommandFilter(CommandFilter):
         self,
         container: str,
         user: Optional[str] = None,
+        persistent_session: bool = False,
     ):
         """Initialize the Docker command filter.
 
         Args:
             container: Container ID or name
             user: Username to run commands as in the container
+            persistent_session: Whether to run all commands in one long-lived
+                ``docker exec`` shell, which keeps the working directory and
+                environment between commands, instead of one exec per command
         """
         self.container = container
         self.user = user
+        self.persistent_session = persistent_session
+
+    def get_shell_command(self) -> Optional[List[str]]:
+        if not self.persistent_session:
+            return None
+        # The terminal lets the shell use the same prompt protocol as a local one
+        docker_parts = ["docker", "exec", "-i", "-t"]
+        if self.user:
+            docker_parts.extend(["-u", self.user])
+        # A login shell, like the one-off execs, so that the profile sets up
+        # the environment (PATH, conda, nvm)
+        docker_parts.extend([self.container, "/bin/bash", "-l"])
+        return docker_parts
 
     def filter_command(self, command: str) -> str:
         """Wrap a command for execution in a Docker container.
@@ -147,8 +593,12 @@ class DockerCommandFilter(CommandFilter):
             command: Command to execute in container
 
         Returns:
-            Docker exec command string
+            Docker exec command string, or the command itself when it runs in
+            the persistent session
         """
+        if self.persistent_session:
+            return command
+
         docker_parts = ["docker", "exec"]
 
         if self.user:
@@ -163,6 +613,35 @@ class DockerCommandFilter(CommandFilter):
         return " ".join(docker_parts)
 
 
+BANNED_COMMAND_STRS = [
+    "git init",
+    "git commit",
+    "git add",
+]
+
+
+def find_banned_str(command: str, banned_command_strs: List[str]) -> Optional[str]:
+    """Return the first banned string found in a command, if any."""
+    for banned_str in banned_command_strs:
+        if banned_str in command:
+            return banned_str
+    return None
+
+
+def confirm_command(display_command: str) -> bool:
+    """Ask the user whether to execute a command."""
+    confirmation = input(
+        f"Do you want to execute the command: {display_command}? (y/n): "
+    )
+    return confirmation.lower() == "y"
+
+
+# Advice on long lived commands in the bash tool's description, and the one
+# replacing it when the bash_job tool is offered as well
+BACKGROUND_COMMANDS_HINT = "* Please run long lived commands in the background, e.g. 'sleep 10 &' or start a server in the background."
+BASH_JOB_HINT = "* Run long lived commands, such as servers, builds and test suites, with the `bash_job` tool instead of in the background with `&`."
+
+
 class BashTool(LLMTool):
     """A tool for executing bash commands.
 
@@ -172,7 +651,7 @@ class BashTool(LLMTool):
     """
 
     name = "bash"
-    description = """\
+    description = f"""\
 Run commands in a bash shell
 * When invoking this tool, the contents of the \"command\" parameter does NOT need to be XML-escaped.
 * You don't have access to the internet via this tool.
@@ -180,7 +659,7 @@ Run commands in a bash shell
 * State is persistent across command calls and discussions with the user.
 * To inspect a particular line range of a file, e.g. lines 10-25, try 'sed -n 10,25p /path/to/the/file'.
 * Please avoid commands that may produce a very large amount of output.
-* Please run long lived commands in the background, e.g. 'sleep 10 &' or start a server in the background."""
+{BACKGROUND_COMMANDS_HINT}"""
 
     input_schema = {
         "type": "object",
@@ -200,6 +679,10 @@ Run commands in a bash shell
         command_filters: Optional[List[CommandFilter]] = None,
         timeout: int = 60,
         additional_banned_command_strs: Optional[List[str]] = None,
+        message_queue: Optional[asyncio.Queue] = None,
+        output_head_bytes: int = OUTPUT_HEAD_BYTES,
+        output_tail_bytes: int = OUTPUT_TAIL_BYTES,
+        shell_pool: Optional[ShellPool] = None,
     ):
         """Initialize the BashTool.
 
@@ -207,25 +690,74 @@ Run commands in a bash shell
             workspace_root: Root directory of the workspace
             require_confirmation: Whether to require user confirmation before executing commands
             command_filters: Optional list of command filters to apply before execution
+            message_queue: Queue to stream the output of running commands to, if any
+            output_head_bytes: Bytes kept from the start of the output of a command
+            output_tail_bytes: Bytes kept from the end of the output of a command
+            shell_pool: Pool to take a ready shell from instead of spawning one
         """
         super().__init__()
         self.workspace_root = workspace_root
         self.require_confirmation = require_confirmation
         self.command_filters = command_filters or []
         self.timeout = timeout
+        self.message_queue = message_queue
+        self.output_head_bytes = output_head_bytes
+        self.output_tail_bytes = output_tail_bytes
+        self.shell_pool = shell_pool
 
-        self.banned_command_strs = [
-            "git init",
-            "git commit",
-            "git add",
-        ]
+        self.banned_command_strs = list(BANNED_COMMAND_STRS)
         if additional_banned_command_strs is not None:
             self.banned_command_strs.extend(additional_banned_command_strs)
 
-        self.child, self.custom_prompt = start_persistent_shell(timeout=timeout)
+        # Commands share one shell, so they run one at a time
+        self._shell_lock = asyncio.Lock()
+        self._start_shell()
+
+    def get_shell_command(self) -> Optional[List[str]]:
+        """Return the command starting a remote shell, if a filter provides one."""
+        for command_filter in self.command_filters:
+            shell_command = command_filter.get_shell_command()
+            if shell_command is not None:
+                return shell_command
+        return None
+
+    def _start_shell(self):
+        shell_command = self.get_shell_command()
+        # Pooled shells are local ones
+        self._pooled = shell_command is None and self.shell_pool is not None
+        if self._pooled:
+            self.child, self.custom_prompt = self.shell_pool.acquire(
+                self.workspace_root
+            )
+            self.child.timeout = self.timeout
+            return
+        self.child, self.custom_prompt = start_persistent_shell(
+            timeout=self.timeout, shell_command=shell_command
+        )
         if self.workspace_root:
             run_command(self.child, self.custom_prompt, f"cd {self.workspace_root}")
 
+    def close(self):
+        """Kill the shell of the tool."""
+        if self._pooled:
+            self.shell_pool.release(self.child)
+        else:
+            self.child.close(force=True)
+
+    async def _restart_shell(self):
+        """Replace the shell, closing the current one or giving it back to the pool first."""
+        # Closing and spawning a shell both block
+        await asyncio.to_thread(self.close)
+        await asyncio.to_thread(self._start_shell)
+
+    async def _interrupt(self):
+        """Stop the running command, restarting the shell if it does not recover."""
+        try:
+            self.child.sendintr()
+            await read_until_prompt(self.child, self.custom_prompt, timeout=5)
+        except Exception:
+            await self._restart_shell()
+
     def add_command_filter(self, command_filter: CommandFilter) -> None:
         """Add a command filter to the filter chain.
 
@@ -277,38 +809,49 @@ Run commands in a bash shell
         if command != original_command:
             display_command = f"{original_command}\nTransformed to: {command}"
 
-        for banned_str in self.banned_command_strs:
-            if banned_str in command:
-                return ToolImplOutput(
-                    f"Command not executed due to banned string in command: {banned_str} found in {command}.",
-                    f"Command not executed due to banned string in command: {banned_str} found in {command}.",
-                    aux_data | {"success": False, "reason": "Banned command"},
-                )
+        banned_str = find_banned_str(command, self.banned_command_strs)
+        if banned_str is not None:
+            return ToolImplOutput(
+                f"Command not executed due to banned string in command: {banned_str} found in {command}.",
+                f"Command not executed due to banned string in command: {banned_str} found in {command}.",
+                aux_data | {"success": False, "reason": "Banned command"},
+            )
 
         if self.require_confirmation:
-            confirmation = input(
-                f"Do you want to execute the command: {display_command}? (y/n): "
-            )
-            if confirmation.lower() != "y":
+            if not confirm_command(display_command):
                 return ToolImplOutput(
                     "Command not executed due to lack of user confirmation.",
                     "Command execution cancelled",
                     aux_data | {"success": False, "reason": "User did not confirm"},
                 )
 
-        # confirm no bad stuff happened
-        try:
-            echo_result = run_command(self.child, self.custom_prompt, "echo hello")
-            assert echo_result.strip() == "hello"
-        except Exception:
-            self.child, self.custom_prompt = start_persistent_shell(self.timeout)
+        async with self._shell_lock:
+            return await self._execute(command, original_command, aux_data)
+
+    async def _execute(
+        self, command: str, original_command: str, aux_data: Dict[str, Any]
+    ) -> ToolImplOutput:
+        if not self.child.isalive():
+            await self._restart_shell()
 
         # Execute the command and capture output
+        output = HeadTailBuffer(self.output_head_bytes, self.output_tail_bytes)
+        stream = (
+            OutputStream(self.message_queue, self.name, original_command)
+            if self.message_queue is not None
+            else None
+        )
         try:
-            result = run_command(self.child, self.custom_prompt, command)
+            result = await run_command_async(
+                self.child, self.custom_prompt, command, on_output=stream, output=output
+            )
         except Exception as e:
-            # self.child, self.custom_prompt = start_persistent_shell(self.timeout)
+            if isinstance(e, pexpect.EOF):
+                # The shell, or the exec session running it, died; reconnect
+                # so the next command finds a shell
+                await self._restart_shell()
             if "Timeout exceeded." in str(e):
+                await self._interrupt()
                 return ToolImplOutput(
                     "Command timed out. Please try again.",
                     "Command timed out. Please try again.",
@@ -323,7 +866,12 @@ Run commands in a bash shell
                     "error": str(e),
                 },
             )
+        finally:
+            if stream is not None:
+                stream.flush()
 
+        if output.omitted_bytes:
+            aux_data["omitted_bytes"] = output.omitted_bytes
         return ToolImplOutput(
             result,
             f"Command '{command}' executed.",
@@ -347,6 +895,8 @@ def create_bash_tool(
     cwd: Optional[Path] = None,
     command_filters: Optional[List[CommandFilter]] = None,
     additional_banned_command_strs: Optional[List[str]] = None,
+    message_queue: Optional[asyncio.Queue] = None,
+    shell_pool: Optional[ShellPool] = None,
 ) -> BashTool:
     """Create a bash tool for executing bash commands.
 
@@ -354,6 +904,8 @@ def create_bash_tool(
         ask_user_permission: Whether to ask user permission for commands
         cwd: Default working directory for commands
         command_filters: Optional list of command filters to apply before execution
+        message_queue: Queue to stream the output of running commands to, if any
+        shell_pool: Pool to take a ready shell from, if any
 
     Returns:
         BashTool instance configured with the provided parameters
@@ -363,6 +915,8 @@ def create_bash_tool(
         require_confirmation=ask_user_permission,
         command_filters=command_filters,
         additional_banned_command_strs=additional_banned_command_strs,
+        message_queue=message_queue,
+        shell_pool=shell_pool,
     )
 
 
@@ -407,6 +961,9 @@ def create_docker_bash_tool(
     ask_user_permission: bool = True,
     cwd: Optional[Path] = None,
     additional_banned_command_strs: Optional[List[str]] = None,
+    message_queue: Optional[asyncio.Queue] = None,
+    shell_pool: Optional[ShellPool] = None,
+    persistent_session: bool = True,
 ) -> BashTool:
     """Create a bash tool that executes commands in a Docker container.
 
@@ -415,6 +972,10 @@ def create_docker_bash_tool(
         user: Username to run commands as in the container
         ask_user_permission: Whether to ask user permission for commands
         cwd: Default working directory for commands
+        message_queue: Queue to stream the output of running commands to, if any
+        shell_pool: Pool to take a ready local shell from, only used without
+            a persistent session
+        persistent_session: Whether to keep one ``docker exec`` shell for all commands
 
     Returns:
         BashTool instance configured with Docker command filter
@@ -422,6 +983,7 @@ def create_docker_bash_tool(
     docker_filter = DockerCommandFilter(
         container=container,
         user=user,
+        persistent_session=persistent_session,
     )
 
     return create_bash_tool(
@@ -429,4 +991,6 @@ def create_docker_bash_tool(
         cwd=cwd,
         command_filters=[docker_filter],
         additional_banned_command_strs=additional_banned_command_strs,
+        message_queue=message_queue,
+        shell_pool=shell_pool,
     )
@@ -4,11 +4,14 @@ from ii_agent.tools.base import (
     ToolImplOutput,
 )
 from ii_agent.tools.web_search_client import create_image_search_client
+from ii_agent.tools.result_cache import ToolCachePolicy
 from typing import Any, Optional
 
 
 class ImageSearchTool(LLMTool):
     name = "image_search"
+    read_only = True
+    cache_policy = ToolCachePolicy(ttl=60 * 60)
     description = """Performs an image search using a search engine API and returns a list of image URLs."""
     input_schema = {
         "type": "object",
@@ -0,0 +1,291 @@
+"""Background jobs for long-running shell commands, such as servers and builds."""
+
+import asyncio
+import os
+import re
+import shutil
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+# Directory of job logs, relative to the workspace root
+JOBS_DIR = ".jobs"
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class JobNotFoundError(KeyError):
+    """Raised for a job id the manager does not know."""
+
+
+class BoundedLog:
+    """Log file that keeps only the most recent output of a job.
+
+    Offsets count every byte ever written, so they stay valid when the log
+    drops old output. Once the file exceeds ``max_bytes`` it is cut down to
+    its last half, and reads from before the cut start at the oldest byte
+    still kept.
+
+    The file stays open for appending. Compacting copies the kept half to a
+    new file and swaps it in, so it may run in a worker thread while the
+    log is read; appends must wait for it.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        # Offset of the first byte still in the file
+        self.start_offset = 0
+        self.size = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unbuffered, so reads see every appended byte
+        self._file = open(path, "wb", buffering=0)
+        # Guards swapping the file against reads
+        self._lock = threading.Lock()
+
+    @property
+    def end_offset(self) -> int:
+        return self.start_offset + self.size
+
+    def append(self, data: bytes) -> bool:
+        """Append output; returns whether the log should be compacted."""
+        self._file.write(data)
+        self.size += len(data)
+        return self.size > self.max_bytes
+
+    def compact(self):
+        """Drop all but the last half of ``max_bytes`` of output."""
+        cut = self.size - self.max_bytes // 2
+        if cut <= 0:
+            return
+        compacted = self.path.with_name(self.path.name + ".tmp")
+        with open(self.path, "rb") as src, open(compacted, "wb") as dst:
+            src.seek(cut)
+            shutil.copyfileobj(src, dst)
+        new_file = open(compacted, "ab", buffering=0)
+        with self._lock:
+            os.replace(compacted, self.path)
+            self._file.close()
+            self._file = new_file
+            self.start_offset += cut
+            self.size -= cut
+
+    def write(self, data: bytes):
+        """Append output, compacting the log if it grew too large."""
+        if self.append(data):
+            self.compact()
+
+    def close(self):
+        self._file.close()
+
+    def read(self, offset: int, max_bytes: int) -> tuple[bytes, int]:
+        """Read at most ``max_bytes`` from ``offset`` on.
+
+        Returns:
+            The bytes and the offset they start at, later than ``offset`` if
+            the output there was dropped.
+        """
+        with self._lock:
+            offset = min(max(offset, self.start_offset), self.end_offset)
+            with open(self.path, "rb") as f:
+                f.seek(offset - self.start_offset)
+                return f.read(max_bytes), offset
+
+
+@dataclass
+class BackgroundJob:
+    job_id: str
+    command: str
+    process: asyncio.subprocess.Process
+    log: BoundedLog
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+    killed: bool = False
+    # Notified whenever output arrives or the job ends
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+    reader: Optional[asyncio.Task] = None
+
+    @property
+    def exit_code(self) -> Optional[int]:
+        return self.process.returncode if self.finished_at is not None else None
+
+    @property
+    def status(self) -> str:
+        if self.finished_at is None:
+            return "running"
+        return "killed" if self.killed else "exited"
+
+    def describe(self) -> str:
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        elapsed = f"{end - self.started_at:.1f}s"
+        if self.finished_at is None:
+            state = f"is running (pid {self.process.pid}, for {elapsed})"
+        elif self.killed:
+            state = f"was killed after {elapsed}"
+        else:
+            state = f"exited with code {self.exit_code} after {elapsed}"
+        return f"Job {self.job_id} {state}; {self.log.end_offset} bytes of output"
+
+
+class JobManager:
+    """Runs shell commands in the background and tracks them by id.
+
+    Each job runs in its own process group in the workspace, with stdout and
+    stderr written to a bounded log file under ``.jobs/``. Jobs can be
+    polled, tailed by offset, waited on until their output matches a pattern,
+    and killed. The manager belongs to one session; closing it kills the jobs
+    still running.
+    """
+
+    def __init__(self, workspace_root: Path, max_log_bytes: int = 8 * 1024 * 1024):
+        self.workspace_root = Path(workspace_root)
+        self.max_log_bytes = max_log_bytes
+        self.jobs: dict[str, BackgroundJob] = {}
+        self._next_id = 1
+
+    def get(self, job_id: str) -> BackgroundJob:
+        try:
+            return self.jobs[job_id]
+        except KeyError:
+            raise JobNotFoundError(f"No job with id {job_id}") from None
+
+    async def start(self, command: str) -> BackgroundJob:
+        """Start a command in the background."""
+        job_id = f"job-{self._next_id}"
+        self._next_id += 1
+        log = BoundedLog(
+            self.workspace_root / JOBS_DIR / f"{job_id}.log", self.max_log_bytes
+        )
+        process = await asyncio.create_subprocess_exec(
+            "/bin/bash",
+            "-c",
+            command,
+            cwd=self.workspace_root,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            # Its own process group, so killing the job kills its children too
+            start_new_session=True,
+        )
+        job = BackgroundJob(job_id, command, process, log)
+        job.reader = asyncio.create_task(self._collect_output(job))
+        self.jobs[job_id] = job
+        return job
+
+    async def _collect_output(self, job: BackgroundJob):
+        try:
+            while True:
+                data = await job.process.stdout.read(READ_CHUNK_SIZE)
+                if not data:
+                    break
+                if job.log.append(data):
+                    # Compacting copies up to half the log
+                    await asyncio.to_thread(job.log.compact)
+                async with job.changed:
+                    job.changed.notify_all()
+        finally:
+            job.log.close()
+        await job.process.wait()
+        job.finished_at = time.monotonic()
+        async with job.changed:
+            job.changed.notify_all()
+
+    def tail(
+        self, job_id: str, offset: Optional[int] = None, max_bytes: int = 16 * 1024
+    ) -> tuple[str, int, int]:
+        """Read the output of a job.
+
+        Args:
+            job_id: The job.
+            offset: Offset to read from; by default the last ``max_bytes``.
+            max_bytes: Most bytes to read.
+
+        Returns:
+            The output, the offset it starts at and the offset it ends at.
+        """
+        log = self.get(job_id).log
+        if offset is None:
+            offset = log.end_offset - max_bytes
+        data, start = log.read(offset, max_bytes)
+        return data.decode("utf-8", errors="replace"), start, start + len(data)
+
+    async def wait(
+        self,
+        job_id: str,
+        pattern: Optional[str] = None,
+        timeout: float = 60,
+        offset: int = 0,
+    ) -> Optional[re.Match]:
+        """Wait until the output of a job matches a pattern, or the job ends.
+
+        Args:
+            job_id: The job.
+            pattern: Regular expression to look for in the output from
+                ``offset`` on; without one, wait for the job to end.
+            timeout: Most seconds to wait.
+            offset: Offset of the output to search from.
+
+        Returns:
+            The match, or None if the job ended or the time ran out first.
+        """
+        job = self.get(job_id)
+        regex = re.compile(pattern, re.MULTILINE) if pattern is not None else None
+        deadline = time.monotonic() + timeout
+        # End of the output searched so far, kept so matches may span reads
+        carry = ""
+        async with job.changed:
+            while True:
+                if regex is not None:
+                    while True:
+                        data, start = job.log.read(offset, READ_CHUNK_SIZE)
+                        if not data:
+                            break
+                        offset = start + len(data)
+                        text = carry + data.decode("utf-8", errors="replace")
+                        match = regex.search(text)
+                        if match is not None:
+                            return match
+                        carry = text[-4096:]
+                if job.finished_at is not None:
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                try:
+                    await asyncio.wait_for(job.changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def kill(self, job_id: str, grace_period: float = 5) -> BackgroundJob:
+        """Stop a job and the processes it started.
+
+        The job gets SIGTERM, and SIGKILL if it is still running after
+        ``grace_period`` seconds.
+        """
+        job = self.get(job_id)
+        if job.finished_at is not None:
+            return job
+        job.killed = True
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(job.process.pid, sig)
+            except ProcessLookupError:
+                break
+            try:
+                await asyncio.wait_for(asyncio.shield(job.reader), grace_period)
+                break
+            except asyncio.TimeoutError:
+                continue
+        return job
+
+    def close(self):
+        """Kill the jobs still running, without waiting for them."""
+        for job in self.jobs.values():
+            if job.finished_at is None:
+                job.killed = True
+                try:
+                    os.killpg(job.process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
@@ -0,0 +1,163 @@
+"""Tools whose expensive backing resources are created on first use."""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from ii_agent.llm.base import ToolCallParameters
+from ii_agent.llm.message_history import MessageHistory
+from ii_agent.tools.base import LLMTool, ToolImplOutput
+
+
+class LazyToolStats:
+    """Counts, per tool name, how often lazy tools are created and used.
+
+    A tool that is created for many sessions but rarely materialized is
+    one whose startup cost the laziness saves.
+    """
+
+    def __init__(self):
+        self._stats: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, name: str) -> dict[str, float]:
+        return self._stats.setdefault(
+            name, {"created": 0, "materialized": 0, "calls": 0, "startup_seconds": 0.0}
+        )
+
+    def record_created(self, name: str):
+        with self._lock:
+            self._entry(name)["created"] += 1
+
+    def record_materialized(self, name: str, startup_seconds: float):
+        with self._lock:
+            entry = self._entry(name)
+            entry["materialized"] += 1
+            entry["startup_seconds"] += startup_seconds
+
+    def record_call(self, name: str):
+        with self._lock:
+            self._entry(name)["calls"] += 1
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._stats.items()}
+
+
+_default_stats: LazyToolStats | None = None
+
+
+def get_lazy_tool_stats() -> LazyToolStats:
+    """Return the process-wide lazy tool statistics."""
+    global _default_stats
+    if _default_stats is None:
+        _default_stats = LazyToolStats()
+    return _default_stats
+
+
+class LazyTool(LLMTool):
+    """Advertises a tool to the model at once and builds it on first use.
+
+    The name, description and input schema are read from the tool class, so
+    the tool is listed in the very first request, while the factory, which
+    may spawn a shell or start a browser, only runs when the model calls the
+    tool. Other attributes are read from the built tool, building it if
+    needed.
+
+    Planning a turn's tool calls must not build the tool on the event loop,
+    so until the tool is built, the planning hooks answer from the class: a
+    call is read-only only if the class is read-only for every input, and no
+    call has a resource key, so calls of a class that decides per input run
+    alone.
+    """
+
+    def __init__(
+        self,
+        tool_class: type[LLMTool],
+        factory: Callable[[], LLMTool],
+        stats: Optional[LazyToolStats] = None,
+    ):
+        """Initialize the lazy tool.
+
+        Args:
+            tool_class: Class of the tool, providing its schema.
+            factory: Builds the tool.
+            stats: Statistics to record to, by default the process-wide ones.
+        """
+        self.tool_class = tool_class
+        self.name = tool_class.name
+        self.description = tool_class.description
+        self.input_schema = tool_class.input_schema
+        self.read_only = tool_class.read_only
+        self._factory = factory
+        self._tool: Optional[LLMTool] = None
+        self._lock = threading.Lock()
+        self.stats = stats if stats is not None else get_lazy_tool_stats()
+        self.stats.record_created(self.name)
+
+    @property
+    def materialized(self) -> bool:
+        return self._tool is not None
+
+    @property
+    def tool(self) -> LLMTool:
+        """The built tool, built now if it was not used before."""
+        if self._tool is None:
+            with self._lock:
+                if self._tool is None:
+                    start = time.perf_counter()
+                    tool = self._factory()
+                    self.stats.record_materialized(
+                        self.name, time.perf_counter() - start
+                    )
+                    self._tool = tool
+        return self._tool
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes the lazy tool does not define
+        if name.startswith("_") or name == "tool_class":
+            raise AttributeError(name)
+        return getattr(self.tool, name)
+
+    @property
+    def should_stop(self) -> bool:
+        return self._tool is not None and self._tool.should_stop
+
+    def is_read_only(self, tool_input: dict[str, Any]) -> bool:
+        if self._tool is not None:
+            return self._tool.is_read_only(tool_input)
+        return self.read_only and self.tool_class.is_read_only is LLMTool.is_read_only
+
+    def get_resource_key(self, tool_input: dict[str, Any]) -> Optional[str]:
+        if self._tool is not None:
+            return self._tool.get_resource_key(tool_input)
+        return None
+
+    def adjust_parallel_calls(
+        self, tool_calls: list[ToolCallParameters]
+    ) -> list[ToolCallParameters]:
+        if self._tool is not None:
+            return self._tool.adjust_parallel_calls(tool_calls)
+        return tool_calls
+
+    def get_tool_start_message(self, tool_input: dict[str, Any]) -> str:
+        if self._tool is not None:
+            return self._tool.get_tool_start_message(tool_input)
+        return super().get_tool_start_message(tool_input)
+
+    def close(self):
+        # A tool that was never built holds nothing
+        if self._tool is not None:
+            self._tool.close()
+
+    async def run_impl(
+        self,
+        tool_input: dict[str, Any],
+        message_history: Optional[MessageHistory] = None,
+    ) -> ToolImplOutput:
+        self.stats.record_call(self.name)
+        if self._tool is None:
+            # Building may block for a while, e.g. to start a shell
+            await asyncio.to_thread(lambda: self.tool)
+        return await self._tool.run_impl(tool_input, message_history)
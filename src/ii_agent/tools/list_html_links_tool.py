@@ -11,6 +11,7 @@ from ii_agent.utils import WorkspaceManager
 
 class ListHtmlLinksTool(LLMTool):
     name = "list_html_links"
+    read_only = True
     description = (
         "Scans a specified HTML file (or all HTML files in a directory) "
         "and lists all unique local HTML file names linked within them. "
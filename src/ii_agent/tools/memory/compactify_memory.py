@@ -31,7 +31,7 @@ class CompactifyMemoryTool(LLMTool):
                 "Message history is required to compactify memory.",
                 auxiliary_data={"success": False},
             )
-        truncated = self.context_manager.apply_truncation(
+        truncated = await self.context_manager.apply_truncation_async(
             message_history.get_messages_for_llm()
         )
         message_history.set_message_list(truncated)
@@ -5,6 +5,7 @@ from ii_agent.tools.base import LLMTool, ToolImplOutput
 
 class MessageTool(LLMTool):
     name = "message_user"
+    read_only = True
 
     description = """\
 Send a message to the user. Use this tool to communicate effectively in a variety of scenarios, including:
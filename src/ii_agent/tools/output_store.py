@@ -0,0 +1,100 @@
+import hashlib
+from typing import Any
+
+from ii_agent.core.storage.files import FileStore
+
+# Directory of offloaded outputs, relative to the workspace root
+TOOL_OUTPUTS_DIR = ".tool_outputs"
+
+
+class ToolOutputStore:
+    """Stores large tool outputs outside the message history.
+
+    Outputs longer than ``threshold_chars`` are written to the file store under
+    a content-addressed handle, and the history keeps only a preview of their
+    head and tail. The full output can be read back with the read_tool_output
+    tool. Identical outputs share one stored copy.
+    """
+
+    def __init__(
+        self,
+        file_store: FileStore,
+        threshold_chars: int = 20_000,
+        head_chars: int = 4_000,
+        tail_chars: int = 2_000,
+    ):
+        if head_chars + tail_chars >= threshold_chars:
+            raise ValueError(
+                f"The preview ({head_chars} + {tail_chars} chars) must be shorter than the threshold ({threshold_chars} chars)"
+            )
+        self.file_store = file_store
+        self.threshold_chars = threshold_chars
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self._handles: set[str] = set()
+
+    @staticmethod
+    def _path(handle: str) -> str:
+        return f"{handle}.txt"
+
+    def put(self, output: str) -> str:
+        """Store an output and return its handle."""
+        handle = hashlib.sha256(output.encode("utf-8", "surrogatepass")).hexdigest()[
+            :16
+        ]
+        if handle not in self._handles:
+            self.file_store.write(self._path(handle), output)
+            self._handles.add(handle)
+        return handle
+
+    def get(self, handle: str) -> str:
+        """Read a stored output.
+
+        Raises:
+            FileNotFoundError: If no output is stored under the handle.
+        """
+        if not handle.isalnum():
+            raise FileNotFoundError(f"No tool output stored under handle {handle}")
+        return self.file_store.read(self._path(handle))
+
+    def offload(
+        self, tool_name: str, output: list[dict[str, Any]] | str
+    ) -> list[dict[str, Any]] | str:
+        """Replace the long text of a tool output with a preview and a handle.
+
+        Text items of list outputs are offloaded one by one; images are kept.
+        """
+        if isinstance(output, str):
+            return self._offload_text(tool_name, output)
+        offloaded = []
+        for item in output:
+            if (
+                isinstance(item, dict)
+                and item.get("type") == "text"
+                and len(item.get("text", "")) > self.threshold_chars
+            ):
+                item = {**item, "text": self._offload_text(tool_name, item["text"])}
+            offloaded.append(item)
+        return offloaded
+
+    def clip(self, text: str) -> str:
+        """Cut text read back from the store to the offloading threshold."""
+        if len(text) <= self.threshold_chars:
+            return text
+        return (
+            text[: self.threshold_chars]
+            + f"\n[... clipped at {self.threshold_chars} chars; read a smaller range]"
+        )
+
+    def _offload_text(self, tool_name: str, text: str) -> str:
+        if len(text) <= self.threshold_chars:
+            return text
+        handle = self.put(text)
+        omitted = len(text) - self.head_chars - self.tail_chars
+        return (
+            f"{text[: self.head_chars]}\n\n"
+            f"[... {omitted} of {len(text)} chars of {tool_name} output omitted. "
+            f'The full output is stored under handle "{handle}"; '
+            f"use the read_tool_output tool to page, grep or slice it ...]\n\n"
+            f"{text[-self.tail_chars :]}"
+        )
@@ -7,11 +7,14 @@ from ii_agent.tools.base import (
     LLMTool,
     ToolImplOutput,
 )
+from ii_agent.tools.result_cache import ToolCachePolicy
 from ii_agent.utils import WorkspaceManager
 
 
 class PdfTextExtractTool(LLMTool):
     name = "pdf_text_extract"
+    read_only = True
+    cache_policy = ToolCachePolicy(ttl=7 * 24 * 60 * 60)
     description = "Extracts text content from a PDF file located in the workspace."
     input_schema = {
         "type": "object",
@@ -31,6 +34,16 @@ class PdfTextExtractTool(LLMTool):
         self.workspace_manager = workspace_manager
         self.max_output_length = max_output_length
 
+    def get_resource_key(self, tool_input: dict[str, Any]) -> Optional[str]:
+        # Called before the input is validated
+        path = tool_input.get("file_path")
+        if not isinstance(path, str):
+            return None
+        return str(self.workspace_manager.workspace_path(Path(path)))
+
+    def get_cache_files(self, tool_input: dict[str, Any]) -> list[Path]:
+        return [self.workspace_manager.workspace_path(Path(tool_input["file_path"]))]
+
     async def run_impl(
         self,
         tool_input: dict[str, Any],
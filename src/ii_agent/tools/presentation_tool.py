@@ -4,8 +4,9 @@ from ii_agent.llm.context_manager.base import ContextManager
 from ii_agent.tools.image_search_tool import ImageSearchTool
 from ii_agent.tools.base import LLMTool
 from ii_agent.utils import WorkspaceManager
-from ii_agent.tools.bash_tool import create_bash_tool
+from ii_agent.tools.bash_tool import create_bash_tool, get_shell_pool
 from ii_agent.tools.str_replace_tool_relative import StrReplaceEditorTool
+from ii_agent.tools.registry import ToolRegistry
 
 from ii_agent.llm.message_history import MessageHistory
 from ii_agent.tools.base import ToolImplOutput
@@ -182,7 +183,9 @@ action = init
         self.client = client
         self.workspace_manager = workspace_manager
         self.message_queue = message_queue
-        self.bash_tool = create_bash_tool(ask_user_permission, workspace_manager.root)
+        self.bash_tool = create_bash_tool(
+            ask_user_permission, workspace_manager.root, shell_pool=get_shell_pool()
+        )
         self.tools = [
             self.bash_tool,
             StrReplaceEditorTool(workspace_manager=workspace_manager),
@@ -191,9 +194,13 @@ action = init
         if image_search_tool.is_available():
             self.tools.append(image_search_tool)
         self.history = MessageHistory(context_manager=context_manager)
-        self.tool_params = [tool.get_tool_param() for tool in self.tools]
+        self.registry = ToolRegistry(self.tools)
         self.max_turns = 200
 
+    def close(self):
+        for tool in self.registry:
+            tool.close()
+
     async def run_impl(
         self,
         tool_input: dict[str, Any],
@@ -241,29 +248,19 @@ action = init
 
         remaining_turns = self.max_turns
         while remaining_turns > 0:
-            self.history.truncate()
+            await self.history.truncate_async()
             remaining_turns -= 1
 
             delimiter = "-" * 45 + "PRESENTATION AGENT" + "-" * 45
             print(f"\n{delimiter}\n")
 
-            # Get tool parameters for available tools
-            tool_params = [tool.get_tool_param() for tool in self.tools]
-
-            # Check for duplicate tool names
-            tool_names = [param.name for param in tool_params]
-            sorted_names = sorted(tool_names)
-            for i in range(len(sorted_names) - 1):
-                if sorted_names[i] == sorted_names[i + 1]:
-                    raise ValueError(f"Tool {sorted_names[i]} is duplicated")
-
             current_messages = self.history.get_messages_for_llm()
 
             # Generate response using the client
-            model_response, _ = self.client.generate(
+            model_response, _ = await self.client.agenerate(
                 messages=current_messages,
                 max_tokens=8192,
-                tools=tool_params,
+                tools=self.registry.tool_params,
                 system_prompt=self.PROMPT,
             )
 
@@ -299,12 +296,7 @@ action = init
                 )
             )
 
-            try:
-                tool = next(t for t in self.tools if t.name == tool_call.tool_name)
-            except StopIteration as exc:
-                raise ValueError(
-                    f"Tool with name {tool_call.tool_name} not found"
-                ) from exc
+            tool = self.registry.get(tool_call.tool_name)
 
             # Execute the tool
             result = tool.run(tool_call.tool_input, deepcopy(self.history))
@@ -0,0 +1,137 @@
+import re
+from typing import Any, Optional
+
+from ii_agent.llm.message_history import MessageHistory
+from ii_agent.tools.base import LLMTool, ToolImplOutput
+from ii_agent.tools.output_store import ToolOutputStore
+
+PAGE_LINES = 200
+MAX_MATCHES = 200
+
+
+class ReadToolOutputTool(LLMTool):
+    name = "read_tool_output"
+    read_only = True
+    description = """\
+Read a large tool output that was stored under a handle instead of being shown in full.
+* By default, returns one page of the output (page 1 is the first 200 lines)
+* With `pattern`, returns the lines matching the regular expression, with line numbers
+* With `start_line` and `end_line`, returns that range of lines (1-based, inclusive)
+* With `offset` and `length`, returns that range of characters, for outputs with very long lines"""
+
+    input_schema = {
+        "type": "object",
+        "properties": {
+            "handle": {
+                "type": "string",
+                "description": "The handle of the stored output.",
+            },
+            "page": {
+                "type": "integer",
+                "description": "The page of 200 lines to return, starting at 1.",
+            },
+            "pattern": {
+                "type": "string",
+                "description": "A regular expression; return only the lines that match it.",
+            },
+            "context": {
+                "type": "integer",
+                "description": "Number of lines to show around each match. Defaults to 0.",
+            },
+            "start_line": {
+                "type": "integer",
+                "description": "First line of the slice to return, starting at 1.",
+            },
+            "end_line": {
+                "type": "integer",
+                "description": "Last line of the slice to return. Defaults to 200 lines after start_line.",
+            },
+            "offset": {
+                "type": "integer",
+                "description": "Character offset of the slice to return, starting at 0.",
+            },
+            "length": {
+                "type": "integer",
+                "description": "Number of characters to return from offset.",
+            },
+        },
+        "required": ["handle"],
+    }
+
+    def __init__(self, output_store: ToolOutputStore):
+        super().__init__()
+        self.output_store = output_store
+
+    async def run_impl(
+        self,
+        tool_input: dict[str, Any],
+        message_history: Optional[MessageHistory] = None,
+    ) -> ToolImplOutput:
+        handle = tool_input["handle"]
+        try:
+            stored_output = self.output_store.get(handle)
+        except FileNotFoundError:
+            msg = f"No tool output stored under handle {handle}"
+            return ToolImplOutput(msg, msg, auxiliary_data={"success": False})
+        lines = stored_output.splitlines()
+
+        if "offset" in tool_input:
+            offset = max(tool_input["offset"], 0)
+            length = tool_input.get("length") or self.output_store.threshold_chars
+            output = stored_output[offset : offset + length]
+        elif tool_input.get("pattern"):
+            output = self._grep(
+                lines, tool_input["pattern"], tool_input.get("context", 0)
+            )
+        elif tool_input.get("start_line"):
+            start = max(tool_input["start_line"], 1)
+            end = tool_input.get("end_line") or start + PAGE_LINES - 1
+            output = self._slice(lines, start, min(end, start + PAGE_LINES - 1))
+        else:
+            page = max(tool_input.get("page", 1), 1)
+            start = (page - 1) * PAGE_LINES + 1
+            output = self._slice(lines, start, start + PAGE_LINES - 1)
+            pages = max((len(lines) + PAGE_LINES - 1) // PAGE_LINES, 1)
+            output = f"Page {page} of {pages}\n{output}"
+
+        output = self.output_store.clip(output)
+        return ToolImplOutput(
+            output,
+            f"Read tool output {handle}",
+            auxiliary_data={"success": True},
+        )
+
+    @staticmethod
+    def _slice(lines: list[str], start: int, end: int) -> str:
+        if start > len(lines):
+            return f"The output has only {len(lines)} lines"
+        return "\n".join(
+            f"{number}: {line}"
+            for number, line in enumerate(lines[start - 1 : end], start=start)
+        )
+
+    @staticmethod
+    def _grep(lines: list[str], pattern: str, context: int) -> str:
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            return f"Invalid pattern {pattern}: {e}"
+
+        shown: list[int] = []
+        matches = 0
+        for i, line in enumerate(lines):
+            if not regex.search(line):
+                continue
+            matches += 1
+            if matches > MAX_MATCHES:
+                break
+            for j in range(max(i - context, 0), min(i + context + 1, len(lines))):
+                if not shown or j > shown[-1]:
+                    shown.append(j)
+
+        if not shown:
+            return f"No lines match {pattern}"
+        output = "\n".join(f"{j + 1}: {lines[j]}" for j in shown)
+        if matches > MAX_MATCHES:
+            output += f"\n[Stopped after {MAX_MATCHES} matches]"
+        return output
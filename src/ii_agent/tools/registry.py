@@ -0,0 +1,65 @@
+"""Immutable name-indexed collection of the tools an agent can call."""
+
+from types import MappingProxyType
+from typing import Iterator, Sequence
+
+from ii_agent.llm.base import ToolParam
+from ii_agent.tools.base import LLMTool
+
+
+class ToolRegistry:
+    """The tools of an agent, indexed once when the agent is built.
+
+    Building the registry checks that tool names are unique, compiles the
+    input validator of every tool and builds the tool parameters sent to the
+    model. ``tool_params`` is the same list on every turn, so clients can
+    reuse their provider-specific tool definitions across requests; neither
+    the list nor the registry may be modified.
+    """
+
+    def __init__(self, tools: Sequence[LLMTool]):
+        """Build the registry.
+
+        Args:
+            tools: The tools, in the order they are presented to the model.
+
+        Raises:
+            ValueError: If two tools share a name.
+        """
+        by_name: dict[str, LLMTool] = {}
+        for tool in tools:
+            if tool.name in by_name:
+                raise ValueError(f"Tool {tool.name} is duplicated")
+            by_name[tool.name] = tool
+            tool.get_input_validator()
+        self._tools = tuple(tools)
+        self._by_name = MappingProxyType(by_name)
+        self._tool_params = [tool.get_tool_param() for tool in self._tools]
+
+    @property
+    def tools(self) -> list[LLMTool]:
+        return list(self._tools)
+
+    @property
+    def tool_params(self) -> list[ToolParam]:
+        return self._tool_params
+
+    def get(self, tool_name: str) -> LLMTool:
+        """Look up a tool by name.
+
+        Raises:
+            ValueError: If no tool has this name.
+        """
+        try:
+            return self._by_name[tool_name]
+        except KeyError:
+            raise ValueError(f"Tool with name {tool_name} not found") from None
+
+    def __contains__(self, tool_name: str) -> bool:
+        return tool_name in self._by_name
+
+    def __iter__(self) -> Iterator[LLMTool]:
+        return iter(self._tools)
+
+    def __len__(self) -> int:
+        return len(self._tools)
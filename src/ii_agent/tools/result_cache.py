@@ -0,0 +1,334 @@
+"""Cache of the results of idempotent tool calls, shared across sessions."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+ToolOutput = list[dict[str, Any]] | str
+
+
+@dataclass(frozen=True)
+class ToolCachePolicy:
+    """Declares that the results of a tool may be reused.
+
+    Only tools whose result depends on nothing but their input and the
+    workspace files they read should declare a policy.
+
+    Attributes:
+        ttl: Seconds a result stays valid.
+    """
+
+    ttl: float
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def make_cache_key(
+    tool_name: str, tool_input: dict[str, Any], files: Sequence[Path] = ()
+) -> str:
+    """Hash a tool call into a cache key.
+
+    Inputs differing only in key order or surrounding whitespace share a key.
+    Each file contributes its path, modification time and size, so editing or
+    replacing a file invalidates the results computed from it.
+    """
+    parts: list[Any] = [tool_name, _normalize(tool_input)]
+    for path in files:
+        try:
+            stat = os.stat(path)
+            parts.append([str(path), stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            parts.append([str(path), None, None])
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class ToolResultCache:
+    """Two-tier LRU cache of tool outputs.
+
+    Results are kept in memory and, if a database path is attached, in a
+    SQLite file that survives restarts and is shared by every process using
+    the same path. Both tiers expire results after the TTL given when they
+    were stored and evict the least recently used results once they exceed
+    their size bound. Hits, misses and evictions are counted per tool.
+
+    ``aget`` and ``aput`` read and write the SQLite file in a worker thread,
+    so the event loop only ever touches the memory tier.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        db_path: Optional[str | Path] = None,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Most results kept in memory.
+            max_bytes: Most bytes of serialized results kept in memory.
+            db_path: SQLite file of the on-disk tier, if any.
+            max_disk_bytes: Most bytes of serialized results kept on disk.
+            clock: Returns the current time in seconds.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._clock = clock
+        # key -> (expires_at, serialized output, tool name)
+        self._memory: OrderedDict[str, tuple[float, str, str]] = OrderedDict()
+        self._memory_bytes = 0
+        # Guards the memory tier and the stats
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, int]] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        # Bytes stored on disk, as of the last write of this process
+        self._disk_bytes = 0
+        self._db_lock = threading.Lock()
+        if db_path is not None:
+            self.attach_disk(db_path)
+
+    def attach_disk(self, db_path: str | Path):
+        """Keep results in the SQLite file at ``db_path`` as well."""
+        db_path = Path(db_path).expanduser()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(
+            str(db_path), check_same_thread=False, isolation_level=None
+        )
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS tool_results ("
+            "key TEXT PRIMARY KEY, tool_name TEXT NOT NULL, output TEXT NOT NULL, "
+            "size INTEGER NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS ix_tool_results_accessed_at "
+            "ON tool_results (accessed_at)"
+        )
+        (disk_bytes,) = db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM tool_results"
+        ).fetchone()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+            self._db = db
+            self._disk_bytes = disk_bytes
+
+    def _entry(self, tool_name: str) -> dict[str, int]:
+        return self._stats.setdefault(
+            tool_name,
+            {
+                "memory_hits": 0,
+                "disk_hits": 0,
+                "misses": 0,
+                "stores": 0,
+                "evictions": 0,
+            },
+        )
+
+    def _remember(self, tool_name: str, key: str, expires_at: float, data: str):
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old[1])
+        if len(data) > self.max_bytes:
+            return
+        self._memory[key] = (expires_at, data, tool_name)
+        self._memory_bytes += len(data)
+        while (
+            len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes
+        ):
+            _, (_, evicted, evicted_tool) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._entry(evicted_tool)["evictions"] += 1
+
+    def _get_memory(self, tool_name: str, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is None:
+                return None
+            expires_at, data, _ = cached
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self._entry(tool_name)["memory_hits"] += 1
+                return data
+            del self._memory[key]
+            self._memory_bytes -= len(data)
+            return None
+
+    def _get_disk(self, key: str, now: float) -> Optional[tuple[str, float]]:
+        """Read an unexpired result and its expiry time from the disk tier."""
+        with self._db_lock:
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT output, expires_at, size FROM tool_results WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] > now:
+                    self._db.execute(
+                        "UPDATE tool_results SET accessed_at = ? WHERE key = ?",
+                        (now, key),
+                    )
+                    return row[0], row[1]
+                self._db.execute("DELETE FROM tool_results WHERE key = ?", (key,))
+                self._disk_bytes -= row[2]
+            except sqlite3.Error as e:
+                logger.warning(f"Error reading the tool result cache: {e}")
+            return None
+
+    def _finish_get(
+        self, tool_name: str, key: str, row: Optional[tuple[str, float]]
+    ) -> Optional[ToolOutput]:
+        with self._lock:
+            if row is None:
+                self._entry(tool_name)["misses"] += 1
+                return None
+            data, expires_at = row
+            self._remember(tool_name, key, expires_at, data)
+            self._entry(tool_name)["disk_hits"] += 1
+        return json.loads(data)
+
+    def get(self, tool_name: str, key: str) -> Optional[ToolOutput]:
+        """Return the cached output under ``key``, or None on a miss."""
+        now = self._clock()
+        data = self._get_memory(tool_name, key, now)
+        if data is not None:
+            return json.loads(data)
+        return self._finish_get(tool_name, key, self._get_disk(key, now))
+
+    async def aget(self, tool_name: str, key: str) -> Optional[ToolOutput]:
+        """Like ``get``, reading the disk tier in a worker thread."""
+        now = self._clock()
+        data = self._get_memory(tool_name, key, now)
+        if data is not None:
+            return json.loads(data)
+        row = None
+        if self._db is not None:
+            row = await asyncio.to_thread(self._get_disk, key, now)
+        return self._finish_get(tool_name, key, row)
+
+    def _start_put(
+        self, tool_name: str, key: str, output: ToolOutput, ttl: float
+    ) -> tuple[str, float, float]:
+        """Store an output in memory; returns what the disk tier should store."""
+        now = self._clock()
+        expires_at = now + ttl
+        data = json.dumps(output)
+        with self._lock:
+            self._entry(tool_name)["stores"] += 1
+            self._remember(tool_name, key, expires_at, data)
+        return data, expires_at, now
+
+    def _put_disk(
+        self, tool_name: str, key: str, data: str, expires_at: float, now: float
+    ):
+        with self._db_lock:
+            if self._db is None or len(data) > self.max_disk_bytes:
+                return
+            try:
+                old = self._db.execute(
+                    "SELECT size FROM tool_results WHERE key = ?", (key,)
+                ).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO tool_results "
+                    "(key, tool_name, output, size, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, tool_name, data, len(data), expires_at, now),
+                )
+                self._disk_bytes += len(data) - (old[0] if old is not None else 0)
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk(now)
+            except sqlite3.Error as e:
+                logger.warning(f"Error writing the tool result cache: {e}")
+
+    def _evict_disk(self, now: float):
+        """Drop expired results, then the least recently used ones, until under the bound."""
+        self._db.execute("DELETE FROM tool_results WHERE expires_at <= ?", (now,))
+        # Other processes sharing the file may have written to it since
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM tool_results"
+        ).fetchone()
+        evicted = []
+        if total > self.max_disk_bytes:
+            rows = self._db.execute(
+                "SELECT key, size, tool_name FROM tool_results ORDER BY accessed_at"
+            ).fetchall()
+            for key, size, tool_name in rows:
+                if total <= self.max_disk_bytes:
+                    break
+                evicted.append((key, tool_name))
+                total -= size
+            self._db.executemany(
+                "DELETE FROM tool_results WHERE key = ?", [(key,) for key, _ in evicted]
+            )
+        self._disk_bytes = total
+        with self._lock:
+            for _, tool_name in evicted:
+                self._entry(tool_name)["evictions"] += 1
+
+    def put(self, tool_name: str, key: str, output: ToolOutput, ttl: float):
+        """Store an output under ``key`` for ``ttl`` seconds."""
+        data, expires_at, now = self._start_put(tool_name, key, output, ttl)
+        self._put_disk(tool_name, key, data, expires_at, now)
+
+    async def aput(self, tool_name: str, key: str, output: ToolOutput, ttl: float):
+        """Like ``put``, writing the disk tier in a worker thread."""
+        data, expires_at, now = self._start_put(tool_name, key, output, ttl)
+        if self._db is not None:
+            await asyncio.to_thread(
+                self._put_disk, tool_name, key, data, expires_at, now
+            )
+
+    def clear(self):
+        """Drop every cached result from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        with self._db_lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM tool_results")
+                self._disk_bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "tools": {name: dict(entry) for name, entry in self._stats.items()},
+            }
+
+
+_default_cache: ToolResultCache | None = None
+
+
+def get_tool_result_cache() -> ToolResultCache:
+    """Return the process-wide tool result cache."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ToolResultCache()
+    return _default_cache
@@ -5,6 +5,7 @@ https://www.anthropic.com/engineering/swe-bench-sonnet.
 """
 
 import asyncio
+from copy import deepcopy
 from pathlib import Path
 from collections import defaultdict
 from ii_agent.utils import match_indent, match_indent_by_first_line, WorkspaceManager
@@ -40,6 +41,17 @@ def is_path_in_directory(directory: Path, path: Path) -> bool:
         return False
 
 
+def _is_well_formed_insert(tool_input: dict[str, Any]) -> bool:
+    # Called before the input is validated; malformed calls are left to validation
+    insert_line = tool_input.get("insert_line")
+    return (
+        tool_input.get("command") == "insert"
+        and isinstance(insert_line, int)
+        and not isinstance(insert_line, bool)
+        and isinstance(tool_input.get("new_str"), str)
+    )
+
+
 def adjust_parallel_calls(
     tool_calls: list[ToolCallParameters],
 ) -> list[ToolCallParameters]:
@@ -47,19 +59,15 @@ def adjust_parallel_calls(
     # sort insert calls by line number
     tool_calls.sort(
         key=lambda x: (
-            x.tool_input.get("command") != "insert",
-            x.tool_input.get("insert_line", 0),
+            not _is_well_formed_insert(x.tool_input),
+            x.tool_input["insert_line"] if _is_well_formed_insert(x.tool_input) else 0,
         )
     )
 
     # increment line numbers of insert calls after each insert call
     line_shift = 0
     for tool_call in tool_calls:
-        if (
-            tool_call.tool_input.get("command") == "insert"
-            and "insert_line" in tool_call.tool_input
-            and "new_str" in tool_call.tool_input
-        ):
+        if _is_well_formed_insert(tool_call.tool_input):
             tool_call.tool_input["insert_line"] += line_shift
             line_shift += len(tool_call.tool_input["new_str"].splitlines())
     return tool_calls
@@ -196,6 +204,28 @@ Notes for using the `str_replace` command:\n
         self._file_history = defaultdict(list)
         self.message_queue = message_queue
 
+    def is_read_only(self, tool_input: dict[str, Any]) -> bool:
+        return tool_input.get("command") == "view"
+
+    def get_resource_key(self, tool_input: dict[str, Any]) -> Optional[str]:
+        # Called before the input is validated
+        path = tool_input.get("path")
+        if not isinstance(path, str):
+            return None
+        return str(self.workspace_manager.workspace_path(Path(path)))
+
+    def adjust_parallel_calls(
+        self, tool_calls: list[ToolCallParameters]
+    ) -> list[ToolCallParameters]:
+        # Line numbers of inserts issued in the same turn refer to the original
+        # file, so shift them only when the batch is made of plain edits.
+        if len(tool_calls) > 1 and all(
+            call.tool_input.get("command") in ("insert", "str_replace")
+            for call in tool_calls
+        ):
+            return adjust_parallel_calls(deepcopy(tool_calls))
+        return tool_calls
+
     def _send_file_update(self, path: Path, content: str):
         """Send file content update through message queue if available."""
         if self.message_queue:
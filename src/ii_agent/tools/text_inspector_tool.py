@@ -10,6 +10,7 @@ from ii_agent.utils import WorkspaceManager
 
 class TextInspectorTool(LLMTool):
     name = "get_text_from_local_file"
+    read_only = True
     description = """Use this tool to get the text content from a local file. Supported file types: [".xlsx", ".pptx", ".flac", ".pdf", ".docx"]
 Note:
 - This tool works only with the supported file types listed above. 
@@ -32,6 +33,13 @@ Note:
         self.md_converter = MarkdownConverter()
         self.workspace_manager = workspace_manager
 
+    def get_resource_key(self, tool_input: dict[str, Any]) -> Optional[str]:
+        # Called before the input is validated
+        path = tool_input.get("file_path")
+        if not isinstance(path, str):
+            return None
+        return str(self.workspace_manager.workspace_path(path))
+
     def forward(self, file_path: str) -> str:
         # Convert relative path to absolute path using workspace_manager
         abs_path = str(self.workspace_manager.workspace_path(file_path))
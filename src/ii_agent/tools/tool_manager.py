@@ -1,9 +1,10 @@
 import os
 import asyncio
+import functools
 import logging
 from copy import deepcopy
 from typing import Optional, List, Dict, Any
-from ii_agent.llm.base import LLMClient
+from ii_agent.llm.base import LLMClient, ToolParam
 from ii_agent.llm.context_manager.llm_summarizing import LLMSummarizingContextManager
 from ii_agent.llm.token_counter import TokenCounter
 from ii_agent.tools.image_search_tool import ImageSearchTool
@@ -19,7 +20,15 @@ from ii_agent.tools.static_deploy_tool import StaticDeployTool
 from ii_agent.tools.sequential_thinking_tool import SequentialThinkingTool
 from ii_agent.tools.message_tool import MessageTool
 from ii_agent.tools.complete_tool import CompleteTool, ReturnControlToUserTool, CompleteToolReviewer, ReturnControlToGeneralAgentTool
-from ii_agent.tools.bash_tool import create_bash_tool, create_docker_bash_tool
+from ii_agent.tools.bash_job_tool import BashJobTool
+from ii_agent.tools.bash_tool import (
+    BACKGROUND_COMMANDS_HINT,
+    BASH_JOB_HINT,
+    BashTool,
+    create_bash_tool,
+    create_docker_bash_tool,
+    get_shell_pool,
+)
 from ii_agent.browser.browser import Browser
 from ii_agent.utils import WorkspaceManager
 from ii_agent.llm.message_history import MessageHistory
@@ -53,6 +62,10 @@ from ii_agent.tools.image_gen_tool import ImageGenerateTool
 from ii_agent.tools.pdf_tool import PdfTextExtractTool
 from ii_agent.tools.deep_research_tool import DeepResearchTool
 from ii_agent.tools.list_html_links_tool import ListHtmlLinksTool
+from ii_agent.tools.output_store import ToolOutputStore
+from ii_agent.tools.read_tool_output_tool import ReadToolOutputTool
+from ii_agent.tools.lazy_tool import LazyTool
+from ii_agent.tools.registry import ToolRegistry
 from ii_agent.utils.constants import TOKEN_BUDGET
 
 
@@ -67,16 +80,36 @@ def get_system_tools(
     """
     Retrieves a list of all system tools.
 
+    Tools backed by a shell, a browser or a cloud client are built lazily, on
+    their first call, so sessions that never use them do not pay for them.
+
     Returns:
         list[LLMTool]: A list of all system tools.
     """
     if container_id is not None:
-        bash_tool = create_docker_bash_tool(
-            container=container_id, ask_user_permission=ask_user_permission
+        bash_tool = LazyTool(
+            BashTool,
+            lambda: create_docker_bash_tool(
+                container=container_id,
+                ask_user_permission=ask_user_permission,
+                message_queue=message_queue,
+                shell_pool=get_shell_pool(),
+            ),
         )
     else:
-        bash_tool = create_bash_tool(
-            ask_user_permission=ask_user_permission, cwd=workspace_manager.root
+        bash_tool = LazyTool(
+            BashTool,
+            lambda: create_bash_tool(
+                ask_user_permission=ask_user_permission,
+                cwd=workspace_manager.root,
+                message_queue=message_queue,
+                shell_pool=get_shell_pool(),
+            ),
+        )
+
+    def lazy_media_tool(tool_class: type[LLMTool]) -> LazyTool:
+        return LazyTool(
+            tool_class, lambda: tool_class(workspace_manager=workspace_manager)
         )
 
     logger = logging.getLogger("presentation_context_manager")
@@ -105,6 +138,17 @@ def get_system_tools(
         ),
         DisplayImageTool(workspace_manager=workspace_manager),
     ]
+    if container_id is None:
+        # Jobs run on the host, so they are only offered with a local shell
+        bash_tool.description = bash_tool.description.replace(
+            BACKGROUND_COMMANDS_HINT, BASH_JOB_HINT
+        )
+        tools.append(
+            BashJobTool(
+                workspace_root=workspace_manager.root,
+                require_confirmation=ask_user_permission,
+            )
+        )
     image_search_tool = ImageSearchTool()
     if image_search_tool.is_available():
         tools.append(image_search_tool)
@@ -121,42 +165,44 @@ def get_system_tools(
             os.environ.get("MEDIA_GCP_PROJECT_ID")
             and os.environ.get("MEDIA_GCP_LOCATION")
         ):
-            tools.append(ImageGenerateTool(workspace_manager=workspace_manager))
+            tools.append(lazy_media_tool(ImageGenerateTool))
             if tool_args.get("video_generation", False):
                 tools.extend([
-                    VideoGenerateFromTextTool(workspace_manager=workspace_manager), 
-                    VideoGenerateFromImageTool(workspace_manager=workspace_manager),
-                    LongVideoGenerateFromTextTool(workspace_manager=workspace_manager),
-                    LongVideoGenerateFromImageTool(workspace_manager=workspace_manager)
+                    lazy_media_tool(VideoGenerateFromTextTool),
+                    lazy_media_tool(VideoGenerateFromImageTool),
+                    lazy_media_tool(LongVideoGenerateFromTextTool),
+                    lazy_media_tool(LongVideoGenerateFromImageTool),
                 ])
         if tool_args.get("audio_generation", False) and (
             os.environ.get("OPEN_API_KEY") and os.environ.get("AZURE_OPENAI_ENDPOINT")
         ):
             tools.extend(
                 [
-                    AudioTranscribeTool(workspace_manager=workspace_manager),
-                    AudioGenerateTool(workspace_manager=workspace_manager),
+                    lazy_media_tool(AudioTranscribeTool),
+                    lazy_media_tool(AudioGenerateTool),
                 ]
             )
             
         # Browser tools
         if tool_args.get("browser", False):
-            browser = Browser()
+            # The browser tools share one browser, created by the first one used
+            get_browser = functools.cache(Browser)
             tools.extend(
-                [
-                    BrowserNavigationTool(browser=browser),
-                    BrowserRestartTool(browser=browser),
-                    BrowserScrollDownTool(browser=browser),
-                    BrowserScrollUpTool(browser=browser),
-                    BrowserViewTool(browser=browser),
-                    BrowserWaitTool(browser=browser),
-                    BrowserSwitchTabTool(browser=browser),
-                    BrowserOpenNewTabTool(browser=browser),
-                    BrowserClickTool(browser=browser),
-                    BrowserEnterTextTool(browser=browser),
-                    BrowserPressKeyTool(browser=browser),
-                    BrowserGetSelectOptionsTool(browser=browser),
-                    BrowserSelectDropdownOptionTool(browser=browser),
+                LazyTool(tool_class, lambda tool_class=tool_class: tool_class(browser=get_browser()))
+                for tool_class in [
+                    BrowserNavigationTool,
+                    BrowserRestartTool,
+                    BrowserScrollDownTool,
+                    BrowserScrollUpTool,
+                    BrowserViewTool,
+                    BrowserWaitTool,
+                    BrowserSwitchTabTool,
+                    BrowserOpenNewTabTool,
+                    BrowserClickTool,
+                    BrowserEnterTextTool,
+                    BrowserPressKeyTool,
+                    BrowserGetSelectOptionsTool,
+                    BrowserSelectDropdownOptionTool,
                 ]
             )
 
@@ -183,15 +229,28 @@ class AgentToolManager:
 
     Tools include bash commands, browser interactions, file operations,
     search capabilities, and task completion functionality.
+
+    With an output store, tool outputs above its threshold are stored outside
+    the history, which keeps a preview and a handle, and the read_tool_output
+    tool is added to read them back.
+
+    The tools are indexed in a ``ToolRegistry`` when the manager is created;
+    tools cannot be added afterwards.
     """
 
-    def __init__(self, tools: List[LLMTool], logger_for_agent_logs: logging.Logger, interactive_mode: bool = True, reviewer_mode: bool = False):
+    def __init__(self, tools: List[LLMTool], logger_for_agent_logs: logging.Logger, interactive_mode: bool = True, reviewer_mode: bool = False, output_store: Optional[ToolOutputStore] = None):
         self.logger_for_agent_logs = logger_for_agent_logs
         if reviewer_mode:
             self.complete_tool = ReturnControlToGeneralAgentTool() if interactive_mode else CompleteToolReviewer()
         else:
             self.complete_tool = ReturnControlToUserTool() if interactive_mode else CompleteTool()
         self.tools = tools
+        self.output_store = output_store
+        self.read_output_tool = (
+            ReadToolOutputTool(output_store) if output_store is not None else None
+        )
+        extra_tools = [self.read_output_tool] if self.read_output_tool is not None else []
+        self.registry = ToolRegistry(self.tools + extra_tools + [self.complete_tool])
 
     def get_tool(self, tool_name: str) -> LLMTool:
         """
@@ -206,11 +265,7 @@ class AgentToolManager:
         Raises:
             ValueError: If the tool with the specified name is not found.
         """
-        try:
-            tool: LLMTool = next(t for t in self.get_tools() if t.name == tool_name)
-            return tool
-        except StopIteration:
-            raise ValueError(f"Tool with name {tool_name} not found")
+        return self.registry.get(tool_name)
 
     async def run_tool(self, tool_params: ToolCallParameters, history: MessageHistory):
         """
@@ -249,8 +304,104 @@ class AgentToolManager:
         else:
             tool_result = result
 
+        if self.output_store is not None and llm_tool is not self.read_output_tool:
+            tool_result = self.output_store.offload(tool_name, tool_result)
+
         return tool_result
 
+    def plan_parallel_tool_calls(
+        self, tool_calls: list[ToolCallParameters]
+    ) -> list[list[list[ToolCallParameters]]]:
+        """
+        Groups the tool calls of a single turn into execution stages.
+
+        Stages run one after another. Each stage is a list of chains that run
+        concurrently, and the calls inside a chain run sequentially. Read-only
+        calls and calls scoped to a resource key share a stage, with calls on
+        the same resource chained in order. Read-only calls without a key may
+        read any resource, so they never share a stage with a mutating call
+        scoped to a key. Any other mutating call runs alone in its own stage,
+        so it never overlaps with calls issued before or after it.
+
+        Args:
+            tool_calls (list[ToolCallParameters]): The tool calls in the order the model issued them.
+
+        Returns:
+            list[list[list[ToolCallParameters]]]: The execution stages.
+        """
+        stages: list[list[list[ToolCallParameters]]] = []
+        chains: dict[str, list[ToolCallParameters]] = {}
+        independent: list[list[ToolCallParameters]] = []
+        # Whether a chain of the current stage mutates its resource
+        has_keyed_writes = False
+
+        def flush():
+            nonlocal has_keyed_writes
+            if chains or independent:
+                stages.append(independent + list(chains.values()))
+            chains.clear()
+            independent.clear()
+            has_keyed_writes = False
+
+        for tool_call in tool_calls:
+            llm_tool = self.get_tool(tool_call.tool_name)
+            resource_key = llm_tool.get_resource_key(tool_call.tool_input)
+            read_only = llm_tool.is_read_only(tool_call.tool_input)
+            if resource_key is not None:
+                if not read_only:
+                    if independent:
+                        flush()
+                    has_keyed_writes = True
+                chains.setdefault(resource_key, []).append(tool_call)
+            elif read_only:
+                if has_keyed_writes:
+                    flush()
+                independent.append([tool_call])
+            else:
+                flush()
+                stages.append([[tool_call]])
+        flush()
+
+        return [
+            [
+                self.get_tool(chain[0].tool_name).adjust_parallel_calls(chain)
+                if len(chain) > 1
+                else chain
+                for chain in stage
+            ]
+            for stage in stages
+        ]
+
+    async def run_tools_parallel(
+        self, tool_calls: list[ToolCallParameters], history: MessageHistory
+    ) -> list[str | list[dict[str, Any]]]:
+        """
+        Executes all tool calls of a turn, running independent calls concurrently.
+
+        Args:
+            tool_calls (list[ToolCallParameters]): The tool calls in the order the model issued them.
+            history (MessageHistory): The history of the conversation.
+        Returns:
+            list: The tool results, in the same order as ``tool_calls``.
+        """
+        results: dict[str, Any] = {}
+
+        async def run_chain(chain: list[ToolCallParameters]):
+            for tool_call in chain:
+                results[tool_call.tool_call_id] = await self.run_tool(
+                    tool_call, history
+                )
+
+        for stage in self.plan_parallel_tool_calls(tool_calls):
+            outcomes = await asyncio.gather(
+                *(run_chain(chain) for chain in stage), return_exceptions=True
+            )
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+
+        return [results[tool_call.tool_call_id] for tool_call in tool_calls]
+
     def should_stop(self):
         """
         Checks if the agent should stop based on the completion tool.
@@ -275,6 +426,11 @@ class AgentToolManager:
         """
         self.complete_tool.reset()
 
+    def close(self):
+        """Release the resources held by the tools, such as their shells."""
+        for tool in self.registry:
+            tool.close()
+
     def get_tools(self) -> list[LLMTool]:
         """
         Retrieves a list of all available tools.
@@ -282,4 +438,15 @@ class AgentToolManager:
         Returns:
             list[LLMTool]: A list of all available tools.
         """
-        return self.tools + [self.complete_tool]
+        return self.registry.tools
+
+    def get_tool_params(self) -> list[ToolParam]:
+        """
+        Retrieves the parameters of all available tools, as sent to the model.
+
+        The same list is returned on every call and must not be modified.
+
+        Returns:
+            list[ToolParam]: The tool parameters.
+        """
+        return self.registry.tool_params
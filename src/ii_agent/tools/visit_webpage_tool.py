@@ -4,6 +4,7 @@ from ii_agent.tools.base import (
 )
 from typing import Any, Optional
 from ii_agent.llm.message_history import MessageHistory
+from ii_agent.tools.result_cache import ToolCachePolicy
 from ii_agent.tools.visit_webpage_client import (
     create_visit_client,
     WebpageVisitException,
@@ -15,6 +16,8 @@ from ii_agent.utils.constants import VISIT_WEB_PAGE_MAX_OUTPUT_LENGTH
 
 class VisitWebpageTool(LLMTool):
     name = "visit_webpage"
+    read_only = True
+    cache_policy = ToolCachePolicy(ttl=60 * 60)
     description = "You should call this tool when you need to visit a webpage and extract its content. Returns webpage content as text."
     input_schema = {
         "type": "object",
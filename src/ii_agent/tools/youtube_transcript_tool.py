@@ -4,6 +4,7 @@ from ii_agent.tools.base import (
 )
 from typing import Any, Optional
 from ii_agent.llm.message_history import MessageHistory
+from ii_agent.tools.result_cache import ToolCachePolicy
 import yt_dlp
 import aiohttp
 import asyncio
@@ -11,6 +12,8 @@ import asyncio
 
 class YoutubeTranscriptTool(LLMTool):
     name = "youtube_video_transcript"
+    read_only = True
+    cache_policy = ToolCachePolicy(ttl=24 * 60 * 60)
     description = """This tool retrieves and returns the transcript of a YouTube video.
     It supports both manually created subtitles and automatically generated captions,
     prioritizing manual subtitles when available."""
@@ -48,8 +48,7 @@ Format your response as a single, well-structured prompt without explanations or
             TextPrompt(text=f"Enhance this request into a detailed prompt: {user_input}\n\nAdditional context - {file_context}")
         ]]
         
-        # Use the Anthropic client's generate method
-        response_blocks, _ = client.generate(
+        response_blocks, _ = await client.agenerate(
             messages=messages,
             max_tokens=max_tokens,
             system_prompt=system_prompt,
@@ -0,0 +1,45 @@
+"""Per-turn cost of building provider requests as the history grows.
+
+Run with ``PYTHONPATH=src python tests/benchmarks/bench_request_building.py``.
+Each agent turn converts the whole history into the Anthropic request format;
+with the conversion cache only the new turns are converted, so the cost per
+turn stays nearly flat instead of growing with the number of turns.
+"""
+
+import time
+
+from ii_agent.llm.anthropic import AnthropicDirectClient
+from ii_agent.llm.base import TextPrompt, TextResult, ToolCall, ToolFormattedResult
+
+TURNS = 200
+REPORT_EVERY = 20
+
+
+def main():
+    client = AnthropicDirectClient(model_name="claude-sonnet-4@20250514")
+    messages = [[TextPrompt(text="Explore the repository")]]
+
+    elapsed = 0.0
+    print(f"{'turns':>6} {'us/turn':>10}")
+    for i in range(1, TURNS + 1):
+        messages.append(
+            [
+                TextResult(text=f"Reading file {i}"),
+                ToolCall(f"call_{i}", "bash", {"command": f"cat file_{i}.py"}),
+            ]
+        )
+        messages.append([ToolFormattedResult(f"call_{i}", "bash", "x = 1\n" * 200)])
+
+        start = time.perf_counter()
+        client._build_request_params(
+            list(messages), max_tokens=1000, system_prompt="You are an agent."
+        )
+        elapsed += time.perf_counter() - start
+
+        if i % REPORT_EVERY == 0:
+            print(f"{i:>6} {elapsed / REPORT_EVERY * 1e6:>10.1f}")
+            elapsed = 0.0
+
+
+if __name__ == "__main__":
+    main()
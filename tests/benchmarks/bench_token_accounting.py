@@ -0,0 +1,60 @@
+"""Per-turn cost of token accounting as the history grows.
+
+Run with ``PYTHONPATH=src python tests/benchmarks/bench_token_accounting.py``.
+Each agent turn truncates the history (a no-op below the budget) and logs its
+token count; with incremental accounting the cost per turn stays flat instead
+of growing with the number of turns.
+"""
+
+import logging
+import time
+from unittest.mock import Mock
+
+from ii_agent.llm.base import TextResult, ToolCall, ToolCallParameters
+from ii_agent.llm.context_manager.llm_summarizing import LLMSummarizingContextManager
+from ii_agent.llm.message_history import MessageHistory
+from ii_agent.llm.token_counter import TokenCounter
+
+TURNS = 1000
+REPORT_EVERY = 100
+
+
+def main():
+    context_manager = LLMSummarizingContextManager(
+        client=Mock(),
+        token_counter=TokenCounter(),
+        logger=Mock(spec=logging.Logger),
+        token_budget=10**9,
+        max_size=10**9,
+    )
+    history = MessageHistory(context_manager)
+    history.add_user_prompt("Explore the repository")
+
+    elapsed = 0.0
+    print(f"{'turns':>6} {'us/turn':>10}")
+    for i in range(1, TURNS + 1):
+        call = ToolCallParameters(
+            tool_call_id=f"call_{i}",
+            tool_name="bash",
+            tool_input={"command": f"cat file_{i}.py"},
+        )
+        history.add_assistant_turn(
+            [
+                TextResult(text=f"Reading file {i}"),
+                ToolCall(call.tool_call_id, call.tool_name, call.tool_input),
+            ]
+        )
+        history.add_tool_call_result(call, "x = 1\n" * 200)
+
+        start = time.perf_counter()
+        history.truncate()
+        history.count_tokens()
+        elapsed += time.perf_counter() - start
+
+        if i % REPORT_EVERY == 0:
+            print(f"{i:>6} {elapsed / REPORT_EVERY * 1e6:>10.1f}")
+            elapsed = 0.0
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
+import asyncio
 import logging
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
+
+import pytest
 
 from ii_agent.llm.base import (
     TextPrompt,
@@ -9,8 +12,11 @@ from ii_agent.llm.base import (
     ToolFormattedResult,
 )
 from ii_agent.llm.context_manager.llm_summarizing import LLMSummarizingContextManager
+from ii_agent.llm.message_history import MessageHistory
 from ii_agent.llm.token_counter import TokenCounter
 
+pytest_plugins = ("pytest_asyncio",)
+
 
 def test_llm_summarizing_context_manager():
     mock_logger = Mock(spec=logging.Logger)
@@ -163,3 +169,280 @@ def test_llm_calls_during_summarization():
 
     assert result == expected_result
 
+
+
+@pytest.mark.asyncio
+async def test_async_truncation_matches_sync_truncation():
+    mock_llm_client = Mock(spec=LLMClient)
+    summary_response = ([TextResult(text="Generated summary.")], None)
+    mock_llm_client.generate.return_value = summary_response
+    mock_llm_client.agenerate = AsyncMock(return_value=summary_response)
+
+    context_manager = LLMSummarizingContextManager(
+        client=mock_llm_client,
+        token_counter=TokenCounter(),
+        logger=Mock(spec=logging.Logger),
+        token_budget=1000,
+        max_size=10,
+    )
+    message_lists = []
+    for j in range(12):
+        if j % 2 == 0:
+            message_lists.append([TextPrompt(text=f"Turn {j // 2}")])
+        else:
+            message_lists.append([TextResult(text=f"Turn {j // 2}")])
+
+    sync_result = context_manager.apply_truncation_if_needed(message_lists)
+    async_result = await context_manager.apply_truncation_if_needed_async(
+        message_lists
+    )
+
+    assert async_result == sync_result
+    # The async path never blocks on the synchronous client
+    mock_llm_client.generate.assert_called_once()
+    mock_llm_client.agenerate.assert_awaited_once()
+    assert (
+        mock_llm_client.agenerate.call_args.kwargs["messages"]
+        == mock_llm_client.generate.call_args.kwargs["messages"]
+    )
+
+
+def make_turns(count, start=0, prefix=""):
+    return [
+        [TextPrompt(text=f"{prefix}Turn {j // 2}")]
+        if j % 2 == 0
+        else [TextResult(text=f"{prefix}Turn {j // 2}")]
+        for j in range(start, start + count)
+    ]
+
+
+def make_presummarizing_manager(agenerate):
+    mock_llm_client = Mock(spec=LLMClient)
+    mock_llm_client.agenerate = agenerate
+    return LLMSummarizingContextManager(
+        client=mock_llm_client,
+        token_counter=TokenCounter(),
+        logger=Mock(spec=logging.Logger),
+        token_budget=10**6,
+        max_size=10,
+        presummarize_threshold=0.8,
+    )
+
+
+@pytest.mark.asyncio
+async def test_presummarized_summary_is_swapped_in_at_the_limit():
+    agenerate = AsyncMock(return_value=([TextResult(text="Background summary.")], None))
+    context_manager = make_presummarizing_manager(agenerate)
+
+    message_lists = make_turns(7)
+    assert await context_manager.apply_truncation_if_needed_async(message_lists) is message_lists
+    agenerate.assert_not_called()
+
+    # The soft threshold (8 of 10 message lists) starts the summary in the background
+    message_lists = message_lists + make_turns(1, start=7)
+    assert await context_manager.apply_truncation_if_needed_async(message_lists) is message_lists
+    await asyncio.sleep(0)
+    agenerate.assert_awaited_once()
+
+    # Turns added meanwhile are kept after the summary
+    message_lists = message_lists + make_turns(3, start=8)
+    result = await context_manager.apply_truncation_if_needed_async(message_lists)
+
+    agenerate.assert_awaited_once()
+    assert result[0] is message_lists[0]
+    assert result[1][0].text == "Conversation Summary: Background summary."
+    # 8 // 2 - 2 = 2 tail events at the soft threshold, plus the 3 new turns
+    assert result[2:] == message_lists[6:]
+
+
+@pytest.mark.asyncio
+async def test_presummarization_in_flight_is_awaited_at_the_limit():
+    release = asyncio.Event()
+
+    async def slow_summary(**kwargs):
+        await release.wait()
+        return [TextResult(text="Slow summary.")], None
+
+    agenerate = AsyncMock(side_effect=slow_summary)
+    context_manager = make_presummarizing_manager(agenerate)
+    message_lists = make_turns(8)
+    await context_manager.apply_truncation_if_needed_async(message_lists)
+
+    truncation = asyncio.create_task(
+        context_manager.apply_truncation_if_needed_async(message_lists + make_turns(3, start=8))
+    )
+    await asyncio.sleep(0)
+    assert not truncation.done()
+    release.set()
+    result = await truncation
+
+    assert agenerate.await_count == 1
+    assert result[1][0].text == "Conversation Summary: Slow summary."
+
+
+@pytest.mark.asyncio
+async def test_presummarization_is_discarded_when_history_changes():
+    agenerate = AsyncMock(return_value=([TextResult(text="Summary.")], None))
+    context_manager = make_presummarizing_manager(agenerate)
+    await context_manager.apply_truncation_if_needed_async(make_turns(8))
+    await asyncio.sleep(0)
+
+    # The history was replaced, e.g. by the agent clearing it
+    message_lists = make_turns(11)
+    result = await context_manager.apply_truncation_if_needed_async(message_lists)
+
+    assert agenerate.await_count == 2
+    forgotten_prompt = agenerate.call_args.kwargs["messages"][0][0].text
+    assert forgotten_prompt.count("<EVENT id=") == len(message_lists) - 1 - 3
+    assert len(result) == 5
+
+
+@pytest.mark.asyncio
+async def test_clearing_the_history_cancels_the_background_summary():
+    cancelled = asyncio.Event()
+
+    async def endless_summary(**kwargs):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    context_manager = make_presummarizing_manager(AsyncMock(side_effect=endless_summary))
+    history = MessageHistory(context_manager)
+    history.set_message_list(make_turns(8))
+    await history.truncate_async()
+    await asyncio.sleep(0)
+
+    history.clear()
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert context_manager._pending == {}
+
+
+@pytest.mark.asyncio
+async def test_histories_sharing_a_manager_keep_their_own_background_summary():
+    async def summarize(messages, **kwargs):
+        prompt = messages[0][0].text
+        return [TextResult(text="Summary of A." if "A-" in prompt else "Summary of B.")], None
+
+    agenerate = AsyncMock(side_effect=summarize)
+    context_manager = make_presummarizing_manager(agenerate)
+    history_a = MessageHistory(context_manager)
+    history_b = MessageHistory(context_manager)
+    history_a.set_message_list(make_turns(8, prefix="A-"))
+    history_b.set_message_list(make_turns(8, prefix="B-"))
+
+    # Both histories reach the soft threshold, one after the other
+    await history_a.truncate_async()
+    await history_b.truncate_async()
+    await asyncio.sleep(0)
+    assert agenerate.await_count == 2
+
+    # Clearing one history leaves the summary of the other running
+    history_c = MessageHistory(context_manager)
+    history_c.clear()
+    assert len(context_manager._pending) == 2
+
+    history_a.set_message_list(history_a._message_lists + make_turns(3, start=8, prefix="A-"))
+    history_b.set_message_list(history_b._message_lists + make_turns(3, start=8, prefix="B-"))
+    await history_a.truncate_async()
+    await history_b.truncate_async()
+
+    assert agenerate.await_count == 2
+    assert history_a._message_lists[1][0].text == "Conversation Summary: Summary of A."
+    assert history_b._message_lists[1][0].text == "Conversation Summary: Summary of B."
+
+
+def make_chunking_manager(client, **kwargs):
+    return LLMSummarizingContextManager(
+        client=client,
+        token_counter=TokenCounter(),
+        logger=Mock(spec=logging.Logger),
+        token_budget=10**6,
+        summary_chunk_tokens=100,
+        **kwargs,
+    )
+
+
+def make_events(count):
+    # Each event is about 45 tokens, so two fit in a chunk of 100
+    return [[TextResult(text=f"Event {i} " + "x" * 120)] for i in range(count)]
+
+
+def test_events_are_split_into_token_bounded_chunks():
+    context_manager = make_chunking_manager(Mock(spec=LLMClient))
+    events = make_events(5) + [[TextResult(text="y" * 1000)]]
+
+    chunks = context_manager._chunk_events(events)
+
+    assert chunks == [events[0:2], events[2:4], events[4:5], events[5:6]]
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_summarized_concurrently_then_reduced():
+    running = 0
+    max_running = 0
+
+    async def summarize(messages, **kwargs):
+        nonlocal running, max_running
+        prompt = messages[0][0].text
+        if "<PARTIAL SUMMARY" in prompt:
+            return [TextResult(text="Merged summary.")], None
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        first_event = prompt.split("<EVENT id=0>\nASSISTANT: Event ")[1].split(" ")[0]
+        return [TextResult(text=f"Chunk from event {first_event}.")], None
+
+    client = Mock(spec=LLMClient)
+    client.agenerate = AsyncMock(side_effect=summarize)
+    context_manager = make_chunking_manager(client, summary_fan_out=2)
+
+    summary = await context_manager._agenerate_summary(
+        make_events(8), "Conversation Summary: Earlier work."
+    )
+
+    assert summary == "Merged summary."
+    assert client.agenerate.await_count == 5
+    assert max_running == 2
+    reduce_prompt = client.agenerate.call_args.kwargs["messages"][0][0].text
+    assert "<PREVIOUS SUMMARY>\nEarlier work.\n</PREVIOUS SUMMARY>" in reduce_prompt
+    assert reduce_prompt.index("Chunk from event 0.") < reduce_prompt.index("Chunk from event 6.")
+    assert "<EVENT" not in reduce_prompt
+
+
+def test_sync_chunked_summary_matches_async_prompts():
+    client = Mock(spec=LLMClient)
+    client.generate.return_value = ([TextResult(text="Partial.")], None)
+    context_manager = make_chunking_manager(client)
+
+    summary = context_manager._generate_summary(make_events(4))
+
+    assert summary == "Partial."
+    assert client.generate.call_count == 3
+    reduce_prompt = client.generate.call_args.kwargs["messages"][0][0].text
+    assert reduce_prompt.count("<PARTIAL SUMMARY id=") == 2
+
+
+def test_small_windows_use_a_single_request():
+    client = Mock(spec=LLMClient)
+    client.generate.return_value = ([TextResult(text="Summary.")], None)
+    context_manager = make_chunking_manager(client)
+
+    assert context_manager._generate_summary(make_events(2)) == "Summary."
+    client.generate.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"summary_chunk_tokens": 0}, {"summary_chunk_tokens": -100}, {"summary_fan_out": 0}]
+)
+def test_non_positive_chunk_settings_are_rejected(kwargs):
+    with pytest.raises(ValueError, match="cannot be non-positive"):
+        LLMSummarizingContextManager(
+            client=Mock(spec=LLMClient),
+            token_counter=TokenCounter(),
+            logger=Mock(spec=logging.Logger),
+            **kwargs,
+        )
@@ -0,0 +1,208 @@
+import logging
+from unittest.mock import Mock
+
+import pytest
+
+from ii_agent.llm.base import (
+    AnthropicThinkingBlock,
+    ImageBlock,
+    LLMClient,
+    TextPrompt,
+    TextResult,
+    ToolCall,
+    ToolCallParameters,
+    ToolFormattedResult,
+)
+from ii_agent.llm.context_manager.llm_summarizing import LLMSummarizingContextManager
+from ii_agent.llm.context_manager.observation_masking import (
+    ObservationMaskingContextManager,
+)
+from ii_agent.llm.message_history import MessageHistory
+from ii_agent.llm.token_counter import TokenCounter
+from ii_agent.server.factories.agent_factory import AgentConfig, AgentFactory
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+def make_tool_turns(count, output_chars=12_000, thinking=True):
+    message_lists = [[TextPrompt(text="Explore the repository")]]
+    for i in range(count):
+        call = ToolCall(
+            tool_call_id=f"call_{i}",
+            tool_name="bash",
+            tool_input={"command": f"cat {i}"},
+        )
+        if thinking:
+            message_lists.append(
+                [
+                    AnthropicThinkingBlock(
+                        type="thinking", signature="sig", thinking=f"Thinking {i}"
+                    ),
+                    call,
+                ]
+            )
+        else:
+            message_lists.append([call])
+        message_lists.append(
+            [
+                ToolFormattedResult(
+                    tool_call_id=f"call_{i}",
+                    tool_name="bash",
+                    tool_output="x" * output_chars,
+                )
+            ]
+        )
+    return message_lists
+
+
+def make_manager(**kwargs):
+    return ObservationMaskingContextManager(
+        token_counter=TokenCounter(),
+        logger=Mock(spec=logging.Logger),
+        **kwargs,
+    )
+
+
+def test_masks_all_but_the_last_observations():
+    context_manager = make_manager(keep_last_observations=2)
+    message_lists = make_tool_turns(4)
+
+    result = context_manager.mask_observations(message_lists)
+
+    assert len(result) == len(message_lists)
+    assert result[2][0].tool_output == "[output of bash elided, 12k chars]"
+    assert result[4][0].tool_output == "[output of bash elided, 12k chars]"
+    assert result[1] == [message_lists[1][1]]  # Old thinking is dropped
+    # The last two calls and results are untouched
+    assert result[5:] == message_lists[5:]
+    assert all(a is b for a, b in zip(result[5:], message_lists[5:]))
+    assert MessageHistory._ensure_tool_call_integrity(result) == result
+
+
+def test_masks_images_and_keeps_short_outputs():
+    context_manager = make_manager(keep_last_observations=0)
+    image = {
+        "type": "image",
+        "source": {"type": "base64", "media_type": "image/png", "data": ""},
+    }
+    message_lists = [
+        [
+            TextPrompt(text="Look at this"),
+            ImageBlock(type="image", source=image["source"]),
+        ],
+        [AnthropicThinkingBlock(type="thinking", signature="sig", thinking="Hmm")],
+        [ToolCall(tool_call_id="a", tool_name="browser_view", tool_input={})],
+        [
+            ToolFormattedResult(
+                tool_call_id="a",
+                tool_name="browser_view",
+                tool_output=[{"type": "text", "text": "page"}, image],
+            )
+        ],
+        [ToolCall(tool_call_id="b", tool_name="bash", tool_input={})],
+        [ToolFormattedResult(tool_call_id="b", tool_name="bash", tool_output="ok")],
+    ]
+
+    result = context_manager.mask_observations(message_lists)
+
+    assert result[0] == [
+        TextPrompt(text="Look at this"),
+        TextPrompt(text="[image elided]"),
+    ]
+    assert result[1] == [TextResult(text="[thinking elided]")]
+    assert (
+        result[3][0].tool_output == "[output of browser_view elided, 4 chars, 1 image]"
+    )
+    assert result[5] is message_lists[5]
+
+
+def test_nothing_to_mask_returns_the_same_list():
+    context_manager = make_manager(keep_last_observations=5)
+    message_lists = make_tool_turns(3)
+
+    assert context_manager.mask_observations(message_lists) is message_lists
+
+
+def test_fallback_only_runs_when_masking_is_not_enough():
+    client = Mock(spec=LLMClient)
+    client.generate.return_value = ([TextResult(text="Summary.")], None)
+    summarizer = LLMSummarizingContextManager(
+        client=client,
+        token_counter=TokenCounter(),
+        logger=Mock(spec=logging.Logger),
+        token_budget=10_000,
+    )
+    context_manager = make_manager(
+        token_budget=10_000, keep_last_observations=1, fallback=summarizer
+    )
+
+    masked = context_manager.apply_truncation_if_needed(
+        make_tool_turns(6, output_chars=3_000, thinking=False)
+    )
+    client.generate.assert_not_called()
+    assert context_manager.count_tokens(masked) < 10_000
+
+    summarized = context_manager.apply_truncation_if_needed(
+        make_tool_turns(6, output_chars=45_000, thinking=False)
+    )
+    client.generate.assert_called_once()
+    assert summarized[1][0].text == "Conversation Summary: Summary."
+
+
+@pytest.mark.asyncio
+async def test_async_truncation_masks_history():
+    context_manager = make_manager(token_budget=10_000, keep_last_observations=1)
+    history = MessageHistory(context_manager)
+    history.add_user_prompt("Explore the repository")
+    for i in range(6):
+        call = ToolCallParameters(
+            tool_call_id=f"call_{i}", tool_name="bash", tool_input={}
+        )
+        history.add_assistant_turn(
+            [ToolCall(call.tool_call_id, call.tool_name, call.tool_input)]
+        )
+        history.add_tool_call_result(call, "x" * 12_000)
+
+    await history.truncate_async()
+
+    assert history.count_tokens() < 10_000
+    assert len(history.get_messages_for_llm()) == 13
+
+
+@pytest.mark.parametrize(
+    "strategy, expected_type, fallback_type",
+    [
+        ("summarize", LLMSummarizingContextManager, None),
+        ("mask", ObservationMaskingContextManager, type(None)),
+        (
+            "mask-then-summarize",
+            ObservationMaskingContextManager,
+            LLMSummarizingContextManager,
+        ),
+    ],
+)
+def test_agent_factory_selects_context_strategy(
+    tmp_path, strategy, expected_type, fallback_type
+):
+    factory = AgentFactory(
+        AgentConfig(logs_path=str(tmp_path / "logs.txt"), context_strategy=strategy)
+    )
+    client = Mock(spec=LLMClient)
+    client.model_name = "claude-sonnet-4@20250514"
+
+    context_manager = factory._create_context_manager(client, Mock(spec=logging.Logger))
+
+    assert type(context_manager) is expected_type
+    if fallback_type is not None:
+        assert type(context_manager.fallback) is fallback_type
+
+
+def test_unknown_context_strategy_is_rejected(tmp_path):
+    factory = AgentFactory(
+        AgentConfig(logs_path=str(tmp_path / "logs.txt"), context_strategy="forget")
+    )
+    client = Mock(spec=LLMClient)
+    client.model_name = "claude-sonnet-4@20250514"
+
+    with pytest.raises(ValueError, match="Unknown context strategy: forget"):
+        factory._create_context_manager(client, Mock(spec=logging.Logger))
@@ -0,0 +1,160 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import anthropic
+import httpx
+import pytest
+
+from ii_agent.llm.base import LLMClient, TextResult
+from ii_agent.llm.openai import OpenAIDirectClient
+from ii_agent.llm.rate_limiter import RateLimiter
+
+from test_streaming import (
+    MESSAGES,
+    TOOLS,
+    anthropic_message,
+    anthropic_stream_events,
+    make_anthropic_client,
+)
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+class FakeAsyncStream:
+    def __init__(self, **kwargs):
+        self.events = anthropic_stream_events()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def __aiter__(self):
+        for event in self.events:
+            yield event
+
+    async def get_final_message(self):
+        return anthropic_message()
+
+
+def make_async_anthropic_client():
+    client = make_anthropic_client()
+    client.async_client = Mock()
+    client.async_client.messages.create = AsyncMock(
+        side_effect=lambda **kwargs: anthropic_message()
+    )
+    client.async_client.messages.stream.side_effect = FakeAsyncStream
+    return client
+
+
+@pytest.mark.asyncio
+async def test_anthropic_agenerate_matches_generate():
+    client = make_async_anthropic_client()
+
+    response, metadata = client.generate(MESSAGES, max_tokens=100, tools=TOOLS)
+    async_response, async_metadata = await client.agenerate(
+        MESSAGES, max_tokens=100, tools=TOOLS
+    )
+
+    assert async_response == response
+    assert async_metadata["input_tokens"] == metadata["input_tokens"]
+    client.client.messages.create.assert_called_once()
+    assert (
+        client.async_client.messages.create.call_args.kwargs
+        == client.client.messages.create.call_args.kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_anthropic_agenerate_backs_off_without_blocking():
+    client = make_async_anthropic_client()
+    error = anthropic.APIConnectionError(
+        request=httpx.Request("POST", "https://api.anthropic.com")
+    )
+    client.async_client.messages.create = AsyncMock(
+        side_effect=[error, anthropic_message()]
+    )
+
+    client.rate_limiter = RateLimiter(base_backoff=0.01)
+
+    with patch("ii_agent.llm.rate_limiter.time.sleep") as blocking_sleep:
+        response, _ = await client.agenerate(MESSAGES, max_tokens=100, tools=TOOLS)
+
+    assert isinstance(response[0], TextResult)
+    assert client.async_client.messages.create.await_count == 2
+    blocking_sleep.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_anthropic_agenerate_stream_matches_generate_stream():
+    client = make_async_anthropic_client()
+
+    events = list(client.generate_stream(MESSAGES, max_tokens=100, tools=TOOLS))
+    async_events = [
+        event
+        async for event in client.agenerate_stream(
+            MESSAGES, max_tokens=100, tools=TOOLS
+        )
+    ]
+
+    assert [(e.type, e.delta, e.tool_call_id) for e in async_events] == [
+        (e.type, e.delta, e.tool_call_id) for e in events
+    ]
+    assert async_events[-1].response == events[-1].response
+
+
+@pytest.mark.asyncio
+async def test_openai_agenerate_stream_matches_agenerate():
+    client = OpenAIDirectClient(model_name="local-model", cot_model=False)
+    usage = SimpleNamespace(prompt_tokens=20, completion_tokens=4)
+
+    def chunk(content=None, usage=None):
+        return SimpleNamespace(
+            usage=usage,
+            choices=[
+                SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=None))
+            ]
+            if content
+            else [],
+        )
+
+    async def chunks():
+        for item in [chunk("Hello "), chunk("world"), chunk(usage=usage)]:
+            yield item
+
+    completion = SimpleNamespace(
+        usage=usage,
+        choices=[
+            SimpleNamespace(
+                message=SimpleNamespace(content="Hello world", tool_calls=None)
+            )
+        ],
+    )
+
+    async def create(**kwargs):
+        return chunks() if kwargs.get("stream") else completion
+
+    client.async_client = Mock()
+    client.async_client.chat.completions.create = AsyncMock(side_effect=create)
+
+    response, metadata = await client.agenerate(MESSAGES, max_tokens=100)
+    events = [
+        event async for event in client.agenerate_stream(MESSAGES, max_tokens=100)
+    ]
+
+    assert response == [TextResult(text="Hello world")]
+    assert [e.delta for e in events if e.type == "text"] == ["Hello ", "world"]
+    assert events[-1].response == response
+    assert events[-1].metadata["input_tokens"] == metadata["input_tokens"] == 20
+
+
+@pytest.mark.asyncio
+async def test_default_agenerate_runs_generate_in_a_thread():
+    client = Mock(spec=LLMClient)
+    client.generate.return_value = ([TextResult(text="done")], {"input_tokens": 1})
+
+    response, metadata = await LLMClient.agenerate(client, MESSAGES, max_tokens=10)
+
+    assert response == [TextResult(text="done")]
+    assert client.generate.call_args.kwargs["max_tokens"] == 10
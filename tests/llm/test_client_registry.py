@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+
+from ii_agent.llm.client_registry import ClientRegistry
+from ii_agent.server.app import lifespan
+from ii_agent.server.factories.client_factory import ClientFactory
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+def test_same_configuration_returns_the_same_client():
+    registry = ClientRegistry()
+
+    first = registry.get_client("openai-direct", model_name="model-a", cot_model=False)
+    second = registry.get_client("openai-direct", model_name="model-a", cot_model=False)
+    other = registry.get_client("openai-direct", model_name="model-b", cot_model=False)
+
+    assert first is second
+    assert other is not first
+    assert registry.stats()["clients"] == 2
+    assert registry.stats()["hits"] == 1
+    assert registry.stats()["misses"] == 2
+
+
+def test_clients_of_one_sdk_share_a_transport():
+    registry = ClientRegistry(max_connections=10)
+
+    first = registry.get_client("openai-direct", model_name="model-a")
+    second = registry.get_client("openai-direct", model_name="model-b")
+
+    assert first.client._client is second.client._client
+    assert first.async_client._client is second.async_client._client
+    assert first.client._client._transport._pool._max_connections == 10
+    assert registry.stats()["pools"]["openai-direct"]["sync"] == {"open": 0, "idle": 0}
+
+
+def test_client_factory_reuses_clients_per_configuration():
+    factory = ClientFactory(registry=ClientRegistry())
+
+    client = factory.create_client("claude-sonnet-4@20250514", thinking_tokens=0)
+
+    assert (
+        factory.create_client("claude-sonnet-4@20250514", thinking_tokens=0) is client
+    )
+    assert (
+        factory.create_client("claude-sonnet-4@20250514", thinking_tokens=2048)
+        is not client
+    )
+    assert factory.pool_stats()["clients"] == 2
+
+
+@pytest.mark.asyncio
+async def test_aclose_forgets_clients():
+    registry = ClientRegistry()
+    client = registry.get_client("openai-direct", model_name="model-a")
+
+    await registry.aclose()
+
+    assert registry.get_client("openai-direct", model_name="model-a") is not client
+
+
+@pytest.mark.asyncio
+async def test_app_shutdown_closes_the_shared_clients():
+    registry = ClientRegistry()
+    client = registry.get_client("openai-direct", model_name="model-a")
+
+    with patch("ii_agent.server.app.get_client_registry", return_value=registry):
+        async with lifespan(FastAPI()):
+            assert registry.stats()["clients"] == 1
+
+    assert registry.stats()["clients"] == 0
+    assert client.async_client._client.is_closed
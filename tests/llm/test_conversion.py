@@ -0,0 +1,188 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from anthropic.types import ThinkingBlock
+
+from ii_agent.llm import anthropic as anthropic_module
+from ii_agent.llm.anthropic import AnthropicDirectClient
+from ii_agent.llm.base import (
+    ImageBlock,
+    TextPrompt,
+    TextResult,
+    ToolCall,
+    ToolFormattedResult,
+)
+from ii_agent.llm.conversion import BlockConverters, TurnConversionCache
+from ii_agent.llm.openai import OpenAIDirectClient
+
+
+def make_history(turns: int):
+    messages = [[TextPrompt(text="Fix the failing test")]]
+    for i in range(turns):
+        messages.append(
+            [
+                ToolCall(
+                    tool_call_id=f"call_{i}",
+                    tool_name="bash",
+                    tool_input={"command": f"ls {i}"},
+                )
+            ]
+        )
+        messages.append(
+            [
+                ToolFormattedResult(
+                    tool_call_id=f"call_{i}", tool_name="bash", tool_output=f"file_{i}"
+                )
+            ]
+        )
+    return messages
+
+
+def serialize(params):
+    return json.dumps(params["messages"], default=lambda v: v.to_dict())
+
+
+def test_only_new_turns_are_converted():
+    client = AnthropicDirectClient(
+        model_name="claude-sonnet-4@20250514", use_caching=False
+    )
+    messages = make_history(10)
+    client._build_request_params(messages, max_tokens=100)
+
+    with patch.object(
+        anthropic_module, "_convert_turn", wraps=anthropic_module._convert_turn
+    ) as convert_turn:
+        messages = messages + [[TextResult(text="Done")], [TextPrompt(text="Thanks")]]
+        params = client._build_request_params(messages, max_tokens=100)
+
+    assert [call.args[0] for call in convert_turn.call_args_list] == messages[-2:]
+    assert params["messages"][-1] == {
+        "role": "user",
+        "content": [anthropic_module.AnthropicTextBlock(type="text", text="Thanks")],
+    }
+
+
+def test_cached_turns_match_a_fresh_conversion():
+    messages = make_history(5)
+    messages[1].insert(
+        0, ThinkingBlock(type="thinking", thinking="Look around", signature="sig")
+    )
+    warm = AnthropicDirectClient(
+        model_name="claude-sonnet-4@20250514", use_caching=True
+    )
+    for length in range(1, len(messages) + 1):
+        warm._build_request_params(messages[:length], max_tokens=100)
+
+    fresh = AnthropicDirectClient(
+        model_name="claude-sonnet-4@20250514", use_caching=True
+    )
+
+    assert serialize(warm._build_request_params(messages, max_tokens=100)) == serialize(
+        fresh._build_request_params(messages, max_tokens=100)
+    )
+    assert warm.conversion_cache.hits > 0
+
+
+def test_modified_turns_are_converted_again():
+    cache = TurnConversionCache()
+    turn = [TextPrompt(text="a")]
+
+    assert cache.convert(turn, lambda t: [b.text for b in t]) == ["a"]
+    turn.append(TextPrompt(text="b"))
+    assert cache.convert(turn, lambda t: [b.text for b in t]) == ["a", "b"]
+    assert cache.convert(turn, lambda t: [b.text for b in t], variant="model") == [
+        "a",
+        "b",
+    ]
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_cache_is_bounded():
+    cache = TurnConversionCache(max_turns=2)
+    turns = [[TextPrompt(text=str(i))] for i in range(3)]
+    for turn in turns:
+        cache.convert(turn, lambda t: t[0].text)
+
+    cache.convert(turns[0], lambda t: t[0].text)
+
+    assert (cache.hits, cache.misses) == (0, 4)
+
+
+def test_cache_is_bounded_in_bytes():
+    cache = TurnConversionCache(max_bytes=10_000)
+    screenshots = [
+        [
+            ImageBlock(
+                type="image",
+                source={
+                    "type": "base64",
+                    "media_type": "image/png",
+                    "data": "x" * 3000,
+                },
+            )
+        ]
+        for _ in range(3)
+    ]
+    for turn in screenshots:
+        cache.convert(turn, lambda t: {"image": t[0].source["data"]})
+
+    # Each turn holds about 6000 bytes with its conversion, so only the last is kept
+    assert cache.size < 10_000
+    cache.convert(screenshots[2], lambda t: {"image": t[0].source["data"]})
+    cache.convert(screenshots[0], lambda t: {"image": t[0].source["data"]})
+    assert (cache.hits, cache.misses) == (1, 4)
+
+    # A turn larger than the bound is converted but not kept
+    huge = [TextPrompt(text="y" * 20_000)]
+    cache.convert(huge, lambda t: t[0].text)
+    assert cache.size < 10_000
+
+
+def test_dispatch_handles_subclasses_and_reloaded_classes():
+    converters = BlockConverters({TextPrompt: lambda block: block.text})
+
+    class Subclass(TextPrompt):
+        pass
+
+    # A class defined again, as after a module reload
+    Reloaded = type(
+        "TextPrompt", (), {"__module__": TextPrompt.__module__, "text": "reloaded"}
+    )
+    Reloaded.__qualname__ = TextPrompt.__qualname__
+
+    assert converters.convert(Subclass(text="sub")) == "sub"
+    assert converters.convert(Reloaded()) == "reloaded"
+    with pytest.raises(ValueError, match="Unknown message type"):
+        converters.convert(TextResult(text="x"))
+
+
+def test_openai_cot_prompt_does_not_leak_into_cached_turns():
+    client = OpenAIDirectClient(model_name="local-model", cot_model=True)
+    messages = make_history(2)
+    messages[4].append(
+        ToolFormattedResult(tool_call_id="call_x", tool_name="bash", tool_output="more")
+    )
+
+    first = client._build_request_params(
+        messages, max_tokens=100, system_prompt="Be brief"
+    )
+    second = client._build_request_params(
+        messages, max_tokens=100, system_prompt="Be terse"
+    )
+
+    assert (
+        first["messages"][0]["content"][0]["text"] == "Be brief\n\nFix the failing test"
+    )
+    assert (
+        second["messages"][0]["content"][0]["text"]
+        == "Be terse\n\nFix the failing test"
+    )
+    assert [m["role"] for m in second["messages"]] == [
+        "user",
+        "assistant",
+        "tool",
+        "assistant",
+        "tool",
+        "tool",
+    ]
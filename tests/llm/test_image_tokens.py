@@ -0,0 +1,101 @@
+import base64
+import io
+import logging
+from unittest.mock import Mock, patch
+
+import pytest
+from PIL import Image
+
+from ii_agent.llm.base import ImageBlock
+from ii_agent.llm.context_manager.llm_summarizing import LLMSummarizingContextManager
+from ii_agent.llm.image_tokens import (
+    DEFAULT_IMAGE_TOKENS,
+    ImageTokenEstimator,
+    image_size_from_base64,
+)
+from ii_agent.llm.token_counter import TokenCounter
+
+
+def encode_image(fmt: str, size=(640, 480), **save_kwargs) -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color=(200, 30, 30)).save(buffer, format=fmt, **save_kwargs)
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+@pytest.mark.parametrize(
+    "fmt, save_kwargs",
+    [
+        ("PNG", {}),
+        ("JPEG", {}),
+        ("JPEG", {"progressive": True}),
+        ("JPEG", {"exif": b"Exif\x00\x00" + b"\x00" * 8000}),
+        ("WEBP", {}),
+        ("WEBP", {"lossless": True}),
+    ],
+)
+def test_reads_dimensions_from_header(fmt, save_kwargs):
+    data = encode_image(fmt, size=(1279, 721), **save_kwargs)
+
+    assert image_size_from_base64(data) == (1279, 721)
+
+
+def test_decodes_only_a_prefix_of_the_data():
+    data = encode_image("PNG", size=(300, 200))
+
+    with patch(
+        "ii_agent.llm.image_tokens.base64.b64decode", wraps=base64.b64decode
+    ) as decode:
+        assert image_size_from_base64(data) == (300, 200)
+
+    assert all(len(call.args[0]) <= 64 for call in decode.call_args_list)
+
+
+def test_unknown_or_invalid_data_uses_fallback():
+    estimator = ImageTokenEstimator()
+
+    assert (
+        estimator.estimate({"type": "base64", "data": "not an image!"})
+        == DEFAULT_IMAGE_TOKENS
+    )
+    assert (
+        estimator.estimate({"type": "url", "url": "https://example.com/a.png"})
+        == DEFAULT_IMAGE_TOKENS
+    )
+    assert (
+        image_size_from_base64(base64.b64encode(b"GIF89a" + b"\x00" * 64).decode())
+        is None
+    )
+
+
+def test_estimates_are_cached_per_image():
+    estimator = ImageTokenEstimator(cache_size=1)
+    first = encode_image("PNG", size=(750, 100))
+    second = encode_image("PNG", size=(1500, 100))
+
+    with patch(
+        "ii_agent.llm.image_tokens.image_size_from_base64", wraps=image_size_from_base64
+    ) as read:
+        assert estimator.estimate({"data": first}) == 100
+        assert estimator.estimate({"data": first}) == 100
+        assert read.call_count == 1
+        assert estimator.estimate({"data": second}) == 200
+        assert estimator.estimate({"data": first}) == 100
+        assert read.call_count == 3
+
+
+def test_counting_paths_agree():
+    source = {"type": "base64", "media_type": "image/png", "data": encode_image("PNG")}
+    token_counter = TokenCounter()
+    context_manager = LLMSummarizingContextManager(
+        client=Mock(),
+        token_counter=token_counter,
+        logger=Mock(spec=logging.Logger),
+        token_budget=10**6,
+    )
+
+    expected = int(640 * 480 / 750)
+    assert token_counter.count_tokens([{"type": "image", "source": source}]) == expected
+    assert (
+        context_manager.count_block_tokens(ImageBlock(type="image", source=source))
+        == expected
+    )
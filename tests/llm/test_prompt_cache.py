@@ -0,0 +1,180 @@
+import json
+
+from anthropic.types import ThinkingBlock
+
+from ii_agent.llm.anthropic import AnthropicDirectClient
+from ii_agent.llm.base import (
+    TextPrompt,
+    TextResult,
+    ToolCall,
+    ToolFormattedResult,
+    ToolParam,
+)
+from ii_agent.llm.client_registry import ClientRegistry
+from ii_agent.llm.prompt_cache import CachePlan, PromptCachePlanner, PromptCacheUsage
+from ii_agent.server.factories.client_factory import ClientFactory
+
+SYSTEM_PROMPT = "You are a helpful agent."
+TOOLS = [
+    ToolParam(
+        name="bash",
+        description="Run a command",
+        input_schema={"type": "object", "properties": {"command": {"type": "string"}}},
+    )
+]
+
+
+def make_history(turns: int, summary: bool = False):
+    messages = [[TextPrompt(text="Fix the failing test")]]
+    if summary:
+        messages.append([TextResult(text="Conversation Summary: explored the repo")])
+        messages.append([TextPrompt(text="Continue")])
+    for i in range(turns):
+        messages.append(
+            [
+                ThinkingBlock(type="thinking", thinking=f"Step {i}", signature="sig"),
+                ToolCall(
+                    tool_call_id=f"call_{i}",
+                    tool_name="bash",
+                    tool_input={"command": f"ls {i}"},
+                ),
+            ]
+        )
+        messages.append(
+            [
+                ToolFormattedResult(
+                    tool_call_id=f"call_{i}", tool_name="bash", tool_output=f"file_{i}"
+                )
+            ]
+        )
+    return messages
+
+
+def without_cache_control(value):
+    if isinstance(value, dict):
+        return {
+            k: without_cache_control(v)
+            for k, v in value.items()
+            if k != "cache_control"
+        }
+    if isinstance(value, list):
+        return [without_cache_control(v) for v in value]
+    if hasattr(value, "to_dict"):
+        return without_cache_control(value.to_dict())
+    return value
+
+
+def cache_breakpoints(params) -> int:
+    serialized = json.dumps(
+        [params["system"], params["tools"], params["messages"]],
+        default=lambda v: v.to_dict(),
+    )
+    return serialized.count('"cache_control"')
+
+
+def test_planner_uses_system_tail_summary_and_previous_tail():
+    planner = PromptCachePlanner()
+
+    plan = planner.plan(
+        make_history(3, summary=True), has_system_prompt=True, has_tools=True
+    )
+
+    assert plan == CachePlan(cache_system=True, message_indices=[1, 6, 8])
+
+
+def test_planner_without_system_prompt_caches_tools():
+    planner = PromptCachePlanner()
+
+    plan = planner.plan(
+        [[TextPrompt(text="hi")]], has_system_prompt=False, has_tools=True
+    )
+
+    assert plan == CachePlan(cache_tools=True, message_indices=[0])
+
+
+def test_requests_have_at_most_four_breakpoints_and_leave_history_untouched():
+    client = AnthropicDirectClient(
+        model_name="claude-sonnet-4@20250514", use_caching=True
+    )
+    messages = make_history(6, summary=True)
+
+    params = client._build_request_params(
+        messages, max_tokens=100, system_prompt=SYSTEM_PROMPT, tools=TOOLS
+    )
+
+    assert cache_breakpoints(params) == 4
+    assert params["system"] == [
+        {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+    ]
+    summary_block = params["messages"][1]["content"][-1].to_dict()
+    assert summary_block["text"].startswith("Conversation Summary:")
+    assert summary_block["cache_control"] == {"type": "ephemeral"}
+    # The thinking blocks of the history never carry a breakpoint themselves
+    assert all(
+        "cache_control" not in block.to_dict()
+        for message_list in messages
+        for block in message_list
+        if isinstance(block, ThinkingBlock)
+    )
+
+
+def test_serialized_prefix_is_identical_across_turns():
+    client = AnthropicDirectClient(
+        model_name="claude-sonnet-4@20250514", use_caching=True
+    )
+    messages = make_history(4)
+
+    first = client._build_request_params(
+        messages, max_tokens=100, system_prompt=SYSTEM_PROMPT, tools=TOOLS
+    )
+    second = client._build_request_params(
+        make_history(5), max_tokens=100, system_prompt=SYSTEM_PROMPT, tools=TOOLS
+    )
+
+    def serialize(value):
+        return json.dumps(without_cache_control(value), sort_keys=False)
+
+    assert serialize(second["system"]) == serialize(first["system"])
+    assert serialize(second["tools"]) == serialize(first["tools"])
+    assert serialize(second["messages"][: len(messages)]) == serialize(
+        first["messages"]
+    )
+
+
+def test_cache_usage_is_recorded_per_turn():
+    usage = PromptCacheUsage()
+
+    usage.record(
+        {
+            "input_tokens": 100,
+            "cache_creation_input_tokens": 900,
+            "cache_read_input_tokens": 0,
+        }
+    )
+    turn = usage.record(
+        {
+            "input_tokens": 50,
+            "cache_creation_input_tokens": 150,
+            "cache_read_input_tokens": 800,
+        }
+    )
+    assert usage.record(None) is None
+
+    assert PromptCacheUsage.hit_rate_of(turn) == 0.8
+    assert usage.totals() == {
+        "input_tokens": 150,
+        "cache_creation_input_tokens": 1050,
+        "cache_read_input_tokens": 800,
+    }
+    assert usage.hit_rate == 0.4
+
+
+def test_client_factory_enables_caching():
+    factory = ClientFactory(registry=ClientRegistry())
+
+    assert factory.create_client("claude-sonnet-4@20250514").use_caching
+    assert (
+        not ClientFactory(registry=ClientRegistry(), use_caching=False)
+        .create_client("claude-sonnet-4@20250514")
+        .use_caching
+    )
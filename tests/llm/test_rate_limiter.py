@@ -0,0 +1,145 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from ii_agent.llm.rate_limiter import RateLimiter, RateLimiterRegistry, RateLimits
+
+pytest_plugins = ("pytest_asyncio",)
+
+real_sleep = asyncio.sleep
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await real_sleep(0)
+
+
+def rate_limit_error(retry_after=None):
+    headers = {"retry-after": retry_after} if retry_after is not None else {}
+    return SimpleNamespace(status_code=429, response=SimpleNamespace(headers=headers))
+
+
+@pytest.fixture
+def clock():
+    clock = FakeClock()
+    with patch("ii_agent.llm.rate_limiter.asyncio.sleep", new=clock.sleep):
+        yield clock
+
+
+@pytest.mark.asyncio
+async def test_callers_are_admitted_in_order_at_the_quota(clock):
+    limiter = RateLimiter(RateLimits(requests_per_minute=60), clock=clock)
+    for _ in range(60):
+        await limiter.acquire()
+    admitted = []
+
+    async def call(i):
+        await limiter.acquire()
+        admitted.append((i, clock.now))
+
+    await asyncio.gather(*(call(i) for i in range(5)))
+
+    assert [i for i, _ in admitted] == [0, 1, 2, 3, 4]
+    # One request a second once the burst of the first minute is used up
+    times = [t for _, t in admitted]
+    assert all(t >= k + 1 - 1e-6 for k, t in enumerate(times))
+
+
+@pytest.mark.asyncio
+async def test_reported_usage_frees_reserved_output_tokens(clock):
+    limiter = RateLimiter(RateLimits(output_tokens_per_minute=1000), clock=clock)
+
+    first = await limiter.acquire(output_tokens=800)
+    limiter.settle(first, {"input_tokens": 50, "output_tokens": 100})
+    await limiter.acquire(output_tokens=800)
+
+    assert clock.now == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_pauses_every_caller_for_retry_after(clock):
+    limiter = RateLimiter(clock=clock)
+    for _ in range(40):
+        reservation = await limiter.acquire()
+
+    assert limiter.throttle(reservation, rate_limit_error("7")) == 7
+    await limiter.acquire()
+
+    assert clock.now >= 7
+    stats = limiter.stats()
+    assert stats["throttled"] == 1
+    # Unlimited requests are now paced at half the highest rate seen
+    assert stats["requests_per_minute"] == pytest.approx(20 * 2 ** (7 / 30))
+
+
+@pytest.mark.asyncio
+async def test_one_rate_limit_under_low_traffic_costs_only_the_pause(clock):
+    limiter = RateLimiter(clock=clock)
+    await limiter.acquire()
+    reservation = await limiter.acquire()
+
+    limiter.throttle(reservation, rate_limit_error("3"))
+    await limiter.acquire()
+
+    # The retry goes out when the pause ends, not once a new bucket fills up
+    assert clock.now == pytest.approx(3)
+    clock.now += 10
+    await limiter.acquire()
+    assert clock.now == pytest.approx(13)
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_halves_the_quota_and_recovers_over_time(clock):
+    limiter = RateLimiter(RateLimits(requests_per_minute=500), clock=clock)
+    reservation = await limiter.acquire()
+
+    limiter.throttle(reservation, rate_limit_error("1"))
+    assert limiter.stats()["requests_per_minute"] == 250
+    limiter.throttle(reservation, rate_limit_error("1"))
+    assert limiter.stats()["requests_per_minute"] == 125
+
+    clock.now += 30
+    assert limiter.stats()["requests_per_minute"] == pytest.approx(250)
+    clock.now += 30
+    assert limiter.stats()["requests_per_minute"] == 500
+
+    # Without a quota, the rate recovers to unlimited
+    unlimited = RateLimiter(clock=clock)
+    unlimited.throttle(await unlimited.acquire(), rate_limit_error("1"))
+    clock.now += 60
+    assert unlimited.stats()["requests_per_minute"] is None
+
+
+def test_backoff_uses_decorrelated_jitter():
+    limiter = RateLimiter(base_backoff=1, max_backoff=20)
+    reservation = limiter.acquire_sync()
+    delays = [limiter.throttle(reservation, ConnectionError()) for _ in range(20)]
+
+    assert all(1 <= delay <= 20 for delay in delays)
+    assert all(
+        delay <= max(previous, 1) * 3 for previous, delay in zip(delays, delays[1:])
+    )
+    assert max(delays) > 3
+
+    limiter.settle(reservation)
+    assert limiter.throttle(reservation, ConnectionError()) <= 3
+
+
+def test_registry_shares_limiters_per_provider_and_model():
+    registry = RateLimiterRegistry()
+    registry.configure(RateLimits(requests_per_minute=10), provider="anthropic")
+
+    limiter = registry.get("anthropic", "claude")
+
+    assert registry.get("anthropic", "claude") is limiter
+    assert limiter.limits.requests_per_minute == 10
+    assert registry.get("openai", "gpt").limits == RateLimits()
@@ -0,0 +1,140 @@
+import json
+import time
+
+import pytest
+from anthropic.types import ThinkingBlock
+
+from ii_agent.llm import get_client
+from ii_agent.llm.base import LLMClient, TextPrompt, TextResult, ToolCall
+from ii_agent.llm.replay import ReplayLLMClient
+
+pytest_plugins = ("pytest_asyncio",)
+
+USAGE = {"input_tokens": 12, "output_tokens": 7, "cache_read_input_tokens": 0}
+
+
+class ScriptedClient(LLMClient):
+    def __init__(self):
+        self.calls = 0
+
+    def generate(
+        self,
+        messages,
+        max_tokens,
+        system_prompt=None,
+        temperature=0.0,
+        tools=[],
+        tool_choice=None,
+        thinking_tokens=None,
+    ):
+        self.calls += 1
+        prompt = messages[-1][0].text
+        response = [
+            ThinkingBlock(type="thinking", thinking="Plan", signature="sig"),
+            TextResult(text=f"Answer to {prompt}"),
+            ToolCall(
+                tool_call_id=f"call_{self.calls}",
+                tool_name="bash",
+                tool_input={"command": "ls"},
+            ),
+        ]
+        return response, {"raw_response": object(), **USAGE}
+
+
+def ask(client, prompt):
+    return client.generate(
+        [[TextPrompt(text=prompt)]], max_tokens=100, system_prompt="Be brief"
+    )
+
+
+def test_record_then_replay_offline(tmp_path):
+    cassette = str(tmp_path / "cassettes" / "run.jsonl")
+    recorder = get_client(
+        "replay", cassette_path=cassette, mode="record", client=ScriptedClient()
+    )
+    recorded = [ask(recorder, "first"), ask(recorder, "second")]
+
+    lines = [json.loads(line) for line in open(cassette)]
+    assert [line["metadata"] for line in lines] == [USAGE, USAGE]
+
+    player = get_client("replay", cassette_path=cassette)
+    # Requests are matched by hash, not by order
+    assert ask(player, "second") == (recorded[1][0], USAGE)
+    assert ask(player, "first") == (recorded[0][0], USAGE)
+    assert isinstance(recorded[0][0][0], ThinkingBlock)
+
+
+def follow_up(client, task, prompt):
+    messages = [
+        [TextPrompt(text=task)],
+        [TextResult(text="Working on it")],
+        [TextPrompt(text=prompt)],
+    ]
+    return client.generate(messages, max_tokens=100, system_prompt="Be brief")
+
+
+def test_unmatched_requests_get_the_next_unserved_recording_of_their_conversation(
+    tmp_path,
+):
+    cassette = str(tmp_path / "run.jsonl")
+    recorder = ReplayLLMClient(cassette, mode="record", client=ScriptedClient())
+    follow_up(recorder, "Task A", "first")
+    follow_up(recorder, "Task B", "first of B")
+    follow_up(recorder, "Task A", "second")
+
+    player = ReplayLLMClient(cassette)
+    assert follow_up(player, "Task A", "second")[0][1].text == "Answer to second"
+    # Task B's recording was made earlier, but belongs to another conversation
+    assert follow_up(player, "Task A", "changed")[0][1].text == "Answer to first"
+    with pytest.raises(KeyError, match="no responses left for conversation"):
+        follow_up(player, "Task A", "third")
+    assert follow_up(player, "Task B", "changed")[0][1].text == "Answer to first of B"
+
+    with pytest.raises(KeyError, match="No recorded response"):
+        follow_up(ReplayLLMClient(cassette, strict=True), "Task A", "changed")
+
+
+def test_dates_and_uuids_do_not_change_the_request(tmp_path):
+    cassette = str(tmp_path / "run.jsonl")
+    recorder = ReplayLLMClient(cassette, mode="record", client=ScriptedClient())
+    recorder.generate(
+        [
+            [
+                TextPrompt(
+                    text="Read /workspace/0b6f1c2e-8d4a-4c1e-9a57-3f1d2c4b5a69/notes.md"
+                )
+            ]
+        ],
+        max_tokens=100,
+        system_prompt="Today is 2026-10-16.",
+    )
+
+    player = ReplayLLMClient(cassette, strict=True)
+    response, _ = player.generate(
+        [
+            [
+                TextPrompt(
+                    text="Read /workspace/7e2d9a41-5c3b-4f60-8e1a-b2c4d6e8f0a1/notes.md"
+                )
+            ]
+        ],
+        max_tokens=100,
+        system_prompt="Today is 2026-10-17.",
+    )
+    assert response[1].text.startswith("Answer to Read")
+
+
+@pytest.mark.asyncio
+async def test_replay_injects_latency(tmp_path):
+    cassette = str(tmp_path / "run.jsonl")
+    ask(ReplayLLMClient(cassette, mode="record", client=ScriptedClient()), "first")
+    player = ReplayLLMClient(cassette, latency=0.2)
+
+    start = time.perf_counter()
+    response, metadata = await player.agenerate(
+        [[TextPrompt(text="first")]], max_tokens=100, system_prompt="Be brief"
+    )
+
+    assert time.perf_counter() - start >= 0.2
+    assert response[1].text == "Answer to first"
+    assert metadata == USAGE
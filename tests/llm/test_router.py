@@ -0,0 +1,185 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import anthropic
+import httpx
+import pytest
+
+from ii_agent.llm.base import LLMClient, TextPrompt, TextResult
+from ii_agent.llm.client_registry import ClientRegistry
+from ii_agent.llm.rate_limiter import RateLimiterRegistry
+from ii_agent.llm.router import RouterLLMClient
+from ii_agent.server.factories.client_factory import ClientFactory
+
+from test_streaming import anthropic_message
+
+pytest_plugins = ("pytest_asyncio",)
+
+MESSAGES = [[TextPrompt(text="hi")]]
+
+
+class OverloadedError(Exception):
+    status_code = 529
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+class StubEndpoint(LLMClient):
+    """A local endpoint with a fixed latency that can be made to fail."""
+
+    def __init__(self, name, latency=0.0, error=None):
+        self.name = name
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    def generate(self, messages, max_tokens, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.error:
+            raise self.error
+        return [TextResult(text=self.name)], {"input_tokens": 1, "output_tokens": 1}
+
+    async def agenerate(self, messages, max_tokens, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return [TextResult(text=self.name)], {"input_tokens": 1, "output_tokens": 1}
+
+
+def test_requests_go_to_the_fastest_healthy_endpoint():
+    slow = StubEndpoint("us-east5", latency=0.05)
+    fast = StubEndpoint("europe-west1", latency=0.0)
+    router = RouterLLMClient([("us-east5", slow), ("europe-west1", fast)])
+
+    # Unmeasured endpoints are tried first
+    router.generate(MESSAGES, max_tokens=10)
+    router.generate(MESSAGES, max_tokens=10)
+    responses = [router.generate(MESSAGES, max_tokens=10) for _ in range(5)]
+
+    assert router.ranked_endpoints() == ["europe-west1", "us-east5"]
+    assert all(response[0][0].text == "europe-west1" for response in responses)
+    assert responses[0][1]["endpoint"] == "europe-west1"
+    assert slow.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_overloaded_endpoints_fail_over_and_cool_down():
+    overloaded = StubEndpoint("direct", error=OverloadedError("overloaded"))
+    healthy = StubEndpoint("us-east5", latency=0.01)
+    router = RouterLLMClient(
+        [("direct", overloaded), ("us-east5", healthy)], cooldown=60
+    )
+
+    first, _ = await router.agenerate(MESSAGES, max_tokens=10)
+    second, _ = await router.agenerate(MESSAGES, max_tokens=10)
+
+    assert first[0].text == second[0].text == "us-east5"
+    # The failed endpoint is skipped while cooling down
+    assert overloaded.calls == 1
+    stats = router.stats()["endpoints"]["direct"]
+    assert stats["cooling_down"] and stats["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_requests_are_not_failed_over():
+    broken = StubEndpoint("direct", error=BadRequestError("bad request"))
+    other = StubEndpoint("us-east5")
+    router = RouterLLMClient([("direct", broken), ("us-east5", other)])
+
+    with pytest.raises(BadRequestError):
+        await router.agenerate(MESSAGES, max_tokens=10)
+    assert other.calls == 0
+    assert router.stats()["endpoints"]["direct"]["failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_requests_are_hedged_to_a_second_endpoint():
+    stalled = StubEndpoint("us-east5", latency=5)
+    backup = StubEndpoint("europe-west1", latency=0.01)
+    router = RouterLLMClient(
+        [("us-east5", stalled), ("europe-west1", backup)], hedge=True, hedge_after=0.05
+    )
+
+    start = time.perf_counter()
+    response, metadata = await router.agenerate(MESSAGES, max_tokens=10)
+
+    assert time.perf_counter() - start < 1
+    assert metadata["endpoint"] == "europe-west1"
+    assert router.stats()["hedged_requests"] == 1
+    await asyncio.sleep(0)
+    assert stalled.cancelled == 1
+
+
+def test_hedging_waits_for_the_p95_latency():
+    router = RouterLLMClient(
+        [("a", StubEndpoint("a")), ("b", StubEndpoint("b"))], hedge=True
+    )
+    for latency in [0.1] * 18 + [0.4, 0.9]:
+        router._record_success("a", latency)
+
+    assert router._hedge_delay("a") == 0.9
+    assert router._hedge_delay("b") is None
+
+
+def test_client_factory_routes_across_regions():
+    factory = ClientFactory(
+        project_id="project",
+        registry=ClientRegistry(),
+        router_endpoints=["us-east5", "direct"],
+    )
+
+    client = factory.create_client("claude-sonnet-4@20250514")
+
+    assert isinstance(client, RouterLLMClient)
+    assert factory.create_client("claude-sonnet-4@20250514") is client
+    assert list(client.endpoints) == ["us-east5", "direct"]
+    assert client.endpoints["direct"].model_name == "claude-sonnet-4-20250514"
+    assert client.endpoints["us-east5"].max_retries == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_in_one_region_fails_over_without_waiting():
+    factory = ClientFactory(
+        project_id="project",
+        registry=ClientRegistry(),
+        router_endpoints=["us-east5", "europe-west1"],
+    )
+    with patch(
+        "ii_agent.llm.anthropic.get_rate_limiter_registry",
+        return_value=RateLimiterRegistry(),
+    ):
+        router = factory.create_client("claude-sonnet-4@20250514")
+    rate_limited = anthropic.RateLimitError(
+        "rate limited",
+        response=httpx.Response(
+            429,
+            headers={"retry-after": "30"},
+            request=httpx.Request("POST", "https://us-east5-aiplatform.googleapis.com"),
+        ),
+        body=None,
+    )
+    router.endpoints["us-east5"].async_client.messages.create = AsyncMock(
+        side_effect=rate_limited
+    )
+    router.endpoints["europe-west1"].async_client.messages.create = AsyncMock(
+        side_effect=lambda **kwargs: anthropic_message()
+    )
+
+    start = time.monotonic()
+    _, metadata = await router.agenerate(MESSAGES, max_tokens=10)
+
+    assert time.monotonic() - start < 1
+    assert metadata["endpoint"] == "europe-west1"
+    # Only the region that returned the 429 is paused
+    assert router.endpoints["us-east5"].rate_limiter.stats()["paused_for"] > 20
+    assert router.endpoints["europe-west1"].rate_limiter.stats()["paused_for"] == 0
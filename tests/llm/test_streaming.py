@@ -0,0 +1,204 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from anthropic.types import Message
+
+from ii_agent.llm.anthropic import AnthropicDirectClient
+from ii_agent.llm.base import LLMClient, TextPrompt, TextResult, ToolCall, ToolParam
+from ii_agent.llm.openai import OpenAIDirectClient
+
+MESSAGES = [[TextPrompt(text="List the workspace")]]
+TOOLS = [
+    ToolParam(
+        name="bash",
+        description="Run a command",
+        input_schema={"type": "object", "properties": {"command": {"type": "string"}}},
+    )
+]
+
+
+def anthropic_message() -> Message:
+    return Message.model_validate(
+        {
+            "id": "msg_1",
+            "type": "message",
+            "role": "assistant",
+            "model": "claude",
+            "content": [
+                {"type": "text", "text": "Listing files"},
+                {
+                    "type": "tool_use",
+                    "id": "call_1",
+                    "name": "bash",
+                    "input": {"command": "ls"},
+                },
+            ],
+            "stop_reason": "tool_use",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 12, "output_tokens": 7},
+        }
+    )
+
+
+def anthropic_stream_events():
+    def delta(index, **kwargs):
+        return SimpleNamespace(
+            type="content_block_delta", index=index, delta=SimpleNamespace(**kwargs)
+        )
+
+    return [
+        SimpleNamespace(type="message_start"),
+        SimpleNamespace(
+            type="content_block_start",
+            index=0,
+            content_block=SimpleNamespace(type="text"),
+        ),
+        delta(0, type="text_delta", text="Listing "),
+        delta(0, type="text_delta", text="files"),
+        SimpleNamespace(
+            type="content_block_start",
+            index=1,
+            content_block=SimpleNamespace(type="tool_use", id="call_1", name="bash"),
+        ),
+        delta(1, type="input_json_delta", partial_json='{"command": '),
+        delta(1, type="input_json_delta", partial_json='"ls"}'),
+        SimpleNamespace(type="message_stop"),
+    ]
+
+
+def make_anthropic_client() -> AnthropicDirectClient:
+    client = AnthropicDirectClient(
+        model_name="claude-sonnet-4@20250514", use_caching=False
+    )
+
+    class FakeStream:
+        def __init__(self, **kwargs):
+            self.events = anthropic_stream_events()
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+        def __iter__(self):
+            return iter(self.events)
+
+        def get_final_message(self):
+            return anthropic_message()
+
+    client.client = Mock()
+    client.client.messages.create.side_effect = lambda **kwargs: anthropic_message()
+    client.client.messages.stream.side_effect = FakeStream
+    return client
+
+
+def test_anthropic_stream_yields_deltas_then_complete():
+    client = make_anthropic_client()
+
+    events = list(client.generate_stream(MESSAGES, max_tokens=100, tools=TOOLS))
+
+    assert [(e.type, e.delta) for e in events[:-1]] == [
+        ("text", "Listing "),
+        ("text", "files"),
+        ("tool_use", '{"command": '),
+        ("tool_use", '"ls"}'),
+    ]
+    assert events[2].tool_call_id == "call_1"
+    assert events[2].tool_name == "bash"
+    assert events[-1].type == "complete"
+
+
+def test_anthropic_stream_result_matches_generate():
+    client = make_anthropic_client()
+
+    response, metadata = client.generate(MESSAGES, max_tokens=100, tools=TOOLS)
+    complete = list(client.generate_stream(MESSAGES, max_tokens=100, tools=TOOLS))[-1]
+
+    assert complete.response == response
+    assert complete.response == [
+        TextResult(text="Listing files"),
+        ToolCall(tool_call_id="call_1", tool_name="bash", tool_input={"command": "ls"}),
+    ]
+    assert complete.metadata["input_tokens"] == metadata["input_tokens"] == 12
+    assert complete.metadata["output_tokens"] == metadata["output_tokens"] == 7
+    # Both paths send the same request
+    create_kwargs = client.client.messages.create.call_args.kwargs
+    stream_kwargs = client.client.messages.stream.call_args.kwargs
+    assert create_kwargs == stream_kwargs
+
+
+def test_openai_stream_result_matches_generate():
+    client = OpenAIDirectClient(model_name="local-model", cot_model=False)
+
+    def tool_call_delta(index, id=None, name=None, arguments=None):
+        return SimpleNamespace(
+            index=index,
+            id=id,
+            function=SimpleNamespace(name=name, arguments=arguments),
+        )
+
+    def chunk(content=None, tool_calls=None, usage=None, choices=True):
+        return SimpleNamespace(
+            usage=usage,
+            choices=[
+                SimpleNamespace(
+                    delta=SimpleNamespace(content=content, tool_calls=tool_calls)
+                )
+            ]
+            if choices
+            else [],
+        )
+
+    usage = SimpleNamespace(prompt_tokens=20, completion_tokens=4)
+    chunks = [
+        chunk(tool_calls=[tool_call_delta(0, id="call_1", name="bash", arguments="")]),
+        chunk(tool_calls=[tool_call_delta(0, arguments='{"command"')]),
+        chunk(tool_calls=[tool_call_delta(0, arguments=': "ls"}')]),
+        chunk(usage=usage, choices=False),
+    ]
+    completion = SimpleNamespace(
+        usage=usage,
+        choices=[
+            SimpleNamespace(
+                message=SimpleNamespace(
+                    content=None,
+                    tool_calls=[
+                        SimpleNamespace(
+                            id="call_1",
+                            function=SimpleNamespace(
+                                name="bash", arguments='{"command": "ls"}'
+                            ),
+                        )
+                    ],
+                )
+            )
+        ],
+    )
+
+    def create(**kwargs):
+        return iter(chunks) if kwargs.get("stream") else completion
+
+    client.client = Mock()
+    client.client.chat.completions.create.side_effect = create
+
+    response, metadata = client.generate(MESSAGES, max_tokens=100, tools=TOOLS)
+    events = list(client.generate_stream(MESSAGES, max_tokens=100, tools=TOOLS))
+
+    assert [e.delta for e in events if e.type == "tool_use"] == [
+        '{"command"',
+        ': "ls"}',
+    ]
+    assert events[-1].response == response
+    assert events[-1].metadata["input_tokens"] == metadata["input_tokens"] == 20
+
+
+def test_default_generate_stream_yields_single_complete_event():
+    client = Mock(spec=LLMClient)
+    client.generate.return_value = ([TextResult(text="done")], {"input_tokens": 1})
+
+    events = list(LLMClient.generate_stream(client, MESSAGES, max_tokens=10))
+
+    assert len(events) == 1
+    assert events[0].type == "complete"
+    assert events[0].response == [TextResult(text="done")]
@@ -0,0 +1,99 @@
+import base64
+
+import pytest
+
+from ii_agent.llm.token_counter import TokenCounter
+from ii_agent.llm.tokenizer import (
+    BPETokenizer,
+    HeuristicTokenizer,
+    Tokenizer,
+    get_default_tokenizer,
+)
+
+MERGES = [b"he", b"ll", b"hell", b"hello", b" w", b"or", b" wor", b" world"]
+
+
+@pytest.fixture
+def vocab_path(tmp_path):
+    tokens = [bytes([b]) for b in range(256)] + MERGES
+    path = tmp_path / "tiny.tiktoken"
+    path.write_bytes(
+        b"\n".join(
+            base64.b64encode(token) + b" " + str(rank).encode()
+            for rank, token in enumerate(tokens)
+        )
+    )
+    return str(path)
+
+
+class CountingTokenizer(Tokenizer):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text: str) -> int:
+        self.calls += 1
+        return len(text)
+
+
+def test_bpe_merges_known_words(vocab_path):
+    tokenizer = BPETokenizer(vocab_path)
+
+    assert tokenizer.count("hello world") == 2
+    # " there" only merges "he": " ", "t", "he", "r", "e"
+    assert tokenizer.count("hello there") == 1 + 5
+    assert tokenizer.count("") == 0
+
+
+def test_pure_python_bpe_matches_native_encoder(vocab_path):
+    native = BPETokenizer(vocab_path)
+    pure = BPETokenizer(vocab_path)
+    pure._encoding = None
+
+    for text in [
+        "hello world",
+        "def hello():\n    return 'world'",
+        "你好 world 123456",
+    ]:
+        assert pure.count(text) == native.count(text)
+
+
+def test_counts_are_memoized_by_content(vocab_path):
+    tokenizer = CountingTokenizer()
+    counter = TokenCounter(tokenizer=tokenizer, cache_size=2)
+
+    assert counter.count_tokens("abc") == 3
+    assert counter.count_tokens("abc") == 3
+    assert tokenizer.calls == 1
+
+    counter.count_tokens("de")
+    counter.count_tokens("fgh")  # evicts "abc"
+    counter.count_tokens("abc")
+    assert tokenizer.calls == 4
+
+
+def test_calibration_per_model():
+    calibrations = {"claude": 1.5, "claude-opus": 2.0}
+
+    sonnet = TokenCounter.for_model(
+        "claude-sonnet-4", calibrations, HeuristicTokenizer()
+    )
+    opus = TokenCounter.for_model("claude-opus-4", calibrations, HeuristicTokenizer())
+    other = TokenCounter.for_model("gemini-2.5-pro", calibrations, HeuristicTokenizer())
+
+    assert sonnet.count_tokens("x" * 300) == 150
+    assert opus.count_tokens("x" * 300) == 200
+    assert other.count_tokens("x" * 300) == 100
+    assert TokenCounter.calibrate([(100, 120), (300, 360)]) == pytest.approx(1.2)
+
+
+def test_default_tokenizer_falls_back_to_heuristic(monkeypatch, tmp_path, vocab_path):
+    monkeypatch.delenv("TOKENIZER_VOCAB_PATH", raising=False)
+    assert isinstance(get_default_tokenizer(), HeuristicTokenizer)
+
+    monkeypatch.setenv("TOKENIZER_VOCAB_PATH", str(tmp_path / "missing.tiktoken"))
+    assert isinstance(get_default_tokenizer(), HeuristicTokenizer)
+
+    monkeypatch.setenv("TOKENIZER_VOCAB_PATH", vocab_path)
+    assert isinstance(get_default_tokenizer(), BPETokenizer)
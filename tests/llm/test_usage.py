@@ -0,0 +1,158 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ii_agent.db.models import Base
+from ii_agent.llm.base import LLMClient, TextPrompt, TextResult
+from ii_agent.llm.usage import (
+    AGENT_CALLER,
+    SUMMARIZER_CALLER,
+    MeteredLLMClient,
+    UsageLedger,
+)
+
+pytest_plugins = ("pytest_asyncio",)
+
+MESSAGES = [[TextPrompt(text="hi")]]
+
+
+class UsageClient(LLMClient):
+    model_name = "claude-sonnet-4"
+
+    def __init__(self, input_tokens=100, output_tokens=20):
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+    def generate(self, messages, max_tokens, **kwargs):
+        return [TextResult(text="ok")], {
+            "raw_response": object(),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_creation_input_tokens": -1,
+            "cache_read_input_tokens": 80,
+        }
+
+
+@pytest.fixture
+def database():
+    """Point the table classes at a fresh in-memory database."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    with patch(
+        "ii_agent.db.manager.SessionLocal",
+        sessionmaker(bind=engine, expire_on_commit=False),
+    ):
+        yield
+
+
+def test_ledger_writes_in_batches():
+    batches = []
+    ledger = UsageLedger(sink=batches.append, batch_size=3)
+    client = MeteredLLMClient(UsageClient(), "session", AGENT_CALLER, ledger=ledger)
+
+    for _ in range(4):
+        client.generate(MESSAGES, max_tokens=10)
+
+    assert [len(batch) for batch in batches] == [3]
+    assert ledger.pending == 1
+    ledger.flush()
+    assert [record.turn for batch in batches for record in batch] == [1, 2, 3, 4]
+    record = batches[0][0]
+    assert (record.input_tokens, record.output_tokens) == (100, 20)
+    # Counts the provider does not report are stored as zero
+    assert (record.cache_creation_input_tokens, record.cache_read_input_tokens) == (
+        0,
+        80,
+    )
+    assert record.model_name == "claude-sonnet-4"
+
+
+def test_ledger_flushes_old_records():
+    now = [0.0]
+    batches = []
+    ledger = UsageLedger(sink=batches.append, flush_interval=5, clock=lambda: now[0])
+    client = MeteredLLMClient(UsageClient(), "session", AGENT_CALLER, ledger=ledger)
+
+    client.generate(MESSAGES, max_tokens=10)
+    now[0] = 6
+    client.generate(MESSAGES, max_tokens=10)
+
+    assert len(batches) == 1 and ledger.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_streamed_calls_are_recorded_on_completion():
+    ledger = UsageLedger(batch_size=100)
+    client = MeteredLLMClient(
+        UsageClient(), "session", SUMMARIZER_CALLER, ledger=ledger
+    )
+
+    events = [event async for event in client.agenerate_stream(MESSAGES, max_tokens=10)]
+
+    assert events[-1].type == "complete"
+    assert ledger.pending == 1
+    assert client.model_name == "claude-sonnet-4"
+
+
+def test_usage_endpoint_aggregates_by_caller(database):
+    from ii_agent.db.manager import Usage
+    from ii_agent.server.api import sessions_router
+
+    ledger = UsageLedger(sink=Usage.save_usage)
+    agent = MeteredLLMClient(UsageClient(), "s1", AGENT_CALLER, ledger=ledger)
+    summarizer = MeteredLLMClient(
+        UsageClient(input_tokens=5000, output_tokens=500),
+        "s1",
+        SUMMARIZER_CALLER,
+        ledger=ledger,
+    )
+    other_session = MeteredLLMClient(UsageClient(), "s2", AGENT_CALLER, ledger=ledger)
+    agent.generate(MESSAGES, max_tokens=10)
+    agent.generate(MESSAGES, max_tokens=10)
+    summarizer.generate(MESSAGES, max_tokens=10)
+    other_session.generate(MESSAGES, max_tokens=10)
+
+    app = FastAPI()
+    app.include_router(sessions_router)
+    with patch("ii_agent.server.api.sessions.get_usage_ledger", return_value=ledger):
+        response = TestClient(app).get("/api/sessions/s1/usage")
+
+    assert response.status_code == 200
+    usage = response.json()
+    assert usage["totals"]["calls"] == 3
+    assert usage["totals"]["input_tokens"] == 5200
+    assert usage["totals"]["cache_read_input_tokens"] == 240
+    by_caller = {row["caller"]: row for row in usage["by_caller"]}
+    assert by_caller["agent"]["calls"] == 2
+    assert by_caller["summarizer"]["output_tokens"] == 500
+    assert usage["by_model"][0]["model_name"] == "claude-sonnet-4"
+    assert usage["top_calls"][0]["caller"] == "summarizer"
+
+
+@pytest.mark.asyncio
+async def test_batches_due_on_the_event_loop_are_written_in_a_worker_thread():
+    loop_thread = threading.get_ident()
+    written = threading.Event()
+    threads = []
+
+    def sink(batch):
+        threads.append(threading.get_ident())
+        written.set()
+
+    ledger = UsageLedger(sink=sink, batch_size=1)
+    client = MeteredLLMClient(UsageClient(), "session", AGENT_CALLER, ledger=ledger)
+
+    await client.agenerate(MESSAGES, max_tokens=10)
+    assert await asyncio.to_thread(written.wait, 5)
+
+    assert threads and threads[0] != loop_thread
+    assert ledger.pending == 0
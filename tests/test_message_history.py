@@ -1,11 +1,18 @@
+import logging
+from unittest.mock import Mock
+
 import pytest
 from ii_agent.llm.base import (
+    AnthropicThinkingBlock,
     TextPrompt,
     TextResult,
     ToolCall,
+    ToolCallParameters,
     ToolFormattedResult,
 )
+from ii_agent.llm.context_manager.llm_summarizing import LLMSummarizingContextManager
 from ii_agent.llm.message_history import MessageHistory
+from ii_agent.llm.token_counter import TokenCounter
 
 
 @pytest.fixture
@@ -103,3 +110,132 @@ class TestToolCallIntegrity:
             [TextResult(text="Done")],
         ]
         assert result == expected
+
+
+class TestAddAssistantTurn:
+    def test_keeps_only_first_tool_call_by_default(self, message_history):
+        """Test that extra tool calls are dropped outside parallel mode."""
+        message_history.add_assistant_turn(
+            [
+                TextResult(text="Reading both files"),
+                ToolCall(tool_call_id="1", tool_name="view", tool_input={}),
+                ToolCall(tool_call_id="2", tool_name="view", tool_input={}),
+            ]
+        )
+        assert [
+            call.tool_call_id for call in message_history.get_pending_tool_calls()
+        ] == ["1"]
+
+    def test_keeps_all_tool_calls_in_parallel_mode(self, message_history):
+        """Test that every tool call is kept when parallel tool calls are enabled."""
+        message_history.add_assistant_turn(
+            [
+                ToolCall(tool_call_id="1", tool_name="view", tool_input={}),
+                ToolCall(tool_call_id="2", tool_name="view", tool_input={}),
+            ],
+            parallel_tool_calls=True,
+        )
+        assert [
+            call.tool_call_id for call in message_history.get_pending_tool_calls()
+        ] == ["1", "2"]
+
+
+class CountingTokenCounter(TokenCounter):
+    """Token counter that records how many strings it measured."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def count_tokens(self, prompt_chars):
+        self.calls += 1
+        return super().count_tokens(prompt_chars)
+
+
+class TestIncrementalTokenAccounting:
+    @pytest.fixture
+    def context_manager(self):
+        return LLMSummarizingContextManager(
+            client=Mock(),
+            token_counter=CountingTokenCounter(),
+            logger=Mock(spec=logging.Logger),
+            token_budget=1_000_000,
+            max_size=10_000,
+        )
+
+    def add_tool_turn(self, history: MessageHistory, i: int):
+        call = ToolCallParameters(
+            tool_call_id=f"call_{i}",
+            tool_name="bash",
+            tool_input={"command": f"ls {i}"},
+        )
+        history.add_assistant_turn(
+            [
+                TextResult(text=f"Listing directory {i}"),
+                ToolCall(call.tool_call_id, call.tool_name, call.tool_input),
+            ]
+        )
+        history.add_tool_call_result(call, "file.txt\n" * i)
+
+    def test_count_matches_full_recount(self, context_manager):
+        history = MessageHistory(context_manager)
+        history.add_user_prompt("Explore the repository")
+        for i in range(5):
+            self.add_tool_turn(history, i)
+        thinking = AnthropicThinkingBlock(
+            type="thinking", thinking="Let me think " * 20, signature="sig"
+        )
+        history.add_assistant_turn([thinking, TextResult(text="Done")])
+
+        messages = history.get_messages_for_llm()
+        assert history.count_tokens() == context_manager.count_tokens(messages)
+
+        # Thinking only counts while it is in the last turn
+        history.add_user_prompt("Thanks")
+        messages = history.get_messages_for_llm()
+        assert history.count_tokens() == context_manager.count_tokens(messages)
+
+        # The dangling tool call of the last kept turn is dropped too
+        history.set_message_list(messages[:4])
+        messages = history.get_messages_for_llm()
+        assert len(messages) == 4
+        assert history.count_tokens() == context_manager.count_tokens(messages)
+
+        history.clear_from_last_to_user_message()
+        history.clear()
+        assert history.count_tokens() == 0
+
+    def test_per_turn_cost_does_not_grow_with_history(self, context_manager):
+        history = MessageHistory(context_manager)
+        history.add_user_prompt("Explore the repository")
+        counter = context_manager.token_counter
+
+        calls_per_turn = []
+        for i in range(200):
+            before = counter.calls
+            self.add_tool_turn(history, i)
+            history.truncate()
+            history.count_tokens()
+            calls_per_turn.append(counter.calls - before)
+
+        # Only the three new blocks of each turn are measured
+        assert set(calls_per_turn) == {3}
+
+    def test_truncate_still_drops_dangling_tool_calls(self, context_manager):
+        history = MessageHistory(context_manager)
+        history.add_user_prompt("Run ls")
+        history.add_assistant_turn(
+            [ToolCall(tool_call_id="call_1", tool_name="bash", tool_input={})]
+        )
+        # The run was interrupted before the tool result was recorded
+        history.add_user_prompt("Try again")
+
+        history.truncate()
+
+        assert history.get_messages_for_llm() == [
+            [TextPrompt(text="Run ls")],
+            [TextPrompt(text="Try again")],
+        ]
+        assert history.count_tokens() == context_manager.count_tokens(
+            history.get_messages_for_llm()
+        )
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from ii_agent.tools.bash_job_tool import BashJobTool
+from ii_agent.tools.job_manager import BoundedLog
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+@pytest.mark.asyncio
+async def test_wait_for_a_server_and_kill_it(tmp_path):
+    tool = BashJobTool(workspace_root=tmp_path, require_confirmation=False)
+    command = "echo starting; sleep 0.3; echo 'Listening on 8000'; sleep 30 & wait"
+
+    output = await tool.run_async({"action": "start", "command": command})
+    assert output.startswith("Started job job-1")
+    assert "Its output is logged to .jobs/job-1.log" in output
+
+    start = time.monotonic()
+    output = await tool.run_async(
+        {
+            "action": "wait",
+            "job_id": "job-1",
+            "pattern": r"Listening on \d+",
+            "timeout": 10,
+        }
+    )
+    assert time.monotonic() - start < 5
+    assert output.startswith("Found 'Listening on 8000'. Job job-1 is running")
+
+    output = await tool.run_async({"action": "kill", "job_id": "job-1"})
+    assert "Job job-1 was killed" in output
+    # The sleep started by the job was killed along with it
+    job = tool.job_manager.get("job-1")
+    assert job.reader.done()
+    assert (
+        tmp_path / ".jobs" / "job-1.log"
+    ).read_text() == "starting\nListening on 8000\n"
+
+
+@pytest.mark.asyncio
+async def test_exit_code_and_tail_with_offsets(tmp_path):
+    tool = BashJobTool(workspace_root=tmp_path, require_confirmation=False)
+    await tool.run_async({"action": "start", "command": "seq 1 5; exit 3"})
+
+    output = await tool.run_async({"action": "wait", "job_id": "job-1", "timeout": 10})
+    assert output.startswith("Job job-1 exited with code 3")
+    assert tool.job_manager.get("job-1").exit_code == 3
+
+    output = await tool.run_async({"action": "tail", "job_id": "job-1", "offset": 4})
+    assert output == "3\n4\n5\n\n[Output bytes 4-10; continue with offset=10]"
+    output = await tool.run_async(
+        {"action": "wait", "job_id": "job-1", "pattern": "6", "timeout": 10}
+    )
+    assert output.startswith("The output did not match before the job ended")
+    output = await tool.run_async({"action": "status", "job_id": "job-2"})
+    assert output == "Error: No job with id job-2"
+
+
+def test_log_keeps_the_latest_output(tmp_path):
+    log = BoundedLog(tmp_path / "job.log", max_bytes=10)
+    log.write(b"12345678")
+    log.write(b"abcdefgh")
+
+    # Cut down to the last half once over the limit
+    assert (log.start_offset, log.end_offset) == (11, 16)
+    assert log.read(0, 100) == (b"defgh", 11)
+    assert log.read(13, 2) == (b"fg", 13)
+
+
+@pytest.mark.asyncio
+async def test_large_output_is_compacted_off_the_event_loop(tmp_path):
+    tool = BashJobTool(
+        workspace_root=tmp_path, max_log_bytes=1000, require_confirmation=False
+    )
+    with patch(
+        "ii_agent.tools.job_manager.asyncio.to_thread", wraps=asyncio.to_thread
+    ) as to_thread:
+        await tool.run_async({"action": "start", "command": "seq 1 2000"})
+        await tool.run_async({"action": "wait", "job_id": "job-1", "timeout": 10})
+
+    log = tool.job_manager.get("job-1").log
+    assert to_thread.called
+    assert log.end_offset == len("".join(f"{i}\n" for i in range(1, 2001)))
+    assert log.size <= 1000
+    data, start = log.read(0, 2000)
+    assert start == log.start_offset
+    assert data.endswith(b"1999\n2000\n")
+    assert not list(tmp_path.glob(".jobs/*.tmp"))
+
+
+@pytest.mark.asyncio
+async def test_close_kills_running_jobs(tmp_path):
+    tool = BashJobTool(workspace_root=tmp_path, require_confirmation=False)
+    await tool.run_async({"action": "start", "command": "sleep 30"})
+    job = tool.job_manager.get("job-1")
+
+    tool.close()
+    await asyncio.wait_for(job.reader, 5)
+
+    assert job.status == "killed"
+
+
+@pytest.mark.asyncio
+async def test_start_applies_the_rules_of_the_bash_tool(tmp_path, monkeypatch):
+    tool = BashJobTool(
+        workspace_root=tmp_path, additional_banned_command_strs=["rm -rf"]
+    )
+
+    output = await tool.run_async({"action": "start", "command": "git commit -m wip"})
+    assert output.startswith(
+        "Command not executed due to banned string in command: git commit"
+    )
+    output = await tool.run_async({"action": "start", "command": "rm -rf build"})
+    assert output.startswith(
+        "Command not executed due to banned string in command: rm -rf"
+    )
+
+    prompts = []
+    monkeypatch.setattr("builtins.input", lambda prompt: prompts.append(prompt) or "n")
+    output = await tool.run_async({"action": "start", "command": "sleep 30"})
+    assert output == "Command not executed due to lack of user confirmation."
+    assert prompts == ["Do you want to execute the command: sleep 30? (y/n): "]
+    assert tool.job_manager.jobs == {}
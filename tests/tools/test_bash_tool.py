@@ -4,12 +4,17 @@ This module contains tests for the core functionality of BashTool,
 including command execution, error handling, and integration with command filters.
 """
 
+import asyncio
+import os
+import time
+
 import pytest
 from pathlib import Path
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import ANY, patch, MagicMock
 
 
+from ii_agent.core.event import EventType
 from ii_agent.tools.base import ToolImplOutput
 from ii_agent.tools.bash_tool import (
     BashTool,
@@ -17,7 +22,11 @@ from ii_agent.tools.bash_tool import (
     DockerCommandFilter,
     start_persistent_shell,
     run_command,
+    run_command_async,
     create_bash_tool,
+    create_docker_bash_tool,
+    HeadTailBuffer,
+    ShellPool,
 )
 
 pytest_plugins = ('pytest_asyncio',)
@@ -37,7 +46,7 @@ async def test_successful_command():
         workspace_root=Path("/tmp"),
         require_confirmation=False,
     )
-    with patch("ii_agent.tools.bash_tool.run_command") as mock_run_command:
+    with patch("ii_agent.tools.bash_tool.run_command_async") as mock_run_command:
         # Mock a successful command execution
         mock_run_command.return_value = "Command output"
 
@@ -59,7 +68,7 @@ async def test_failed_command():
         workspace_root=Path("/tmp"),
         require_confirmation=False,
     )
-    with patch("ii_agent.tools.bash_tool.run_command") as mock_run_command:
+    with patch("ii_agent.tools.bash_tool.run_command_async") as mock_run_command:
         # Mock a failed command execution that raises an exception
         mock_run_command.side_effect = Exception("Command failed")
 
@@ -85,7 +94,7 @@ async def test_command_with_exception():
         workspace_root=Path("/tmp"),
         require_confirmation=False,
     )
-    with patch("ii_agent.tools.bash_tool.run_command") as mock_run_command:
+    with patch("ii_agent.tools.bash_tool.run_command_async") as mock_run_command:
         # Mock an exception during command execution
         mock_run_command.side_effect = Exception("Test exception")
 
@@ -190,10 +199,15 @@ class BashToolTest(unittest.IsolatedAsyncioTestCase):
             "ii_agent.tools.bash_tool.run_command",
             return_value="command output",
         )
+        self.run_command_async_patch = patch(
+            "ii_agent.tools.bash_tool.run_command_async",
+            return_value="command output",
+        )
 
         # Start patches
         self.mock_start_shell = self.start_shell_patch.start()
         self.mock_run_command = self.run_command_patch.start()
+        self.mock_run_command_async = self.run_command_async_patch.start()
 
         # Reset mocks for each test to avoid interference between tests
         self.mock_run_command.reset_mock()
@@ -202,6 +216,7 @@ class BashToolTest(unittest.IsolatedAsyncioTestCase):
         """Tear down test fixtures."""
         self.start_shell_patch.stop()
         self.run_command_patch.stop()
+        self.run_command_async_patch.stop()
 
     def test_init(self):
         """Test BashTool initialization."""
@@ -289,8 +304,8 @@ class BashToolTest(unittest.IsolatedAsyncioTestCase):
         mock_input.assert_called_once()
 
         # Check that command was executed
-        self.mock_run_command.assert_called_with(
-            self.mock_child, self.mock_prompt, "ls -l"
+        self.mock_run_command_async.assert_called_with(
+            self.mock_child, self.mock_prompt, "ls -l", on_output=ANY, output=ANY
         )
 
         # Check result
@@ -314,7 +329,7 @@ class BashToolTest(unittest.IsolatedAsyncioTestCase):
         mock_input.assert_called_once()
 
         # Check that command was NOT executed
-        self.mock_run_command.assert_not_called()
+        self.mock_run_command_async.assert_not_called()
 
         # Check result
         self.assertIsInstance(result, ToolImplOutput)
@@ -331,8 +346,8 @@ class BashToolTest(unittest.IsolatedAsyncioTestCase):
         result = await tool.run_impl({"command": "ls -l"})
 
         # Check that command was executed
-        self.mock_run_command.assert_called_with(
-            self.mock_child, self.mock_prompt, "ls -l"
+        self.mock_run_command_async.assert_called_with(
+            self.mock_child, self.mock_prompt, "ls -l", on_output=ANY, output=ANY
         )
 
         # Check result
@@ -356,8 +371,8 @@ class BashToolTest(unittest.IsolatedAsyncioTestCase):
         self.assertTrue(filter1.called)
 
         # Check that transformed command was executed
-        self.mock_run_command.assert_called_with(
-            self.mock_child, self.mock_prompt, "PREFIX: ls -l"
+        self.mock_run_command_async.assert_called_with(
+            self.mock_child, self.mock_prompt, "PREFIX: ls -l", on_output=ANY, output=ANY
         )
 
         # Check result includes both original and executed commands
@@ -366,8 +381,8 @@ class BashToolTest(unittest.IsolatedAsyncioTestCase):
 
     async def test_run_impl_error(self):
         """Test handling of command execution errors."""
-        # Make run_command raise an exception
-        self.mock_run_command.side_effect = Exception("Command failed")
+        # Make run_command_async raise an exception
+        self.mock_run_command_async.side_effect = Exception("Command failed")
 
         # No workspace root here or we get a real failure on a non-existent directory
         tool = BashTool(
@@ -408,6 +423,8 @@ class BashToolTest(unittest.IsolatedAsyncioTestCase):
                 require_confirmation=True,
                 command_filters=None,
                 additional_banned_command_strs=None,
+                message_queue=None,
+                shell_pool=None,
             )
 
 
@@ -485,6 +502,243 @@ async def test_command_with_timeout():
     assert output.auxiliary_data["success"]
 
 
+@pytest.mark.asyncio
+async def test_commands_do_not_block_the_event_loop():
+    """Test that other coroutines run while commands of several shells are running."""
+    tools = [BashTool(workspace_root=Path("/tmp"), require_confirmation=False) for _ in range(3)]
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    start = time.perf_counter()
+    outputs = await asyncio.gather(
+        *(tool.run_impl({"command": f"sleep 1 && echo done {i}"}) for i, tool in enumerate(tools))
+    )
+    elapsed = time.perf_counter() - start
+    ticker.cancel()
+
+    assert [output.tool_output for output in outputs] == ["done 0", "done 1", "done 2"]
+    # The shells ran concurrently and the loop kept ticking meanwhile
+    assert elapsed < 2
+    assert ticks > 50
+
+
+@pytest.mark.asyncio
+async def test_run_command_async_reads_large_and_split_output():
+    """Test that output is read completely and the prompt is found across reads."""
+    child, prompt = start_persistent_shell(timeout=10)
+
+    output = await run_command_async(
+        child, prompt, "seq 1 200000", output=HeadTailBuffer(head_bytes=2_000_000)
+    )
+    assert output.splitlines()[-1] == "200000"
+    assert len(output.splitlines()) == 200000
+    # The shell state carries over to sync and async commands alike
+    run_command(child, prompt, "export GREETING=hi")
+    assert await run_command_async(child, prompt, "echo $GREETING") == "hi"
+    child.close()
+
+
+def test_head_tail_buffer_keeps_both_ends():
+    """Test that the buffer keeps the start and the end of the output within its bounds."""
+    buffer = HeadTailBuffer(head_bytes=4, tail_bytes=6)
+    for chunk in [b"ab", b"cdef", b"ghijklmn", b"op"]:
+        buffer.append(chunk)
+
+    assert buffer.omitted_bytes == 6
+    assert buffer.getvalue() == "abcd\n... [6 bytes of output omitted] ...\nklmnop"
+
+
+@pytest.mark.asyncio
+async def test_output_is_streamed_while_the_command_runs():
+    """Test that output reaches the queue before the command ends and the result is bounded."""
+    queue = asyncio.Queue()
+    tool = BashTool(
+        workspace_root=Path("/tmp"),
+        require_confirmation=False,
+        message_queue=queue,
+        output_head_bytes=100,
+        output_tail_bytes=100,
+    )
+
+    run = asyncio.create_task(
+        tool.run_impl({"command": "echo started && sleep 1 && seq 1 100000"})
+    )
+    streamed = ""
+    while "started" not in streamed:
+        event = await asyncio.wait_for(queue.get(), timeout=5)
+        assert event.type == EventType.TOOL_OUTPUT_DELTA
+        assert event.content["command"] == "echo started && sleep 1 && seq 1 100000"
+        streamed += event.content["text"]
+    assert not run.done()
+    assert streamed.strip() == "started"
+
+    result = await run
+    assert result.tool_output.startswith("started\n1\n2\n")
+    assert result.tool_output.endswith("99999\n100000")
+    assert "bytes of output omitted" in result.tool_output
+    assert result.auxiliary_data["omitted_bytes"] > 500_000
+    events = [queue.get_nowait() for _ in range(queue.qsize())]
+    assert events[-1].content["text"].endswith("100000\n")
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for the shell pool"
+        time.sleep(0.05)
+
+
+@pytest.mark.asyncio
+async def test_tools_take_ready_shells_from_the_pool(tmp_path):
+    """Test that a pooled shell is handed out ready, in the workspace, and killed on close."""
+    pool = ShellPool(size=1, timeout=10)
+    pool.configure(1)
+    wait_for(lambda: pool.stats()["idle"] == 1)
+
+    start = time.perf_counter()
+    tool = BashTool(workspace_root=tmp_path, require_confirmation=False, shell_pool=pool)
+    assert time.perf_counter() - start < 1
+
+    result = await tool.run_impl({"command": "pwd"})
+    assert result.tool_output == str(tmp_path)
+    assert tool.child.timeout == 60
+    # The pool starts a replacement in the background
+    wait_for(lambda: pool.stats()["idle"] == 1)
+
+    child = tool.child
+    tool.close()
+    wait_for(lambda: not child.isalive())
+    pool.close()
+    assert pool.stats() == {
+        "hits": 1,
+        "misses": 0,
+        "spawned": 2,
+        "killed": 1,
+        "idle": 0,
+        "size": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_dead_pooled_shells_are_given_back_before_respawning(tmp_path):
+    """Test that a shell that died is released to the pool, not leaked."""
+    pool = ShellPool(size=0)
+    tool = BashTool(workspace_root=tmp_path, require_confirmation=False, shell_pool=pool)
+
+    # The shell exits while running a command, then dies between commands
+    assert (await tool.run_impl({"command": "exit"})).auxiliary_data["success"] is False
+    tool.child.close(force=True)
+    result = await tool.run_impl({"command": "pwd"})
+
+    assert result.tool_output == str(tmp_path)
+    assert pool.stats()["misses"] == 3
+    assert pool.stats()["killed"] == 2
+    tool.close()
+    pool.close()
+
+
+def test_empty_pool_starts_shells_on_demand(tmp_path):
+    """Test that a shell is started at once when none is ready."""
+    pool = ShellPool(size=0)
+
+    tool = BashTool(workspace_root=tmp_path, require_confirmation=False, shell_pool=pool)
+
+    assert run_command(tool.child, tool.custom_prompt, "pwd") == str(tmp_path)
+    assert pool.stats()["misses"] == 1
+    tool.close()
+    pool.close()
+
+
+FAKE_DOCKER = """#!/bin/sh
+# Runs "docker exec" commands on the host and logs every call
+echo "$@" >> "$FAKE_DOCKER_LOG"
+[ "$1" = exec ] || exit 1
+shift
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -i|-t) shift ;;
+        -u) shift 2 ;;
+        *) break ;;
+    esac
+done
+shift
+exec "$@"
+"""
+
+
+@pytest.fixture
+def fake_docker(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    docker = bin_dir / "docker"
+    docker.write_text(FAKE_DOCKER)
+    docker.chmod(0o755)
+    log = tmp_path / "docker.log"
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_DOCKER_LOG", str(log))
+    return lambda: log.read_text().splitlines() if log.exists() else []
+
+
+@pytest.mark.asyncio
+async def test_docker_commands_share_one_exec_session(fake_docker, tmp_path):
+    """Test that commands run in one long-lived exec session that keeps shell state."""
+    tool = create_docker_bash_tool(container="sandbox", ask_user_permission=False)
+
+    await tool.run_impl({"command": f"cd {tmp_path} && export GREETING=hi"})
+    result = await tool.run_impl({"command": "echo $GREETING && pwd"})
+
+    assert result.tool_output == f"hi\n{tmp_path}"
+    assert result.auxiliary_data["executed_command"] == "echo $GREETING && pwd"
+    assert fake_docker() == ["exec -i -t sandbox /bin/bash -l"]
+    tool.close()
+
+
+@pytest.mark.asyncio
+async def test_docker_session_is_a_login_shell(fake_docker):
+    """Test that the exec session loads the login profile, like one-off execs do."""
+    tool = create_docker_bash_tool(container="sandbox", ask_user_permission=False)
+
+    result = await tool.run_impl({"command": "shopt -q login_shell && echo login"})
+
+    assert result.tool_output == "login"
+    assert fake_docker() == ["exec -i -t sandbox /bin/bash -l"]
+    tool.close()
+
+
+@pytest.mark.asyncio
+async def test_docker_session_reconnects_after_it_dies(fake_docker):
+    """Test that a new exec session is started when the current one ends."""
+    tool = create_docker_bash_tool(
+        container="sandbox", user="agent", ask_user_permission=False
+    )
+
+    result = await tool.run_impl({"command": "exit"})
+    assert result.auxiliary_data["success"] is False
+    assert (await tool.run_impl({"command": "echo back"})).tool_output == "back"
+
+    tool.child.close(force=True)
+    assert (await tool.run_impl({"command": "echo again"})).tool_output == "again"
+    assert fake_docker() == ["exec -i -t -u agent sandbox /bin/bash -l"] * 3
+    tool.close()
+
+
+def test_docker_filter_wraps_each_command_without_a_session():
+    """Test that commands are wrapped in their own exec without a persistent session."""
+    docker_filter = DockerCommandFilter(container="sandbox")
+
+    assert docker_filter.get_shell_command() is None
+    assert (
+        docker_filter.filter_command('echo "hi"')
+        == 'docker exec sandbox /bin/bash -l -c "echo \\"hi\\""'
+    )
+
+
 # These will pass, but don't run in CI.
 @pytest.mark.xfail
 class TestWithRealContainer(unittest.IsolatedAsyncioTestCase):
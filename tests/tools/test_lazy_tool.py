@@ -0,0 +1,113 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ii_agent.llm.base import ToolCallParameters
+from ii_agent.tools import get_system_tools
+from ii_agent.tools.bash_tool import BashTool
+from ii_agent.tools.lazy_tool import LazyTool, LazyToolStats
+from ii_agent.tools.registry import ToolRegistry
+from ii_agent.tools.tool_manager import AgentToolManager
+from ii_agent.utils import WorkspaceManager
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+@pytest.fixture
+def shell():
+    with (
+        patch(
+            "ii_agent.tools.bash_tool.start_persistent_shell",
+            return_value=(MagicMock(), "PROMPT>>"),
+        ) as start_shell,
+        patch(
+            "ii_agent.tools.bash_tool.run_command_async", return_value="hello"
+        ) as run_command,
+    ):
+        yield start_shell, run_command
+
+
+@pytest.mark.asyncio
+async def test_shell_starts_on_the_first_bash_call(shell, tmp_path):
+    start_shell, _ = shell
+    stats = LazyToolStats()
+    bash = LazyTool(BashTool, lambda: BashTool(require_confirmation=False), stats=stats)
+    registry = ToolRegistry([bash])
+
+    # The schema is advertised without starting a shell
+    assert registry.tool_params[0].input_schema == BashTool.input_schema
+    start_shell.assert_not_called()
+
+    assert await bash.run_async({"command": "echo hello"}) == "hello"
+    assert await bash.run_async({"command": "echo hello"}) == "hello"
+
+    start_shell.assert_called_once()
+    assert isinstance(bash.tool, BashTool)
+    assert stats.stats()["bash"] == {
+        "created": 1,
+        "materialized": 1,
+        "calls": 2,
+        "startup_seconds": pytest.approx(0, abs=1),
+    }
+
+
+def test_system_tools_start_no_shell_or_browser(shell, tmp_path):
+    start_shell, _ = shell
+    with patch("ii_agent.tools.tool_manager.Browser") as browser_class:
+        tools = get_system_tools(
+            client=MagicMock(),
+            workspace_manager=WorkspaceManager(root=tmp_path),
+            message_queue=asyncio.Queue(),
+            tool_args={"browser": True},
+        )
+        start_shell.assert_not_called()
+        browser_class.assert_not_called()
+
+        registry = ToolRegistry(tools)
+        navigate = registry.get("browser_navigation").tool
+        click = registry.get("browser_click").tool
+
+    # Browser tools share the browser created by the first one used
+    browser_class.assert_called_once()
+    assert navigate.browser is click.browser
+    assert not registry.get("bash").materialized
+
+
+def test_planning_tool_calls_does_not_build_the_tool(shell):
+    start_shell, _ = shell
+    bash = LazyTool(BashTool, lambda: BashTool(require_confirmation=False))
+    tool_manager = AgentToolManager([bash], MagicMock())
+    calls = [
+        ToolCallParameters(
+            tool_call_id=str(i), tool_name="bash", tool_input={"command": "ls"}
+        )
+        for i in range(2)
+    ]
+
+    stages = tool_manager.plan_parallel_tool_calls(calls)
+
+    start_shell.assert_not_called()
+    # Unbuilt tools are treated as mutating, so the calls run one after another
+    assert [
+        [[c.tool_call_id for c in chain] for chain in stage] for stage in stages
+    ] == [
+        [["0"]],
+        [["1"]],
+    ]
+
+
+def test_bash_points_long_lived_commands_at_bash_job_when_offered(tmp_path):
+    def bash_description(**kwargs):
+        tools = get_system_tools(
+            client=MagicMock(),
+            workspace_manager=WorkspaceManager(root=tmp_path),
+            message_queue=asyncio.Queue(),
+            **kwargs,
+        )
+        return ToolRegistry(tools).get("bash").description
+
+    assert "with the `bash_job` tool" in bash_description()
+    assert "'sleep 10 &'" not in bash_description()
+    # Jobs are not offered with a container's shell
+    assert "'sleep 10 &'" in bash_description(container_id="sandbox")
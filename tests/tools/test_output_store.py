@@ -0,0 +1,123 @@
+import logging
+from unittest.mock import Mock
+
+import pytest
+
+from ii_agent.core.storage.local import LocalFileStore
+from ii_agent.llm.base import ToolCallParameters
+from ii_agent.tools.base import LLMTool, ToolImplOutput
+from ii_agent.tools.output_store import ToolOutputStore
+from ii_agent.tools.read_tool_output_tool import ReadToolOutputTool
+from ii_agent.tools.tool_manager import AgentToolManager
+
+pytest_plugins = ("pytest_asyncio",)
+
+LOG = "\n".join(
+    f"line {i}: {'ERROR disk full' if i % 100 == 0 else 'ok'}" for i in range(1, 3001)
+)
+
+
+class LogTool(LLMTool):
+    name = "build"
+    description = "Prints a long build log"
+    input_schema = {"type": "object", "properties": {}}
+
+    async def run_impl(self, tool_input, message_history=None) -> ToolImplOutput:
+        return ToolImplOutput(LOG, "Built")
+
+
+@pytest.fixture
+def output_store(tmp_path):
+    return ToolOutputStore(
+        LocalFileStore(str(tmp_path / ".tool_outputs")),
+        threshold_chars=10_000,
+        head_chars=500,
+        tail_chars=200,
+    )
+
+
+def test_long_outputs_are_replaced_by_a_preview(output_store, tmp_path):
+    preview = output_store.offload("build", LOG)
+
+    assert preview.startswith(LOG[:500])
+    assert preview.endswith(LOG[-200:])
+    assert len(preview) < 1_000
+    handle = preview.split('handle "')[1].split('"')[0]
+    assert output_store.get(handle) == LOG
+    assert (tmp_path / ".tool_outputs" / f"{handle}.txt").read_text() == LOG
+    # Content-addressed: the same output is stored once under the same handle
+    assert output_store.offload("build", LOG) == preview
+    assert len(list((tmp_path / ".tool_outputs").iterdir())) == 1
+
+
+def test_short_outputs_and_images_are_kept(output_store):
+    image = {
+        "type": "image",
+        "source": {"type": "base64", "media_type": "image/png", "data": "x" * 20_000},
+    }
+
+    assert output_store.offload("bash", "ok") == "ok"
+    offloaded = output_store.offload(
+        "browser_view", [{"type": "text", "text": LOG}, image]
+    )
+    assert offloaded[1] is image
+    assert "read_tool_output" in offloaded[0]["text"]
+
+
+@pytest.mark.asyncio
+async def test_read_tool_output_pages_greps_and_slices(output_store):
+    handle = output_store.put(LOG)
+    tool = ReadToolOutputTool(output_store)
+
+    page = await tool.run_async({"handle": handle, "page": 2})
+    assert page.startswith("Page 2 of 15\n201: line 201: ok")
+    assert page.endswith("400: line 400: ERROR disk full")
+
+    matches = await tool.run_async({"handle": handle, "pattern": "ERROR", "context": 1})
+    assert matches.splitlines()[:3] == [
+        "99: line 99: ok",
+        "100: line 100: ERROR disk full",
+        "101: line 101: ok",
+    ]
+    assert len(matches.splitlines()) == 30 * 3 - 1
+
+    lines = await tool.run_async(
+        {"handle": handle, "start_line": 2999, "end_line": 5000}
+    )
+    assert lines == "2999: line 2999: ok\n3000: line 3000: ERROR disk full"
+
+    chars = await tool.run_async({"handle": handle, "offset": 8, "length": 4})
+    assert chars == "ok\nl"
+
+    missing = await tool.run_async({"handle": "0123456789abcdef"})
+    assert missing == "No tool output stored under handle 0123456789abcdef"
+    assert (
+        await tool.run_async({"handle": "../secrets"})
+        == "No tool output stored under handle ../secrets"
+    )
+
+
+@pytest.mark.asyncio
+async def test_tool_manager_offloads_outputs(output_store):
+    tool_manager = AgentToolManager(
+        [LogTool()], Mock(spec=logging.Logger), output_store=output_store
+    )
+    assert "read_tool_output" in [tool.name for tool in tool_manager.get_tools()]
+
+    preview = await tool_manager.run_tool(
+        ToolCallParameters(tool_call_id="1", tool_name="build", tool_input={}), Mock()
+    )
+    handle = preview.split('handle "')[1].split('"')[0]
+    page = await tool_manager.run_tool(
+        ToolCallParameters(
+            tool_call_id="2",
+            tool_name="read_tool_output",
+            tool_input={"handle": handle, "offset": 0, "length": 20_000},
+        ),
+        Mock(),
+    )
+
+    assert len(preview) < 1_000
+    # Retrieved output is clipped to the threshold, never offloaded again
+    assert page.startswith(LOG[:9_000])
+    assert "clipped at 10000 chars" in page
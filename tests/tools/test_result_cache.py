@@ -0,0 +1,184 @@
+import asyncio
+from unittest.mock import patch
+
+import pymupdf
+import pytest
+
+from ii_agent.tools.base import LLMTool, ToolImplOutput
+from ii_agent.tools.pdf_tool import PdfTextExtractTool
+from ii_agent.tools.result_cache import ToolCachePolicy, ToolResultCache
+from ii_agent.utils import WorkspaceManager
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+class SearchTool(LLMTool):
+    name = "search"
+    description = "Searches"
+    cache_policy = ToolCachePolicy(ttl=60)
+    input_schema = {
+        "type": "object",
+        "properties": {"query": {"type": "string"}, "page": {"type": "integer"}},
+        "required": ["query"],
+    }
+
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    async def run_impl(self, tool_input, message_history=None) -> ToolImplOutput:
+        self.calls += 1
+        if self.fail:
+            return ToolImplOutput("Search failed", "failed", {"success": False})
+        return ToolImplOutput(
+            [{"title": tool_input["query"], "call": self.calls}],
+            "searched",
+            {"success": True},
+        )
+
+
+@pytest.fixture
+def cache():
+    now = [0.0]
+    cache = ToolResultCache(clock=lambda: now[0])
+    cache.now = now
+    with patch("ii_agent.tools.base.get_tool_result_cache", return_value=cache):
+        yield cache
+
+
+@pytest.mark.asyncio
+async def test_sessions_share_results_until_they_expire(cache):
+    first_session, second_session = SearchTool(), SearchTool()
+
+    output = await first_session.run_async({"query": "gaia", "page": 1})
+    # Key order and surrounding whitespace do not matter
+    assert await second_session.run_async({"page": 1, "query": " gaia "}) == output
+    assert second_session.calls == 0
+
+    cache.now[0] = 61
+    assert (await second_session.run_async({"query": "gaia", "page": 1}))[0][
+        "call"
+    ] == 1
+    assert second_session.calls == 1
+    assert cache.stats()["tools"]["search"] == {
+        "memory_hits": 1,
+        "disk_hits": 0,
+        "misses": 2,
+        "stores": 2,
+        "evictions": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_failures_and_invalid_inputs_are_not_cached(cache):
+    tool = SearchTool(fail=True)
+
+    await tool.run_async({"query": "gaia"})
+    await tool.run_async({"query": "gaia"})
+    assert (
+        await tool.run_async({"page": 1})
+        == "Invalid tool input: 'query' is a required property"
+    )
+
+    assert tool.calls == 2
+    assert cache.stats()["memory_entries"] == 0
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ToolResultCache(max_entries=2)
+    cache.put("search", "a", "x", ttl=60)
+    cache.put("search", "b", "y", ttl=60)
+    assert cache.get("search", "a") == "x"
+    cache.put("search", "c", "z", ttl=60)
+
+    assert cache.get("search", "b") is None
+    assert cache.get("search", "a") == "x"
+    assert cache.stats()["tools"]["search"]["evictions"] == 1
+
+
+def test_disk_tier_outlives_the_process_and_is_size_bounded(tmp_path):
+    db_path = tmp_path / "cache.db"
+    ticks = iter(range(100))
+
+    def clock():
+        return next(ticks)
+
+    cache = ToolResultCache(db_path=db_path, max_disk_bytes=20, clock=clock)
+    cache.put("search", "a", "x" * 8, ttl=60)
+    cache.put("search", "b", "y" * 8, ttl=60)
+
+    restarted = ToolResultCache(db_path=db_path, max_disk_bytes=20, clock=clock)
+    assert restarted.get("search", "a") == "x" * 8
+    # Each result takes 10 bytes, so storing a third evicts "b", used least recently
+    restarted.put("search", "c", "z" * 8, ttl=60)
+
+    assert ToolResultCache(db_path=db_path).get("search", "b") is None
+    assert restarted.get("search", "a") == "x" * 8
+    assert restarted.stats()["tools"]["search"] == {
+        "memory_hits": 1,
+        "disk_hits": 1,
+        "misses": 0,
+        "stores": 1,
+        "evictions": 1,
+    }
+
+
+def test_evictions_are_counted_against_the_evicted_tool(tmp_path):
+    ticks = iter(range(100))
+
+    def clock():
+        return next(ticks)
+
+    cache = ToolResultCache(
+        max_entries=1, db_path=tmp_path / "cache.db", max_disk_bytes=20, clock=clock
+    )
+    cache.put("search", "a", "x" * 8, ttl=60)
+    cache.put("search", "b", "y" * 8, ttl=60)
+    cache.put("visit", "c", "z" * 8, ttl=60)
+
+    stats = cache.stats()
+    # "a" and then "b" were pushed out of memory, and storing "c" pushed "a"
+    # off the disk
+    assert stats["tools"]["search"]["evictions"] == 3
+    assert stats["tools"]["visit"]["evictions"] == 0
+    assert stats["disk_bytes"] == 20
+
+
+@pytest.mark.asyncio
+async def test_tools_read_and_write_the_disk_tier_off_the_event_loop(tmp_path):
+    cache = ToolResultCache(db_path=tmp_path / "cache.db")
+    with (
+        patch("ii_agent.tools.base.get_tool_result_cache", return_value=cache),
+        patch(
+            "ii_agent.tools.result_cache.asyncio.to_thread", wraps=asyncio.to_thread
+        ) as to_thread,
+    ):
+        output = await SearchTool().run_async({"query": "gaia"})
+        # A new process only has the disk tier
+        restarted = ToolResultCache(db_path=tmp_path / "cache.db")
+        with patch("ii_agent.tools.base.get_tool_result_cache", return_value=restarted):
+            tool = SearchTool()
+            assert await tool.run_async({"query": "gaia"}) == output
+
+    assert tool.calls == 0
+    assert restarted.stats()["tools"]["search"]["disk_hits"] == 1
+    # A miss and a store in the first process, a hit in the second
+    assert to_thread.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_pdf_results_are_invalidated_when_the_file_changes(cache, tmp_path):
+    def write_pdf(text):
+        doc = pymupdf.open()
+        doc.new_page().insert_text((72, 72), text)
+        doc.save(tmp_path / "paper.pdf")
+        doc.close()
+
+    tool = PdfTextExtractTool(WorkspaceManager(root=tmp_path))
+    write_pdf("first draft")
+    assert "first draft" in await tool.run_async({"file_path": "paper.pdf"})
+    assert "first draft" in await tool.run_async({"file_path": "paper.pdf"})
+
+    write_pdf("final version")
+    assert "final version" in await tool.run_async({"file_path": "paper.pdf"})
+    assert cache.stats()["tools"]["pdf_text_extract"]["memory_hits"] == 1
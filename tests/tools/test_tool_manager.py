@@ -0,0 +1,202 @@
+import asyncio
+import logging
+from typing import Any, Optional
+from unittest.mock import Mock
+
+import pytest
+
+from ii_agent.llm.base import ToolCallParameters
+from ii_agent.llm.message_history import MessageHistory
+from ii_agent.tools.base import LLMTool, ToolImplOutput
+from ii_agent.tools.str_replace_tool_relative import StrReplaceEditorTool
+from ii_agent.tools.tool_manager import AgentToolManager
+from ii_agent.utils import WorkspaceManager
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+class RecordingTool(LLMTool):
+    """Tool that records when each call starts and finishes."""
+
+    description = "Records calls"
+    input_schema = {"type": "object", "properties": {}}
+
+    def __init__(self, name: str, log: list, read_only: bool = False):
+        self.name = name
+        self.read_only = read_only
+        self.log = log
+
+    def get_resource_key(self, tool_input: dict[str, Any]) -> Optional[str]:
+        return tool_input.get("path")
+
+    async def run_impl(self, tool_input, message_history=None) -> ToolImplOutput:
+        self.log.append(("start", tool_input["id"]))
+        await asyncio.sleep(0.05)
+        self.log.append(("end", tool_input["id"]))
+        return ToolImplOutput(f"result {tool_input['id']}", "done")
+
+
+def make_call(tool_name: str, call_id: str, **tool_input) -> ToolCallParameters:
+    return ToolCallParameters(
+        tool_call_id=call_id,
+        tool_name=tool_name,
+        tool_input={"id": call_id, **tool_input},
+    )
+
+
+@pytest.fixture
+def log():
+    return []
+
+
+@pytest.fixture
+def tool_manager(log):
+    tools = [
+        RecordingTool("search", log, read_only=True),
+        RecordingTool("edit", log),
+        RecordingTool("shell", log),
+    ]
+    return AgentToolManager(tools, Mock(spec=logging.Logger))
+
+
+def test_plan_groups_read_only_calls_into_one_stage(tool_manager):
+    calls = [
+        make_call("search", "1"),
+        make_call("search", "2"),
+        make_call("search", "3"),
+    ]
+
+    stages = tool_manager.plan_parallel_tool_calls(calls)
+
+    assert len(stages) == 1
+    assert [[c.tool_call_id for c in chain] for chain in stages[0]] == [
+        ["1"],
+        ["2"],
+        ["3"],
+    ]
+
+
+def test_plan_chains_calls_on_the_same_resource(tool_manager):
+    calls = [
+        make_call("edit", "1", path="a.py"),
+        make_call("edit", "2", path="b.py"),
+        make_call("edit", "3", path="a.py"),
+    ]
+
+    stages = tool_manager.plan_parallel_tool_calls(calls)
+
+    assert len(stages) == 1
+    chains = sorted([c.tool_call_id for c in chain] for chain in stages[0])
+    assert chains == [["1", "3"], ["2"]]
+
+
+def test_plan_keeps_unscoped_readers_apart_from_scoped_writes(tool_manager):
+    calls = [
+        make_call("search", "1"),
+        make_call("search", "2", path="a.py"),
+        make_call("edit", "3", path="b.py"),
+        make_call("edit", "4", path="a.py"),
+        make_call("search", "5"),
+    ]
+
+    stages = tool_manager.plan_parallel_tool_calls(calls)
+
+    # The unscoped search may read a.py or b.py while they are being edited
+    assert [
+        [[c.tool_call_id for c in chain] for chain in stage] for stage in stages
+    ] == [
+        [["1"], ["2"]],
+        [["3"], ["4"]],
+        [["5"]],
+    ]
+
+
+def test_plan_runs_unscoped_mutating_calls_alone(tool_manager):
+    calls = [
+        make_call("search", "1"),
+        make_call("shell", "2"),
+        make_call("search", "3"),
+    ]
+
+    stages = tool_manager.plan_parallel_tool_calls(calls)
+
+    assert [
+        [[c.tool_call_id for c in chain] for chain in stage] for stage in stages
+    ] == [
+        [["1"]],
+        [["2"]],
+        [["3"]],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_malformed_calls_are_reported_as_invalid_input(tmp_path):
+    editor = StrReplaceEditorTool(WorkspaceManager(root=tmp_path))
+    tool_manager = AgentToolManager([editor], Mock(spec=logging.Logger))
+    calls = [
+        ToolCallParameters(
+            tool_call_id="1", tool_name=editor.name, tool_input={"command": "view"}
+        )
+    ]
+
+    results = await tool_manager.run_tools_parallel(calls, MessageHistory(None))
+
+    assert results == ["Invalid tool input: 'path' is a required property"]
+
+
+@pytest.mark.asyncio
+async def test_inserts_with_malformed_lines_are_reported_as_invalid_input(tmp_path):
+    (tmp_path / "a.txt").write_text("one\ntwo\n")
+    editor = StrReplaceEditorTool(WorkspaceManager(root=tmp_path))
+    tool_manager = AgentToolManager([editor], Mock(spec=logging.Logger))
+    calls = [
+        ToolCallParameters(
+            tool_call_id=str(i),
+            tool_name=editor.name,
+            tool_input={
+                "command": "insert",
+                "path": "a.txt",
+                "insert_line": line,
+                "new_str": "new",
+            },
+        )
+        for i, line in enumerate(["1", 2])
+    ]
+
+    results = await tool_manager.run_tools_parallel(calls, MessageHistory(None))
+
+    assert results[0] == "Invalid tool input: '1' is not of type 'integer'"
+    assert "has been edited" in results[1]
+    assert (tmp_path / "a.txt").read_text() == "one\ntwo\nnew\n"
+
+
+@pytest.mark.asyncio
+async def test_run_tools_parallel_overlaps_independent_calls(tool_manager, log):
+    calls = [make_call("search", "1"), make_call("search", "2")]
+
+    results = await tool_manager.run_tools_parallel(calls, MessageHistory(None))
+
+    assert results == ["result 1", "result 2"]
+    # Both calls start before either of them finishes
+    assert [event for event, _ in log] == ["start", "start", "end", "end"]
+
+
+@pytest.mark.asyncio
+async def test_run_tools_parallel_serializes_conflicting_calls(tool_manager, log):
+    calls = [
+        make_call("edit", "1", path="a.py"),
+        make_call("edit", "2", path="a.py"),
+        make_call("shell", "3"),
+    ]
+
+    results = await tool_manager.run_tools_parallel(calls, MessageHistory(None))
+
+    assert results == ["result 1", "result 2", "result 3"]
+    assert log == [
+        ("start", "1"),
+        ("end", "1"),
+        ("start", "2"),
+        ("end", "2"),
+        ("start", "3"),
+        ("end", "3"),
+    ]
@@ -0,0 +1,101 @@
+import logging
+from unittest.mock import Mock, patch
+
+import jsonschema
+import pytest
+
+from ii_agent.llm.anthropic import AnthropicDirectClient
+from ii_agent.llm.base import TextPrompt
+from ii_agent.llm.openai import OpenAIDirectClient
+from ii_agent.tools.base import LLMTool, ToolImplOutput
+from ii_agent.tools.registry import ToolRegistry
+from ii_agent.tools.tool_manager import AgentToolManager
+
+pytest_plugins = ("pytest_asyncio",)
+
+MESSAGES = [[TextPrompt(text="hi")]]
+
+
+class EchoTool(LLMTool):
+    description = "Echoes its input"
+
+    def __init__(self, name: str):
+        self.name = name
+        self.input_schema = {
+            "type": "object",
+            "properties": {"text": {"type": "string"}, "count": {"type": "integer"}},
+            "required": ["text"],
+        }
+
+    async def run_impl(self, tool_input, message_history=None) -> ToolImplOutput:
+        return ToolImplOutput(tool_input["text"], "echoed")
+
+
+def test_registry_indexes_tools_by_name():
+    tools = [EchoTool("a"), EchoTool("b")]
+    registry = ToolRegistry(tools)
+
+    assert registry.get("b") is tools[1]
+    assert "a" in registry and len(registry) == 2
+    assert [param.name for param in registry.tool_params] == ["a", "b"]
+    with pytest.raises(ValueError, match="Tool with name c not found"):
+        registry.get("c")
+    with pytest.raises(ValueError, match="Tool a is duplicated"):
+        ToolRegistry([EchoTool("a"), EchoTool("a")])
+
+
+def test_tool_manager_returns_the_same_tool_params_every_turn():
+    tool_manager = AgentToolManager([EchoTool("echo")], Mock(spec=logging.Logger))
+
+    assert tool_manager.get_tool_params() is tool_manager.get_tool_params()
+    assert tool_manager.get_tool("echo").name == "echo"
+    assert (
+        tool_manager.get_tool(tool_manager.complete_tool.name)
+        is tool_manager.complete_tool
+    )
+
+
+@pytest.mark.asyncio
+async def test_input_validator_is_compiled_once():
+    tool = EchoTool("echo")
+    ToolRegistry([tool])
+
+    with patch.object(jsonschema.Draft202012Validator, "check_schema") as check_schema:
+        assert await tool.run_async({"text": "hi"}) == "hi"
+        output = await tool.run_async({"text": "hi", "count": "two"})
+
+    # The schema was checked when the registry was built
+    check_schema.assert_not_called()
+    # Errors match the ones jsonschema.validate reports
+    with pytest.raises(jsonschema.ValidationError) as expected:
+        jsonschema.validate({"text": "hi", "count": "two"}, tool.input_schema)
+    assert output == "Invalid tool input: " + expected.value.message
+
+
+def test_clients_convert_a_tool_list_once():
+    tool_params = ToolRegistry([EchoTool("a"), EchoTool("b")]).tool_params
+    anthropic_client = AnthropicDirectClient(model_name="claude-sonnet-4@20250514")
+    openai_client = OpenAIDirectClient(model_name="local-model")
+
+    first = anthropic_client._build_request_params(
+        MESSAGES, max_tokens=10, tools=tool_params
+    )
+    second = anthropic_client._build_request_params(
+        MESSAGES, max_tokens=10, tools=tool_params
+    )
+    openai_client._build_request_params(MESSAGES, max_tokens=10, tools=tool_params)
+    openai_tools = openai_client._build_request_params(
+        MESSAGES, max_tokens=10, tools=tool_params
+    )["tools"]
+
+    assert anthropic_client.tool_definitions.hits == 1
+    assert first["tools"][:-1] == second["tools"][:-1]
+    # The cache breakpoint is not written into the shared definitions
+    assert "cache_control" in second["tools"][-1]
+    assert (
+        "cache_control"
+        not in anthropic_client.tool_definitions.convert(tool_params, None)[-1]
+    )
+    assert openai_client.tool_definitions.hits == 1
+    assert openai_tools[0]["function"]["parameters"]["strict"] is True
+    assert "strict" not in tool_params[0].input_schema
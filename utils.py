@@ -1,10 +1,22 @@
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
 import uuid
 from pathlib import Path
+from ii_agent.llm.context_manager import CONTEXT_STRATEGIES
 from ii_agent.utils import WorkspaceManager
 from ii_agent.utils.constants import DEFAULT_MODEL
 
 
+def parse_token_calibration(value: str) -> tuple[str, float]:
+    """Parse a ``PREFIX=FACTOR`` token count calibration."""
+    prefix, _, factor = value.partition("=")
+    try:
+        if prefix:
+            return prefix, float(factor)
+    except ValueError:
+        pass
+    raise ArgumentTypeError(f"expected MODEL_PREFIX=FACTOR, got {value!r}")
+
+
 def parse_common_args(parser: ArgumentParser):
     parser.add_argument(
         "--workspace",
@@ -100,6 +112,112 @@ def parse_common_args(parser: ArgumentParser):
         default=False,
         help="Enable reviewer agent to analyze and improve outputs",
     )
+    parser.add_argument(
+        "--parallel-tool-calls",
+        action="store_true",
+        default=False,
+        help="Execute every tool call of a turn, running independent calls concurrently",
+    )
+    parser.add_argument(
+        "--offload-tool-outputs",
+        action="store_true",
+        default=False,
+        help="Store large tool outputs in the workspace and keep only a preview and a handle in the history",
+    )
+    parser.add_argument(
+        "--presummarize-threshold",
+        type=float,
+        default=None,
+        help="Start summarizing the history in the background once it reaches this fraction of the token budget (e.g. 0.8)",
+    )
+    parser.add_argument(
+        "--token-calibration",
+        type=parse_token_calibration,
+        nargs="+",
+        default=[],
+        metavar="MODEL_PREFIX=FACTOR",
+        help="Scale local token counts for models whose name starts with MODEL_PREFIX, e.g. claude=1.1; the longest matching prefix wins",
+    )
+    parser.add_argument(
+        "--context-strategy",
+        type=str,
+        default="summarize",
+        choices=CONTEXT_STRATEGIES,
+        help="How to shrink the history: summarize it with the LLM, mask old tool outputs without calling the LLM, or mask first and summarize only if still needed",
+    )
+    parser.add_argument(
+        "--summary-chunk-tokens",
+        type=int,
+        default=None,
+        help="Summarize forgotten events in chunks of at most this many tokens, then merge the chunk summaries",
+    )
+    parser.add_argument(
+        "--summary-fan-out",
+        type=int,
+        default=4,
+        help="Maximum number of chunks summarized concurrently",
+    )
+    parser.add_argument(
+        "--router-endpoints",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Regions to route LLM requests across by latency and health; 'direct' is the first-party API",
+    )
+    parser.add_argument(
+        "--hedge-requests",
+        action="store_true",
+        default=False,
+        help="With --router-endpoints, also send requests slower than the endpoint's p95 latency to a second endpoint",
+    )
+    parser.add_argument(
+        "--llm-rpm",
+        type=float,
+        default=None,
+        help="Requests per minute allowed for each LLM model, shared by all sessions",
+    )
+    parser.add_argument(
+        "--llm-input-tpm",
+        type=float,
+        default=None,
+        help="Input tokens per minute allowed for each LLM model, shared by all sessions",
+    )
+    parser.add_argument(
+        "--llm-output-tpm",
+        type=float,
+        default=None,
+        help="Output tokens per minute allowed for each LLM model, shared by all sessions",
+    )
+    parser.add_argument(
+        "--shell-pool-size",
+        type=int,
+        default=2,
+        help="Number of started shells kept ready for new sessions",
+    )
+    parser.add_argument(
+        "--tool-cache-path",
+        type=str,
+        default="~/.ii_agent/tool_results.db",
+        help="SQLite file keeping cached results of idempotent tools across restarts; empty to cache in memory only",
+    )
+    parser.add_argument(
+        "--record-cassette",
+        type=str,
+        default=None,
+        help="Record every LLM response of the run to this cassette file",
+    )
+    parser.add_argument(
+        "--replay-cassette",
+        type=str,
+        default=None,
+        help="Answer LLM requests from this cassette file instead of calling the provider",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=None,
+        help="Seconds to wait before each replayed response; a negative value replays the recorded latency",
+    )
     return parser
 
 